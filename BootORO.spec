@@ -1,5 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
-# Auto-generado por BootOroBuilder - 2026-02-19 21:14:04
+# Auto-generado por BootOroBuilder (onefile) - 2026-10-19 09:12:41
 
 block_cipher = None
 
@@ -28,7 +28,21 @@ a = Analysis(
     'tkinter',
     'tkinter.ttk',
     'tkinter.messagebox',
-    'tkinter.filedialog'
+    'tkinter.filedialog',
+    'playwright',
+    'playwright.sync_api',
+    'tkcalendar',
+    'modules.autorizar_anexo3.ui.panel',
+    'modules.autorizar_anexo3.ui.programacion_panel',
+    'modules.laboratorio.ui.laboratorio_panel',
+    'modules.laboratorio.ui.estadisticas_creados_panel',
+    'modules.laboratorio.ui.estadisticas_asistidos_panel',
+    'ui.saldo_panel',
+    'ui.empresas_panel',
+    'ui.procedimientos_panel',
+    'ui.resultados_panel',
+    'modules.autorizar_anexo3.services.automation_worker',
+    'modules.laboratorio.services.laboratorio_worker'
     ],
     hookspath=[],
     hooksconfig={},
@@ -50,6 +64,7 @@ a = Analysis(
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
+    
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
@@ -0,0 +1,132 @@
+"""
+Benchmark de arranque de Boot ORO.
+
+Mide:
+  1. Tiempo de imports al arrancar (python -X importtime) y qué librerías
+     pesadas se cargan antes de abrir la ventana.
+  2. Tiempo hasta la primera ventana dibujada, en desarrollo (python main.py)
+     y opcionalmente de uno o más ejecutables empaquetados (--exe).
+
+La app cierra sola apenas dibuja la ventana cuando recibe la variable de
+entorno BOOTORO_BENCHMARK_ARRANQUE=1 (ver MainWindow.run).
+
+Uso:
+    python benchmark_arranque.py
+    python benchmark_arranque.py --exe dist/BootORO.exe --repeticiones 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent
+
+# Librerías que NO deberían cargarse antes de abrir un panel/worker
+LIBRERIAS_PESADAS = ["playwright", "fitz", "pymupdf", "tkcalendar", "cryptography", "requests"]
+
+_LINEA_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# Reproduce lo que hace el arranque antes de la primera ventana (sin crear Tk):
+# importar la UI y registrar los paneles
+_CODIGO_ARRANQUE = (
+    "import sys; sys.path.insert(0, 'src'); "
+    "from ui.main_window import MainWindow; "
+    "w = MainWindow.__new__(MainWindow); w.panels_registry = {}; w._register_panels()"
+)
+
+
+def medir_importtime() -> dict:
+    """
+    Ejecuta `python -X importtime` con los imports del arranque.
+
+    Returns:
+        Dict con total_ms, top (lista de (cumulativo_ms, módulo)) y pesadas cargadas
+    """
+    codigo = _CODIGO_ARRANQUE
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=str(PROJECT_ROOT), capture_output=True, text=True
+    )
+    total_us = 0
+    top = []
+    cargados = set()
+    for linea in resultado.stderr.splitlines():
+        m = _LINEA_IMPORTTIME.match(linea)
+        if not m:
+            continue
+        propio, acumulado, sangria, nombre = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        total_us += propio
+        cargados.add(nombre.split(".")[0])
+        if len(sangria) <= 1:  # Import de primer nivel
+            top.append((acumulado / 1000, nombre))
+    top.sort(reverse=True)
+    return {
+        "total_ms": total_us / 1000,
+        "top": top[:10],
+        "pesadas": [lib for lib in LIBRERIAS_PESADAS if lib in cargados],
+        "error": resultado.stderr if resultado.returncode != 0 else "",
+    }
+
+
+def medir_arranque(comando: list, repeticiones: int = 3, timeout: int = 120) -> list:
+    """
+    Lanza la app N veces y mide el tiempo hasta que cierra tras dibujar la ventana.
+
+    Returns:
+        Lista de tiempos en segundos (la primera corrida es el arranque en frío)
+    """
+    entorno = dict(os.environ, BOOTORO_BENCHMARK_ARRANQUE="1")
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=str(PROJECT_ROOT), env=entorno, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def imprimir_tiempos(etiqueta: str, tiempos: list):
+    frio = tiempos[0]
+    tibio = statistics.median(tiempos[1:]) if len(tiempos) > 1 else frio
+    print(f"  {etiqueta:<40} frío: {frio:6.2f}s | tibio (mediana): {tibio:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de Boot ORO")
+    parser.add_argument("--exe", action="append", default=[], help="Ejecutable empaquetado a medir (repetible)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Corridas por objetivo (la 1ra es en frío)")
+    parser.add_argument("--sin-ventana", action="store_true", help="Solo medir imports (sin abrir la app)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  ⏱️  Benchmark de arranque - Boot ORO")
+    print("=" * 60)
+
+    print("\n📦 Imports de arranque (python -X importtime, UI + registro de paneles):")
+    info = medir_importtime()
+    if info["error"]:
+        print(f"  ❌ Error importando: {info['error'][-500:]}")
+    print(f"  Total: {info['total_ms']:.0f} ms")
+    for acumulado, nombre in info["top"]:
+        print(f"    {acumulado:8.1f} ms  {nombre}")
+    if info["pesadas"]:
+        print(f"  ⚠️ Librerías pesadas cargadas al arrancar: {', '.join(info['pesadas'])}")
+    else:
+        print("  ✅ Ninguna librería pesada se carga al arrancar")
+
+    if args.sin_ventana:
+        return
+
+    print("\n🪟 Tiempo hasta la primera ventana:")
+    imprimir_tiempos("python main.py", medir_arranque([sys.executable, "main.py"], args.repeticiones))
+    for exe in args.exe:
+        imprimir_tiempos(Path(exe).name, medir_arranque([str(Path(exe).resolve())], args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
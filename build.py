@@ -1,6 +1,15 @@
 """
 Builder para empaquetar Boot ORO como .exe con PyInstaller.
 
+Modos de build:
+  - onefile → dist/BootORO.exe (un solo archivo autocontenido, UPX, con
+              Chromium). Se descomprime en sys._MEIPASS en cada arranque.
+              Con --chromium-externo Chromium NO va dentro del .exe: se
+              distribuye en dist/browsers/chromium-XXXX.zip (hay que copiarlo
+              junto al .exe) y se extrae una sola vez (caché).
+  - onedir  → dist/BootORO/BootORO.exe + _internal/ (sin extracción en cada
+              arranque, bytecode optimizado, sin UPX).
+
 Empaqueta dentro del .exe:
   - endpoint.env       → configuración (no visible al usuario)
   - resources/keys/    → llave pública Ed25519 (protegida)
@@ -11,7 +20,15 @@ Datos de runtime (junto al .exe):
   - session_data/      → sesión y recargas usadas
   - screenshots/       → capturas de Playwright
   - temp/              → PDFs generados
+  - browsers/          → caché de Chromium extraído (--chromium-externo)
+
+Uso:
+    python build.py                          # onefile (por defecto)
+    python build.py --chromium-externo       # onefile con Chromium en zip aparte
+    python build.py --modo onedir
+    python build.py --modo ambos --benchmark # compara arranque frío/tibio
 """
+import argparse
 import os
 import shutil
 import subprocess
@@ -27,12 +44,34 @@ class BootOroBuilder:
     APP_NAME = "BootORO"
     # Icono (opcional, cambiar si se tiene un .ico)
     ICON_PATH = None
-
-    def __init__(self, project_root: str = None):
+    # Modos de empaquetado soportados
+    MODOS = ("onefile", "onedir")
+    # Nivel de optimización de bytecode en modo onedir (1 = -O, quita asserts)
+    OPTIMIZE_PYC = 1
+    def __init__(self, project_root: str = None, modo: str = "onefile", chromium_externo: bool = False):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de build inválido: {modo} (use {', '.join(self.MODOS)})")
+        self.modo = modo
+        # Solo onefile: Chromium como zip junto al .exe en lugar de dentro del .exe
+        self.chromium_externo = chromium_externo and modo == "onefile"
         self.project_root = Path(project_root or Path(__file__).parent)
         self.dist_dir = self.project_root / "dist"
-        self.build_dir = self.project_root / "build"
-        self.spec_file = self.project_root / f"{self.APP_NAME}.spec"
+        # Workpath separado por modo para poder construir ambos sin limpiar
+        self.build_dir = self.project_root / "build" / modo
+        sufijo = "" if modo == "onefile" else f"-{modo}"
+        self.spec_file = self.project_root / f"{self.APP_NAME}{sufijo}.spec"
+
+    @property
+    def exe_path(self) -> Path:
+        """Ruta del ejecutable generado según el modo."""
+        if self.modo == "onedir":
+            return self.dist_dir / self.APP_NAME / f"{self.APP_NAME}.exe"
+        return self.dist_dir / f"{self.APP_NAME}.exe"
+
+    @property
+    def runtime_dir(self) -> Path:
+        """Directorio junto al .exe donde la app escribe sus datos."""
+        return self.exe_path.parent
 
     # ──────────────────────────────────────────
     # Archivos empaquetados dentro del .exe
@@ -42,6 +81,7 @@ class BootOroBuilder:
         """
         Retorna lista de tuplas (origen, destino_en_exe) para --add-data.
         Estos archivos quedan DENTRO del .exe y se extraen en sys._MEIPASS.
+        Con --chromium-externo Chromium NO se incluye (ver _empaquetar_chromium_externo).
         """
         sep = ";"  # Windows
         items = []
@@ -66,8 +106,9 @@ class BootOroBuilder:
         if src_dir.exists():
             items.append((str(src_dir), "src"))
         
-        # Navegadores Playwright → playwright/browsers/
-        playwright_browsers = self._find_playwright_browsers()
+        # Navegadores Playwright → playwright/browsers/ (salvo --chromium-externo:
+        # en onefile se extraen ~300 MB en cada arranque)
+        playwright_browsers = [] if self.chromium_externo else self._find_playwright_browsers()
         if playwright_browsers:
             for browser_path in playwright_browsers:
                 browser_name = Path(browser_path).name  # Ej: chromium-1112
@@ -94,6 +135,22 @@ class BootOroBuilder:
             "tkinter.ttk",
             "tkinter.messagebox",
             "tkinter.filedialog",
+            # Dependencias que ahora se importan bajo demanda
+            "playwright",
+            "playwright.sync_api",
+            "tkcalendar",
+            # Paneles registrados por ruta en MainWindow.PANELES (import perezoso)
+            "modules.autorizar_anexo3.ui.panel",
+            "modules.autorizar_anexo3.ui.programacion_panel",
+            "modules.laboratorio.ui.laboratorio_panel",
+            "modules.laboratorio.ui.estadisticas_creados_panel",
+            "modules.laboratorio.ui.estadisticas_asistidos_panel",
+            "ui.saldo_panel",
+            "ui.empresas_panel",
+            "ui.procedimientos_panel",
+            "ui.resultados_panel",
+            "modules.autorizar_anexo3.services.automation_worker",
+            "modules.laboratorio.services.laboratorio_worker",
         ]
 
     # ──────────────────────────────────────────
@@ -136,8 +193,11 @@ class BootOroBuilder:
         # Icono
         icon_line = f"icon=r'{self.ICON_PATH}'," if self.ICON_PATH else ""
 
+        # Bytecode optimizado solo en onedir (requiere PyInstaller >= 6.0)
+        optimize_line = f"optimize={self.OPTIMIZE_PYC}," if self.modo == "onedir" else ""
+
         spec = f"""# -*- mode: python ; coding: utf-8 -*-
-# Auto-generado por BootOroBuilder - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+# Auto-generado por BootOroBuilder ({self.modo}) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 block_cipher = None
 
@@ -164,10 +224,47 @@ a = Analysis(
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
+    {optimize_line}
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+"""
+        if self.modo == "onedir":
+            # Sin UPX: los binarios grandes (python3*.dll, libcrypto, PyMuPDF,
+            # node.exe del driver de Playwright) se descomprimirían en memoria
+            # en cada carga y retrasarían el arranque
+            spec += f"""
+exe = EXE(
+    pyz,
+    a.scripts,
+    [('O', None, 'OPTION')],
+    exclude_binaries=True,
+    name='{self.APP_NAME}',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    {icon_line}
+)
 
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='{self.APP_NAME}',
+)
+"""
+        else:
+            spec += f"""
 exe = EXE(
     pyz,
     a.scripts,
@@ -217,6 +314,8 @@ exe = EXE(
         try:
             import PyInstaller
             print(f"  PyInstaller: {PyInstaller.__version__}")
+            if self.modo == "onedir" and int(PyInstaller.__version__.split(".")[0]) < 6:
+                errores.append("El modo onedir requiere PyInstaller >= 6.0 (optimize de bytecode)")
         except ImportError:
             errores.append("PyInstaller no está instalado. Ejecute: pip install pyinstaller")
 
@@ -247,14 +346,35 @@ exe = EXE(
     # Crear directorios de runtime
     # ──────────────────────────────────────────
     def crear_directorios_runtime(self):
-        """Crea los directorios de datos junto al .exe en dist/."""
-        exe_dir = self.dist_dir
+        """Crea los directorios de datos junto al .exe."""
+        exe_dir = self.runtime_dir
         dirs_runtime = ["logs", "session_data", "screenshots", "temp/anexos3"]
+        if self.chromium_externo:
+            dirs_runtime.append("browsers")
         for d in dirs_runtime:
             dr = exe_dir / d
             dr.mkdir(parents=True, exist_ok=True)
             print(f"  📁 {d}/")
-        print("  ✅ Directorios de runtime creados en dist/")
+        print(f"  ✅ Directorios de runtime creados en {exe_dir}")
+
+    def _empaquetar_chromium_externo(self):
+        """
+        --chromium-externo (onefile): deja Chromium como zip junto al .exe (dist/browsers/).
+        PlaywrightService lo extrae una sola vez en el primer uso y reutiliza
+        la carpeta extraída en los siguientes arranques.
+        """
+        browsers = self._find_playwright_browsers()
+        if not browsers:
+            print("  ⚠️ Sin Chromium de Playwright: el .exe usará Chrome/Edge del sistema")
+            return
+        destino_dir = self.runtime_dir / "browsers"
+        destino_dir.mkdir(parents=True, exist_ok=True)
+        origen = Path(browsers[0])
+        zip_base = destino_dir / origen.name
+        print(f"  🗜️ Comprimiendo {origen.name} → {zip_base}.zip ...")
+        shutil.make_archive(str(zip_base), "zip", root_dir=str(origen.parent), base_dir=origen.name)
+        size_mb = Path(f"{zip_base}.zip").stat().st_size / (1024 * 1024)
+        print(f"  ✅ Chromium externo listo ({size_mb:.1f} MB)")
     
     def _find_playwright_browsers(self) -> list:
         """
@@ -326,7 +446,7 @@ exe = EXE(
         5. Crear directorios de runtime
         """
         print("=" * 60)
-        print(f"  🔨 Boot ORO Builder - {self.APP_NAME}.exe")
+        print(f"  🔨 Boot ORO Builder - {self.APP_NAME}.exe ({self.modo})")
         print("=" * 60)
 
         # 1. Validar
@@ -371,15 +491,20 @@ exe = EXE(
         print("\n📁 Paso 5: Creando directorios de runtime...")
         self.crear_directorios_runtime()
 
+        # 6. Chromium fuera del .exe (solo con --chromium-externo)
+        if self.chromium_externo:
+            print("\n🌐 Paso 6: Empaquetando Chromium junto al .exe...")
+            self._empaquetar_chromium_externo()
+
         # Verificar resultado
-        exe_path = self.dist_dir / f"{self.APP_NAME}.exe"
+        exe_path = self.exe_path
         if exe_path.exists():
             size_mb = exe_path.stat().st_size / (1024 * 1024)
             print("\n" + "=" * 60)
             print(f"  ✅ BUILD EXITOSO")
             print(f"  📦 Ejecutable: {exe_path}")
             print(f"  📊 Tamaño: {size_mb:.1f} MB")
-            print(f"\n  📌 Para distribuir, copie toda la carpeta dist/")
+            print(f"\n  📌 Para distribuir, copie toda la carpeta {self.runtime_dir}")
             print(f"     (incluye el .exe y los directorios de datos)")
             print("=" * 60)
             return True
@@ -391,7 +516,42 @@ exe = EXE(
 # ──────────────────────────────────────────
 # Ejecución directa
 # ──────────────────────────────────────────
+def benchmark_builds(builders: list, repeticiones: int = 5):
+    """
+    Mide arranque en frío (1ra corrida) y tibio (mediana del resto) de cada
+    ejecutable construido, reutilizando benchmark_arranque.py.
+    """
+    from benchmark_arranque import medir_arranque, imprimir_tiempos
+
+    print("\n" + "=" * 60)
+    print("  ⏱️  Arranque hasta la primera ventana (frío / tibio)")
+    print("=" * 60)
+    for builder in builders:
+        if not builder.exe_path.exists():
+            print(f"  ⚠️ {builder.modo}: no existe {builder.exe_path}")
+            continue
+        tiempos = medir_arranque([str(builder.exe_path)], repeticiones)
+        imprimir_tiempos(f"{builder.modo} ({builder.exe_path.name})", tiempos)
+
+
 if __name__ == "__main__":
-    builder = BootOroBuilder()
-    success = builder.build()
+    parser = argparse.ArgumentParser(description="Builder de Boot ORO")
+    parser.add_argument("--modo", choices=BootOroBuilder.MODOS + ("ambos",), default="onefile",
+                        help="onefile (un .exe), onedir (carpeta) o ambos")
+    parser.add_argument("--chromium-externo", action="store_true",
+                        help="onefile: Chromium en dist/browsers/*.zip (extraído una vez) en vez de dentro del .exe")
+    parser.add_argument("--sin-limpiar", action="store_true", help="No borrar build/ y dist/ previos")
+    parser.add_argument("--benchmark", action="store_true", help="Medir arranque frío/tibio al terminar")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Corridas del benchmark (la 1ra es en frío)")
+    args = parser.parse_args()
+
+    modos = BootOroBuilder.MODOS if args.modo == "ambos" else (args.modo,)
+    builders = [BootOroBuilder(modo=modo, chromium_externo=args.chromium_externo) for modo in modos]
+    success = True
+    for i, builder in enumerate(builders):
+        # Solo limpiar antes del primer build para no borrar el anterior
+        success = builder.build(limpiar_previo=not args.sin_limpiar and i == 0) and success
+
+    if success and args.benchmark:
+        benchmark_builds(builders, args.repeticiones)
     sys.exit(0 if success else 1)
@@ -3,6 +3,7 @@ Clase de configuración singleton para gestionar las variables de entorno.
 Permite acceder a la configuración desde cualquier parte del proyecto.
 """
 import os
+import socket
 from pathlib import Path
 from typing import Optional
 from utils.paths import get_resource_path, get_data_path, get_runtime_path
@@ -75,6 +76,45 @@ class Config:
         """
         return os.environ.get(key, default)
     
+    @classmethod
+    def get_int(cls, key: str, default: int = 0) -> int:
+        """
+        Obtiene una variable de configuración numérica.
+        
+        Args:
+            key: Nombre de la variable
+            default: Valor si no existe o no es un entero válido
+        """
+        try:
+            return int(cls.get(key, str(default)).strip())
+        except ValueError:
+            return default
+    
+    @classmethod
+    def get_float(cls, key: str, default: float = 0.0) -> float:
+        """
+        Obtiene una variable de configuración decimal.
+        
+        Args:
+            key: Nombre de la variable
+            default: Valor si no existe o no es un número válido
+        """
+        try:
+            return float(cls.get(key, str(default)).strip())
+        except ValueError:
+            return default
+    
+    @classmethod
+    def get_list(cls, key: str, default: str = '') -> list:
+        """
+        Obtiene una variable de configuración separada por comas.
+        
+        Args:
+            key: Nombre de la variable
+            default: Valor por defecto (texto separado por comas)
+        """
+        return [v.strip() for v in cls.get(key, default).split(',') if v.strip()]
+    
     # ===================================
     # CONFIGURACIÓN DEL SERVIDOR
     # ===================================
@@ -209,6 +249,239 @@ class Config:
         """Ruta donde están los PDFs de órdenes médicas para laboratorio"""
         return self.get('LABORATORIO_PDF_PATH', 'C:\\boot\\temp\\laboratorio')
 
+    # ===================================
+    # WORKER - NAVEGADOR EN ESPERA
+    # ===================================
+    @property
+    def worker_modo_espera(self) -> str:
+        """
+        Qué hacer con el navegador cuando no hay órdenes:
+        'cerrar' (lo cierra tras 1 hora inactivo) o 'caliente' (lo mantiene
+        abierto, con sesión válida y el formulario cargado)
+        """
+        modo = self.get('WORKER_MODO_ESPERA', 'cerrar').strip().lower()
+        return modo if modo in ('cerrar', 'caliente') else 'cerrar'
+    
+    @property
+    def worker_precalentar_horas(self) -> list:
+        """Horas (hora, minuto) para precalentar el navegador, ej: WORKER_PRECALENTAR_HORAS=06:45,13:45"""
+        horas = []
+        for texto in self.get('WORKER_PRECALENTAR_HORAS', '').split(','):
+            texto = texto.strip()
+            if not texto:
+                continue
+            try:
+                hora, minuto = (int(parte) for parte in texto.split(':', 1))
+            except ValueError:
+                continue
+            if 0 <= hora < 24 and 0 <= minuto < 60:
+                horas.append((hora, minuto))
+        return horas
+    
+    @property
+    def worker_espera_memoria_max_mb(self) -> int:
+        """Memoria máxima (MB) de los procesos del navegador antes de reciclarlo (0 = sin límite)"""
+        return self.get_int('WORKER_ESPERA_MEMORIA_MAX_MB', 0)
+    
+    @property
+    def worker_espera_verificar_seg(self) -> int:
+        """Cada cuántos segundos se verifica el navegador en espera"""
+        return max(30, self.get_int('WORKER_ESPERA_VERIFICAR_SEG', 300))
+
+    # ===================================
+    # WORKER - REINTENTOS
+    # ===================================
+    @property
+    def worker_reintento_max_seg(self) -> int:
+        """Espera máxima (segundos) antes de reintentar una orden con error temporal"""
+        return max(30, self.get_int('WORKER_REINTENTO_MAX_SEG', 900))
+
+    # ===================================
+    # WORKER - LOTES POR PACIENTE
+    # ===================================
+    @property
+    def worker_lotes_paciente(self) -> bool:
+        """Radicar en una sola solicitud las órdenes seguidas del mismo paciente, fecha y orden médica"""
+        return self.get('WORKER_LOTES_PACIENTE', 'false').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    
+    @property
+    def worker_lote_max(self) -> int:
+        """Máximo de órdenes (CUPS) por solicitud en modo lote"""
+        return max(2, self.get_int('WORKER_LOTE_MAX', 5))
+
+    # ===================================
+    # WORKER - LEASES (varios workers por backend)
+    # ===================================
+    @property
+    def worker_id(self) -> str:
+        """Identificador de este worker ante la API (por defecto equipo-pid)"""
+        return self.get('WORKER_ID', '').strip() or f"{socket.gethostname()}-{os.getpid()}"
+    
+    @property
+    def worker_lease_seg(self) -> int:
+        """Duración (segundos) del lease de una orden reclamada; se renueva cada tercio"""
+        return max(60, self.get_int('WORKER_LEASE_SEG', 300))
+
+    # ===================================
+    # WORKER - ÓRDENES YA RADICADAS
+    # ===================================
+    @property
+    def worker_omitir_radicados(self) -> bool:
+        """
+        No abrir el formulario para órdenes cuyo servicio (documento, CUPS, fecha)
+        ya tiene radicado en el registro local: se cierran como completadas.
+        WORKER_OMITIR_RADICADOS=false fuerza el envío de nuevo.
+        """
+        return self.get('WORKER_OMITIR_RADICADOS', 'true').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+
+    # ===================================
+    # WORKER - EVIDENCIAS DE ERROR
+    # ===================================
+    @property
+    def evidencias_calidad_jpeg(self) -> int:
+        """Calidad (10-95) de las capturas JPEG de error"""
+        return min(95, max(10, self.get_int('EVIDENCIAS_CALIDAD_JPEG', 60)))
+    
+    @property
+    def evidencias_max_capturas(self) -> int:
+        """Máximo de capturas de error guardadas (0 = sin límite)"""
+        return max(0, self.get_int('EVIDENCIAS_MAX_CAPTURAS', 500))
+    
+    @property
+    def evidencias_max_mb(self) -> int:
+        """Tamaño máximo (MB) de la carpeta de evidencias (0 = sin límite)"""
+        return max(0, self.get_int('EVIDENCIAS_MAX_MB', 200))
+    
+    @property
+    def evidencias_max_dias(self) -> int:
+        """Días que se conservan las evidencias (0 = sin límite)"""
+        return max(0, self.get_int('EVIDENCIAS_MAX_DIAS', 30))
+    
+    @property
+    def evidencias_guardar_dom(self) -> bool:
+        """Guardar también el HTML de la página (gzip) junto a la captura"""
+        return self.get('EVIDENCIAS_GUARDAR_DOM', 'true').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+
+    # ===================================
+    # WORKER - TRAZAS DE PLAYWRIGHT
+    # ===================================
+    @property
+    def trazas_activas(self) -> bool:
+        """Grabar trazas de Playwright por caso (TRAZAS_ACTIVAS=true, desactivado por defecto)"""
+        return self.get('TRAZAS_ACTIVAS', 'false').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    
+    @property
+    def trazas_muestreo(self) -> float:
+        """Fracción de casos que se trazan (0.0-1.0); los demás no pagan el costo del tracing"""
+        return min(1.0, max(0.0, self.get_float('TRAZAS_MUESTREO', 1.0)))
+    
+    @property
+    def trazas_lento_seg(self) -> int:
+        """Un caso trazado que tarda al menos esto (segundos) guarda su traza aunque salga bien (0 = solo fallos)"""
+        return max(0, self.get_int('TRAZAS_LENTO_SEG', 120))
+    
+    @property
+    def trazas_capturas(self) -> bool:
+        """Incluir capturas de pantalla en la traza (lo más costoso; DOM y red siempre van)"""
+        return self.get('TRAZAS_CAPTURAS', 'true').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    
+    @property
+    def trazas_max(self) -> int:
+        """Máximo de trazas .zip que se conservan en screenshots/trazas"""
+        return max(1, self.get_int('TRAZAS_MAX', 20))
+
+    # ===================================
+    # WORKER - SALUD DEL PORTAL
+    # ===================================
+    @property
+    def portal_ventana_muestras(self) -> int:
+        """Tiempos de respuesta recientes que se consideran para el estado del portal"""
+        return max(4, self.get_int('PORTAL_VENTANA_MUESTRAS', 20))
+    
+    @property
+    def portal_umbral_lento(self) -> float:
+        """Múltiplo del tiempo normal a partir del cual el portal está LENTO (se escalan los timeouts)"""
+        return max(1.0, self.get_float('PORTAL_UMBRAL_LENTO', 1.5))
+    
+    @property
+    def portal_umbral_degradado(self) -> float:
+        """Múltiplo del tiempo normal a partir del cual el portal está DEGRADADO (se pausa la toma de órdenes)"""
+        return max(self.portal_umbral_lento, self.get_float('PORTAL_UMBRAL_DEGRADADO', 3.0))
+    
+    @property
+    def portal_timeout_factor_max(self) -> float:
+        """Tope del multiplicador de timeouts cuando el portal está lento"""
+        return max(1.0, self.get_float('PORTAL_TIMEOUT_FACTOR_MAX', 3.0))
+    
+    @property
+    def portal_pausa_degradado_seg(self) -> int:
+        """Segundos sin tomar órdenes cuando el portal está DEGRADADO (luego se prueba con una)"""
+        return max(10, self.get_int('PORTAL_PAUSA_DEGRADADO_SEG', 120))
+
+    # ===================================
+    # COLA DE TRABAJO
+    # ===================================
+    @property
+    def cola_politicas(self) -> list:
+        """
+        Políticas de orden de las pendientes, en prioridad:
+        primeros_intentos, antiguedad, agrupar_paciente (COLA_POLITICAS=antiguedad para solo FIFO)
+        """
+        return self.get_list('COLA_POLITICAS', 'primeros_intentos,antiguedad,agrupar_paciente')
+
+    # ===================================
+    # NAVEGADOR (PLAYWRIGHT)
+    # ===================================
+    @property
+    def navegador_headless(self) -> bool:
+        """Ejecutar el navegador de los workers sin ventana (NAVEGADOR_HEADLESS=true)"""
+        return self.get('NAVEGADOR_HEADLESS', 'false').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    
+    @property
+    def navegador_viewport(self) -> tuple:
+        """Tamaño (ancho, alto) de la página en modo headless, ej: NAVEGADOR_VIEWPORT=1366x768"""
+        try:
+            ancho, alto = (int(v) for v in self.get('NAVEGADOR_VIEWPORT', '1366x768').lower().split('x', 1))
+            return ancho, alto
+        except ValueError:
+            return 1366, 768
+    
+    @property
+    def navegador_user_agent(self) -> str:
+        """User agent del navegador (el headless de Chromium se delata como HeadlessChrome)"""
+        return self.get(
+            'NAVEGADOR_USER_AGENT',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+    
+    @property
+    def navegador_bloquear_recursos(self) -> bool:
+        """Activar el filtro de recursos del portal (NAVEGADOR_BLOQUEAR_RECURSOS=false para desactivarlo)"""
+        return self.get('NAVEGADOR_BLOQUEAR_RECURSOS', 'true').strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    
+    @property
+    def navegador_tipos_bloqueados(self) -> list:
+        """Tipos de recurso de Playwright a bloquear"""
+        return self.get_list('NAVEGADOR_TIPOS_BLOQUEADOS', 'image,media,font')
+    
+    @property
+    def navegador_dominios_bloqueados(self) -> list:
+        """Dominios de terceros a bloquear (analítica, publicidad, ...)"""
+        return self.get_list(
+            'NAVEGADOR_DOMINIOS_BLOQUEADOS',
+            'google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,facebook.com,hotjar.com,clarity.ms'
+        )
+    
+    @property
+    def navegador_recursos_permitidos(self) -> list:
+        """Fragmentos de URL que nunca se bloquean (reCAPTCHA del login)"""
+        return self.get_list('NAVEGADOR_RECURSOS_PERMITIDOS', 'recaptcha,gstatic.com')
+    
+    @property
+    def navegador_cache_recursos_mb(self) -> int:
+        """Memoria máxima (MB) para cachear JS/CSS versionados del portal (0 = sin caché)"""
+        return self.get_int('NAVEGADOR_CACHE_RECURSOS_MB', 64)
+
 
 # Crear una instancia global para facilitar el acceso
 config = Config()
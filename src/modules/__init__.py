@@ -2,6 +2,11 @@
 Módulos funcionales de la aplicación.
 Cada módulo representa un proceso/funcionalidad completa.
 """
-from .autorizar_anexo3 import AutorizarAnexo3Panel
+from utils.lazy import exportar_perezoso
 
 __all__ = ['AutorizarAnexo3Panel']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'AutorizarAnexo3Panel': 'modules.autorizar_anexo3.ui.panel'
+})
@@ -2,7 +2,12 @@
 Módulo de Autorización - Anexo 3
 Proceso completo para búsqueda y autorización de órdenes HC.
 """
-from .ui import AutorizarAnexo3Panel
-from .ui.programacion_panel import ProgramacionPanel
+from utils.lazy import exportar_perezoso
 
 __all__ = ['AutorizarAnexo3Panel', 'ProgramacionPanel']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'AutorizarAnexo3Panel': 'modules.autorizar_anexo3.ui.panel',
+    'ProgramacionPanel': 'modules.autorizar_anexo3.ui.programacion_panel'
+})
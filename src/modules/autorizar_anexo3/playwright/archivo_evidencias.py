@@ -0,0 +1,207 @@
+"""
+Archivo de evidencias de error del worker (capturas de pantalla y DOM).
+
+La captura se toma en el hilo del worker (la API sync de Playwright no es
+thread-safe) pero ya comprimida por el navegador (JPEG, solo el viewport) y
+sin escribir a disco: un hilo escritor guarda la imagen, el HTML de la página
+en gzip y la fila del índice (SQLite, por idItemOrden), y aplica la
+retención por cantidad, tamaño total y antigüedad. Así el worker no se
+detiene codificando PNG grandes y la carpeta no crece sin límite.
+"""
+import gzip
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.logger import AdvancedLogger
+from utils.paths import get_data_path
+
+
+class ArchivoEvidencias:
+    """Capturas de error comprimidas, indexadas por orden y con retención acotada"""
+
+    def __init__(
+        self,
+        directorio: Optional[Path] = None,
+        calidad_jpeg: int = 60,
+        max_capturas: int = 500,
+        max_mb: int = 200,
+        max_dias: int = 30,
+        guardar_dom: bool = True,
+        logger: Optional[AdvancedLogger] = None
+    ):
+        """
+        Args:
+            directorio: Carpeta de las evidencias (por defecto screenshots/)
+            calidad_jpeg: Calidad de la imagen (10-95)
+            max_capturas: Máximo de capturas guardadas (0 = sin límite)
+            max_mb: Tamaño máximo del archivo en MB (0 = sin límite)
+            max_dias: Antigüedad máxima en días (0 = sin límite)
+            guardar_dom: Guardar también el HTML de la página (gzip)
+            logger: Instancia del logger
+        """
+        self.directorio = Path(directorio) if directorio else get_data_path('screenshots')
+        self.calidad_jpeg = calidad_jpeg
+        self.max_capturas = max_capturas
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_dias = max_dias
+        self.guardar_dom = guardar_dom
+        self.logger = logger or AdvancedLogger()
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(
+            str(self.directorio / 'evidencias.db'), check_same_thread=False, isolation_level=None
+        )
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute(
+            'CREATE TABLE IF NOT EXISTS capturas ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' fecha TEXT NOT NULL,'
+            ' id_item TEXT NOT NULL,'
+            ' motivo TEXT NOT NULL DEFAULT \'\','
+            ' imagen TEXT NOT NULL,'
+            ' dom TEXT NOT NULL DEFAULT \'\','
+            ' bytes INTEGER NOT NULL DEFAULT 0)'
+        )
+        self._conexion.execute('CREATE INDEX IF NOT EXISTS idx_capturas_item ON capturas (id_item)')
+        self._conexion.execute('CREATE INDEX IF NOT EXISTS idx_capturas_fecha ON capturas (fecha)')
+
+        # Cola acotada: si el disco va lento se descartan capturas antes que frenar al worker
+        self._cola: queue.Queue = queue.Queue(maxsize=50)
+        self._hilo = threading.Thread(target=self._escribir, name='evidencias', daemon=True)
+        self._hilo.start()
+        self._cola.put_nowait(None)  # Retención inicial (incluye los PNG sueltos de versiones anteriores)
+
+    def capturar(self, page, id_item: Any, motivo: str = '') -> str:
+        """
+        Toma la evidencia de la página (hilo del worker) y la encola para guardarla.
+
+        Args:
+            page: Página de Playwright
+            id_item: idItemOrden del caso
+            motivo: Error o causa de la captura
+
+        Returns:
+            Ruta donde quedará la imagen ('' si no se pudo capturar)
+        """
+        try:
+            imagen = page.screenshot(type='jpeg', quality=self.calidad_jpeg, full_page=False)
+        except Exception as e:
+            self.logger.warning('Evidencias', f'⚠️ No se pudo capturar la pantalla de {id_item}: {e}')
+            return ''
+        dom = ''
+        if self.guardar_dom:
+            try:
+                dom = page.content()
+            except Exception:
+                dom = ''
+
+        ahora = datetime.now()
+        nombre = f"error_{id_item}_{ahora.strftime('%Y%m%d_%H%M%S_%f')}"
+        try:
+            self._cola.put_nowait({
+                'fecha': ahora.strftime('%Y-%m-%d %H:%M:%S'), 'id_item': str(id_item), 'motivo': motivo or '',
+                'nombre': nombre, 'imagen': imagen, 'dom': dom
+            })
+        except queue.Full:
+            self.logger.warning('Evidencias', f'⚠️ Cola de evidencias llena, se descarta la captura de {id_item}')
+            return ''
+        return str(self.directorio / f'{nombre}.jpg')
+
+    def capturas(self, id_item: Any) -> List[Dict[str, Any]]:
+        """Evidencias guardadas de una orden, de la más reciente a la más antigua"""
+        with self._lock:
+            cursor = self._conexion.execute(
+                'SELECT id, fecha, id_item, motivo, imagen, dom, bytes FROM capturas'
+                ' WHERE id_item = ? ORDER BY id DESC',
+                (str(id_item),)
+            )
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def detener(self, timeout: float = 10):
+        """Termina de escribir lo encolado y detiene el hilo escritor"""
+        try:
+            self._cola.put(False, timeout=timeout)
+        except queue.Full:
+            return
+        self._hilo.join(timeout)
+
+    # ==================== HILO ESCRITOR ====================
+
+    def _escribir(self):
+        """Guarda las capturas encoladas (None = solo retención, False = detener)"""
+        while True:
+            tarea = self._cola.get()
+            if tarea is False:
+                return
+            try:
+                if tarea:
+                    self._guardar(tarea)
+                self.aplicar_retencion()
+            except Exception as e:
+                self.logger.warning('Evidencias', f'⚠️ Error guardando evidencia: {e}')
+
+    def _guardar(self, tarea: Dict[str, Any]):
+        imagen = self.directorio / f"{tarea['nombre']}.jpg"
+        imagen.write_bytes(tarea['imagen'])
+        tamano = len(tarea['imagen'])
+        dom = ''
+        if tarea['dom']:
+            ruta_dom = self.directorio / f"{tarea['nombre']}.html.gz"
+            with gzip.open(ruta_dom, 'wt', encoding='utf-8') as f:
+                f.write(tarea['dom'])
+            dom = ruta_dom.name
+            tamano += ruta_dom.stat().st_size
+        with self._lock:
+            self._conexion.execute(
+                'INSERT INTO capturas (fecha, id_item, motivo, imagen, dom, bytes) VALUES (?, ?, ?, ?, ?, ?)',
+                (tarea['fecha'], tarea['id_item'], tarea['motivo'][:1000], imagen.name, dom, tamano)
+            )
+        self.logger.debug('Evidencias', f"📸 Evidencia de {tarea['id_item']} guardada: {imagen.name} ({tamano // 1024} KB)")
+
+    def aplicar_retencion(self):
+        """Borra las capturas más antiguas hasta cumplir antigüedad, cantidad y tamaño"""
+        with self._lock:
+            filas = self._conexion.execute('SELECT id, fecha, imagen, dom, bytes FROM capturas ORDER BY id').fetchall()
+        limite_fecha = (
+            (datetime.now() - timedelta(days=self.max_dias)).strftime('%Y-%m-%d %H:%M:%S') if self.max_dias else ''
+        )
+        total_bytes = sum(fila[4] for fila in filas)
+        restantes = len(filas)
+        borrar = []
+        for id_captura, fecha, imagen, dom, tamano in filas:
+            if not (
+                (limite_fecha and fecha < limite_fecha)
+                or (self.max_capturas and restantes > self.max_capturas)
+                or (self.max_bytes and total_bytes > self.max_bytes)
+            ):
+                break
+            borrar.append(id_captura)
+            for nombre in (imagen, dom):
+                if nombre:
+                    (self.directorio / nombre).unlink(missing_ok=True)
+            total_bytes -= tamano
+            restantes -= 1
+        if borrar:
+            with self._lock:
+                self._conexion.executemany('DELETE FROM capturas WHERE id = ?', [(i,) for i in borrar])
+            self.logger.debug('Evidencias', f'🧹 {len(borrar)} evidencias antiguas eliminadas')
+        self._limpiar_png_sueltos()
+
+    def _limpiar_png_sueltos(self):
+        """Capturas PNG de versiones anteriores (sin índice): solo se aplica la antigüedad"""
+        if not self.max_dias:
+            return
+        limite = time.time() - self.max_dias * 86400
+        for png in self.directorio.glob('*.png'):
+            try:
+                if png.stat().st_mtime < limite:
+                    png.unlink()
+            except OSError:
+                continue
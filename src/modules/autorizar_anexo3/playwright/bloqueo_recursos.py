@@ -0,0 +1,220 @@
+"""
+Filtro de recursos para las páginas del portal (context.route).
+
+Bloquea tipos de recurso y dominios de terceros que la automatización no
+usa (imágenes, fuentes, analítica, ...) y sirve desde memoria los recursos
+estáticos ya descargados (JS/CSS). Interceptar con route desactiva la caché
+HTTP de Chromium, así que sin esta caché cada reinicio() volvería a bajar
+los bundles del portal.
+
+Solo se cachean URLs versionadas por contenido (main.3f2a9c1b.js, ?v=...),
+que no cambian sin cambiar de URL, y se respeta Cache-Control: no-store y
+no-cache no se guardan, max-age limita la vigencia y al vencer se revalida
+con If-None-Match si el servidor dio ETag.
+
+reCAPTCHA siempre pasa (lista de permitidos), el login depende de él.
+"""
+import re
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.logger import AdvancedLogger
+
+
+class BloqueadorRecursos:
+    """Router de Playwright que bloquea/cachea recursos y lleva estadísticas"""
+
+    # Tipos que se pueden servir desde la caché en memoria
+    TIPOS_CACHEABLES = {'script', 'stylesheet', 'font', 'image'}
+    # Encabezados que no aplican a un cuerpo ya descomprimido
+    _ENCABEZADOS_DESCARTADOS = {'content-encoding', 'content-length', 'transfer-encoding'}
+    # Nombre de archivo con hash de contenido (main.3f2a9c1b.js, chunk-A1b2C3d4.css)
+    _RE_ARCHIVO_HASH = re.compile(r'[.\-_](?=[A-Za-z_-]*\d)[A-Za-z0-9_-]{8,}\.[a-z0-9]{2,5}$')
+    # Versión en la query (?v=..., ?hash=...)
+    _RE_QUERY_VERSION = re.compile(r'(?:^|&)(?:v|ver|version|hash)=[A-Za-z0-9._-]{6,}(?:&|$)')
+    _RE_MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)')
+
+    def __init__(
+        self,
+        logger: Optional[AdvancedLogger] = None,
+        tipos_bloqueados: Iterable[str] = (),
+        dominios_bloqueados: Iterable[str] = (),
+        permitidos: Iterable[str] = (),
+        cache_max_mb: int = 64
+    ):
+        """
+        Args:
+            logger: Instancia del logger
+            tipos_bloqueados: resource_type de Playwright a bloquear (image, font, media, ...)
+            dominios_bloqueados: Dominios de terceros a bloquear (incluye subdominios)
+            permitidos: Fragmentos de URL que nunca se bloquean ni cachean (recaptcha, ...)
+            cache_max_mb: Tamaño máximo de la caché en memoria (0 = sin caché)
+        """
+        self.logger = logger or AdvancedLogger()
+        self.tipos_bloqueados = {t.lower() for t in tipos_bloqueados}
+        self.dominios_bloqueados = [d.lower().lstrip('.') for d in dominios_bloqueados]
+        self.permitidos = [p.lower() for p in permitidos]
+        self.cache_max_bytes = max(0, cache_max_mb) * 1024 * 1024
+
+        # url -> (status, headers, body, vence) con vence en time.monotonic() (None = sin vencimiento)
+        self._cache: Dict[str, Tuple[int, Dict[str, str], bytes, Optional[float]]] = {}
+        self._cache_bytes = 0
+
+        self.estadisticas = self._estadisticas_vacias()
+        self.totales = self._estadisticas_vacias()
+
+    @staticmethod
+    def _estadisticas_vacias() -> dict:
+        return {
+            'bloqueadas': 0,
+            'bloqueadas_por_tipo': {},
+            'desde_cache': 0,
+            'bytes_cache': 0,
+        }
+
+    def instalar(self, context):
+        """
+        Registra el filtro en el contexto del navegador.
+
+        Args:
+            context: BrowserContext de Playwright
+        """
+        context.route('**/*', self._manejar)
+        tipos = ', '.join(sorted(self.tipos_bloqueados)) or '-'
+        self.logger.info(
+            'Playwright',
+            f'🚫 Filtro de recursos activo | tipos: {tipos} | dominios: {len(self.dominios_bloqueados)} | '
+            f'caché: {self.cache_max_bytes // (1024 * 1024)} MB'
+        )
+
+    def _es_permitido(self, url: str) -> bool:
+        url = url.lower()
+        return any(p in url for p in self.permitidos)
+
+    def _es_dominio_bloqueado(self, url: str) -> bool:
+        host = (urlparse(url).hostname or '').lower()
+        return any(host == d or host.endswith('.' + d) for d in self.dominios_bloqueados)
+
+    def _manejar(self, route):
+        """Handler de context.route (corre en el hilo dueño de la página)"""
+        request = route.request
+        url = request.url
+        tipo = request.resource_type
+
+        try:
+            if self._es_permitido(url):
+                route.continue_()
+                return
+
+            if tipo in self.tipos_bloqueados or self._es_dominio_bloqueado(url):
+                self._contar_bloqueo(tipo)
+                route.abort('blockedbyclient')
+                return
+
+            if request.method == 'GET' and tipo in self.TIPOS_CACHEABLES and self.cache_max_bytes:
+                try:
+                    self._servir_con_cache(route, url)
+                except Exception as e:
+                    # fetch() falló (red, timeout, TLS): que el navegador pida el recurso directo
+                    self.logger.debug('Playwright', f'Filtro de recursos: sin caché para {url}: {e}')
+                    route.continue_()
+                return
+
+            route.continue_()
+        except Exception as e:
+            # Página cerrada o ruta ya resuelta: nada que hacer
+            self.logger.debug('Playwright', f'Filtro de recursos: {e}')
+
+    @classmethod
+    def _es_versionada(cls, url: str) -> bool:
+        """True si la URL cambia cuando cambia el contenido (hash en el nombre o versión en la query)"""
+        partes = urlparse(url)
+        return bool(cls._RE_ARCHIVO_HASH.search(partes.path) or cls._RE_QUERY_VERSION.search(partes.query))
+
+    @classmethod
+    def _vigencia(cls, headers: Dict[str, str]) -> Tuple[bool, Optional[float]]:
+        """
+        Interpreta Cache-Control de la respuesta.
+
+        Returns:
+            (se_puede_guardar, segundos_de_vigencia) con None = sin max-age
+        """
+        cache_control = next((v for k, v in headers.items() if k.lower() == 'cache-control'), '').lower()
+        if 'no-store' in cache_control or 'no-cache' in cache_control:
+            return False, None
+        max_age = cls._RE_MAX_AGE.search(cache_control)
+        return True, (float(max_age.group(1)) if max_age else None)
+
+    def _servir_con_cache(self, route, url: str):
+        """Responde desde memoria (revalidando si venció) o descarga el recurso y lo guarda"""
+        en_cache = self._cache.get(url)
+        if en_cache and en_cache[3] is not None and time.monotonic() >= en_cache[3]:
+            # Vencida por max-age: solo se reutiliza si el servidor confirma el ETag (304)
+            self._descartar(url)
+            status, headers, body, _ = en_cache
+            etag = next((v for k, v in headers.items() if k.lower() == 'etag'), '')
+            en_cache = None
+            if etag:
+                respuesta = route.fetch(headers={**route.request.headers, 'if-none-match': etag})
+                if respuesta.status != 304:
+                    self._responder_y_guardar(route, url, respuesta)
+                    return
+                _, segundos = self._vigencia(respuesta.headers)
+                self._guardar(url, status, headers, body, segundos)
+                en_cache = self._cache.get(url)
+
+        if en_cache:
+            status, headers, body, _ = en_cache
+            route.fulfill(status=status, headers=headers, body=body)
+            for stats in (self.estadisticas, self.totales):
+                stats['desde_cache'] += 1
+                stats['bytes_cache'] += len(body)
+            return
+
+        self._responder_y_guardar(route, url, route.fetch())
+
+    def _responder_y_guardar(self, route, url: str, respuesta):
+        body = respuesta.body()
+        headers = {k: v for k, v in respuesta.headers.items() if k.lower() not in self._ENCABEZADOS_DESCARTADOS}
+        route.fulfill(status=respuesta.status, headers=headers, body=body)
+
+        guardable, segundos = self._vigencia(headers)
+        if respuesta.status == 200 and guardable and self._es_versionada(url):
+            self._guardar(url, respuesta.status, headers, body, segundos)
+
+    def _guardar(self, url: str, status: int, headers: Dict[str, str], body: bytes, segundos: Optional[float]):
+        if self._cache_bytes + len(body) > self.cache_max_bytes:
+            return
+        vence = time.monotonic() + segundos if segundos is not None else None
+        self._cache[url] = (status, headers, body, vence)
+        self._cache_bytes += len(body)
+
+    def _descartar(self, url: str):
+        en_cache = self._cache.pop(url, None)
+        if en_cache:
+            self._cache_bytes -= len(en_cache[2])
+
+    def _contar_bloqueo(self, tipo: str):
+        for stats in (self.estadisticas, self.totales):
+            stats['bloqueadas'] += 1
+            stats['bloqueadas_por_tipo'][tipo] = stats['bloqueadas_por_tipo'].get(tipo, 0) + 1
+
+    def tomar_estadisticas(self) -> dict:
+        """
+        Retorna las estadísticas desde la última llamada (por caso) y las reinicia.
+
+        Returns:
+            Dict con bloqueadas, bloqueadas_por_tipo, desde_cache y bytes_cache
+        """
+        stats, self.estadisticas = self.estadisticas, self._estadisticas_vacias()
+        return stats
+
+    @staticmethod
+    def resumen(stats: dict) -> str:
+        """Texto corto para el log"""
+        por_tipo = ', '.join(f'{t}: {n}' for t, n in sorted(stats['bloqueadas_por_tipo'].items()))
+        return (
+            f"{stats['bloqueadas']} bloqueadas ({por_tipo or '-'}) | "
+            f"{stats['desde_cache']} desde caché ({stats['bytes_cache'] / 1024:.0f} KB ahorrados)"
+        )
@@ -0,0 +1,142 @@
+"""
+Ejecución de un lote de órdenes del mismo paciente en un solo envío.
+
+Varias órdenes (idItemOrden) del mismo paciente, fecha, atención y orden
+médica se radican como una sola solicitud con varios CUPS: la búsqueda del
+documento, los datos de contacto, IPS, causa y diagnóstico se llenan una
+vez. El resultado se replica a cada idItemOrden cuyo CUPS quedó ingresado;
+los que no entraron al formulario se devuelven al worker como no enviados.
+"""
+import copy
+from typing import Any, Dict, List, Optional
+
+from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import EjecutarCasosPlaywright
+from modules.autorizar_anexo3.playwright.errores_caso import (
+    ElementoNoEncontradoError, ErrorCaso, OpcionNoEncontradaError, PdfGeneracionError
+)
+from services.ingreso_items_multiples import IngresoItemsMultiples
+
+
+class EjecutarCasosLote(EjecutarCasosPlaywright):
+    """Ejecutor de Anexo 3 que radica varios CUPS (uno por idItemOrden) en una solicitud"""
+
+    def __init__(self, page, logger, pause_callback=None):
+        super().__init__(page, logger, pause_callback)
+        self.ingreso_multiple = IngresoItemsMultiples(page, logger)
+        # [{'idItemOrden', 'cups'}] del lote actual, en el orden en que se ingresan
+        self.items_lote: List[Dict[str, Any]] = []
+        # Resultado por CUPS del último ingreso: [{'cups', 'ok', 'detalle', 'opcion_ausente'}]
+        self.resultados_cups: List[Dict[str, Any]] = []
+
+    def preparar_lote(self, items: List[Dict[str, Any]]):
+        """
+        Define las órdenes del siguiente inicio_casos().
+
+        Args:
+            items: Lista de {'idItemOrden': ..., 'cups': ...}
+        """
+        self.items_lote = list(items)
+        self.resultados_cups = []
+
+    def ids_enviados(self) -> List[Any]:
+        """
+        idItemOrden que forman parte de la solicitud: todos si aún no se
+        ingresaron servicios, o solo aquellos cuyo CUPS quedó ingresado.
+        """
+        if not self.resultados_cups:
+            return [item['idItemOrden'] for item in self.items_lote]
+        return [
+            item['idItemOrden']
+            for item, resultado in zip(self.items_lote, self.resultados_cups)
+            if resultado.get('ok')
+        ]
+
+    def error_no_enviado(self, id_item: Any) -> Optional[ErrorCaso]:
+        """
+        Error propio de una orden cuyo CUPS no entró a la solicitud: el mismo
+        que tendría sola (un CUPS ausente de la lista del portal no se reintenta).
+
+        Returns:
+            OpcionNoEncontradaError, ElementoNoEncontradoError o None si el CUPS entró
+        """
+        for item, resultado in zip(self.items_lote, self.resultados_cups):
+            if item['idItemOrden'] != id_item:
+                continue
+            if resultado.get('ok'):
+                return None
+            tipo = OpcionNoEncontradaError if resultado.get('opcion_ausente') else ElementoNoEncontradoError
+            mensaje = f"CUPS {item.get('cups', '')} no se pudo ingresar en el lote"
+            if resultado.get('detalle'):
+                mensaje += f": {resultado['detalle']}"
+            return tipo(mensaje)
+        return None
+
+    def _ids_caso(self, data) -> list:
+        """El diario registra la fase en cada orden enviada del lote"""
+        return self.ids_enviados()
+
+    def _cups_item(self, data, id_item) -> str:
+        """CUPS de cada orden del lote (para el índice de radicados)"""
+        for item in self.items_lote:
+            if item['idItemOrden'] == id_item:
+                return item['cups']
+        return ''
+
+    def _datos_por_item(self, data) -> list:
+        """Copia de data por cada idItemOrden enviado (para reportar a la API)"""
+        copias = []
+        for id_item in self.ids_enviados():
+            copia = copy.copy(data)
+            copia.idItemOrden = id_item
+            copias.append(copia)
+        return copias
+
+    def actualizar(self, data, estado: str, numero_autorizacion: str = ""):
+        """Reporta el mismo estadoCaso/número a cada orden enviada del lote"""
+        for copia in self._datos_por_item(data):
+            super().actualizar(copia, estado, numero_autorizacion)
+
+    def actualizar_con_resultado_ejecucion(self, data, estado: str, numero_autorizacion: str = "", resultado_ejecucion: str = ""):
+        """Igual que la clase padre, pero por cada orden enviada del lote"""
+        for copia in self._datos_por_item(data):
+            super().actualizar(copia, estado, numero_autorizacion)
+            if resultado_ejecucion:
+                self._actualizar_resultado_ejecucion(copia, resultado_ejecucion)
+
+    def _ingresar_servicios(self, data):
+        """Ingresa todos los CUPS del lote en el modal de servicios"""
+        cups_list = [item['cups'] for item in self.items_lote]
+        self.logger.info('EjecutarCaso', f"📦 Lote: ingresando {len(cups_list)} CUPS {cups_list}")
+
+        clic_Boton_servicios = self.page.wait_for_selector("//button[@aria-required='true'][contains(.,'Seleccionar Servicio')]", timeout=self._t(5000))
+        clic_Boton_servicios.click()
+        self.verificar_sesion_activa(data, "ANTES DE INGRESO DE ITEMS")
+
+        resultado = self.ingreso_multiple.ingresar_procedimientos(cups_list=cups_list, page=self.page)
+        self.resultados_cups = list(self.ingreso_multiple.resultados_cups)
+        if not resultado:
+            if self.resultados_cups and all(r.get('opcion_ausente') for r in self.resultados_cups):
+                raise OpcionNoEncontradaError(f"Ningún CUPS del lote {cups_list} está en la lista del portal")
+            raise ElementoNoEncontradoError(f"No se pudo ingresar ningún CUPS del lote {cups_list}")
+
+        fallidos = [r['cups'] for r in self.resultados_cups if not r['ok']]
+        if fallidos:
+            self.logger.warning('EjecutarCaso', f"⚠️ Lote parcial: CUPS no ingresados {fallidos} (sus órdenes se reintentarán aparte)")
+
+    def _obtener_archivo_pdf(self, data) -> str:
+        """
+        Anexo 3 de grupo: un solo PDF con los procedimientos enviados en la
+        solicitud (no los de toda la orden: el lote puede cubrir solo una parte
+        o haber dejado CUPS sin ingresar)
+        """
+        cups_enviados = [self._cups_item(data, id_item) for id_item in self.ids_enviados()]
+        self.logger.info('EjecutarCaso', f"📄 === GENERANDO ANEXO 3 (LOTE) - CUPS {cups_enviados} ===")
+        try:
+            return self.pdf_service.generar_anexo3_grupo(
+                id_atencion=data.idAtencion, id_orden=data.idOrden, cups=cups_enviados
+            )
+        except Exception as e:
+            error_msg = f"Error al generar PDF del Anexo 3 (lote): {e}"
+            self.logger.error('EjecutarCaso', f"❌ {error_msg}", e)
+            self.crear_archivo_error(data, "ERROR_GENERAR_PDF", error_msg, "")
+            raise PdfGeneracionError(error_msg, causa=e)
@@ -7,17 +7,76 @@ import time
 import os
 import datetime
 import re
+import json
 import requests
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeout
 from utils.logger import AdvancedLogger
 from modules.autorizar_anexo3.playwright.helpers_playwright import PlaywrightHelper
 from modules.autorizar_anexo3.playwright.ingreso_items_playwright import IngresoItemsPlaywright
 from modules.autorizar_anexo3.services.pdf_anexo3_service import PDFAnexo3Service
+from modules.autorizar_anexo3.playwright.errores_caso import (
+    ErrorCaso, DocumentoInvalidoError, PdfFaltanteError, PdfGeneracionError, RechazoPortalError,
+    IpsNoEncontradaError, SesionPerdidaError, ElementoNoEncontradoError, OpcionNoEncontradaError,
+    ResultadoIndeterminadoError, clasificar_error
+)
 from config.config import config  # Usar el singleton de config existente
+from services.registro_resultados import RegistroResultados, obtener_registro
+from utils.paths import get_data_path
 
 
-class SessionLostException(Exception):
+# Reinicio suave del formulario en una sola llamada: cierra SweetAlert2, marca
+# el input de documento actual y cambia de ruta en el cliente (Urgencias →
+# Ambulatoria) esperando a que React desmonte el formulario anterior.
+_JS_REINICIO_SUAVE = r"""
+async () => {
+    const menu = (texto) => document.evaluate(
+        "//span[contains(.,'Reportar')]/parent::div/following-sibling::ul/li/span[contains(.,'" + texto + "')]",
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    const esperar = (ms) => new Promise(r => setTimeout(r, ms));
+
+    const swal = document.querySelector('.swal2-container');
+    if (swal) {
+        const btn = swal.querySelector('.swal2-confirm');
+        if (btn) { btn.click(); }
+        else if (typeof Swal !== 'undefined' && Swal.close) { Swal.close(); }
+        else { swal.remove(); }
+    }
+    window.scrollTo(0, 0);
+
+    const viejo = document.querySelector("input[name*='numeroDocumento']");
+    if (viejo) { viejo.setAttribute('data-bootoro-viejo', '1'); }
+
+    const urgencias = menu('Urgencias');
+    if (!urgencias || !menu('Ambulatoria')) { return 'sin_menu'; }
+    urgencias.click();
+
+    const inicio = Date.now();
+    while (viejo && viejo.isConnected && Date.now() - inicio < 3000) { await esperar(50); }
+    await esperar(50);
+
+    const ambulatoria = menu('Ambulatoria');
+    if (!ambulatoria) { return 'sin_menu'; }
+    ambulatoria.click();
+    return 'ok';
+}
+"""
+
+# Centinela de formulario listo: input de documento nuevo (no marcado) y vacío,
+# tipo de identificación por defecto y, si se conoce, la URL del formulario
+_JS_FORMULARIO_LISTO = r"""
+(urlFormulario) => {
+    if (urlFormulario && location.href !== urlFormulario) { return false; }
+    const input = document.querySelector("input[name*='numeroDocumento']");
+    if (!input || input.hasAttribute('data-bootoro-viejo') || input.value) { return false; }
+    return [...document.querySelectorAll('.ant-select-selection-item')]
+        .some(e => e.textContent.includes('Adulto sin Identificación'));
+}
+"""
+
+
+class SessionLostException(SesionPerdidaError):
     """Excepción personalizada para cuando se pierde la sesión del navegador"""
     def __init__(self, message="La sesión del navegador se ha perdido"):
         self.message = message
@@ -34,22 +93,176 @@ class PausedException(Exception):
 class EjecutarCasosPlaywright:
     """Servicio para ejecutar casos completos de pacientes - USANDO XPATHS DE SELENIUM"""
     
-    def __init__(self, page: Page, logger: AdvancedLogger, pause_callback=None):
+    # Tiempo máximo para que el formulario quede listo tras el reinicio suave
+    TIMEOUT_REINICIO_SUAVE = 5000
+    # Módulo con el que se guardan los resultados (ver RegistroResultados)
+    MODULO_RESULTADOS = 'anexo3'
+    
+    def __init__(
+        self,
+        page: Page,
+        logger: AdvancedLogger,
+        pause_callback=None,
+        helper: Optional[PlaywrightHelper] = None,
+        ingreso_items: Optional[IngresoItemsPlaywright] = None,
+        pdf_service: Optional[PDFAnexo3Service] = None
+    ):
         """
+        El ejecutor está pensado para vivir mientras viva la página: el worker
+        lo crea una sola vez y lo reutiliza en todos los casos.
+        
         Args:
             page: Página de Playwright
             logger: Logger
             pause_callback: Función que retorna True si el worker está pausado
+            helper: PlaywrightHelper compartido (opcional, se crea si no se pasa)
+            ingreso_items: Servicio de ingreso de CUPS (opcional)
+            pdf_service: Servicio de PDF Anexo 3 (opcional, se crea al primer uso)
         """
         self.page = page
         self.logger = logger
-        self.helper = PlaywrightHelper(page)
-        self.ingreso_items = IngresoItemsPlaywright(page, logger)
-        self.pdf_service = PDFAnexo3Service(logger, config)
+        self.helper = helper or PlaywrightHelper(page)
+        self.ingreso_items = ingreso_items or IngresoItemsPlaywright(page, logger, helper=self.helper)
+        self._pdf_service = pdf_service
         self.modo_actual = config.get('MODE', 'REGULAR')  # CAPITATED o REGULAR
         self.pause_callback = pause_callback  # Callback para verificar pausa
+        
+        # Cache de elementos estables del formulario (form, botón guardar...)
+        # Se invalida en cada navegación del frame principal
+        self._cache_elementos: Dict[str, object] = {}
+        # Cache de la sesión: texto de opción -> scrollTop del virtual list donde apareció.
+        # Tipos de identificación, IPS y causas se repiten en cada caso.
+        self._offsets_opciones: Dict[str, int] = {}
+        # Memo de la selección ganadora por campo (candidato + variante de XPath),
+        # persistido en session_data para sobrevivir reinicios del navegador
+        self._memo_file = get_data_path("session_data/selecciones_ips.json")
+        self._memo_selecciones: Dict[str, dict] = self._cargar_memo_selecciones()
+        # URL del formulario de Ambulatoria (se toma al iniciar cada caso)
+        self._url_formulario: Optional[str] = None
+        # Error tipado del último caso fallido (estado + política de reintento para el worker)
+        self.ultimo_error: Optional[ErrorCaso] = None
+        # Diario de fases (DiarioCasos) que asigna el worker; None = sin diario
+        self.diario = None
+        # Salud del portal (SaludPortal) que asigna el worker: escala los timeouts
+        # y recibe los tiempos de respuesta; None = timeouts fijos
+        self.salud = None
+        try:
+            self.page.on('framenavigated', self._on_navegacion)
+        except Exception as e:
+            self.logger.debug('EjecutarCaso', f"No se pudo registrar listener de navegación: {e}")
         print(f"Modo actual de operación: {self.modo_actual}")
     
+    @property
+    def pdf_service(self) -> PDFAnexo3Service:
+        """Servicio de PDF creado bajo demanda (Laboratorio nunca lo usa)"""
+        if self._pdf_service is None:
+            self._pdf_service = PDFAnexo3Service(self.logger, config)
+        return self._pdf_service
+    
+    # ============ CACHE DE ELEMENTOS ============
+    
+    def _on_navegacion(self, frame):
+        """Invalida el cache cuando navega el frame principal"""
+        try:
+            if frame == self.page.main_frame:
+                self.invalidar_cache()
+        except Exception:
+            self.invalidar_cache()
+    
+    def invalidar_cache(self):
+        """Descarta todos los elementos cacheados"""
+        self._cache_elementos.clear()
+    
+    def _elemento_cacheado(self, clave: str, selectores: list, timeout: int = 5000):
+        """
+        Retorna un elemento estable del formulario reutilizando el handle cacheado
+        mientras siga conectado al DOM. Si no hay cache, prueba los selectores en orden.
+        
+        Args:
+            clave: Nombre del elemento en el cache (ej: 'boton_guardar')
+            selectores: Selectores a probar en orden si no hay cache
+            timeout: Timeout por selector en milisegundos
+        
+        Returns:
+            ElementHandle o None si ningún selector encontró el elemento
+        """
+        elemento = self._cache_elementos.get(clave)
+        if elemento is not None:
+            try:
+                if elemento.evaluate("el => el.isConnected"):
+                    return elemento
+            except Exception:
+                pass
+            self._cache_elementos.pop(clave, None)
+        
+        for selector in selectores:
+            try:
+                elemento = self.page.wait_for_selector(selector, timeout=self._t(timeout))
+                if elemento:
+                    self._cache_elementos[clave] = elemento
+                    return elemento
+            except Exception:
+                continue
+        return None
+    
+    # ============ MEMO DE SELECCIONES (IPS / SEDE) ============
+    
+    @staticmethod
+    def _firma_config_ips() -> str:
+        """Firma de la configuración de IPS: si cambia, el memo deja de ser válido"""
+        return "|".join([
+            (config.nit_ips or "").strip(),
+            (config.nombre_ips or "").strip(),
+            (config.sede_ips or "").strip(),
+            (config.sede_ips_nombre or "").strip(),
+        ])
+    
+    def _cargar_memo_selecciones(self) -> Dict[str, dict]:
+        """Carga el memo persistido si corresponde a la configuración actual"""
+        try:
+            if self._memo_file.exists():
+                datos = json.loads(self._memo_file.read_text(encoding='utf-8'))
+                if datos.get('firma') == self._firma_config_ips():
+                    return datos.get('campos', {})
+        except Exception as e:
+            self.logger.debug('EjecutarCaso', f"No se pudo leer memo de selecciones: {e}")
+        return {}
+    
+    def _guardar_memo_selecciones(self):
+        """Persiste el memo en session_data"""
+        try:
+            self._memo_file.parent.mkdir(parents=True, exist_ok=True)
+            self._memo_file.write_text(
+                json.dumps({'firma': self._firma_config_ips(), 'campos': self._memo_selecciones},
+                           ensure_ascii=False, indent=2),
+                encoding='utf-8'
+            )
+        except Exception as e:
+            self.logger.debug('EjecutarCaso', f"No se pudo guardar memo de selecciones: {e}")
+    
+    def _memo_priorizar(self, campo: str, candidatos: List[str]) -> List[str]:
+        """Pone primero el candidato que ganó la última vez para el campo"""
+        ganador = self._memo_selecciones.get(campo, {}).get('candidato')
+        if ganador in candidatos:
+            return [ganador] + [c for c in candidatos if c != ganador]
+        return list(candidatos)
+    
+    def _memo_priorizar_variantes(self, campo: str, variantes: List[str]) -> List[tuple]:
+        """Retorna (índice, variante) con la variante ganadora primero"""
+        indexadas = list(enumerate(variantes))
+        ganadora = self._memo_selecciones.get(campo, {}).get('variante')
+        if isinstance(ganadora, int) and 0 <= ganadora < len(variantes):
+            indexadas.insert(0, indexadas.pop(ganadora))
+        return indexadas
+    
+    def _memo_registrar(self, campo: str, candidato: str, variante: int = 0):
+        """Recuerda la selección ganadora; solo escribe a disco si cambió"""
+        nuevo = {'candidato': candidato, 'variante': variante}
+        if self._memo_selecciones.get(campo) != nuevo:
+            self._memo_selecciones[campo] = nuevo
+            self._guardar_memo_selecciones()
+            self.logger.debug('EjecutarCaso', f"Memo {campo}: '{candidato}' (variante {variante})")
+    
     def _verificar_pausa(self):
         """Verifica si el worker está pausado y lanza excepción si es así"""
         if self.pause_callback and self.pause_callback():
@@ -61,13 +274,13 @@ class EjecutarCasosPlaywright:
         MÉTODO PRINCIPAL - Migrado de Selenium
         Ejecuta el caso completo de un paciente.
         """
-        telefono_value = None
-        telefono_value1 = None
         texto = None
+        self.ultimo_error = None
         
         try:
             self._verificar_pausa()  # Verificar pausa al inicio
             self.verificar_sesion_activa(data, "Error: Sesión del navegador no está activa al inicio del proceso de casos")
+            self._url_formulario = self.page.url  # Referencia para el centinela de reinicio()
             
             self.logger.info('EjecutarCaso', f"tipoIdentificacion: {data.tipoIdentificacion}")
             print(data.tipoIdentificacion)
@@ -79,12 +292,11 @@ class EjecutarCasosPlaywright:
                 dynamic_xpath = f"//div[@class='ant-select-item-option-content'][contains(.,'{data.tipoIdentificacion}')]"
                 combo_tipo_identidad = self.esperar_y_clickear(dynamic_xpath)
                 if not combo_tipo_identidad:
-                    for i in range(4):
-                        self.verificar_sesion_activa(data, "DURANTE SCROLL DE IDENTIFICACIÓN")
-                        self.scroll_list_to(100 * (i + 1))
-                        combo_tipo_identidad = self.esperar_y_clickear(dynamic_xpath)
-                        if combo_tipo_identidad:
-                            break
+                    self.verificar_sesion_activa(data, "DURANTE SCROLL DE IDENTIFICACIÓN")
+                    option = self.scroll_list_and_find_option(data.tipoIdentificacion, exacto=False)
+                    if option:
+                        self.click_option(option)
+                        combo_tipo_identidad = option
                 if combo_tipo_identidad:
                     self.logger.info('EjecutarCaso', f"Clicked on combo tipo identidad dinámico: {data.tipoIdentificacion}")
                 else:
@@ -92,7 +304,7 @@ class EjecutarCasosPlaywright:
             else:
                 # Para otros tipos: abrir combo y buscar directo con scroll (como Selenium)
                 self.comboIdentidad()
-                self.page.wait_for_selector('.rc-virtual-list-holder', timeout=5000)
+                self.page.wait_for_selector('.rc-virtual-list-holder', timeout=self._t(5000))
                 option = self.scroll_list_and_find_option(data.tipoIdentificacion)
                 time.sleep(1)
                 if option:
@@ -106,13 +318,13 @@ class EjecutarCasosPlaywright:
             self.verificar_sesion_activa(data, "DESPUÉS DE SELECCIÓN DE IDENTIFICACIÓN")
             
             # ====== INGRESO DE NÚMERO DE IDENTIFICACIÓN ====== (XPATH SELENIUM EXACTO)
-            input_identidad_inicio = self.page.wait_for_selector("//input[contains(@name,'numeroDocumento')]", timeout=5000)
+            input_identidad_inicio = self.page.wait_for_selector("//input[contains(@name,'numeroDocumento')]", timeout=self._t(5000))
             self.helper.ingresar_texto(input_identidad_inicio, str(data.identificacion))
             self.logger.info('EjecutarCaso', f"ingreso input : {data.identificacion}")
             
             time.sleep(1)
             # XPATH SELENIUM EXACTO para botón buscar
-            boton_buscar = self.page.wait_for_selector("//button[@width='100%'][contains(.,'Buscar')]", timeout=5000)
+            boton_buscar = self.page.wait_for_selector("//button[@width='100%'][contains(.,'Buscar')]", timeout=self._t(5000))
             boton_buscar.click()
             self.logger.info('EjecutarCaso', "Clicked on buton buscar")
             time.sleep(2)
@@ -130,102 +342,19 @@ class EjecutarCasosPlaywright:
                 self.verificar_sesion_activa(data, "AL MANEJAR ERROR DE BÚSQUEDA")
                 
                 # XPATH SELENIUM EXACTO para botón OK
-                bonton_ok = self.page.wait_for_selector("body > div.swal2-container.swal2-center.swal2-backdrop-show > div > div.swal2-actions > button.swal2-confirm.swal2-styled", timeout=5000)
+                bonton_ok = self.page.wait_for_selector("body > div.swal2-container.swal2-center.swal2-backdrop-show > div > div.swal2-actions > button.swal2-confirm.swal2-styled", timeout=self._t(5000))
                 print("bonton_ok")
                 bonton_ok.click()
                 self.logger.info('EjecutarCaso', f"clic boton bonton_ok")
-                self.actualizar(data, "4", "") # error al encontrar el tipo de docuemento 
-                self.reinicio()
-                return False  # ERROR: tipo de documento incorrecto
+                raise DocumentoInvalidoError(f"El portal no encontró el documento {data.tipoIdentificacion} {data.identificacion}: {texto}")
             else:
                 # ====== LLENADO DE FORMULARIO PRINCIPAL ======
                 self._verificar_pausa()  # Verificar pausa
                 self.verificar_sesion_activa(data, "ANTES DE LLENAR FORMULARIO")
                 
-                # Correo (XPATH SELENIUM EXACTO)
-                input_correo = self.page.wait_for_selector("#email", timeout=5000)
-                input_correo.click()
-                self.logger.info('EjecutarCaso', "Clicked on email input")
-                input_correo.fill("")
-                # Usar email del paciente si existe, sino usar fallback
-                email_paciente = getattr(data, 'email', None) or getattr(data, 'correo', None) or "GENOMA@GENOMA.com"
-                self.helper.ingresar_texto(input_correo, email_paciente)
-                self.logger.info('EjecutarCaso', f"Ingresó {email_paciente}")
-                
-                # Nombre de emergencia (XPATH SELENIUM EXACTO)
-                input_nombre_e = self.page.wait_for_selector("#emergencyContactName", timeout=5000)
-                input_nombre_e.click()
-                input_nombre_e.fill("")
-                self.helper.ingresar_texto(input_nombre_e, "emergencia")
-                self.logger.info('EjecutarCaso', f"Ingresó emergencia")
-                
-                # Teléfono principal (XPATH SELENIUM EXACTO)
-                input_telefono = self.page.wait_for_selector("#telefono", timeout=5000)
-                telefono_value = input_telefono.get_attribute('value')
-                self.logger.info('EjecutarCaso', f"Valor actual del campo de teléfono: {telefono_value}")
-                
-                if telefono_value:
-                    self.logger.info('EjecutarCaso', "El campo de teléfono tiene un valor.")
-                    if len(telefono_value) == 10:
-                        print("El número de teléfono tiene 10 caracteres.")
-                    else:
-                        input_telefono.click(click_count=2)
-                        input_telefono.press("Delete")
-                        self.helper.ingresar_texto(input_telefono, str(data.telefono))
-                else:
-                    self.logger.info('EjecutarCaso', "El campo de teléfono está vacío.")
-                    input_telefono.click()
-                    input_telefono.fill("")
-                    self.helper.ingresar_texto(input_telefono, str(data.telefono))
-                    self.logger.info('EjecutarCaso', f"Ingresó telefono")
-                
-                # Teléfono de emergencia (XPATH SELENIUM EXACTO)
-                input_telefono_1 = self.page.wait_for_selector("#emergencyContactPhone", timeout=5000)
-                telefono_value1 = input_telefono_1.get_attribute('value')
-                self.logger.info('EjecutarCaso', f"Valor actual del campo de teléfono de emergencia: {telefono_value1}")
-                
-                if telefono_value1:
-                    self.logger.info('EjecutarCaso', "El campo de teléfono de emergencia tiene un valor.")
-                    if len(telefono_value1) == 10:
-                        print("El número de teléfono tiene 10 caracteres.")
-                    else:
-                        input_telefono_1.click(click_count=2)
-                        input_telefono_1.press("Delete")
-                        self.helper.ingresar_texto(input_telefono_1, str(data.telefono))
-                else:
-                    self.logger.info('EjecutarCaso', "El campo de teléfono de emergencia está vacío.")
-                    input_telefono_1.click()
-                    input_telefono_1.fill("")
-                    self.helper.ingresar_texto(input_telefono_1, str(data.telefono))
-                    self.logger.info('EjecutarCaso', f"Ingresó telefono")
-                
-                # Dirección principal (XPATH SELENIUM EXACTO)
-                dirreccion = self.page.wait_for_selector("#root > div > section > section > section > main > div.w-100.col > div > div > div > form > div > div > div > div:nth-child(3) > div:nth-child(2) > input", timeout=5000)
-                dirreccion_value1 = dirreccion.get_attribute('value')
-                self.logger.info('EjecutarCaso', f"Valor actual del campo dirrecion: {dirreccion_value1}")
-                
-                if dirreccion_value1:
-                    self.logger.info('EjecutarCaso', "El campo de dirección tiene un valor.")
-                else:
-                    self.logger.info('EjecutarCaso', "El campo de dirección está vacío.")
-                    dirreccion.click()
-                    dirreccion.fill("")
-                    self.helper.ingresar_texto(dirreccion, "calle 10")
-                    self.logger.info('EjecutarCaso', f"Ingresó dirrecion")
-                
-                # Dirección alternativa (XPATH SELENIUM EXACTO)
-                dirreccionAlter = self.page.wait_for_selector("#alternativeDirectionForCare", timeout=5000)
-                dirreccion_value2 = dirreccionAlter.get_attribute('value')
-                self.logger.info('EjecutarCaso', f"Valor actual del campo dirrecionAlt: {dirreccion_value2}")
-                
-                if dirreccion_value2:
-                    self.logger.info('EjecutarCaso', "El campo de dirección alternativa tiene un valor.")
-                else:
-                    self.logger.info('EjecutarCaso', "El campo de dirección alternativa está vacío.")
-                    dirreccionAlter.click()
-                    dirreccionAlter.fill("")
-                    self.helper.ingresar_texto(dirreccionAlter, "calle 10")
-                    self.logger.info('EjecutarCaso', f"Ingresó dirrecion")
+                # Datos de contacto y direcciones: un solo llenado en bloque,
+                # con fallback campo a campo para los que no queden aplicados
+                self._llenar_datos_contacto(data)
                 
                 # ====== VERIFICACIÓN DE SESIÓN ANTES DE CONTINUAR CON FECHA ======
                 self._verificar_pausa()  # Verificar pausa
@@ -234,7 +363,7 @@ class EjecutarCasosPlaywright:
                 # Fecha de orden (XPATH SELENIUM EXACTO)
                 self.page.evaluate("window.scrollBy(0, 400);")
                 time.sleep(1)
-                input_fecha_orden = self.page.wait_for_selector("//input[contains(@placeholder,'Select date')]", timeout=5000)
+                input_fecha_orden = self.page.wait_for_selector("//input[contains(@placeholder,'Select date')]", timeout=self._t(5000))
                 input_fecha_orden.click()
                 self.logger.info('EjecutarCaso', "Clicked on date input")
                 input_fecha_orden.fill("")
@@ -245,7 +374,7 @@ class EjecutarCasosPlaywright:
                 
                 # IPS REMITENTE (XPATH SELENIUM EXACTO CON MÚLTIPLES CANDIDATOS)
                 try:
-                    input_IPSREMITE = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* IPS Remitente:')]/parent::div/div/div", timeout=5000)
+                    input_IPSREMITE = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* IPS Remitente:')]/parent::div/div/div", timeout=self._t(5000))
                     input_IPSREMITE.click()
                     self.logger.info('EjecutarCaso', "Clicked on IPS Remitente input")
                     time.sleep(0.5)
@@ -265,8 +394,9 @@ class EjecutarCasosPlaywright:
                         candidatos.append(nombre_config)
                     
                     if not candidatos:
-                        raise Exception("No se encontró NITIPS/NOMBREIPS en configuración")
+                        raise IpsNoEncontradaError("No se encontró NITIPS/NOMBREIPS en configuración")
                     
+                    candidatos = self._memo_priorizar('ips_remitente', candidatos)
                     self.logger.info('EjecutarCaso', f"Candidatos para búsqueda: {candidatos}")
                     
                     # Intentar con cada candidato hasta encontrar la opción
@@ -285,10 +415,9 @@ class EjecutarCasosPlaywright:
                                 self.logger.info('EjecutarCaso', f"No se pudo ingresar texto: '{search_text}'")
                                 continue
                             
-                            time.sleep(2)
                             try:
                                 # Esperar el dropdown específico de ipsSender
-                                self.page.wait_for_selector("//div[@id='ipsSender_list']", timeout=5000)
+                                self.page.wait_for_selector("//div[@id='ipsSender_list']", timeout=self._t(5000))
                                 self.logger.info('EjecutarCaso', f"Dropdown ipsSender_list detectado")
                             except:
                                 self.logger.info('EjecutarCaso', "Dropdown no apareció, reintentando")
@@ -303,10 +432,12 @@ class EjecutarCasosPlaywright:
                             ]
                             
                             option = None
-                            for xpath_opcion in opciones_a_buscar:
+                            variante_ganadora = 0
+                            for variante, xpath_opcion in self._memo_priorizar_variantes('ips_remitente', opciones_a_buscar):
                                 try:
-                                    option = self.page.wait_for_selector(xpath_opcion, timeout=3000)
+                                    option = self.page.wait_for_selector(xpath_opcion, timeout=self._t(3000))
                                     self.logger.info('EjecutarCaso', f"Opción encontrada: {xpath_opcion}")
+                                    variante_ganadora = variante
                                     break
                                 except:
                                     continue
@@ -314,6 +445,7 @@ class EjecutarCasosPlaywright:
                             if option:
                                 option.click()
                                 self.logger.info('EjecutarCaso', f"✅ IPS Remitente seleccionada con: '{search_text}'")
+                                self._memo_registrar('ips_remitente', search_text, variante_ganadora)
                                 seleccion_realizada = True
                                 break
                             else:
@@ -335,9 +467,11 @@ class EjecutarCasosPlaywright:
                         except Exception as e:
                             self.logger.info('EjecutarCaso', f"Error al listar opciones: {e}")
                         
-                        if ultima_excepcion:
+                        if ultima_excepcion and isinstance(clasificar_error(ultima_excepcion), SesionPerdidaError):
                             raise ultima_excepcion
-                        raise Exception(f"No se encontró IPS Remitente después de {len(candidatos)} intentos")
+                        raise IpsNoEncontradaError(
+                            f"No se encontró IPS Remitente después de {len(candidatos)} intentos", causa=ultima_excepcion
+                        )
                 
                 except Exception as e:
                     print(f"Error detallado en IPS REMITENTE: {str(e)}")
@@ -351,22 +485,21 @@ class EjecutarCasosPlaywright:
                 
                 # Causa (XPATH SELENIUM EXACTO)
                 try:
-                    input_causa = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Causa que Motiva la Atención:')]/parent::div/div/div", timeout=5000)
+                    input_causa = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Causa que Motiva la Atención:')]/parent::div/div/div", timeout=self._t(5000))
                     input_causa.click()
                     self.logger.info('EjecutarCaso', "Clicked on Causa input")
                     
                     search_text = "Enfermedad"
-                    if self.helper.ingresar_texto_secuencial(input_causa, search_text):
+                    if self.helper.ingresar_texto_secuencial(input_causa, search_text, esperar_opcion='38 - Enfermedad general'):
                         self.logger.info('EjecutarCaso', "Texto ingresado correctamente")
-                        time.sleep(0.5)
                         
                         # XPATH SELENIUM EXACTO
                         option_xpath = "//div[@class='ant-select-item-option-content'][contains(.,'38 - Enfermedad general')]"
-                        option = self.page.wait_for_selector(option_xpath, timeout=5000)
+                        option = self._esperar_opcion('Causa', '38 - Enfermedad general', option_xpath)
                         option.click()
                         self.logger.info('EjecutarCaso', "Seleccionada Causa correctamente")
                     else:
-                        raise Exception("No se pudo ingresar el texto en el campo Causa")
+                        raise ElementoNoEncontradoError("No se pudo ingresar el texto en el campo Causa")
                 
                 except Exception as e:
                     print(f"Error detallado en Causa: {str(e)}")
@@ -379,12 +512,12 @@ class EjecutarCasosPlaywright:
                 if element:
                     # Playwright usa funciones de flecha, no arguments
                     element.evaluate("el => el.style.visibility = 'visible'")
-                input_prioridad = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Prioridad de la atención')]/parent::div/div", timeout=5000)
+                input_prioridad = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Prioridad de la atención')]/parent::div/div", timeout=self._t(5000))
                 input_prioridad.click()
                 self.logger.info('EjecutarCaso', "Clicked prioridad")
                 
                 # XPATH SELENIUM EXACTO
-                clic_prioridad = self.page.wait_for_selector("//div[@class='ant-select-item-option-content'][contains(.,'No prioritaria')]", timeout=5000)
+                clic_prioridad = self.page.wait_for_selector("//div[@class='ant-select-item-option-content'][contains(.,'No prioritaria')]", timeout=self._t(5000))
                 clic_prioridad.click()
                 self.logger.info('EjecutarCaso', "Clicked prioritaria combo")
                 time.sleep(0.3)
@@ -394,22 +527,21 @@ class EjecutarCasosPlaywright:
                 
                 # Diagnóstico (XPATH SELENIUM EXACTO)
                 try:
-                    input_dx = self.page.wait_for_selector("//input[contains(@aria-owns,'diagnostico_list')]", timeout=5000)
+                    input_dx = self.page.wait_for_selector("//input[contains(@aria-owns,'diagnostico_list')]", timeout=self._t(5000))
                     input_dx.click()
                     self.logger.info('EjecutarCaso', "Clicked on Diagnóstico input")
                     
                     if self.helper.ingresar_texto_secuencial(input_dx, data.diagnostico):
                         self.logger.info('EjecutarCaso', f"Texto ingresado correctamente: {data.diagnostico}")
-                        time.sleep(0.5)
                         
                         # XPATH SELENIUM EXACTO
                         dynamic_xpath_dx = f"//div[@class='ant-select-item-option-content'][contains(.,'{data.diagnostico}')]"
-                        option = self.page.wait_for_selector(dynamic_xpath_dx, timeout=5000)
+                        option = self._esperar_opcion('Diagnóstico', data.diagnostico, dynamic_xpath_dx)
                         option.click()
                         self.logger.info('EjecutarCaso', "Seleccionado Diagnóstico correctamente")
                         time.sleep(0.3)
                     else:
-                        raise Exception("No se pudo ingresar el texto en el campo Diagnóstico")
+                        raise ElementoNoEncontradoError("No se pudo ingresar el texto en el campo Diagnóstico")
                 
                 except Exception as e:
                     print(f"Error detallado en Diagnóstico: {str(e)}")
@@ -423,23 +555,22 @@ class EjecutarCasosPlaywright:
                         input_modalidad.scroll_into_view_if_needed()
                     time.sleep(0.3)
                     
-                    input_modalidad = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Modalidad de realización de la tecnologia de salud')]/parent::div/div/div", timeout=5000)
+                    input_modalidad = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Modalidad de realización de la tecnologia de salud')]/parent::div/div/div", timeout=self._t(5000))
                     input_modalidad.click()
                     self.logger.info('EjecutarCaso', "Clicked on Modalidad input")
                     
                     search_text = "Intramural"
                     if self.helper.ingresar_texto_secuencial(input_modalidad, search_text):
                         self.logger.info('EjecutarCaso', "Texto ingresado correctamente")
-                        time.sleep(0.5)
                         
                         # XPATH SELENIUM EXACTO
                         option_xpath = "//div[@class='ant-select-item-option-content'][contains(.,'Intramural')]"
-                        option = self.page.wait_for_selector(option_xpath, timeout=5000)
+                        option = self.page.wait_for_selector(option_xpath, timeout=self._t(5000))
                         option.click()
                         self.logger.info('EjecutarCaso', "Seleccionada Modalidad Intramural")
                         time.sleep(0.3)
                     else:
-                        raise Exception("No se pudo ingresar el texto en el campo Modalidad")
+                        raise ElementoNoEncontradoError("No se pudo ingresar el texto en el campo Modalidad")
                 
                 except Exception as e:
                     print(f"Error detallado en Modalidad: {str(e)}")
@@ -456,24 +587,23 @@ class EjecutarCasosPlaywright:
                 
                 # Condición y Destino (XPATH SELENIUM EXACTO)
                 try:
-                    input_condicion = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Condición y destino de la persona')]/parent::div/div/div", timeout=5000)
+                    input_condicion = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'* Condición y destino de la persona')]/parent::div/div/div", timeout=self._t(5000))
                     time.sleep(1)
                     input_condicion.click()
                     self.logger.info('EjecutarCaso', "Clicked on Condición y Destino input")
                     
                     search_text = "Paciente"
-                    if self.helper.ingresar_texto_secuencial(input_condicion, search_text):
+                    if self.helper.ingresar_texto_secuencial(input_condicion, search_text, esperar_opcion='Paciente con destino a su domicilio'):
                         self.logger.info('EjecutarCaso', "Texto ingresado correctamente")
-                        time.sleep(0.5)
                         
                         # XPATH SELENIUM EXACTO
                         option_xpath = "//div[@class='ant-select-item-option-content'][contains(.,'Paciente con destino a su domicilio')]"
-                        option = self.page.wait_for_selector(option_xpath, timeout=5000)
+                        option = self.page.wait_for_selector(option_xpath, timeout=self._t(5000))
                         option.click()
                         self.logger.info('EjecutarCaso', "Seleccionada Condición: Paciente con destino a su domicilio")
                         time.sleep(0.3)
                     else:
-                        raise Exception("No se pudo ingresar el texto en el campo Condición y Destino")
+                        raise ElementoNoEncontradoError("No se pudo ingresar el texto en el campo Condición y Destino")
                 
                 except Exception as e:
                     print(f"Error detallado en Condición y Destino: {str(e)}")
@@ -481,14 +611,14 @@ class EjecutarCasosPlaywright:
                     raise
                 
                 # Finalidad (XPATH SELENIUM EXACTO)
-                input_cFinalidad = self.page.wait_for_selector("#finality", timeout=5000)
+                input_cFinalidad = self.page.wait_for_selector("#finality", timeout=self._t(5000))
                 input_cFinalidad.fill("")
                 print(input_cFinalidad)
                 input_cFinalidad.click()
                 self.logger.info('EjecutarCaso', f"clic condicion")
                 
                 # XPATH SELENIUM EXACTO
-                clic_Finalidad = self.page.wait_for_selector("//div[@class='ant-select-item-option-content'][contains(.,'15 - Diagnostico')]", timeout=5000)
+                clic_Finalidad = self.page.wait_for_selector("//div[@class='ant-select-item-option-content'][contains(.,'15 - Diagnostico')]", timeout=self._t(5000))
                 self.page.evaluate("window.scrollBy(0, 100)")
                 time.sleep(0.3)
                 clic_Finalidad.click()
@@ -504,18 +634,17 @@ class EjecutarCasosPlaywright:
                 if resultado:
                     self.buscar_y_clickear_ips_sede(sede_atencion)
                 else:
-                    nombre_archivo = "archivo.txt"
-                    with open(nombre_archivo, 'a') as archivo:
-                        archivo.write(f"combo ips atiende  ,no se encontro,{data.identificacion},ordenCapita,{data.idItemOrden}\n")
-                    self.actualizar(data, "11", "")
-                    self.reinicio()
-                    return False  # ERROR: IPS no encontrada
+                    self._registrar_resultado(
+                        data, RegistroResultados.IPS_NO_ENCONTRADA,
+                        f"IPS de atención '{nombre_ips_atencion}' no encontrada", radicado=''
+                    )
+                    raise IpsNoEncontradaError(f"No se encontró la IPS de atención '{nombre_ips_atencion}'")
                 
                 # ====== OBTENCIÓN DE ARCHIVO PDF (método sobrescribible) ======
                 self._verificar_pausa()  # Verificar pausa antes de generar/obtener PDF
                 file_path = self._obtener_archivo_pdf(data)
                 if not file_path:
-                    return False  # El método ya manejó el error y reinicio
+                    raise PdfFaltanteError("No se obtuvo el archivo PDF de la orden")
                 
                 # Verificar sesión antes de subir archivos
                 self.verificar_sesion_activa(data, "ANTES DE SUBIR ARCHIVOS")
@@ -525,7 +654,7 @@ class EjecutarCasosPlaywright:
                     # Usar expect_file_chooser para simular flujo real (como Selenium send_keys)
                     boton_orden = self.page.locator("#fileListOrdenMedica").locator("xpath=..").locator("button")
                     with self.page.expect_file_chooser() as fc_info:
-                        boton_orden.click(timeout=5000)
+                        boton_orden.click(timeout=self._t(5000))
                     file_chooser = fc_info.value
                     file_chooser.set_files(file_path)
                     time.sleep(1)
@@ -534,7 +663,7 @@ class EjecutarCasosPlaywright:
                     # === SUBIR ARCHIVO A HISTORIA CLÍNICA ===
                     boton_hc = self.page.locator("#fileListHistoriaClinica").locator("xpath=..").locator("button")
                     with self.page.expect_file_chooser() as fc_info2:
-                        boton_hc.click(timeout=5000)
+                        boton_hc.click(timeout=self._t(5000))
                     file_chooser2 = fc_info2.value
                     file_chooser2.set_files(file_path)
                     time.sleep(1)
@@ -551,7 +680,7 @@ class EjecutarCasosPlaywright:
                 time.sleep(0.5)
                 
                 # XPATH SELENIUM EXACTO - Usar justificación del JSON
-                txt_area = self.page.wait_for_selector("#descripcion", timeout=5000)
+                txt_area = self.page.wait_for_selector("#descripcion", timeout=self._t(5000))
                 txt_area.fill("")
                 print("area")
                 justificacion_texto = getattr(data, 'justificacion', '') or 'Orden de autorización'
@@ -578,39 +707,13 @@ class EjecutarCasosPlaywright:
                 except Exception as e:
                     self.logger.warning('EjecutarCaso', f"⚠️ Error al verificar dropdowns: {e}")
                 
-                # Buscar el botón Guardar con múltiples estrategias
+                # Buscar el botón Guardar (cacheado entre casos mientras siga en el DOM)
                 self._verificar_pausa()  # Verificar pausa antes de guardar
                 time.sleep(1)
-                bonton_guardar = None
-                
-                # Estrategia 1: CSS selector (más rápido que XPath)
-                try:
-                    bonton_guardar = self.page.wait_for_selector("button[type='submit'].ant-btn-primary", timeout=5000)
-                    self.logger.info('EjecutarCaso', "✅ Botón Guardar encontrado por CSS selector")
-                except Exception:
-                    pass
-                
-                # Estrategia 2: XPath como fallback
-                if not bonton_guardar:
-                    try:
-                        bonton_guardar = self.page.wait_for_selector("//button[@type='submit'][contains(.,'Guardar')]", timeout=5000)
-                        self.logger.info('EjecutarCaso', "✅ Botón Guardar encontrado por XPath")
-                    except Exception:
-                        pass
-                
-                # Estrategia 3: query_selector directo (sin esperas)
-                if not bonton_guardar:
-                    try:
-                        bonton_guardar = self.page.query_selector("button[type='submit'].ant-btn-primary")
-                        if not bonton_guardar:
-                            bonton_guardar = self.page.query_selector("button.ant-btn-primary.btn-primary")
-                        if bonton_guardar:
-                            self.logger.info('EjecutarCaso', "✅ Botón Guardar encontrado por query_selector")
-                    except Exception:
-                        pass
+                bonton_guardar = self._obtener_boton_guardar()
                 
                 if not bonton_guardar:
-                    raise Exception("No se encontró el botón Guardar con ninguna estrategia")
+                    raise ElementoNoEncontradoError("No se encontró el botón Guardar con ninguna estrategia")
                 
                 print("bonton_guardar")
                 
@@ -630,175 +733,31 @@ class EjecutarCasosPlaywright:
                     self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
                 time.sleep(1)
                 
+                # Desde aquí el portal puede radicar: si la app muere, no reintentar a ciegas
+                self._registrar_fase(data, 'ENVIADA')
+                inicio_guardar = time.time()
                 bonton_guardar.click(force=True)
                 
                 self.logger.info('EjecutarCaso', f"clic boton guardar")
                 time.sleep(3)
                 
-                try:
-                    # ====== DETECCIÓN ROBUSTA DEL MODAL DE RESPUESTA ======
-                    # Esperar directamente por el h2 FINAL (Error o Correcto)
-                    # NO esperar por swal2-title genérico (puede ser modal de "cargando")
-                    tipo_resultado = None
-                    h2_element = None
-                    max_espera_total = 60  # 60 segundos máximo esperando respuesta del servidor
-                    intervalo_polling = 2  # cada 2 segundos
-                    intentos_totales = max_espera_total // intervalo_polling
-                    
-                    self.logger.info('EjecutarCaso', f"⏳ Esperando respuesta del servidor (máx {max_espera_total}s)...")
-                    
-                    for intento in range(intentos_totales):
-                        # Buscar Error
-                        error_title = self.page.query_selector("//h2[contains(.,'Error')]")
-                        if error_title and error_title.is_visible():
-                            tipo_resultado = 'error'
-                            h2_element = error_title
-                            self.logger.info('EjecutarCaso', f"🔍 Modal tipo 'Error' detectado ({intento * intervalo_polling}s)")
-                            break
-                        
-                        # Buscar Correcto
-                        success_title = self.page.query_selector("//h2[contains(.,'Correcto')]")
-                        if success_title and success_title.is_visible():
-                            tipo_resultado = 'correcto'
-                            h2_element = success_title
-                            self.logger.info('EjecutarCaso', f"🔍 Modal tipo 'Correcto' detectado ({intento * intervalo_polling}s)")
-                            break
-                        
-                        if intento < intentos_totales - 1:
-                            if intento % 5 == 0 and intento > 0:
-                                self.logger.info('EjecutarCaso', f"⏳ Aún esperando respuesta... ({intento * intervalo_polling}s)")
-                            time.sleep(intervalo_polling)
-                    
-                    # ====== CAPTURAR TEXTOS ANTES DE CERRAR ======
-                    success_text = None
-                    error_text = None
-                    
-                    if tipo_resultado == 'correcto':
-                        success_text = h2_element.text_content()
-                        self.logger.info('EjecutarCaso', f"📝 Texto éxito capturado: {success_text}")
-                    elif tipo_resultado == 'error':
-                        error_text = "Error sin detalle"
-                        try:
-                            error_el = self.page.query_selector("//div[contains(@class,'swal2-html-container') or @id='swal2-html-container']")
-                            if error_el:
-                                error_text = (error_el.text_content() or "").strip() or error_text
-                                self.logger.info('EjecutarCaso', f"📝 Texto error capturado: {error_text[:100]}...")
-                            else:
-                                self.logger.warning('EjecutarCaso', f"⚠️ Elemento swal2-html-container no encontrado")
-                        except Exception as e:
-                            self.logger.warning('EjecutarCaso', f"⚠️ No se pudo leer swal2-html-container: {e}")
-                    
-                    # Cerrar el modal SweetAlert2 DESPUÉS de capturar los textos
-                    self._cerrar_swal2()
-                    
-                    # ====== PROCESAR SEGÚN TIPO DE RESULTADO ======
-                    if tipo_resultado == 'correcto':
-                        # ====== ÉXITO ======
-                        print(f"ÉXITO: {success_text}")
-                        
-                        numbers = re.findall(r'\d+', success_text)
-                        numbers_str = ''.join(numbers)
-                        
-                        with open("archivo.txt", 'a', encoding='utf-8') as archivo:
-                            archivo.write(f"caso,{success_text},paciente,{data.identificacion},ordenCapita,{data.idItemOrden}\n")
-                        
-                        self._hacer_clic_ok()
-                        self.actualizar(data, "3", numbers_str)
-                        self.reinicio()
-                        time.sleep(2)
-                        self.alerta()
-                        return True  # ÉXITO: Caso completado correctamente
-                    
-                    elif tipo_resultado == 'error':
-                        # ====== ERROR - Procesar detalle ya capturado ======
-                        
-                        # Verificar si es solicitud activa (método sobrescribible por clases hijas)
-                        if "solicitud activa" in error_text.lower() and "número de radicado" in error_text.lower():
-                            return self._manejar_solicitud_activa(data, error_text)
-                        
-                        # Error normal - extraer fragmento
-                        fragment = None
-                        m = re.search(r"(servicio\s*\d+\s*con el número de radicado\s*#\s*\d+)", error_text, re.IGNORECASE)
-                        if m:
-                            fragment = m.group(1).strip()
-                        else:
-                            m1 = re.search(r"servicio\s*(\d+)", error_text, re.IGNORECASE)
-                            m2 = re.search(r"#\s*(\d+)", error_text)
-                            if m1 and m2:
-                                fragment = f"servicio {m1.group(1)} con el número de radicado #{m2.group(1)}"
-                            else:
-                                fragment = (error_text or "Error sin detalle").strip()[:250]
-                        
-                        print(f"ERROR (capturado): {fragment}")
-                        try:
-                            with open("archivo.txt", 'a', encoding='utf-8') as archivo:
-                                archivo.write(f"caso,{fragment},paciente,{data.identificacion},ordenCapita,{data.idItemOrden}\n")
-                        except Exception as e:
-                            self.logger.warning('EjecutarCaso', f"⚠️ No se pudo escribir archivo.txt: {e}")
-                        
-                        try:
-                            self.actualizar(data, "3", "")
-                        except Exception as e:
-                            self.logger.warning('EjecutarCaso', f"⚠️ Falló actualizar con mensaje de error: {e}")
-                        
-                        try:
-                            self._hacer_clic_ok()
-                        except Exception as e:
-                            self.logger.warning('EjecutarCaso', f"⚠️ Falló al hacer clic en OK del modal: {e}")
-                        
-                        self.reinicio()
-                        return False  # ERROR: Servicio duplicado/ya reportado
-                    
-                    else:
-                        # No se encontró ni Error ni Correcto después de todos los intentos
-                        self.logger.warning('EjecutarCaso', f"⚠️ Modal visible pero sin título Error/Correcto después de {max_espera_total}s")
-                        self._hacer_clic_ok()
-                        self.actualizar(data, "19", "")
-                        self.reinicio()
-                        return False  # ERROR: No se pudo determinar resultado
-                except Exception as e:
-                    print(f"Error en manejo de respuesta: {e}")
-                    self.actualizar(data, "11", "")
-                    self.reinicio()
-                    return False  # ERROR: Fallo en manejo de respuesta del servidor
+                return self._procesar_respuesta_guardar(data, inicio_guardar)
                 
+        except PausedException:
+            # La pausa no es un error del caso: dejar el formulario limpio y que el worker la maneje
+            try:
+                self.reinicio()
+            except Exception as e:
+                self.logger.warning('EjecutarCaso', f"⚠️ No se pudo reiniciar el formulario tras la pausa: {e}")
+            raise
         except Exception as e:
-            error_message = str(e).lower()
+            error = clasificar_error(e)
+            self.ultimo_error = error
             
-            # Clasificar errores
-            if any(keyword in error_message for keyword in ["invalid session", "session not created", "no such session", "chrome not reachable"]):
-                self.logger.error('EjecutarCaso', f"❌ SESIÓN DEL NAVEGADOR PERDIDA", e)
-                print(f"[SESIÓN PERDIDA] Paciente {data.identificacion} - Navegador desconectado")
-                self.actualizar(data, "12", "")
-            elif "timeout" in error_message:
-                self.logger.error('EjecutarCaso', f"⏰ TIMEOUT - ELEMENTO NO RESPONDIÓ A TIEMPO", e)
-                print(f"[TIMEOUT] Paciente {data.identificacion} - Página no respondió a tiempo")
-                self.actualizar(data, "13", "")
-            elif any(keyword in error_message for keyword in ["element not found", "no such element", "element not interactable"]):
-                self.logger.error('EjecutarCaso', f"🎯 ELEMENTO NO ENCONTRADO EN LA PÁGINA", e)
-                print(f"[ELEMENTO FALTANTE] Paciente {data.identificacion} - Campo o botón no encontrado")
-                self.actualizar(data, "14", "")
-            elif any(keyword in error_message for keyword in ["stale element", "element is not attached"]):
-                self.logger.error('EjecutarCaso', f"🔄 ELEMENTO OBSOLETO - PÁGINA SE ACTUALIZÓ", e)
-                print(f"[ELEMENTO OBSOLETO] Paciente {data.identificacion} - Página se actualizó")
-                self.actualizar(data, "15", "")
-            elif any(keyword in error_message for keyword in ["network", "connection", "dns", "resolve"]):
-                self.logger.error('EjecutarCaso', f"🌐 ERROR DE CONEXIÓN A INTERNET", e)
-                print(f"[SIN INTERNET] Paciente {data.identificacion} - Problemas de conexión")
-                self.actualizar(data, "16", "")
-            elif any(keyword in error_message for keyword in ["no se pudo encontrar", "pdf no encontrado", "pdf no existe", "pdf faltante"]):
-                self.logger.error('EjecutarCaso', f"📄 ARCHIVO PDF NO ENCONTRADO", e)
-                print(f"[PDF FALTANTE] Paciente {data.identificacion} - Documento no encontrado")
-                self.actualizar(data, "5", "")
-            elif any(keyword in error_message for keyword in ["permission", "access denied", "forbidden"]):
-                self.logger.error('EjecutarCaso', f"🔒 ERROR DE PERMISOS O ACCESO DENEGADO", e)
-                print(f"[SIN PERMISOS] Paciente {data.identificacion} - Acceso denegado")
-                self.actualizar(data, "18", "")
-            else:
-                error_corto = str(e)[:100] + "..." if len(str(e)) > 100 else str(e)
-                self.logger.error('EjecutarCaso', f"❓ ERROR NO CLASIFICADO: {error_corto}", e)
-                print(f"[ERROR DESCONOCIDO] Paciente {data.identificacion} - {error_corto}")
-                self.actualizar(data, "11", "")
+            error_corto = str(error)[:100] + "..." if len(str(error)) > 100 else str(error)
+            self.logger.error('EjecutarCaso', f"{error.icono} {error.etiqueta}: {error_corto}", e)
+            print(f"[{error.etiqueta}] Paciente {data.identificacion} - {error_corto}")
+            self.actualizar(data, str(error.estado), "")
             
             self.logger.info('EjecutarCaso', f"⏰ Timestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             self.reinicio()
@@ -809,7 +768,244 @@ class EjecutarCasosPlaywright:
         self.logger.warning('EjecutarCaso', "⚠️ Flujo inesperado - llegó al final sin retorno explícito")
         return False
     
+    def _procesar_respuesta_guardar(self, data, inicio_guardar: float) -> bool:
+        """
+        Espera y procesa el modal de respuesta del portal tras el clic en Guardar.
+        
+        Returns:
+            True si el portal radicó el caso (Correcto o solicitud activa)
+            
+        Raises:
+            ErrorCaso: rechazo del portal, resultado indeterminado o fallo leyendo la respuesta
+        """
+        try:
+            # ====== DETECCIÓN ROBUSTA DEL MODAL DE RESPUESTA ======
+            # Esperar directamente por el h2 FINAL (Error o Correcto)
+            # NO esperar por swal2-title genérico (puede ser modal de "cargando")
+            tipo_resultado = None
+            h2_element = None
+            max_espera_total = self._t(60)  # 60 segundos (escalados si el portal está lento) esperando respuesta del servidor
+            intervalo_polling = 2  # cada 2 segundos
+            intentos_totales = max_espera_total // intervalo_polling
+            
+            self.logger.info('EjecutarCaso', f"⏳ Esperando respuesta del servidor (máx {max_espera_total}s)...")
+            
+            for intento in range(intentos_totales):
+                # Buscar Error
+                error_title = self.page.query_selector("//h2[contains(.,'Error')]")
+                if error_title and error_title.is_visible():
+                    tipo_resultado = 'error'
+                    h2_element = error_title
+                    self.logger.info('EjecutarCaso', f"🔍 Modal tipo 'Error' detectado ({intento * intervalo_polling}s)")
+                    break
+                
+                # Buscar Correcto
+                success_title = self.page.query_selector("//h2[contains(.,'Correcto')]")
+                if success_title and success_title.is_visible():
+                    tipo_resultado = 'correcto'
+                    h2_element = success_title
+                    self.logger.info('EjecutarCaso', f"🔍 Modal tipo 'Correcto' detectado ({intento * intervalo_polling}s)")
+                    break
+                
+                if intento < intentos_totales - 1:
+                    if intento % 5 == 0 and intento > 0:
+                        self.logger.info('EjecutarCaso', f"⏳ Aún esperando respuesta... ({intento * intervalo_polling}s)")
+                    time.sleep(intervalo_polling)
+            self._medir_portal('guardar', time.time() - inicio_guardar, ok=tipo_resultado is not None)
+            
+            # ====== CAPTURAR TEXTOS ANTES DE CERRAR ======
+            success_text = None
+            error_text = None
+            
+            if tipo_resultado == 'correcto':
+                success_text = h2_element.text_content()
+                self.logger.info('EjecutarCaso', f"📝 Texto éxito capturado: {success_text}")
+            elif tipo_resultado == 'error':
+                error_text = "Error sin detalle"
+                try:
+                    error_el = self.page.query_selector("//div[contains(@class,'swal2-html-container') or @id='swal2-html-container']")
+                    if error_el:
+                        error_text = (error_el.text_content() or "").strip() or error_text
+                        self.logger.info('EjecutarCaso', f"📝 Texto error capturado: {error_text[:100]}...")
+                    else:
+                        self.logger.warning('EjecutarCaso', f"⚠️ Elemento swal2-html-container no encontrado")
+                except Exception as e:
+                    self.logger.warning('EjecutarCaso', f"⚠️ No se pudo leer swal2-html-container: {e}")
+            
+            # Cerrar el modal SweetAlert2 DESPUÉS de capturar los textos
+            self._cerrar_swal2()
+            
+            # ====== PROCESAR SEGÚN TIPO DE RESULTADO ======
+            if tipo_resultado == 'correcto':
+                # ====== ÉXITO ======
+                print(f"ÉXITO: {success_text}")
+                
+                numbers = re.findall(r'\d+', success_text)
+                numbers_str = ''.join(numbers)
+                
+                self._registrar_fase(data, 'RESULTADO', exito=True, numero=numbers_str, mensaje=success_text)
+                self._registrar_resultado(data, RegistroResultados.EXITO, success_text, radicado=numbers_str)
+                radicado_exito = numbers_str  # El cierre va fuera de este try (ver abajo)
+            
+            elif tipo_resultado == 'error':
+                # ====== ERROR - Procesar detalle ya capturado ======
+                
+                # Verificar si es solicitud activa (método sobrescribible por clases hijas)
+                if "solicitud activa" in error_text.lower() and "número de radicado" in error_text.lower():
+                    return self._manejar_solicitud_activa(data, error_text)
+                
+                # Error normal - extraer fragmento
+                fragment = None
+                m = re.search(r"(servicio\s*\d+\s*con el número de radicado\s*#\s*\d+)", error_text, re.IGNORECASE)
+                if m:
+                    fragment = m.group(1).strip()
+                else:
+                    m1 = re.search(r"servicio\s*(\d+)", error_text, re.IGNORECASE)
+                    m2 = re.search(r"#\s*(\d+)", error_text)
+                    if m1 and m2:
+                        fragment = f"servicio {m1.group(1)} con el número de radicado #{m2.group(1)}"
+                    else:
+                        fragment = (error_text or "Error sin detalle").strip()[:250]
+                
+                print(f"ERROR (capturado): {fragment}")
+                self._registrar_fase(data, 'RESULTADO', exito=False, mensaje=fragment)
+                self._registrar_resultado(data, RegistroResultados.RECHAZO, fragment)
+                
+                try:
+                    self._hacer_clic_ok()
+                except Exception as e:
+                    self.logger.warning('EjecutarCaso', f"⚠️ Falló al hacer clic en OK del modal: {e}")
+                
+                raise RechazoPortalError(fragment)  # ERROR: Servicio duplicado/ya reportado
+            
+            else:
+                # No se encontró ni Error ni Correcto después de todos los intentos
+                self.logger.warning('EjecutarCaso', f"⚠️ Modal visible pero sin título Error/Correcto después de {max_espera_total}s")
+                self._hacer_clic_ok()
+                raise ResultadoIndeterminadoError(f"Sin modal Error/Correcto después de {max_espera_total}s")
+        except ErrorCaso:
+            raise
+        except Exception as e:
+            # Ya se hizo clic en Guardar: nunca reintentable (podría radicar dos veces)
+            print(f"Error en manejo de respuesta: {e}")
+            raise ErrorCaso(f"Fallo en manejo de respuesta del servidor: {e}", causa=e)
+        
+        # ====== ÉXITO: el portal ya radicó, nada de aquí puede volver el caso a error ======
+        self._finalizar_radicado(data, lambda: self.actualizar(data, "3", radicado_exito))
+        return True  # ÉXITO: Caso completado correctamente
+
     # ============ MÉTODOS AUXILIARES - XPATHS SELENIUM EXACTOS ============
+    def _ids_caso(self, data) -> list:
+        """idItemOrden que cubre el caso actual (una orden; los lotes lo sobrescriben)"""
+        return [data.idItemOrden]
+    
+    def _registrar_resultado(self, data, tipo: str, detalle: str, radicado: Optional[str] = None):
+        """Guarda el resultado del caso en el registro local (nunca interrumpe el caso)"""
+        try:
+            registro = obtener_registro()
+            for id_item in self._ids_caso(data):
+                registro.registrar(
+                    tipo, getattr(data, 'identificacion', ''), id_item, detalle,
+                    radicado=radicado, modulo=self.MODULO_RESULTADOS,
+                    cups=self._cups_item(data, id_item),
+                    fecha_orden=getattr(data, 'fechaFacturaEvento', '')
+                )
+        except Exception as e:
+            self.logger.warning('EjecutarCaso', f"⚠️ No se pudo guardar el resultado ({tipo}): {e}")
+    
+    def _cups_item(self, data, id_item) -> str:
+        """CUPS de la orden id_item dentro del caso (una orden: el de data)"""
+        return getattr(data, 'cups', '') or ''
+    
+    def _esperar_opcion(self, campo: str, texto: str, xpath: str, timeout: int = 5000):
+        """
+        Espera la opción filtrada de un ant-select del formulario.
+        
+        Raises:
+            OpcionNoEncontradaError: el dropdown quedó en "sin resultados" (el valor no existe en el portal)
+            PlaywrightTimeout: la opción no apareció por otra causa (render lento, se reintenta)
+        """
+        try:
+            return self.page.wait_for_selector(xpath, timeout=self._t(timeout))
+        except PlaywrightTimeout:
+            if self.helper.esperar_filtro_dropdown(texto, timeout=self._t(2000)) == 'vacio':
+                raise OpcionNoEncontradaError(f"'{texto}' no está en la lista de {campo} del portal")
+            raise
+    
+    def _t(self, timeout: int) -> int:
+        """Timeout escalado según la salud del portal (igual si no hay monitor)"""
+        return int(timeout * self.salud.factor_timeout()) if self.salud else timeout
+    
+    def _medir_portal(self, operacion: str, segundos: float, ok: bool = True):
+        """Reporta un tiempo de respuesta del portal al monitor de salud"""
+        if self.salud:
+            self.salud.registrar(operacion, segundos, ok)
+    
+    def _registrar_fase(self, data, fase: str, **detalle):
+        """Anota la fase del caso en el diario del worker (si hay)"""
+        if self.diario is None:
+            return
+        for id_item in self._ids_caso(data):
+            self.diario.registrar(id_item, fase, **detalle)
+    
+    
+    # Selector EXACTO de Selenium para la dirección principal (no tiene id)
+    SELECTOR_DIRECCION = "#root > div > section > section > section > main > div.w-100.col > div > div > div > form > div > div > div > div:nth-child(3) > div:nth-child(2) > input"
+    
+    def _llenar_datos_contacto(self, data):
+        """
+        Llena correo, contacto de emergencia, teléfonos y direcciones.
+        Reglas: los teléfonos con 10 dígitos y las direcciones existentes se conservan.
+        """
+        # Usar email del paciente si existe, sino usar fallback
+        email_paciente = getattr(data, 'email', None) or getattr(data, 'correo', None) or "GENOMA@GENOMA.com"
+        campos = [
+            {'clave': 'email', 'selector': '#email', 'valor': email_paciente, 'conservar': 'nunca'},
+            {'clave': 'emergencyContactName', 'selector': '#emergencyContactName', 'valor': 'emergencia', 'conservar': 'nunca'},
+            {'clave': 'telefono', 'selector': '#telefono', 'valor': str(data.telefono), 'conservar': 'diez_digitos'},
+            {'clave': 'emergencyContactPhone', 'selector': '#emergencyContactPhone', 'valor': str(data.telefono), 'conservar': 'diez_digitos'},
+            {'clave': 'direccion', 'selector': self.SELECTOR_DIRECCION, 'valor': 'calle 10', 'conservar': 'con_valor'},
+            {'clave': 'alternativeDirectionForCare', 'selector': '#alternativeDirectionForCare', 'valor': 'calle 10', 'conservar': 'con_valor'},
+        ]
+        
+        resultados = {}
+        try:
+            # Esperar a que el formulario esté renderizado antes del llenado en bloque
+            self.page.wait_for_selector("#email", timeout=self._t(5000))
+            resultados = self.helper.llenar_campos_bulk(campos) or {}
+        except Exception as e:
+            self.logger.warning('EjecutarCaso', f"Llenado en bloque falló, se usa campo a campo: {e}")
+        
+        for campo in campos:
+            resultado = resultados.get(campo['clave']) or {'estado': 'error'}
+            estado = resultado.get('estado')
+            if estado == 'llenado':
+                self.logger.info('EjecutarCaso', f"Ingresó {campo['clave']}: {resultado.get('final')} (anterior: '{resultado.get('anterior')}')")
+            elif estado == 'conservado':
+                self.logger.info('EjecutarCaso', f"El campo {campo['clave']} tiene un valor válido, se conserva: {resultado.get('anterior')}")
+            else:
+                detalle = resultado.get('error') or estado
+                self.logger.warning('EjecutarCaso', f"⚠️ Campo {campo['clave']} no aplicado en bloque ({detalle}), usando método individual")
+                self._llenar_campo_individual(campo)
+    
+    def _llenar_campo_individual(self, campo: dict):
+        """Llenado campo a campo (método original) para un campo que falló en bloque"""
+        elemento = self.page.wait_for_selector(campo['selector'], timeout=self._t(5000))
+        valor_actual = elemento.get_attribute('value')
+        self.logger.info('EjecutarCaso', f"Valor actual del campo {campo['clave']}: {valor_actual}")
+        
+        if valor_actual:
+            if campo['conservar'] == 'diez_digitos' and len(valor_actual) == 10:
+                self.logger.info('EjecutarCaso', f"El campo {campo['clave']} tiene 10 caracteres, se conserva.")
+                return
+            if campo['conservar'] == 'con_valor':
+                self.logger.info('EjecutarCaso', f"El campo {campo['clave']} tiene un valor, se conserva.")
+                return
+        
+        elemento.click()
+        elemento.fill("")
+        self.helper.ingresar_texto(elemento, campo['valor'])
+        self.logger.info('EjecutarCaso', f"Ingresó {campo['clave']}: {campo['valor']}")
     
     def comboIdentidad(self) -> bool:
         """Método para manejar el combo de identidad - XPATH SELENIUM EXACTO"""
@@ -828,16 +1024,16 @@ class EjecutarCasosPlaywright:
             combo_selector = "//span[@class='ant-select-selection-item'][contains(.,'Adulto sin Identificación')]"
             
             try:
-                combo_element = self.page.wait_for_selector(combo_selector, timeout=5000)
+                combo_element = self.page.wait_for_selector(combo_selector, timeout=self._t(5000))
                 combo_element.click()
                 self.logger.info('EjecutarCaso', "Combo de identidad abierto correctamente")
             except:
                 combo_selector_alt = "//div[contains(@class,'ant-select-selector')]"
-                combo_element = self.page.wait_for_selector(combo_selector_alt, timeout=5000)
+                combo_element = self.page.wait_for_selector(combo_selector_alt, timeout=self._t(5000))
                 combo_element.click()
                 self.logger.info('EjecutarCaso', "Combo abierto con selector alternativo")
             
-            self.page.wait_for_selector(".ant-select-dropdown", timeout=5000)
+            self.page.wait_for_selector(".ant-select-dropdown", timeout=self._t(5000))
             time.sleep(1)
             
             return True
@@ -848,12 +1044,36 @@ class EjecutarCasosPlaywright:
     def esperar_y_clickear(self, xpath: str):
         """Espera y hace clic en un elemento"""
         try:
-            element = self.page.wait_for_selector(xpath, timeout=5000)
+            element = self.page.wait_for_selector(xpath, timeout=self._t(5000))
             element.click()
             return element
         except:
             return None
     
+    def _obtener_boton_guardar(self):
+        """Busca el botón Guardar con múltiples estrategias, usando el cache si es posible"""
+        # Estrategia 1: CSS selector (más rápido que XPath)
+        # Estrategia 2: XPath como fallback
+        bonton_guardar = self._elemento_cacheado('boton_guardar', [
+            "button[type='submit'].ant-btn-primary",
+            "//button[@type='submit'][contains(.,'Guardar')]"
+        ])
+        if bonton_guardar:
+            self.logger.info('EjecutarCaso', "✅ Botón Guardar encontrado")
+            return bonton_guardar
+        
+        # Estrategia 3: query_selector directo (sin esperas)
+        try:
+            bonton_guardar = self.page.query_selector("button[type='submit'].ant-btn-primary")
+            if not bonton_guardar:
+                bonton_guardar = self.page.query_selector("button.ant-btn-primary.btn-primary")
+            if bonton_guardar:
+                self._cache_elementos['boton_guardar'] = bonton_guardar
+                self.logger.info('EjecutarCaso', "✅ Botón Guardar encontrado por query_selector")
+        except Exception:
+            pass
+        return bonton_guardar
+    
     def scroll_list_to(self, position: int):
         """Hace scroll en la lista virtual"""
         try:
@@ -870,65 +1090,32 @@ class EjecutarCasosPlaywright:
         except Exception as e:
             self.logger.error('EjecutarCaso', f"Error al hacer scroll: {e}", e)
     
-    def scroll_list_and_find_option(self, option_text: str, max_attempts: int = 30):
-        """Busca opción en virtual list haciendo scroll - IGUAL QUE SELENIUM"""
-        attempts = 0
-        found_options = set()
-        scroll_position = 0
-        scroll_increment = 100
-        
+    def scroll_list_and_find_option(self, option_text: str, max_attempts: int = 60, exacto: bool = True):
+        """
+        Busca opción en virtual list con una sola búsqueda en la página.
+        Recuerda el scroll donde apareció cada opción para ir directo en los siguientes casos.
+        """
         self.logger.info('EjecutarCaso', f"Buscando opción: '{option_text}'")
+        offset_cache = self._offsets_opciones.get(option_text)
         
-        while attempts < max_attempts:
-            try:
-                time.sleep(0.3)
-                
-                options = self.page.query_selector_all("//div[contains(@class, 'ant-select-item-option-content')]")
-                
-                for option in options:
-                    try:
-                        option_content = option.text_content().strip()
-                        if option_content:
-                            found_options.add(option_content)
-                            
-                            if option_content == option_text:
-                                self.logger.info('EjecutarCaso', f"Opción encontrada: {option_content}")
-                                option.scroll_into_view_if_needed()
-                                time.sleep(0.3)
-                                return option
-                    except:
-                        continue
-                
-                scroll_position += scroll_increment
-                self.page.evaluate(f"""
-                    const container = document.querySelector('.rc-virtual-list-holder');
-                    if (container) container.scrollTop = {scroll_position};
-                """)
-                
-                current_scroll = self.page.evaluate("""
-                    (() => {
-                        const container = document.querySelector('.rc-virtual-list-holder');
-                        return container ? container.scrollTop : 0;
-                    })()
-                """)
-                
-                max_scroll = self.page.evaluate("""
-                    (() => {
-                        const container = document.querySelector('.rc-virtual-list-holder');
-                        return container ? container.scrollHeight - container.clientHeight : 0;
-                    })()
-                """)
-                
-                if current_scroll >= max_scroll and attempts > 5:
-                    self.logger.info('EjecutarCaso', "Llegamos al final de la lista")
-                    break
-            except Exception as e:
-                self.logger.error('EjecutarCaso', f"Error en intento {attempts + 1}: {e}", e)
-            
-            attempts += 1
+        try:
+            option, offset, vistas = self.helper.buscar_opcion_virtual(
+                option_text, exacto=exacto, offset_inicial=offset_cache, max_pasos=max_attempts
+            )
+        except Exception as e:
+            self.logger.error('EjecutarCaso', f"Error buscando opción '{option_text}': {e}", e)
+            return None
+        
+        if option:
+            if offset is not None:
+                self._offsets_opciones[option_text] = offset
+            origen = "cache" if offset_cache is not None and offset == offset_cache else "búsqueda"
+            self.logger.info('EjecutarCaso', f"Opción encontrada: {option_text} (scroll {offset}, {origen})")
+            return option
         
-        self.logger.warning('EjecutarCaso', f"Opción '{option_text}' no encontrada después de {attempts} intentos")
-        self.logger.info('EjecutarCaso', f"Opciones encontradas durante la búsqueda: {list(found_options)}")
+        self._offsets_opciones.pop(option_text, None)
+        self.logger.warning('EjecutarCaso', f"Opción '{option_text}' no encontrada en la lista")
+        self.logger.info('EjecutarCaso', f"Opciones encontradas durante la búsqueda: {vistas}")
         return None
     
     def click_option(self, option):
@@ -1063,23 +1250,27 @@ class EjecutarCasosPlaywright:
             
             # 2. NUEVO: Actualizar resultado_ejecucion en tabla programacion
             if resultado_ejecucion:
-                url_programacion = f"{config.api_url_programacion_base.rstrip('/')}/programacion-ordenes/{data.idItemOrden}"
-                payload_programacion = {
-                    "resultado_ejecucion": resultado_ejecucion
-                }
-                
-                try:
-                    response = requests.put(url_programacion, json=payload_programacion, timeout=10)
-                    if response.status_code == 200:
-                        self.logger.info('EjecutarCaso', f"✅ resultado_ejecucion actualizado: {resultado_ejecucion[:50]}...")
-                    else:
-                        self.logger.warning('EjecutarCaso', f"⚠️ Error actualizando resultado_ejecucion: {response.status_code}")
-                except Exception as e:
-                    self.logger.warning('EjecutarCaso', f"⚠️ Error enviando resultado_ejecucion: {e}")
+                self._actualizar_resultado_ejecucion(data, resultado_ejecucion)
         
         except Exception as e:
             self.logger.error('EjecutarCaso', f"Error al actualizar con resultado_ejecucion: {e}", e)
     
+    def _actualizar_resultado_ejecucion(self, data, resultado_ejecucion: str):
+        """Actualiza resultado_ejecucion de la orden (data.idItemOrden) en la tabla programacion"""
+        url_programacion = f"{config.api_url_programacion_base.rstrip('/')}/programacion-ordenes/{data.idItemOrden}"
+        payload_programacion = {
+            "resultado_ejecucion": resultado_ejecucion
+        }
+        
+        try:
+            response = requests.put(url_programacion, json=payload_programacion, timeout=10)
+            if response.status_code == 200:
+                self.logger.info('EjecutarCaso', f"✅ resultado_ejecucion actualizado: {resultado_ejecucion[:50]}...")
+            else:
+                self.logger.warning('EjecutarCaso', f"⚠️ Error actualizando resultado_ejecucion: {response.status_code}")
+        except Exception as e:
+            self.logger.warning('EjecutarCaso', f"⚠️ Error enviando resultado_ejecucion: {e}")
+    
     def _obtener_archivo_pdf(self, data) -> str:
         """
         Método para obtener el archivo PDF - puede ser sobrescrito en clases hijas.
@@ -1089,7 +1280,10 @@ class EjecutarCasosPlaywright:
             data: Datos del paciente con atributos idAtencion, idOrden, idProcedimiento
             
         Returns:
-            Ruta del archivo PDF o cadena vacía si hay error
+            Ruta del archivo PDF
+            
+        Raises:
+            PdfGeneracionError: Si el PDF no se pudo generar (estado 17)
         """
         self.logger.info('EjecutarCaso', f"📄 === GENERANDO ANEXO 3 ===")
         
@@ -1121,9 +1315,7 @@ class EjecutarCasosPlaywright:
             error_msg = f"Error al generar PDF del Anexo 3: {e}"
             self.logger.error('EjecutarCaso', f"❌ {error_msg}", e)
             self.crear_archivo_error(data, "ERROR_GENERAR_PDF", error_msg, "")
-            self.actualizar(data, "17", "")
-            self.reinicio()
-            return ""
+            raise PdfGeneracionError(error_msg, causa=e)
     
     def _ingresar_servicios(self, data):
         """
@@ -1134,7 +1326,7 @@ class EjecutarCasosPlaywright:
             data: Datos del paciente con atributo 'cups'
         """
         # Servicios (XPATH SELENIUM EXACTO)
-        clic_Boton_servicios = self.page.wait_for_selector("//button[@aria-required='true'][contains(.,'Seleccionar Servicio')]", timeout=5000)
+        clic_Boton_servicios = self.page.wait_for_selector("//button[@aria-required='true'][contains(.,'Seleccionar Servicio')]", timeout=self._t(5000))
         clic_Boton_servicios.click()
         self.logger.info('EjecutarCaso', "Clicked Servicios combo")
         
@@ -1174,18 +1366,43 @@ class EjecutarCasosPlaywright:
             numero_radicado = ''.join(numbers) if numbers else ""
             self.logger.warning('EjecutarCaso', f"⚠️ Usando fallback para número: {numero_radicado}")
         
-        # Registrar en archivo
-        with open("archivo.txt", 'a', encoding='utf-8') as archivo:
-            archivo.write(f"caso,SOLICITUD ACTIVA - {error_text},paciente,{data.identificacion},ordenCapita,{data.idItemOrden}\n")
+        # Registrar en el diario y en el registro de resultados
+        self._registrar_fase(data, 'RESULTADO', exito=True, numero=numero_radicado, mensaje=error_text)
+        self._registrar_resultado(data, RegistroResultados.SOLICITUD_ACTIVA, error_text, radicado=numero_radicado)
         
         # Cerrar modal y actualizar
-        self._hacer_clic_ok()
-        self.actualizar_con_resultado_ejecucion(data, "1", numero_radicado, error_text)
-        self.reinicio()
-        time.sleep(2)
-        self.alerta()
+        self._finalizar_radicado(
+            data, lambda: self.actualizar_con_resultado_ejecucion(data, "1", numero_radicado, error_text)
+        )
         return True  # ÉXITO: Solicitud activa tratada como completada
     
+    def _finalizar_radicado(self, data, reportar: Callable[[], Any], alerta: bool = True):
+        """
+        Cierre de un caso que el portal ya radicó: cierra el modal, reporta el
+        estado a la API y deja el formulario listo para el siguiente caso.
+        
+        Ningún fallo de estos pasos se propaga: si el caso volviera al manejo
+        de errores se sobrescribiría su estado y el worker lo reintentaría,
+        radicando el servicio dos veces. Si el navegador quedó mal, el
+        siguiente caso lo detecta al inicio (verificar_sesion_activa).
+        
+        Args:
+            data: Datos del caso
+            reportar: Llamada que reporta el resultado a la API
+            alerta: Revisar el modal de alerta tras el reinicio
+        """
+        pasos = [('cerrar modal', self._hacer_clic_ok), ('reportar estado', reportar), ('reiniciar formulario', self.reinicio)]
+        if alerta:
+            pasos.append(('revisar alerta', lambda: (time.sleep(2), self.alerta())))
+        for descripcion, paso in pasos:
+            try:
+                paso()
+            except Exception as e:
+                self.logger.warning(
+                    'EjecutarCaso',
+                    f"⚠️ Caso {', '.join(map(str, self._ids_caso(data)))} ya radicado; falló '{descripcion}' (se mantiene como exitoso): {e}"
+                )
+    
     def _cerrar_swal2(self):
         """Cerrar cualquier modal SweetAlert2 abierto usando JavaScript"""
         try:
@@ -1212,7 +1429,11 @@ class EjecutarCasosPlaywright:
             self.logger.warning('EjecutarCaso', f"⚠️ Error cerrando SweetAlert2: {e}")
     
     def reinicio(self):
-        """Método de reinicio - XPATH SELENIUM EXACTO"""
+        """
+        Deja el formulario limpio para el siguiente caso.
+        Primero intenta el reinicio suave (una sola llamada en la página +
+        centinela); si el formulario no queda listo, navega por el menú.
+        """
         try:
             self.logger.info('EjecutarCaso', "🔄 Iniciando proceso de reinicio...")
             
@@ -1220,47 +1441,86 @@ class EjecutarCasosPlaywright:
                 self.logger.error('EjecutarCaso', "❌ Sesión no activa, no se puede realizar reinicio", None)
                 raise SessionLostException("Sesión perdida durante reinicio")
             
-            # Cerrar cualquier SweetAlert2 que esté bloqueando la página
-            self._cerrar_swal2()
-            
-            time.sleep(1)
-            self.page.evaluate("window.scrollTo(0, 0);")
-            time.sleep(1)
-            
             url_actual = self.page.url
             if "portalsalud.coosalud.com" not in url_actual:
                 self.logger.error('EjecutarCaso', f"❌ No estamos en la página correcta: {url_actual}", None)
                 raise Exception("Página incorrecta para reinicio")
             
-            # XPATH SELENIUM EXACTO - con force=True para evitar overlay intercepts
-            try:
-                bonton_urg = self.page.wait_for_selector("//span[contains(.,'Reportar')]/parent::div/following-sibling::ul/li/span[contains(.,'Urgencias')]", timeout=10000)
-                try:
-                    bonton_urg.click(force=True)
-                except Exception:
-                    self.page.evaluate("""(el) => el.click()""", bonton_urg)
-                self.logger.info('EjecutarCaso', "✅ Clic en botón Urgencias")
-                time.sleep(1)
-            except Exception as e:
-                self.logger.error('EjecutarCaso', f"❌ Error haciendo clic en Urgencias: {e}", e)
-                raise
+            if self._reinicio_suave():
+                return
             
-            # XPATH SELENIUM EXACTO - con force=True para evitar overlay intercepts
-            try:
-                bonton_amb = self.page.wait_for_selector("//span[contains(.,'Reportar')]/parent::div/following-sibling::ul/li/span[contains(.,'Ambulatoria')]", timeout=10000)
-                try:
-                    bonton_amb.click(force=True)
-                except Exception:
-                    self.page.evaluate("""(el) => el.click()""", bonton_amb)
-                self.logger.info('EjecutarCaso', "✅ Clic en botón Ambulatoria")
-                self.logger.info('EjecutarCaso', "✅ Reinicio completado exitosamente")
-            except Exception as e:
-                self.logger.error('EjecutarCaso', f"❌ Error haciendo clic en Ambulatoria: {e}", e)
-                raise
+            self.logger.warning('EjecutarCaso', "⚠️ Reinicio suave no dejó el formulario listo, navegando por el menú...")
+            self._reinicio_por_menu()
         except Exception as e:
             self.logger.error('EjecutarCaso', f"❌ Error durante reinicio: {e}", e)
             raise
     
+    def _reinicio_suave(self) -> bool:
+        """
+        Reinicio en el cliente: cambio de ruta del SPA en una sola llamada y
+        espera del centinela (formulario nuevo y vacío), sin sleeps fijos.
+        
+        Returns:
+            True si el formulario quedó listo
+        """
+        inicio = time.time()
+        try:
+            resultado = self.page.evaluate(_JS_REINICIO_SUAVE)
+            if resultado != 'ok':
+                self.logger.debug('EjecutarCaso', f"Reinicio suave no aplicable: {resultado}")
+                return False
+            self.page.wait_for_function(
+                _JS_FORMULARIO_LISTO,
+                arg=self._url_formulario,
+                timeout=self._t(self.TIMEOUT_REINICIO_SUAVE)
+            )
+        except Exception as e:
+            self.logger.debug('EjecutarCaso', f"Reinicio suave falló: {e}")
+            return False
+        
+        # El formulario se volvió a montar: descartar handles anteriores
+        self.invalidar_cache()
+        self._medir_portal('reinicio', time.time() - inicio)
+        self.logger.info('EjecutarCaso', f"✅ Reinicio suave completado en {time.time() - inicio:.1f}s")
+        return True
+    
+    def _reinicio_por_menu(self):
+        """Reinicio por navegación del menú (Urgencias → Ambulatoria) - XPATH SELENIUM EXACTO"""
+        # Cerrar cualquier SweetAlert2 que esté bloqueando la página
+        self._cerrar_swal2()
+        
+        time.sleep(1)
+        self.page.evaluate("window.scrollTo(0, 0);")
+        time.sleep(1)
+        
+        # XPATH SELENIUM EXACTO - con force=True para evitar overlay intercepts
+        try:
+            bonton_urg = self.page.wait_for_selector("//span[contains(.,'Reportar')]/parent::div/following-sibling::ul/li/span[contains(.,'Urgencias')]", timeout=self._t(10000))
+            try:
+                bonton_urg.click(force=True)
+            except Exception:
+                self.page.evaluate("""(el) => el.click()""", bonton_urg)
+            self.logger.info('EjecutarCaso', "✅ Clic en botón Urgencias")
+            time.sleep(1)
+        except Exception as e:
+            self.logger.error('EjecutarCaso', f"❌ Error haciendo clic en Urgencias: {e}", e)
+            raise
+        
+        # XPATH SELENIUM EXACTO - con force=True para evitar overlay intercepts
+        try:
+            bonton_amb = self.page.wait_for_selector("//span[contains(.,'Reportar')]/parent::div/following-sibling::ul/li/span[contains(.,'Ambulatoria')]", timeout=self._t(10000))
+            try:
+                bonton_amb.click(force=True)
+            except Exception:
+                self.page.evaluate("""(el) => el.click()""", bonton_amb)
+            self.logger.info('EjecutarCaso', "✅ Clic en botón Ambulatoria")
+            # El formulario se vuelve a montar: descartar handles anteriores
+            self.invalidar_cache()
+            self.logger.info('EjecutarCaso', "✅ Reinicio completado exitosamente")
+        except Exception as e:
+            self.logger.error('EjecutarCaso', f"❌ Error haciendo clic en Ambulatoria: {e}", e)
+            raise
+    
     def alerta(self):
         """Manejar alertas"""
         componentes = ["//div/h2[contains(.,'Alerta')]"]
@@ -1284,11 +1544,11 @@ class EjecutarCasosPlaywright:
             print("📍 Paso 1: Localizando campo IPS de atención...")
             try:
                 # XPATH SELENIUM EXACTO
-                input_IPS = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'IPS de atención')]/parent::div/div/div", timeout=5000)
+                input_IPS = self.page.wait_for_selector("//label[@class='form-label'][contains(.,'IPS de atención')]/parent::div/div/div", timeout=self._t(5000))
                 print("✅ Campo encontrado por label")
             except:
                 print("⚠️ No encontrado por label, buscando por ID...")
-                input_IPS = self.page.wait_for_selector("#ipsAttentionCode", timeout=5000)
+                input_IPS = self.page.wait_for_selector("#ipsAttentionCode", timeout=self._t(5000))
                 print("✅ Campo encontrado por ID")
             
             print("🖱️ Paso 2: Haciendo clic en el campo...")
@@ -1311,7 +1571,6 @@ class EjecutarCasosPlaywright:
                 print("✅ Texto ingresado correctamente")
                 
                 print("⏳ Paso 4: Esperando dropdown...")
-                time.sleep(1)
                 
                 # Esperar opciones
                 max_intentos = 10
@@ -1358,11 +1617,18 @@ class EjecutarCasosPlaywright:
                 if nombre_ips_cfg:
                     nombres_ips.extend([n.strip() for n in nombre_ips_cfg.split("|") if n.strip()])
                 
+                # Probar primero el texto de opción que ganó en casos anteriores
+                texto_memo = self._memo_selecciones.get('ips_atencion', {}).get('candidato')
+                if texto_memo:
+                    opciones_con_texto.sort(key=lambda par: par[1] != texto_memo)
+                
+                texto_encontrado = None
                 for elemento, texto in opciones_con_texto:
                     print(f"  📝 Evaluando: '{texto}'")
                     if search_text in texto and (not nombres_ips or any(nombre in texto for nombre in nombres_ips)):
                         print(f"  ✅ Opción encontrada: '{texto}'")
                         option_encontrada = elemento
+                        texto_encontrado = texto
                         break
                 
                 if option_encontrada:
@@ -1389,6 +1655,7 @@ class EjecutarCasosPlaywright:
                     
                     if clic_exitoso:
                         self.logger.info('EjecutarCaso', "Opción seleccionada correctamente")
+                        self._memo_registrar('ips_atencion', texto_encontrado)
                         time.sleep(1.5)
                         print("🎉 ¡IPS de atención seleccionada correctamente!")
                         return True
@@ -1414,7 +1681,7 @@ class EjecutarCasosPlaywright:
         """Buscar y hacer clic en la SEDE usando el valor del JSON"""
         try:
             # XPATH SELENIUM EXACTO
-            input_ips_sede = self.page.wait_for_selector("//input[contains(@aria-owns,'sedeIpsAtencion_list')]", timeout=5000)
+            input_ips_sede = self.page.wait_for_selector("//input[contains(@aria-owns,'sedeIpsAtencion_list')]", timeout=self._t(5000))
             input_ips_sede.fill("")
             input_ips_sede.click()
             self.logger.info('EjecutarCaso', "clic ips sede")
@@ -1430,7 +1697,6 @@ class EjecutarCasosPlaywright:
             search_text = sede_atencion or sede_code or sede_nombre
             if self.helper.ingresar_texto_secuencial(input_ips_sede, search_text):
                 self.logger.info('EjecutarCaso', "Texto ingresado correctamente en IPS Sede")
-                time.sleep(2)
                 
                 candidates = []
                 if sede_atencion:
@@ -1441,13 +1707,16 @@ class EjecutarCasosPlaywright:
                     candidates.append(sede_code)
                 if sede_nombre:
                     candidates.append(sede_nombre)
+                candidates = self._memo_priorizar('ips_sede', candidates)
                 
                 option = None
+                cand_ganador = None
                 for cand in candidates:
                     option_xpath = f"//div[@class='ant-select-item-option-content'][contains(.,'{cand}')]"
                     try:
-                        option = self.page.wait_for_selector(option_xpath, timeout=5000)
+                        option = self.page.wait_for_selector(option_xpath, timeout=self._t(5000))
                         if option:
+                            cand_ganador = cand
                             break
                     except:
                         continue
@@ -1455,6 +1724,7 @@ class EjecutarCasosPlaywright:
                 if option:
                     option.click()
                     self.logger.info('EjecutarCaso', "Sede seleccionada correctamente")
+                    self._memo_registrar('ips_sede', cand_ganador)
                     return True
                 else:
                     self.logger.warning('EjecutarCaso', "No se encontró la opción de sede")
@@ -1467,26 +1737,16 @@ class EjecutarCasosPlaywright:
             return False
     
     def crear_archivo_error(self, data, tipo_error: str, descripcion_error: str, ruta_archivo: str = ""):
-        """Crear archivo de errores detallado"""
-        try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            nombre_archivo_error = f"errores_archivos_{timestamp[:8]}.txt"
-            
-            with open(nombre_archivo_error, 'a', encoding='utf-8') as archivo:
-                archivo.write(f"=== ERROR DE ARCHIVO ===\n")
-                archivo.write(f"Timestamp: {datetime.datetime.now()}\n")
-                archivo.write(f"Tipo Error: {tipo_error}\n")
-                archivo.write(f"Descripción: {descripcion_error}\n")
-                archivo.write(f"Paciente ID: {data.identificacion}\n")
-                archivo.write(f"Orden Capita: {data.facturaEvento}\n")
-                archivo.write(f"URL API Original: {data.urlOrdenMedica}\n")
-                archivo.write(f"Ruta Archivo Buscada: {ruta_archivo}\n")
-                archivo.write(f"Ruta Base Configurada: {config.get('PDF_BASE_PATH', '')}\n")
-                archivo.write("="*50 + "\n\n")
-            
-            self.logger.info('EjecutarCaso', f"Error registrado en: {nombre_archivo_error}")
-        except Exception as e:
-            self.logger.error('EjecutarCaso', f"Error creando archivo de errores: {e}", e)
+        """Registra un error de archivo (PDF) en el registro de resultados"""
+        detalle = (
+            f"{tipo_error}: {descripcion_error}\n"
+            f"Orden Capita: {getattr(data, 'facturaEvento', '')}\n"
+            f"URL API Original: {getattr(data, 'urlOrdenMedica', '')}\n"
+            f"Ruta Archivo Buscada: {ruta_archivo}\n"
+            f"Ruta Base Configurada: {config.get('PDF_BASE_PATH', '')}"
+        )
+        self._registrar_resultado(data, RegistroResultados.ERROR_ARCHIVO, detalle, radicado='')
+        self.logger.info('EjecutarCaso', f"Error de archivo registrado en resultados: {tipo_error}")
     
     def _hacer_clic_ok(self) -> bool:
         """Método para hacer clic en OK - con force y JS fallback"""
@@ -1499,7 +1759,7 @@ class EjecutarCasosPlaywright:
             
             for selector in selectors:
                 try:
-                    boton = self.page.wait_for_selector(selector, timeout=5000)
+                    boton = self.page.wait_for_selector(selector, timeout=self._t(5000))
                     try:
                         boton.click(force=True)
                     except Exception:
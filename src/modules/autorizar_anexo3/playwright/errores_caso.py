@@ -0,0 +1,184 @@
+"""
+Taxonomía de errores de un caso (Anexo 3 y Laboratorio).
+
+Cada tipo sabe qué estadoCaso se reporta a la API y si la orden vale la pena
+reintentarla. Los puntos que detectan el fallo lanzan el tipo concreto y
+clasificar_error() convierte cualquier otra excepción (Playwright, requests,
+sistema de archivos) en un ErrorCaso en un solo lugar.
+
+Regla de reintento: solo se reintenta lo que falla ANTES de enviar el
+formulario y puede resolverse solo (sesión, timeouts, red, render lento).
+Un valor que no está en las listas del portal (diagnóstico, causa, CUPS)
+no cambia reintentando. Un rechazo del portal o un resultado indeterminado
+no se reintentan para no radicar dos veces.
+"""
+from typing import Optional
+
+import requests
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+
+
+class ErrorCaso(Exception):
+    """Error de un caso con su estadoCaso y política de reintento (base: no clasificado)"""
+
+    estado = 11
+    reintentable = False
+    espera_reintento = 60  # Segundos base del backoff (ver ProgramadorReintentos)
+    etiqueta = "ERROR NO CLASIFICADO"
+    icono = "❓"
+
+    def __init__(self, mensaje: str = "", causa: Optional[BaseException] = None):
+        """
+        Args:
+            mensaje: Detalle del error (por defecto la etiqueta del tipo)
+            causa: Excepción original, si el error viene de clasificar otra
+        """
+        self.mensaje = mensaje or self.etiqueta
+        self.causa = causa
+        super().__init__(self.mensaje)
+
+
+class DocumentoInvalidoError(ErrorCaso):
+    """El portal no encontró al paciente con el tipo/número de documento"""
+    estado = 4
+    etiqueta = "TIPO DE DOCUMENTO INCORRECTO"
+    icono = "🪪"
+
+
+class PdfFaltanteError(ErrorCaso):
+    """El PDF de la orden no existe o no está configurado"""
+    estado = 5
+    etiqueta = "ARCHIVO PDF NO ENCONTRADO"
+    icono = "📄"
+
+
+class PdfGeneracionError(ErrorCaso):
+    """No se pudo generar el PDF del Anexo 3 (API/servicio de PDF)"""
+    estado = 17
+    reintentable = True
+    espera_reintento = 60
+    etiqueta = "ERROR GENERANDO PDF"
+    icono = "📄"
+
+
+class RechazoPortalError(ErrorCaso):
+    """El portal respondió 'Error' al guardar (duplicado, ya reportado, ...)"""
+    estado = 3  # Histórico: el rechazo se reporta con estado 3 sin número
+    etiqueta = "RECHAZO DEL PORTAL"
+    icono = "⛔"
+
+
+class IpsNoEncontradaError(ErrorCaso):
+    """No se encontró la IPS (remitente o de atención) en los combos del portal"""
+    estado = 11
+    etiqueta = "IPS NO ENCONTRADA"
+    icono = "🏥"
+
+
+class SesionPerdidaError(ErrorCaso):
+    """La página/contexto del navegador se cerró o la sesión expiró"""
+    estado = 12
+    reintentable = True
+    espera_reintento = 20
+    etiqueta = "SESIÓN DEL NAVEGADOR PERDIDA"
+    icono = "❌"
+
+
+class TimeoutPortalError(ErrorCaso):
+    """Un elemento o respuesta del portal no llegó a tiempo"""
+    estado = 13
+    reintentable = True
+    espera_reintento = 60
+    etiqueta = "TIMEOUT - ELEMENTO NO RESPONDIÓ A TIEMPO"
+    icono = "⏰"
+
+
+class ElementoNoEncontradoError(ErrorCaso):
+    """Un campo o botón del formulario no apareció o no aceptó el valor"""
+    estado = 14
+    reintentable = True
+    espera_reintento = 30
+    etiqueta = "ELEMENTO NO ENCONTRADO EN LA PÁGINA"
+    icono = "🎯"
+
+
+class OpcionNoEncontradaError(ErrorCaso):
+    """El dropdown filtró el valor del caso (diagnóstico, causa, CUPS) y no lo ofrece"""
+    estado = 14
+    etiqueta = "OPCIÓN NO EXISTE EN LA LISTA DEL PORTAL"
+    icono = "🔎"
+
+
+class ElementoObsoletoError(ErrorCaso):
+    """El elemento se desmontó del DOM (la página se actualizó)"""
+    estado = 15
+    reintentable = True
+    espera_reintento = 15
+    etiqueta = "ELEMENTO OBSOLETO - PÁGINA SE ACTUALIZÓ"
+    icono = "🔄"
+
+
+class ConexionPortalError(ErrorCaso):
+    """Sin conexión con el portal o la API"""
+    estado = 16
+    reintentable = True
+    espera_reintento = 120
+    etiqueta = "ERROR DE CONEXIÓN"
+    icono = "🌐"
+
+
+class PermisosError(ErrorCaso):
+    """Acceso denegado (archivos locales o portal)"""
+    estado = 18
+    etiqueta = "ERROR DE PERMISOS O ACCESO DENEGADO"
+    icono = "🔒"
+
+
+class ResultadoIndeterminadoError(ErrorCaso):
+    """Se hizo clic en Guardar pero no se pudo leer la respuesta del portal"""
+    estado = 19
+    etiqueta = "NO SE PUDO DETERMINAR EL RESULTADO"
+    icono = "❔"
+
+
+# Playwright solo expone Error y TimeoutError: el motivo de un Error viene
+# en el mensaje del protocolo, así que se distingue aquí y en ningún otro lado
+_MARCAS_SESION = ('has been closed', 'target closed', 'browser closed', 'connection closed', 'crashed')
+_MARCAS_OBSOLETO = ('not attached to the dom', 'element is not attached', 'detached')
+_MARCAS_RED = ('net::err_',)
+
+
+def clasificar_error(error: BaseException) -> ErrorCaso:
+    """
+    Convierte cualquier excepción de un caso en su ErrorCaso.
+
+    Args:
+        error: Excepción capturada
+
+    Returns:
+        El mismo error si ya es un ErrorCaso, o el tipo que corresponde
+    """
+    if isinstance(error, ErrorCaso):
+        return error
+
+    mensaje = str(error)
+    if isinstance(error, PlaywrightTimeout):
+        return TimeoutPortalError(mensaje, causa=error)
+    if isinstance(error, PlaywrightError):
+        texto = mensaje.lower()
+        if any(marca in texto for marca in _MARCAS_SESION):
+            return SesionPerdidaError(mensaje, causa=error)
+        if any(marca in texto for marca in _MARCAS_OBSOLETO):
+            return ElementoObsoletoError(mensaje, causa=error)
+        if any(marca in texto for marca in _MARCAS_RED):
+            return ConexionPortalError(mensaje, causa=error)
+        return ErrorCaso(mensaje, causa=error)
+    if isinstance(error, requests.Timeout):
+        return TimeoutPortalError(mensaje, causa=error)
+    if isinstance(error, (requests.ConnectionError, ConnectionError)):
+        return ConexionPortalError(mensaje, causa=error)
+    if isinstance(error, PermissionError):
+        return PermisosError(mensaje, causa=error)
+    if isinstance(error, FileNotFoundError):
+        return PdfFaltanteError(mensaje, causa=error)
+    return ErrorCaso(mensaje, causa=error)
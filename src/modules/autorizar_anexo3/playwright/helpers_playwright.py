@@ -2,14 +2,190 @@
 Helpers y utilidades para Playwright
 Equivalente a SeleniumHelper pero optimizado para Playwright
 """
+import itertools
 import time
-from typing import Optional
-from playwright.sync_api import Page, Locator, TimeoutError as PlaywrightTimeout
+from typing import Dict, List, Optional, Tuple
+from playwright.sync_api import Page, Locator, ElementHandle, TimeoutError as PlaywrightTimeout
+
+
+# Búsqueda en el virtual list de Ant Design en una sola llamada a evaluate.
+# Toma el dropdown visible, recorre la lista desplazándose una "pantalla"
+# (clientHeight) por paso y espera el re-render de rc-virtual-list antes de
+# volver a leer las opciones. Si el combo tiene filtro escrito, la lista ya
+# viene filtrada y normalmente se resuelve en el primer paso.
+_JS_BUSCAR_OPCION_VIRTUAL = """
+async ([texto, exacto, offsetInicial, maxPasos]) => {
+    const holders = Array.from(document.querySelectorAll('.ant-select-dropdown .rc-virtual-list-holder'))
+        .filter(h => h.offsetParent !== null);
+    const holder = holders.length ? holders[holders.length - 1] : null;
+    const vistas = new Set();
+    const esperarRender = () => new Promise(r => requestAnimationFrame(() => setTimeout(r, 40)));
+    const buscar = () => {
+        const raiz = holder || document;
+        for (const op of raiz.querySelectorAll('.ant-select-item-option-content')) {
+            const t = (op.textContent || '').trim();
+            if (!t) continue;
+            vistas.add(t);
+            if (exacto ? t === texto : t.includes(texto)) return op;
+        }
+        return null;
+    };
+    const resultado = (el) => ({
+        el: el,
+        offset: el && holder ? holder.scrollTop : (el ? 0 : null),
+        vistas: Array.from(vistas).slice(0, 50)
+    });
+
+    if (!holder) return resultado(buscar());
+
+    if (offsetInicial !== null && offsetInicial !== undefined) {
+        holder.scrollTop = offsetInicial;
+        await esperarRender();
+        const el = buscar();
+        if (el) return resultado(el);
+    }
+
+    if (holder.scrollTop !== 0) {
+        holder.scrollTop = 0;
+        await esperarRender();
+    }
+    for (let paso = 0; paso < maxPasos; paso++) {
+        const el = buscar();
+        if (el) return resultado(el);
+        const anterior = holder.scrollTop;
+        // Se deja una fila de solape para no saltarse opciones en el borde
+        holder.scrollTop = anterior + Math.max(holder.clientHeight - 32, 32);
+        await esperarRender();
+        if (holder.scrollTop === anterior) break;  // Final de la lista
+    }
+    return resultado(buscar());
+}
+"""
+
+# Llenado de varios inputs planos en una sola llamada a evaluate.
+# Usa el setter nativo de HTMLInputElement + eventos input/change para que
+# React (antd Form) registre el cambio igual que si se hubiera tecleado.
+# Reglas de conservación:
+#   'nunca'        -> siempre se escribe el valor
+#   'diez_digitos' -> se conserva si el valor actual tiene 10 caracteres
+#   'con_valor'    -> se conserva si el campo ya tiene cualquier valor
+_JS_LLENAR_CAMPOS = """
+(campos) => {
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const resultados = {};
+    for (const c of campos) {
+        try {
+            const el = document.querySelector(c.selector);
+            if (!el) { resultados[c.clave] = {estado: 'no_encontrado'}; continue; }
+            const anterior = el.value || '';
+            const conservar = (c.conservar === 'diez_digitos' && anterior.length === 10)
+                || (c.conservar === 'con_valor' && anterior !== '');
+            if (conservar) {
+                resultados[c.clave] = {estado: 'conservado', anterior: anterior, final: anterior};
+                continue;
+            }
+            el.focus();
+            setter.call(el, c.valor);
+            el.dispatchEvent(new Event('input', {bubbles: true}));
+            el.dispatchEvent(new Event('change', {bubbles: true}));
+            el.blur();
+            resultados[c.clave] = {
+                estado: el.value === c.valor ? 'llenado' : 'no_aplicado',
+                anterior: anterior,
+                final: el.value
+            };
+        } catch (e) {
+            resultados[c.clave] = {estado: 'error', error: String(e)};
+        }
+    }
+    return resultados;
+}
+"""
+
+# El placeholder "sin resultados" aparece antes de que llegue la respuesta de
+# la búsqueda remota: solo se acepta como resultado cuando lleva ESTABLE_MS
+# visible sin spinner. El estado vive en window bajo un token por llamada para
+# que una espera anterior no adelante la siguiente.
+_JS_VACIO_ESTABLE = """
+const vacioEstable = (d, token, estableMs) => {
+    const marca = window.__bootOroVacio;
+    const cargando = d.querySelector('.ant-spin-spinning, .ant-select-item-option-loading, .anticon-loading');
+    if (cargando || !d.querySelector('.ant-select-item-empty, .ant-empty')) {
+        window.__bootOroVacio = {token: token, desde: null};
+        return false;
+    }
+    if (!marca || marca.token !== token || marca.desde === null) {
+        window.__bootOroVacio = {token: token, desde: performance.now()};
+        return false;
+    }
+    return performance.now() - marca.desde >= estableMs;
+};
+"""
+
+# Detecta si el filtro del ant-select ya reaccionó al texto escrito:
+# 'opcion' si hay una opción visible que contiene el texto, 'vacio' si el
+# dropdown muestra "sin resultados" de forma estable, false mientras no haya reaccionado.
+_JS_FILTRO_REACCIONO = """
+([texto, token, estableMs]) => {
+""" + _JS_VACIO_ESTABLE + """
+    const buscado = (texto || '').toLowerCase();
+    const dropdowns = Array.from(document.querySelectorAll('.ant-select-dropdown'))
+        .filter(d => d.offsetParent !== null && !d.classList.contains('ant-select-dropdown-hidden'));
+    for (const d of dropdowns) {
+        for (const op of d.querySelectorAll('.ant-select-item-option-content')) {
+            if ((op.textContent || '').toLowerCase().includes(buscado)) return 'opcion';
+        }
+        if (vacioEstable(d, token, estableMs)) return 'vacio';
+    }
+    return false;
+}
+"""
+
+# Matcher de opción CUPS con semántica de regex ^CUPS-[^0-9]: acepta
+# "890350-CONSULTA..." y descarta variantes numéricas ("890350-01 ...").
+# Resuelve en cuanto hay coincidencia; si el dropdown ya está filtrado al
+# código y ninguna opción cumple, falla de una vez con las candidatas. El
+# "sin resultados" solo cuenta si se mantiene (ver _JS_VACIO_ESTABLE).
+_JS_OPCION_CUPS = r"""
+([codigo, token, estableMs]) => {
+""" + _JS_VACIO_ESTABLE + r"""
+    const escapado = codigo.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    const patron = new RegExp('^' + escapado + '-[^0-9]');
+    const dropdowns = Array.from(document.querySelectorAll('.ant-select-dropdown'))
+        .filter(d => d.offsetParent !== null && !d.classList.contains('ant-select-dropdown-hidden'));
+    const textos = [];
+    for (const d of dropdowns) {
+        for (const op of d.querySelectorAll('.ant-select-item-option-content')) {
+            const t = (op.textContent || '').trim();
+            if (!t) continue;
+            if (patron.test(t)) return {estado: 'ok', el: op, opciones: []};
+            textos.push(t);
+        }
+        if (!textos.length && vacioEstable(d, token, estableMs)) {
+            return {estado: 'vacio', el: null, opciones: []};
+        }
+    }
+    if (textos.length && textos.every(t => t.startsWith(codigo + '-'))) {
+        return {estado: 'sin_coincidencia', el: null, opciones: textos};
+    }
+    return false;
+}
+"""
+
+_JS_LISTAR_OPCIONES = """
+() => Array.from(document.querySelectorAll('.ant-select-dropdown .ant-select-item-option-content'))
+    .filter(op => op.offsetParent !== null)
+    .map(op => (op.textContent || '').trim())
+    .filter(t => t)
+"""
 
 
 class PlaywrightHelper:
     """Clase de utilidades para operaciones comunes con Playwright"""
     
+    VACIO_ESTABLE_MS = 500  # Tiempo que "sin resultados" debe mantenerse para darlo por cierto
+    _tokens = itertools.count(1)
+    
     def __init__(self, page: Page):
         """
         Args:
@@ -181,60 +357,94 @@ class PlaywrightHelper:
         except:
             return False
     
-    def scroll_list_and_find(self, option_text: str, max_attempts: int = 30, scroll_increment: int = 100) -> Optional[Locator]:
+    def buscar_opcion_virtual(
+        self,
+        option_text: str,
+        exacto: bool = True,
+        offset_inicial: Optional[int] = None,
+        max_pasos: int = 60
+    ) -> Tuple[Optional[ElementHandle], Optional[int], List[str]]:
         """
-        Busca una opción en un virtual list con scroll (para Ant Design).
+        Busca una opción en el virtual list del dropdown visible con una sola
+        llamada a evaluate (sin round-trips por opción ni sleeps en Python).
         
         Args:
             option_text: Texto de la opción a buscar
-            max_attempts: Intentos máximos de scroll
-            scroll_increment: Píxeles por scroll
+            exacto: True compara texto completo, False usa "contiene"
+            offset_inicial: scrollTop donde probar primero (ej. desde un cache)
+            max_pasos: Máximo de desplazamientos de una pantalla
         
         Returns:
-            Locator de la opción si se encuentra, None si no
+            (handle de la opción o None, scrollTop donde se encontró, opciones vistas)
         """
-        attempts = 0
-        found_options = set()
+        resultado = self.page.evaluate_handle(
+            _JS_BUSCAR_OPCION_VIRTUAL,
+            [option_text, exacto, offset_inicial, max_pasos]
+        )
+        try:
+            option = resultado.get_property('el').as_element()
+            offset = resultado.get_property('offset').json_value()
+            vistas = resultado.get_property('vistas').json_value() or []
+        finally:
+            resultado.dispose()
+        return option, offset, vistas
+    
+    def scroll_list_and_find(self, option_text: str, max_attempts: int = 60) -> Optional[ElementHandle]:
+        """
+        Busca una opción en un virtual list con scroll (para Ant Design).
         
-        # XPath para opciones de Ant Design
-        options_xpath = "//div[@class='ant-select-item-option-content']"
+        Args:
+            option_text: Texto de la opción a buscar (coincidencia parcial)
+            max_attempts: Máximo de desplazamientos de una pantalla
         
-        while attempts < max_attempts:
-            # Obtener opciones actuales
-            options = self.page.locator(options_xpath).all()
-            
-            for option in options:
-                try:
-                    text = option.text_content()
-                    if text and option_text in text:
-                        # Encontrada!
-                        return option
-                    if text:
-                        found_options.add(text)
-                except:
-                    continue
-            
-            # Scroll down en el dropdown
+        Returns:
+            Handle de la opción si se encuentra, None si no
+        """
+        try:
+            option, _, vistas = self.buscar_opcion_virtual(option_text, exacto=False, max_pasos=max_attempts)
+        except Exception as e:
+            print(f"Error buscando opción '{option_text}': {e}")
+            return None
+        
+        if option is None:
+            print(f"Opción '{option_text}' no encontrada en la lista")
+            print(f"Opciones vistas: {vistas[:10]}...")
+        return option
+    
+    def buscar_opcion_cups(
+        self, codigo_cups: str, timeout: int = 8000
+    ) -> Tuple[Optional[ElementHandle], List[str], str]:
+        """
+        Busca la opción exacta de un CUPS (^CUPS-[^0-9]) en el dropdown visible,
+        evaluando todas las opciones en la página en cada sondeo.
+        
+        Args:
+            codigo_cups: Código CUPS (ej: "890350")
+            timeout: Espera máxima en milisegundos
+        
+        Returns:
+            (handle de la opción o None, opciones candidatas vistas si no hubo
+            coincidencia, estado). Estado: 'ok', 'vacio' o 'sin_coincidencia'
+            (el portal no tiene el CUPS) o 'timeout' (el dropdown no respondió)
+        """
+        codigo_cups = str(codigo_cups).strip()
+        try:
+            resultado = self.page.wait_for_function(
+                _JS_OPCION_CUPS, arg=[codigo_cups, next(self._tokens), self.VACIO_ESTABLE_MS], timeout=timeout
+            )
+        except PlaywrightTimeout:
             try:
-                # Buscar el contenedor del dropdown
-                dropdown = self.page.locator("//div[contains(@class,'ant-select-dropdown')]").first
-                if dropdown.count() > 0:
-                    # Scroll usando evaluate
-                    self.page.evaluate(f"""
-                        const dropdown = document.querySelector('.ant-select-dropdown .rc-virtual-list-holder');
-                        if (dropdown) {{
-                            dropdown.scrollTop += {scroll_increment};
-                        }}
-                    """)
-                    time.sleep(0.3)
-            except:
-                pass
-            
-            attempts += 1
+                return None, self.page.evaluate(_JS_LISTAR_OPCIONES), 'timeout'
+            except Exception:
+                return None, [], 'timeout'
         
-        print(f"Opción '{option_text}' no encontrada después de {attempts} intentos")
-        print(f"Opciones vistas: {list(found_options)[:10]}...")
-        return None
+        try:
+            option = resultado.get_property('el').as_element()
+            opciones = resultado.get_property('opciones').json_value() or []
+            estado = resultado.get_property('estado').json_value()
+        finally:
+            resultado.dispose()
+        return option, opciones, estado
     
     def execute_script(self, script: str, *args):
         """
@@ -279,19 +489,76 @@ class PlaywrightHelper:
                 print(f"Error en fallback de ingresar_texto: {e2}")
                 return False
     
-    def ingresar_texto_secuencial(self, element, texto: str, delay: int = 50) -> bool:
+    def llenar_campos_bulk(self, campos: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
         """
-        Ingresa texto carácter por carácter (compatible con Selenium).
-        Útil para campos ant-select y búsquedas dinámicas.
+        Lee y llena varios inputs planos en una sola llamada a evaluate.
+        
+        Args:
+            campos: Lista de dicts con 'clave', 'selector' (CSS), 'valor' y
+                'conservar' ('nunca', 'diez_digitos' o 'con_valor')
+        
+        Returns:
+            Dict clave -> {'estado', 'anterior', 'final'}. Estados posibles:
+            'llenado', 'conservado', 'no_encontrado', 'no_aplicado' y 'error'.
+        """
+        payload = [
+            {
+                'clave': c['clave'],
+                'selector': c['selector'],
+                'valor': str(c['valor']),
+                'conservar': c.get('conservar', 'nunca')
+            }
+            for c in campos
+        ]
+        return self.page.evaluate(_JS_LLENAR_CAMPOS, payload)
+    
+    def esperar_filtro_dropdown(self, texto: str, timeout: int = 3000) -> Optional[str]:
+        """
+        Espera a que el dropdown visible reaccione al texto filtrado.
+        
+        Args:
+            texto: Texto que debe contener alguna opción
+            timeout: Timeout en milisegundos
+        
+        Returns:
+            'opcion', 'vacio' o None si el filtro no reaccionó
+        """
+        try:
+            handle = self.page.wait_for_function(
+                _JS_FILTRO_REACCIONO, arg=[str(texto), next(self._tokens), self.VACIO_ESTABLE_MS], timeout=timeout
+            )
+            return handle.json_value()
+        except PlaywrightTimeout:
+            return None
+    
+    def ingresar_texto_secuencial(
+        self,
+        element,
+        texto: str,
+        delay: int = 50,
+        esperar_opcion: Optional[str] = None,
+        modo_rapido: bool = True,
+        timeout_filtro: int = 3000
+    ) -> bool:
+        """
+        Ingresa texto en un campo de búsqueda ant-select (compatible con Selenium).
+        
+        En modo rápido inserta el texto de una vez y espera a que el dropdown
+        muestre la opción filtrada. Solo si el filtro no reacciona se vuelve a
+        escribir carácter por carácter.
         
         Args:
             element: Elemento donde ingresar texto
             texto: Texto a ingresar
-            delay: Delay entre caracteres en milisegundos
+            delay: Delay entre caracteres en milisegundos (modo carácter por carácter)
+            esperar_opcion: Texto de la opción a esperar (por defecto el mismo texto)
+            modo_rapido: False fuerza el ingreso carácter por carácter
+            timeout_filtro: Espera máxima de la reacción del filtro en milisegundos
         
         Returns:
             True si tuvo éxito
         """
+        texto = str(texto)
         try:
             # Click en el elemento
             element.click()
@@ -300,10 +567,23 @@ class PlaywrightHelper:
             self.page.keyboard.press('Control+A')
             self.page.keyboard.press('Delete')
             
+            if modo_rapido:
+                self.page.keyboard.insert_text(texto)
+                if self.esperar_filtro_dropdown(esperar_opcion or texto, timeout=timeout_filtro):
+                    return True
+                
+                # El filtro no reaccionó al insert: reescribir tecla a tecla
+                print(f"Filtro sin reacción para '{texto}', reintentando carácter por carácter")
+                self.page.keyboard.press('Control+A')
+                self.page.keyboard.press('Delete')
+            
             # Ingresar carácter por carácter
-            for char in str(texto):
+            for char in texto:
                 self.page.keyboard.type(char, delay=delay)
             
+            if modo_rapido:
+                self.esperar_filtro_dropdown(esperar_opcion or texto, timeout=timeout_filtro)
+            
             return True
             
         except Exception as e:
@@ -316,7 +596,7 @@ class PlaywrightHelper:
                         el.dispatchEvent(new Event('input', { bubbles: true }));
                         el.dispatchEvent(new Event('change', { bubbles: true }));
                     }""",
-                    [element, str(texto)]
+                    [element, texto]
                 )
                 return True
             except Exception as js_error:
@@ -2,23 +2,29 @@
 Ingreso de Items (CUPS) con Playwright
 """
 import time
+from typing import Optional
 from playwright.sync_api import Page
 from utils.logger import AdvancedLogger
 from modules.autorizar_anexo3.playwright.helpers_playwright import PlaywrightHelper
+from modules.autorizar_anexo3.playwright.errores_caso import ElementoNoEncontradoError, OpcionNoEncontradaError
 
 
 class IngresoItemsPlaywright:
     """Servicio para ingresar items CUPS"""
     
-    def __init__(self, page: Page, logger: AdvancedLogger):
+    # Espera máxima de la opción del CUPS en el dropdown (ms)
+    TIMEOUT_OPCION_CUPS = 8000
+    
+    def __init__(self, page: Page, logger: AdvancedLogger, helper: Optional[PlaywrightHelper] = None):
         """
         Args:
             page: Página de Playwright
             logger: Logger
+            helper: PlaywrightHelper compartido (opcional)
         """
         self.page = page
         self.logger = logger
-        self.helper = PlaywrightHelper(page)
+        self.helper = helper or PlaywrightHelper(page)
     
     def IntemsAndFor(self, data):
         """
@@ -56,61 +62,15 @@ class IngresoItemsPlaywright:
             self.helper.ingresar_texto(input_cups, str(codigo_cups))
             self.logger.info('IngresoItems', f"✓ Código ingresado: {codigo_cups}")
             
-            # Espera para que aparezcan las opciones
-            time.sleep(1.5)
-            
-            # Paso 4: Buscar opción en dropdown con manejo robusto (XPATH EXACTO - EXCLUYE VARIANTES NUMÉRICAS)
+            # Paso 4: Buscar opción exacta (^CUPS-[^0-9], excluye variantes numéricas como 902210-1)
             self.logger.info('IngresoItems', "Paso 4: Buscando opción en dropdown...")
-            # XPath que excluye variantes con sufijos numéricos (ej: 902210-1, 890282-01, etc.)
-            dynamic_xpath_dx = (
-                f"//div[@class='ant-select-item-option-content']"
-                f"[starts-with(text(),'{codigo_cups}-') "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'0')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'1')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'2')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'3')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'4')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'5')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'6')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'7')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'8')) "
-                f"and not(starts-with(substring-after(text(),'{codigo_cups}-'),'9'))]"
-            )
-            self.logger.info('IngresoItems', f"XPath de búsqueda (sin variantes numéricas): {dynamic_xpath_dx}")
-            
-            try:
-                # Primer intento con timeout estándar
-                clic_Dx = self.page.wait_for_selector(dynamic_xpath_dx, timeout=15000)
-                self.logger.info('IngresoItems', "✓ Opción encontrada en primer intento")
-                
-            except Exception as timeout_error:
-                self.logger.info('IngresoItems', f"⚠️ Timeout en primer intento para CUPS {codigo_cups}")
-                self.logger.info('IngresoItems', "Intentando scroll y segundo intento...")
-                
-                # Verificar qué opciones están disponibles
-                opciones_disponibles = self.page.query_selector_all("//div[@class='ant-select-item-option-content']")
-                self.logger.info('IngresoItems', f"Opciones disponibles en dropdown: {len(opciones_disponibles)}")
-                
-                for i, opcion in enumerate(opciones_disponibles[:3]):  # Mostrar solo las primeras 3
-                    try:
-                        texto_opcion = opcion.text_content().strip()
-                        self.logger.info('IngresoItems', f"Opción {i+1}: '{texto_opcion}'")
-                    except Exception as opcion_error:
-                        self.logger.info('IngresoItems', f"Error al leer opción {i+1}: {opcion_error}")
-                
-                # Hacer scroll para cargar más opciones
-                self.page.evaluate("window.scrollTo(0, 0);")
-                time.sleep(1)
-                self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                
-                # Segundo intento con timeout más largo
-                try:
-                    clic_Dx = self.page.wait_for_selector(dynamic_xpath_dx, timeout=25000)
-                    self.logger.info('IngresoItems', "✓ Opción encontrada en segundo intento")
-                except:
-                    self.logger.error('IngresoItems', f"❌ Error definitivo: No se encontró opción para CUPS {codigo_cups}")
-                    raise Exception(f"No se encontró opción para CUPS {codigo_cups}")
+            clic_Dx, candidatas, estado = self.helper.buscar_opcion_cups(codigo_cups, timeout=self.TIMEOUT_OPCION_CUPS)
+            if not clic_Dx:
+                self.logger.error('IngresoItems', f"❌ No se encontró opción para CUPS {codigo_cups} ({estado}). Opciones disponibles: {candidatas[:10]}")
+                if estado == 'timeout':
+                    raise ElementoNoEncontradoError(f"El dropdown no mostró opciones para CUPS {codigo_cups}")
+                raise OpcionNoEncontradaError(f"El CUPS {codigo_cups} no está en la lista del portal")
+            self.logger.info('IngresoItems', "✓ Opción encontrada")
             
             # Paso 5: Hacer clic en la opción
             self.logger.info('IngresoItems', "Paso 5: Haciendo clic en opción...")
@@ -3,24 +3,59 @@ Servicio principal de Playwright
 Manejo de navegador, contexto y sesión persistente
 """
 import os
+import random
+import shutil
 import time
 import sys
+import zipfile
 from pathlib import Path
 from typing import Optional
 from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Playwright
+from config.config import Config
 from utils.logger import AdvancedLogger
 from utils.paths import get_data_path
+from modules.autorizar_anexo3.playwright.vista_en_vivo import VistaEnVivo
+from modules.autorizar_anexo3.playwright.bloqueo_recursos import BloqueadorRecursos
+
+
+# En headless se completan señales que el portal (y reCAPTCHA) ven distintas
+# a las de un navegador con ventana
+_JS_ANTI_AUTOMATIZACION = """
+Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+Object.defineProperty(navigator, 'languages', { get: () => ['es-CO', 'es', 'en'] });
+if (!window.chrome) { window.chrome = { runtime: {} }; }
+"""
 
 
 class PlaywrightService:
     """Servicio para gestionar Playwright con sesión persistente"""
     
-    def __init__(self, logger: Optional[AdvancedLogger] = None):
+    def __init__(self, logger: Optional[AdvancedLogger] = None, vista_en_vivo: Optional[VistaEnVivo] = None):
         """
         Args:
             logger: Instancia del logger
+            vista_en_vivo: Buzón donde publicar cuadros para la vista en vivo de la UI
         """
         self.logger = logger or AdvancedLogger()
+        self.vista_en_vivo = vista_en_vivo
+        self._cdp_vista = None  # Sesión CDP del screencast (solo mientras la vista está activa)
+        
+        # Modo de ejecución del navegador (ver Config: NAVEGADOR_*)
+        config = Config()
+        self.headless = config.navegador_headless
+        self.viewport_ancho, self.viewport_alto = config.navegador_viewport
+        self.user_agent = config.navegador_user_agent
+        
+        # Filtro de recursos (imágenes, fuentes, analítica...) con caché de JS/CSS
+        self.bloqueador: Optional[BloqueadorRecursos] = None
+        if config.navegador_bloquear_recursos:
+            self.bloqueador = BloqueadorRecursos(
+                self.logger,
+                tipos_bloqueados=config.navegador_tipos_bloqueados,
+                dominios_bloqueados=config.navegador_dominios_bloqueados,
+                permitidos=config.navegador_recursos_permitidos,
+                cache_max_mb=config.navegador_cache_recursos_mb
+            )
         
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
@@ -34,6 +69,18 @@ class PlaywrightService:
         
         self.screenshots_dir = get_data_path("screenshots")
         self.screenshots_dir.mkdir(exist_ok=True)
+        
+        # Trazas por caso (ver Config: TRAZAS_*): el tracing queda encendido en el
+        # contexto y cada caso abre un chunk nuevo; el chunk solo se guarda si el
+        # caso falla o es lento, si no se descarta (ventana de un caso)
+        self.trazas_activas = config.trazas_activas
+        self.trazas_muestreo = config.trazas_muestreo
+        self.trazas_lento_seg = config.trazas_lento_seg
+        self.trazas_capturas = config.trazas_capturas
+        self.trazas_max = config.trazas_max
+        self.trazas_dir = self.screenshots_dir / "trazas"
+        self._tracing_iniciado = False
+        self._inicio_traza: Optional[float] = None  # monotonic del chunk del caso en curso
     
     def iniciar_navegador(self, reutilizar_sesion: bool = True) -> bool:
         """
@@ -55,10 +102,16 @@ class PlaywrightService:
             self.logger.debug('Playwright', 'Playwright iniciado')
             
             # 2. Lanzar navegador
+            # Con ventana: maximizada. Headless: tamaño fijo igual al viewport
+            if self.headless:
+                arg_ventana = f'--window-size={self.viewport_ancho},{self.viewport_alto}'
+                self.logger.info('Playwright', f'👻 Modo headless ({self.viewport_ancho}x{self.viewport_alto})')
+            else:
+                arg_ventana = '--start-maximized'
             launch_options = {
-                'headless': False,
+                'headless': self.headless,
                 'args': [
-                    '--start-maximized',
+                    arg_ventana,
                     '--disable-blink-features=AutomationControlled',
                     '--disable-web-security',
                     '--disable-features=IsolateOrigins,site-per-process',
@@ -73,7 +126,7 @@ class PlaywrightService:
             # Cadena de fallback: Chromium empaquetado → Chromium instalado → Chrome → Edge
             navegador_lanzado = False
             
-            # 1. Si estamos en .exe, buscar Chromium empaquetado en sys._MEIPASS
+            # 1. Si estamos en .exe, buscar Chromium en la caché junto al .exe o en sys._MEIPASS
             if getattr(sys, 'frozen', False):
                 bundled_path = self._find_bundled_chromium()
                 if bundled_path:
@@ -132,14 +185,16 @@ class PlaywrightService:
         
         try:
             # 3. Crear contexto con user agent real
-            # viewport=None permite que --start-maximized funcione correctamente
-            # y la página se adapte al tamaño real de la ventana del navegador
             self.context = self.browser.new_context(
-                viewport=None,
-                no_viewport=True,
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                ignore_https_errors=True
+                user_agent=self.user_agent,
+                ignore_https_errors=True,
+                **self._opciones_viewport()
             )
+            if self.headless:
+                self.context.add_init_script(_JS_ANTI_AUTOMATIZACION)
+            if self.bloqueador:
+                self.bloqueador.instalar(self.context)
+            self._iniciar_tracing()
             
             # 4. Crear página
             self.page = self.context.new_page()
@@ -201,10 +256,86 @@ class PlaywrightService:
     
     def _create_new_context(self) -> BrowserContext:
         """Crea un nuevo contexto de navegación"""
-        return self.browser.new_context(
-            viewport=None,
-            no_viewport=True
-        )
+        return self.browser.new_context(**self._opciones_viewport())
+    
+    def _opciones_viewport(self) -> dict:
+        """
+        Opciones de viewport para new_context según el modo.
+        
+        Con ventana, viewport=None permite que --start-maximized funcione y la
+        página se adapte al tamaño real de la ventana. En headless no hay
+        ventana: se fija el viewport y el idioma para que el portal se
+        comporte igual que con ventana.
+        """
+        if self.headless:
+            return {
+                'viewport': {'width': self.viewport_ancho, 'height': self.viewport_alto},
+                'locale': 'es-CO',
+            }
+        return {'viewport': None, 'no_viewport': True}
+    
+    def tomar_estadisticas_recursos(self) -> Optional[dict]:
+        """
+        Estadísticas del filtro de recursos desde la última llamada (por caso).
+        
+        Returns:
+            Dict de BloqueadorRecursos o None si el filtro está desactivado
+        """
+        if not self.bloqueador:
+            return None
+        return self.bloqueador.tomar_estadisticas()
+    
+    def sincronizar_vista_en_vivo(self):
+        """
+        Inicia o detiene el screencast según lo pida la UI.
+        Debe llamarse desde el hilo del worker (dueño de la página).
+        Mientras está activa, también procesa los cuadros pendientes.
+        """
+        if not self.vista_en_vivo or not self.esta_activo():
+            return
+        
+        try:
+            if self.vista_en_vivo.activa and self._cdp_vista is None:
+                self._cdp_vista = self.context.new_cdp_session(self.page)
+                self._cdp_vista.on('Page.screencastFrame', self._on_cuadro_vista)
+                self._cdp_vista.send('Page.startScreencast', {
+                    'format': 'png',
+                    'maxWidth': 1280,
+                    'maxHeight': 800,
+                    'everyNthFrame': 2,
+                })
+                self.logger.info('Playwright', '🔴 Vista en vivo iniciada')
+            elif not self.vista_en_vivo.activa and self._cdp_vista is not None:
+                self._detener_vista_en_vivo()
+            
+            if self._cdp_vista is not None:
+                # Deja que Playwright entregue los cuadros recibidos mientras el worker espera
+                self.page.wait_for_timeout(50)
+        except Exception as e:
+            self.logger.debug('Playwright', f'Vista en vivo no disponible: {e}')
+            self._cdp_vista = None
+    
+    def _on_cuadro_vista(self, evento: dict):
+        """Publica un cuadro del screencast y confirma su recepción a Chromium"""
+        if self._cdp_vista is None:
+            return
+        self.vista_en_vivo.publicar(evento.get('data', ''))
+        try:
+            self._cdp_vista.send('Page.screencastFrameAck', {'sessionId': evento.get('sessionId')})
+        except Exception:
+            pass
+    
+    def _detener_vista_en_vivo(self):
+        """Detiene el screencast y libera la sesión CDP"""
+        cdp, self._cdp_vista = self._cdp_vista, None
+        if cdp is None:
+            return
+        try:
+            cdp.send('Page.stopScreencast')
+            cdp.detach()
+        except Exception:
+            pass
+        self.logger.info('Playwright', '⚪ Vista en vivo detenida')
     
     def _setup_event_listeners(self):
         """Configura listeners para eventos importantes"""
@@ -298,11 +429,90 @@ class PlaywrightService:
             self.logger.error('Playwright', 'Error tomando screenshot', e)
             return ""
     
+    # ==================== TRAZAS POR CASO ====================
+    
+    def _iniciar_tracing(self):
+        """Enciende el tracing del contexto (los chunks de cada caso se abren aparte)"""
+        self._tracing_iniciado = False
+        self._inicio_traza = None
+        if not self.trazas_activas:
+            return
+        try:
+            # snapshots incluye DOM y red; las capturas de pantalla son lo más pesado
+            self.context.tracing.start(screenshots=self.trazas_capturas, snapshots=True, sources=False)
+            self._tracing_iniciado = True
+            self.logger.info('Playwright', f'🧵 Trazas por caso activas (muestreo {self.trazas_muestreo:.0%}, lento >= {self.trazas_lento_seg}s)')
+        except Exception as e:
+            self.logger.warning('Playwright', f'⚠️ No se pudo iniciar el tracing: {e}')
+    
+    def iniciar_traza_caso(self) -> bool:
+        """
+        Abre la ventana de traza del caso que empieza (según el muestreo).
+        
+        Returns:
+            True si el caso se está trazando
+        """
+        self._inicio_traza = None
+        if not self._tracing_iniciado or not self.context or random.random() >= self.trazas_muestreo:
+            return False
+        try:
+            self.context.tracing.start_chunk()
+            self._inicio_traza = time.monotonic()
+            return True
+        except Exception as e:
+            self.logger.warning('Playwright', f'⚠️ No se pudo abrir la traza del caso: {e}')
+            return False
+    
+    def finalizar_traza_caso(self, id_caso, fallo: bool) -> str:
+        """
+        Cierra la ventana de traza del caso: la guarda si falló o tardó más del
+        umbral, si no la descarta.
+        
+        Args:
+            id_caso: idItemOrden (u orden del laboratorio) para el nombre del archivo
+            fallo: True si el caso terminó en error
+        
+        Returns:
+            Ruta del .zip guardado ('' si no se guardó)
+        """
+        if self._inicio_traza is None:
+            return ''
+        duracion = time.monotonic() - self._inicio_traza
+        self._inicio_traza = None
+        lento = bool(self.trazas_lento_seg) and duracion >= self.trazas_lento_seg
+        try:
+            if not (fallo or lento):
+                self.context.tracing.stop_chunk()
+                return ''
+            self.trazas_dir.mkdir(parents=True, exist_ok=True)
+            motivo = 'fallo' if fallo else 'lento'
+            ruta = self.trazas_dir / f"traza_{id_caso}_{time.strftime('%Y%m%d_%H%M%S')}_{motivo}.zip"
+            self.context.tracing.stop_chunk(path=str(ruta))
+        except Exception as e:
+            self.logger.warning('Playwright', f'⚠️ No se pudo cerrar la traza de {id_caso}: {e}')
+            return ''
+        self.logger.info('Playwright', f'🧵 Traza de {id_caso} guardada ({motivo}, {duracion:.0f}s): {ruta.name}')
+        self._podar_trazas()
+        return str(ruta)
+    
+    def _podar_trazas(self):
+        """Conserva solo las TRAZAS_MAX trazas más recientes"""
+        trazas = sorted(self.trazas_dir.glob('traza_*.zip'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for vieja in trazas[self.trazas_max:]:
+            try:
+                vieja.unlink()
+            except OSError:
+                continue
+    
     def cerrar_navegador(self):
         """Cierra el navegador y limpia recursos, matando procesos zombies si es necesario"""
         try:
             self.logger.info('Playwright', 'Cerrando navegador...')
             cierre_exitoso = True
+            self._cdp_vista = None
+            # El tracing muere con el contexto; la traza del caso en curso se pierde
+            self._tracing_iniciado = False
+            self._inicio_traza = None
             
             # 1. Cerrar página
             if self.page:
@@ -433,13 +643,51 @@ class PlaywrightService:
         except:
             return False
     
+    def memoria_navegador_mb(self) -> Optional[float]:
+        """
+        Memoria (RSS) que consumen los procesos del navegador lanzados por
+        este proceso (driver de Playwright → Chromium/Chrome/Edge y sus hijos).
+        
+        Returns:
+            Memoria en MB, o None si psutil no está disponible
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+        
+        total = 0
+        process_names = ('chromium', 'chrome', 'msedge')
+        try:
+            for proc in psutil.Process(os.getpid()).children(recursive=True):
+                try:
+                    nombre = (proc.name() or '').lower()
+                    if any(n in nombre for n in process_names):
+                        total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    pass
+        except Exception as e:
+            self.logger.debug('Playwright', f'No se pudo medir memoria del navegador: {e}')
+            return None
+        return total / (1024 * 1024)
+    
     def _find_bundled_chromium(self) -> Optional[str]:
         """
-        Busca Chromium empaquetado dentro del .exe (sys._MEIPASS).
+        Busca Chromium empaquetado con el .exe.
+        
+        Orden de búsqueda:
+          1. Caché persistente junto al .exe (browsers/chromium-XXXX), que se
+             llena una sola vez desde browsers/chromium-XXXX.zip (build onefile
+             con --chromium-externo)
+          2. sys._MEIPASS/playwright/browsers (Chromium dentro del build)
         
         Returns:
             Ruta al ejecutable chrome.exe empaquetado, o None si no se encuentra
         """
+        chrome_cache = self._chromium_en_cache()
+        if chrome_cache:
+            return chrome_cache
+
         try:
             base_path = Path(sys._MEIPASS)
             browsers_dir = base_path / 'playwright' / 'browsers'
@@ -448,18 +696,10 @@ class PlaywrightService:
                 self.logger.debug('Playwright', f'Directorio de browsers no existe: {browsers_dir}')
                 return None
             
-            # Buscar la versión más reciente de Chromium empaquetado
-            chromium_dirs = sorted(
-                [d for d in browsers_dir.iterdir() if d.is_dir() and d.name.startswith('chromium-')],
-                key=lambda d: d.name,
-                reverse=True  # Más reciente primero
-            )
-            
-            for chromium_dir in chromium_dirs:
-                chrome_exe = chromium_dir / 'chrome-win' / 'chrome.exe'
-                if chrome_exe.exists():
-                    self.logger.info('Playwright', f'📦 Chromium empaquetado encontrado: {chrome_exe}')
-                    return str(chrome_exe)
+            chrome_exe = self._buscar_chrome_en(browsers_dir)
+            if chrome_exe:
+                self.logger.info('Playwright', f'📦 Chromium empaquetado encontrado: {chrome_exe}')
+                return str(chrome_exe)
             
             self.logger.warning('Playwright', 'No se encontró chrome.exe en browsers empaquetados')
             return None
@@ -468,6 +708,83 @@ class PlaywrightService:
             self.logger.error('Playwright', f'Error buscando Chromium empaquetado: {e}')
             return None
 
+    @staticmethod
+    def _buscar_chrome_en(browsers_dir: Path, requiere_marca: bool = False) -> Optional[Path]:
+        """
+        Retorna chrome.exe de la versión de Chromium más reciente en browsers_dir.
+        
+        Args:
+            browsers_dir: Carpeta con subcarpetas chromium-XXXX
+            requiere_marca: Exigir el archivo .listo (extracción completa en caché)
+        """
+        chromium_dirs = sorted(
+            [d for d in browsers_dir.iterdir() if d.is_dir() and d.name.startswith('chromium-')],
+            key=lambda d: d.name,
+            reverse=True  # Más reciente primero
+        )
+        for chromium_dir in chromium_dirs:
+            chrome_exe = chromium_dir / 'chrome-win' / 'chrome.exe'
+            if requiere_marca and not (chromium_dir / '.listo').exists():
+                continue
+            if chrome_exe.exists():
+                return chrome_exe
+        return None
+
+    @staticmethod
+    def _cache_chromium_dir() -> Path:
+        """Carpeta persistente (junto al .exe) donde se mantiene Chromium extraído"""
+        return get_data_path('browsers')
+
+    def _chromium_en_cache(self) -> Optional[str]:
+        """
+        Retorna Chromium de la caché persistente, extrayéndolo del zip que
+        acompaña al .exe si es el primer arranque (o hay una versión nueva).
+        
+        Returns:
+            Ruta a chrome.exe en caché, o None si no hay caché ni zip
+        """
+        cache_dir = self._cache_chromium_dir()
+        if not cache_dir.exists():
+            return None
+
+        try:
+            zips = sorted(cache_dir.glob('chromium-*.zip'), key=lambda z: z.name, reverse=True)
+            if zips:
+                version = zips[0].stem
+                destino = cache_dir / version
+                if not (destino / '.listo').exists():
+                    self._extraer_chromium(zips[0], destino)
+
+            chrome_exe = self._buscar_chrome_en(cache_dir, requiere_marca=True)
+            if chrome_exe:
+                self.logger.info('Playwright', f'📦 Chromium en caché: {chrome_exe}')
+                return str(chrome_exe)
+        except Exception as e:
+            self.logger.warning('Playwright', f'⚠️ Caché de Chromium no disponible: {e}')
+        return None
+
+    def _extraer_chromium(self, archivo_zip: Path, destino: Path):
+        """
+        Extrae Chromium a la caché (solo primer arranque).
+        Extrae en una carpeta temporal y la renombra al final, así un cierre
+        a mitad de camino no deja una caché corrupta.
+        """
+        inicio = time.time()
+        self.logger.info('Playwright', f'🗜️ Primer uso: extrayendo {archivo_zip.name} a la caché...')
+        temporal = destino.with_name(destino.name + '.extrayendo')
+        if temporal.exists():
+            shutil.rmtree(temporal, ignore_errors=True)
+        with zipfile.ZipFile(archivo_zip) as zf:
+            zf.extractall(temporal)
+        # El zip contiene la carpeta chromium-XXXX en la raíz
+        contenido = temporal / destino.name
+        if destino.exists():
+            shutil.rmtree(destino, ignore_errors=True)
+        (contenido if contenido.exists() else temporal).rename(destino)
+        shutil.rmtree(temporal, ignore_errors=True)
+        (destino / '.listo').write_text(archivo_zip.name, encoding='utf-8')
+        self.logger.success('Playwright', f'✅ Chromium extraído en {time.time() - inicio:.1f}s: {destino}')
+
     def _find_system_chrome(self) -> Optional[str]:
         """
         Encuentra la instalación de Chrome del sistema.
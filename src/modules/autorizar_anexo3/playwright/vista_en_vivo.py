@@ -0,0 +1,58 @@
+"""
+Vista en vivo del navegador del worker.
+Buzón compartido entre el hilo del worker (que recibe los cuadros del
+screencast de Chromium) y la UI de Tk (que los muestra).
+
+La API sync de Playwright no es thread-safe: la UI nunca toca la página,
+solo activa/desactiva la vista y lee el último cuadro publicado.
+"""
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class VistaEnVivo:
+    """Último cuadro capturado del navegador y bandera de activación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._activa = False
+        self._cuadro: Optional[str] = None  # PNG en base64 (formato de CDP)
+        self._timestamp = 0.0
+
+    @property
+    def activa(self) -> bool:
+        """True si la UI está mostrando la vista en vivo"""
+        return self._activa
+
+    def activar(self):
+        """Solicita al worker que empiece a transmitir cuadros (llamado desde la UI)"""
+        self._activa = True
+
+    def desactivar(self):
+        """Solicita al worker que deje de transmitir y libera el último cuadro"""
+        self._activa = False
+        with self._lock:
+            self._cuadro = None
+            self._timestamp = 0.0
+
+    def publicar(self, cuadro_base64: str):
+        """
+        Publica un cuadro nuevo (llamado desde el hilo del worker).
+
+        Args:
+            cuadro_base64: Imagen PNG codificada en base64
+        """
+        if not self._activa:
+            return
+        with self._lock:
+            self._cuadro = cuadro_base64
+            self._timestamp = time.time()
+
+    def ultimo_cuadro(self) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            (cuadro PNG en base64 o None, timestamp del cuadro)
+        """
+        with self._lock:
+            return self._cuadro, self._timestamp
@@ -1,6 +1,11 @@
 """
 Servicios del módulo Autorizar Anexo 3.
 """
-from .ordenes_service import AutorizarAnexo3Service
+from utils.lazy import exportar_perezoso
 
 __all__ = ['AutorizarAnexo3Service']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'AutorizarAnexo3Service': 'modules.autorizar_anexo3.services.ordenes_service'
+})
@@ -4,17 +4,31 @@ Thread que procesa órdenes programadas usando Playwright
 """
 import time
 import threading
-from datetime import datetime
-from typing import Optional, Callable
+from datetime import datetime, timedelta
+from typing import Optional, Callable, Iterator, List, Tuple
 from pathlib import Path
 
 from utils.logger import AdvancedLogger
 from modules.autorizar_anexo3.services.programacion_service import ProgramacionService
+from modules.autorizar_anexo3.services.programador_reintentos import ProgramadorReintentos
+from services.planificador_cola import PlanificadorCola
+from services.gestor_leases import GestorLeases
+from modules.autorizar_anexo3.services.diario_casos import DiarioCasos
+from modules.autorizar_anexo3.services.salud_portal import SaludPortal
 from modules.autorizar_anexo3.playwright.playwright_service import PlaywrightService
+from modules.autorizar_anexo3.playwright.vista_en_vivo import VistaEnVivo
+from modules.autorizar_anexo3.playwright.archivo_evidencias import ArchivoEvidencias
+from modules.autorizar_anexo3.playwright.bloqueo_recursos import BloqueadorRecursos
 from modules.autorizar_anexo3.playwright.login_playwright import LoginPlaywright
 from modules.autorizar_anexo3.playwright.home_playwright import HomePlaywright
-from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import EjecutarCasosPlaywright
+from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import EjecutarCasosPlaywright, PausedException
+from modules.autorizar_anexo3.playwright.ejecutar_casos_lote import EjecutarCasosLote
+from modules.autorizar_anexo3.playwright.errores_caso import (
+    ErrorCaso, ConexionPortalError, ElementoNoEncontradoError, ResultadoIndeterminadoError, TimeoutPortalError,
+    clasificar_error
+)
 from services.license_service import LicenseService
+from services.registro_resultados import obtener_registro
 from config.config import Config
 
 
@@ -40,6 +54,9 @@ class AutomationWorker(threading.Thread):
         self.api_service = ProgramacionService(base_url=base_url, logger=self.logger)
         self.license_service = LicenseService(base_url=base_url)
         self.playwright_service: Optional[PlaywrightService] = None
+        self.ejecutor: Optional[EjecutarCasosPlaywright] = None  # Reutilizado entre casos
+        self.ejecutor_lote: Optional[EjecutarCasosLote] = None  # Para lotes del mismo paciente
+        self.vista_en_vivo = VistaEnVivo()  # Cuadros para la ventana "Vista en vivo" de la UI
         
         # Control de navegador
         self.ultima_actividad = None
@@ -47,6 +64,68 @@ class AutomationWorker(threading.Thread):
         self.poll_interval = 5  # Consultar cada 5 segundos
         self._formulario_navegado = False  # Bandera para saber si ya navegamos al formulario
         
+        # Navegador en espera (ver Config: WORKER_MODO_ESPERA, WORKER_PRECALENTAR_HORAS, ...)
+        self.modo_espera = self.config.worker_modo_espera
+        self.precalentar_horas = self.config.worker_precalentar_horas
+        self.memoria_max_mb = self.config.worker_espera_memoria_max_mb
+        self.intervalo_verificacion_espera = self.config.worker_espera_verificar_seg
+        self.ventana_precalentado = timedelta(minutes=30)  # Margen tras la hora programada
+        self._ultima_verificacion_espera = 0.0
+        self._precalentados = set()  # (fecha, hora, minuto) ya ejecutados
+        
+        # Reintentos diferidos con backoff por clase de error (ver Config: WORKER_REINTENTO_MAX_SEG)
+        self.reintentos = ProgramadorReintentos(self.config.worker_reintento_max_seg)
+        
+        # Orden de la cola (ver Config: COLA_POLITICAS). id_orden agrupa los ítems del mismo paciente
+        self.planificador = PlanificadorCola(
+            self.config.cola_politicas,
+            campo_fecha='fecha_programacion',
+            campo_grupo='id_orden',
+            campo_intentos='intentos_realizados'
+        )
+        self.metricas_cola = self.planificador.metricas([])
+        
+        # Lotes: órdenes seguidas del mismo paciente/fecha/orden en una sola solicitud
+        self.lotes_paciente = self.config.worker_lotes_paciente
+        self.lote_max = self.config.worker_lote_max
+        
+        # Leases: cada orden se reclama en la API antes de procesarla para que
+        # varios workers compartan el backend (ver Config: WORKER_ID, WORKER_LEASE_SEG)
+        self.worker_id = self.config.worker_id
+        self.lease_seg = self.config.worker_lease_seg
+        self.leases = GestorLeases(
+            self.worker_id,
+            self.lease_seg,
+            renovar=lambda id_item: self.api_service.renovar_lease(id_item, self.worker_id, self.lease_seg),
+            logger=self.logger,
+            modulo='Worker'
+        )
+        # Diario local de fases para reconciliar casos interrumpidos al arrancar
+        self.diario = DiarioCasos(self.worker_id, logger=self.logger)
+        # Órdenes con radicado conocido en el registro local no se vuelven a enviar
+        # (ver Config: WORKER_OMITIR_RADICADOS)
+        self.omitir_radicados = self.config.worker_omitir_radicados
+        
+        # Salud del portal: timeouts dinámicos y pausa si está degradado (ver Config: PORTAL_*)
+        self.salud = SaludPortal(
+            ventana=self.config.portal_ventana_muestras,
+            umbral_lento=self.config.portal_umbral_lento,
+            umbral_degradado=self.config.portal_umbral_degradado,
+            factor_max=self.config.portal_timeout_factor_max,
+            pausa_seg=self.config.portal_pausa_degradado_seg,
+            logger=self.logger
+        )
+        
+        # Capturas de error en JPEG, escritas en segundo plano y con retención (ver Config: EVIDENCIAS_*)
+        self.evidencias = ArchivoEvidencias(
+            calidad_jpeg=self.config.evidencias_calidad_jpeg,
+            max_capturas=self.config.evidencias_max_capturas,
+            max_mb=self.config.evidencias_max_mb,
+            max_dias=self.config.evidencias_max_dias,
+            guardar_dom=self.config.evidencias_guardar_dom,
+            logger=self.logger
+        )
+        
         # Estadísticas
         self.procesados = 0
         self.exitosos = 0
@@ -58,16 +137,25 @@ class AutomationWorker(threading.Thread):
     
     def run(self):
         """Loop principal del worker"""
-        self.logger.info('Worker', '🚀 Worker de automatización iniciado')
+        self.logger.info('Worker', f'🚀 Worker de automatización iniciado (id: {self.worker_id})')
+        if self.modo_espera == 'caliente' or self.precalentar_horas:
+            horas = ', '.join(f'{h:02d}:{m:02d}' for h, m in self.precalentar_horas) or '-'
+            self.logger.info('Worker', f'🔥 Navegador en espera: modo={self.modo_espera} | precalentar: {horas} | memoria máx: {self.memoria_max_mb or "sin límite"} MB')
         self.running = True
         
+        # Antes de pedir trabajo nuevo: cerrar lo que dejó a medias una caída
+        self._reconciliar_diario()
+        
         while self.running:
             try:
                 # Verificar si está pausado
                 if self.paused:
+                    self._sincronizar_vista_en_vivo()
                     time.sleep(1)
                     continue
                 
+                self._sincronizar_vista_en_vivo()
+                
                 # Verificar saldo antes de procesar
                 info_saldo = self.license_service.obtener_saldo()
                 if info_saldo.get("success"):
@@ -80,28 +168,71 @@ class AutomationWorker(threading.Thread):
                     except (TypeError, ValueError):
                         pass
                 
-                # Obtener órdenes pendientes
-                pendientes = self.api_service.obtener_pendientes()
+                # Portal degradado: no tomar órdenes hasta que venza la pausa
+                pausa = self.salud.segundos_pausa()
+                if pausa > 0:
+                    self.actualizar_estadisticas()
+                    time.sleep(min(pausa, self.poll_interval))
+                    continue
+                
+                # Obtener órdenes pendientes, ordenarlas según las políticas de la cola
+                # y dejar fuera los reintentos cuya espera no ha vencido
+                pendientes = self.api_service.obtener_pendientes(incluir_leases_vencidos=True)
+                self._actualizar_metricas_cola(pendientes)
+                pendientes, diferidas = self.reintentos.filtrar_listas(self.planificador.planificar(pendientes))
+                limite = self.salud.limite_ordenes()
+                if limite and len(pendientes) > limite:
+                    self.logger.info('Worker', f'🩺 Portal degradado: se prueba con {limite} orden antes de reanudar')
+                    pendientes = pendientes[:limite]
+                if diferidas and not pendientes:
+                    proximo = self.reintentos.proximo_reintento() or 0
+                    self.logger.debug('Worker', f'⏳ {diferidas} reintento(s) en espera, próximo en {proximo:.0f}s')
                 
                 if pendientes:
-                    self.logger.info('Worker', f'📋 {len(pendientes)} órdenes pendientes encontradas')
+                    self.logger.info('Worker', f'📋 {len(pendientes)} órdenes pendientes encontradas' + (f' ({diferidas} reintentos en espera)' if diferidas else ''))
+                    self.logger.info('Worker', f'📥 Cola: {PlanificadorCola.resumen(self.metricas_cola)}')
                     self.ultima_actividad = time.time()
                     
-                    # Asegurar que el navegador esté activo
-                    if not self.asegurar_navegador_activo():
+                    # Procesar cada orden (o lote de órdenes del mismo paciente)
+                    navegador_listo = True
+                    navegador_iniciado = False
+                    for lote in self._armar_lotes(pendientes):
+                        if not self.running or self.paused or self.salud.segundos_pausa() > 0:
+                            break
+                        
+                        # Las ya radicadas se cierran sin navegador
+                        lote = self._descartar_radicados(lote)
+                        if not lote:
+                            continue
+                        
+                        # Asegurar que el navegador esté activo (solo si queda algo que enviar)
+                        if not navegador_iniciado:
+                            navegador_listo = navegador_iniciado = self.asegurar_navegador_activo()
+                            if not navegador_listo:
+                                break
+                        
+                        self._sincronizar_vista_en_vivo()
+                        if len(lote) == 1:
+                            self.procesar_orden(*lote[0])
+                        else:
+                            self.procesar_lote(lote)
+                        self._registrar_ahorro_recursos(lote[0][0].get('id_item_orden_proced'))
+                        
+                        # Reciclar el navegador si creció por encima del límite de memoria
+                        if self._reciclar_si_excede_memoria() and not self.asegurar_navegador_activo():
+                            self.logger.error('Worker', 'No se pudo reiniciar navegador tras reciclarlo')
+                            break
+                    
+                    # Órdenes reclamadas que no se alcanzaron a procesar (pausa, detención, lote)
+                    self._liberar_leases_sobrantes()
+                    
+                    if not navegador_listo:
                         self.logger.error('Worker', 'No se pudo iniciar navegador, esperando...')
                         time.sleep(30)
                         continue
                     
-                    # Procesar cada orden
-                    for orden in pendientes:
-                        if not self.running or self.paused:
-                            break
-                        
-                        self.procesar_orden(orden)
-                    
                     # Notificar si terminamos todos
-                    if self.running and not self.paused:
+                    if self.running and not self.paused and not diferidas:
                         self.logger.success('Worker', '🎉 Todas las órdenes pendientes han sido procesadas')
                         self.reproducir_sonido_completado()
                 
@@ -116,15 +247,19 @@ class AutomationWorker(threading.Thread):
                 self.logger.error('Worker', 'Error en loop principal', e)
                 time.sleep(10)  # Esperar más tiempo en caso de error
         
+        self._liberar_leases_sobrantes()
+        self.leases.detener()
+        self.evidencias.detener()
         self.logger.info('Worker', '⏹️ Worker detenido')
         self.cerrar_navegador()
     
-    def procesar_orden(self, orden: dict):
+    def procesar_orden(self, orden: dict, datos_paciente: Optional[dict] = None):
         """
         Procesa una orden individual.
         
         Args:
             orden: Diccionario con datos de programacion_ordenes
+            datos_paciente: Datos de la orden si ya se consultaron (al armar lotes)
         """
         id_item = orden.get('id_item_orden_proced')
         intentos_realizados = orden.get('intentos_realizados', 0)
@@ -133,7 +268,8 @@ class AutomationWorker(threading.Thread):
         self.logger.info('Worker', f'▶️ Procesando orden {id_item} (intento {intentos_realizados + 1}/{intentos_maximos})')
         
         # Obtener datos completos del paciente
-        datos_paciente = self.api_service.obtener_datos_orden(id_item)
+        if datos_paciente is None:
+            datos_paciente = self.api_service.obtener_datos_orden(id_item)
         if not datos_paciente:
             self.logger.error('Worker', f'No se encontraron datos para orden {id_item}')
             self.marcar_error(id_item, "Datos de paciente no encontrados")
@@ -142,6 +278,270 @@ class AutomationWorker(threading.Thread):
         nombre_paciente = f"{datos_paciente.get('Nombre1','')} {datos_paciente.get('Apellido1','')}"
         
         # Actualizar a EN_PROGRESO
+        self._marcar_en_progreso(id_item, intentos_realizados, intentos_maximos)
+        
+        self._iniciar_traza()
+        self._ajustar_timeouts()
+        fallo = False
+        try:
+            # Ejecutar automatización
+            self.logger.info('Worker', f'🤖 Automatizando: {nombre_paciente}')
+            self._asegurar_formulario(intentos_realizados, intentos_maximos)
+            
+            # Ejecutar caso - usar inicio_casos como en Selenium
+            ejecutor = self._obtener_ejecutor()
+            data = self._construir_data(datos_paciente, id_item)
+            
+            if ejecutor.inicio_casos(data):
+                # ÉXITO
+                self.reintentos.olvidar(id_item)
+                self.marcar_completado(id_item, nombre_paciente)
+            else:
+                # FALLO - el ejecutor ya reportó el estadoCaso; su error tipado decide el reintento
+                raise ejecutor.ultimo_error or ErrorCaso("Error ejecutando caso")
+            
+        except PausedException:
+            # Pausa del usuario: no es error, devolverla a pendiente
+            self.logger.info('Worker', f'⏸️ Orden {id_item} pausada, se retomará después')
+            self._liberar_lease(id_item)
+            
+        except Exception as e:
+            fallo = True
+            error = clasificar_error(e)
+            self.logger.error('Worker', f'Error procesando {nombre_paciente} ({error.etiqueta})', e)
+            self._manejar_fallo(id_item, error, intentos_realizados + 1, intentos_maximos)
+        
+        finally:
+            self._finalizar_traza(id_item, fallo)
+    
+    def procesar_lote(self, lote: List[Tuple[dict, dict]]):
+        """
+        Procesa en una sola solicitud varias órdenes del mismo paciente, fecha,
+        atención y orden médica (un CUPS por orden). El resultado se aplica a
+        cada idItemOrden: las que entraron en la solicitud comparten el
+        resultado; las que no (CUPS no ingresado) se tratan como fallo propio.
+        
+        Args:
+            lote: Lista de (orden de programacion, datos de la orden)
+        """
+        if len(lote) == 1:
+            self.procesar_orden(*lote[0])
+            return
+        
+        orden_base, datos_base = lote[0]
+        id_base = orden_base.get('id_item_orden_proced')
+        ids = [orden.get('id_item_orden_proced') for orden, _ in lote]
+        nombre_paciente = f"{datos_base.get('Nombre1','')} {datos_base.get('Apellido1','')}"
+        
+        self.logger.info('Worker', f'📦 Lote de {len(lote)} órdenes para {nombre_paciente}: {ids}')
+        for orden, _ in lote:
+            self._marcar_en_progreso(
+                orden.get('id_item_orden_proced'),
+                orden.get('intentos_realizados', 0),
+                orden.get('intentos_maximos', 2)
+            )
+        
+        ejecutor = None
+        error = None
+        self._iniciar_traza()
+        self._ajustar_timeouts()
+        try:
+            self._asegurar_formulario(orden_base.get('intentos_realizados', 0), orden_base.get('intentos_maximos', 2))
+            
+            ejecutor = self._obtener_ejecutor_lote()
+            ejecutor.preparar_lote([
+                {'idItemOrden': orden.get('id_item_orden_proced'), 'cups': datos.get('cups', '')}
+                for orden, datos in lote
+            ])
+            data = self._construir_data(datos_base, id_base)
+            
+            if not ejecutor.inicio_casos(data):
+                raise ejecutor.ultimo_error or ErrorCaso("Error ejecutando lote")
+            
+        except PausedException:
+            self._finalizar_traza(id_base, False)
+            self.logger.info('Worker', f'⏸️ Lote {ids} pausado, se retomará después')
+            for id_item in ids:
+                self._liberar_lease(id_item)
+            return
+            
+        except Exception as e:
+            error = clasificar_error(e)
+            self.logger.error('Worker', f'Error procesando lote de {nombre_paciente} ({error.etiqueta})', e)
+        
+        self._finalizar_traza(id_base, error is not None)
+        
+        # Resultado por idItemOrden
+        enviados = set(ejecutor.ids_enviados()) if ejecutor else set()
+        for orden, datos in lote:
+            id_item = orden.get('id_item_orden_proced')
+            intentos = orden.get('intentos_realizados', 0) + 1
+            maximos = orden.get('intentos_maximos', 2)
+            if id_item not in enviados:
+                # Su CUPS no entró a la solicitud: fallo propio, no el del lote
+                error_item = error if ejecutor is None else (
+                    ejecutor.error_no_enviado(id_item)
+                    or ElementoNoEncontradoError(f"CUPS {datos.get('cups', '')} no se pudo ingresar en el lote")
+                )
+                self._manejar_fallo(id_item, error_item, intentos, maximos)
+            elif error is None:
+                self.reintentos.olvidar(id_item)
+                self.marcar_completado(id_item, nombre_paciente)
+            else:
+                self._manejar_fallo(id_item, error, intentos, maximos)
+    
+    def _armar_lotes(self, pendientes: list) -> Iterator[List[Tuple[dict, Optional[dict]]]]:
+        """
+        Agrupa órdenes seguidas del mismo paciente, fecha, atención y orden
+        médica (el planificador ya las deja juntas). Sin modo lote cada orden
+        va sola y sus datos se consultan al procesarla.
+        
+        Cada orden se reclama justo antes de usarla; las que tiene otro worker
+        se saltan.
+        
+        Yields:
+            Listas de (orden, datos de la orden)
+        """
+        if not self.lotes_paciente:
+            for orden in pendientes:
+                if self._reclamar(orden):
+                    yield [(orden, None)]
+            return
+        
+        lote: List[Tuple[dict, Optional[dict]]] = []
+        clave_lote = None
+        for orden in pendientes:
+            if not self._reclamar(orden):
+                continue
+            datos = self.api_service.obtener_datos_orden(orden.get('id_item_orden_proced'))
+            clave = self._clave_lote(datos)
+            if lote and (clave is None or clave != clave_lote or len(lote) >= self.lote_max):
+                yield lote
+                lote = []
+            lote.append((orden, datos))
+            clave_lote = clave
+        if lote:
+            yield lote
+    
+    def _reclamar(self, orden: dict) -> bool:
+        """Reclama la orden en la API (lease a nombre de este worker)"""
+        id_item = orden.get('id_item_orden_proced')
+        if not self.api_service.reclamar_orden(id_item, self.worker_id, self.lease_seg):
+            self.logger.debug('Worker', f'🔒 Orden {id_item} no reclamada (otro worker la tiene), se salta')
+            return False
+        self.leases.tomar(id_item)
+        self.diario.registrar(id_item, DiarioCasos.RECLAMADA)
+        return True
+    
+    def _liberar_lease(self, id_item: int):
+        """Devuelve la orden a PENDIENTE para que cualquier worker la tome"""
+        self.leases.soltar(id_item)
+        if self.api_service.liberar_orden(id_item, self.worker_id):
+            self.diario.registrar(id_item, DiarioCasos.LIBERADA)
+        else:
+            # Sigue RECLAMADA en el diario: se reconcilia en el próximo arranque
+            self.logger.warning('Worker', f'⚠️ No se pudo devolver la orden {id_item} a PENDIENTE')
+    
+    def _liberar_leases_sobrantes(self):
+        """Libera las órdenes reclamadas que quedaron sin procesar"""
+        for id_item in self.leases.activos():
+            self.logger.debug('Worker', f'🔓 Liberando orden {id_item} sin procesar')
+            self._liberar_lease(id_item)
+    
+    def _iniciar_traza(self):
+        """Abre la ventana de traza de Playwright del caso (si TRAZAS_ACTIVAS y toca por muestreo)"""
+        if self.playwright_service:
+            self.playwright_service.iniciar_traza_caso()
+    
+    def _finalizar_traza(self, id_item: int, fallo: bool):
+        """Guarda la traza del caso si falló o fue lento; si no, la descarta"""
+        if self.playwright_service:
+            self.playwright_service.finalizar_traza_caso(id_item, fallo)
+    
+    def _ajustar_timeouts(self):
+        """Timeout por defecto de la página según la salud del portal (60 s con el portal sano)"""
+        if self.playwright_service and self.playwright_service.page:
+            try:
+                self.playwright_service.page.set_default_timeout(int(60000 * self.salud.factor_timeout()))
+            except Exception as e:
+                self.logger.debug('Worker', f'No se pudo ajustar el timeout de la página: {e}')
+    
+    def _descartar_radicados(self, lote: List[Tuple[dict, Optional[dict]]]) -> List[Tuple[dict, Optional[dict]]]:
+        """
+        Cierra las órdenes del lote que ya tienen radicado en el registro local,
+        antes de levantar el navegador. Sin modo lote los datos de la orden se
+        consultan aquí y se reutilizan al procesarla.
+        
+        Returns:
+            Las órdenes que sí hay que enviar al portal
+        """
+        if not self.omitir_radicados:
+            return lote
+        restantes = []
+        for orden, datos in lote:
+            id_item = orden.get('id_item_orden_proced')
+            if datos is None:
+                datos = self.api_service.obtener_datos_orden(id_item)
+            if not self._cortocircuito_radicado(id_item, datos):
+                restantes.append((orden, datos))
+        return restantes
+    
+    def _cortocircuito_radicado(self, id_item: int, datos: dict) -> bool:
+        """
+        Si el registro local ya tiene radicado para el mismo documento, CUPS y
+        fecha de la orden, la orden se cierra como completada con ese número
+        sin abrir el formulario (evita radicar dos veces el mismo servicio).
+        No descuenta saldo: el caso no se ejecutó.
+        
+        Returns:
+            True si la orden quedó cerrada
+        """
+        if not self.omitir_radicados or not datos:
+            return False
+        try:
+            previo = obtener_registro().radicado_previo(
+                datos.get('NoDocumento'), datos.get('cups'), datos.get('FechaOrden'), id_item_orden=id_item
+            )
+        except Exception as e:
+            self.logger.warning('Worker', f'⚠️ No se pudo consultar el registro de radicados: {e}')
+            return False
+        if not previo:
+            return False
+        
+        radicado = previo['radicado']
+        self.logger.info(
+            'Worker',
+            f"♻️ Orden {id_item}: CUPS {previo['cups']} ya radicado #{radicado} el {previo['fecha']}"
+            f" (orden {previo['id_item_orden']}), no se envía de nuevo"
+        )
+        self.leases.soltar(id_item)
+        self.api_service.actualizar_estado_programacion(
+            id_item,
+            "COMPLETADO",
+            fecha_fin=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            usuario_ejecuto="worker_automatico",
+            resultado=f"Ya radicado #{radicado} (registro local)",
+            worker_id=self.worker_id
+        )
+        self.api_service.actualizar_estado_caso(id_item, 1, radicado)  # 1 = Completado
+        self.diario.registrar(id_item, DiarioCasos.REPORTADA, resultado='COMPLETADO', numero=radicado, duplicado=True)
+        self.reintentos.olvidar(id_item)
+        
+        self.exitosos += 1
+        self.procesados += 1
+        self.actualizar_estadisticas()
+        return True
+    
+    @staticmethod
+    def _clave_lote(datos: Optional[dict]) -> Optional[tuple]:
+        """(documento, fecha, atención, orden) o None si la orden no se puede agrupar"""
+        if not datos or not datos.get('cups'):
+            return None
+        clave = tuple(datos.get(campo) for campo in ('NoDocumento', 'FechaOrden', 'idAtencion', 'idOrden'))
+        return clave if all(clave) else None
+    
+    def _marcar_en_progreso(self, id_item: int, intentos_realizados: int, intentos_maximos: int):
+        """Pasa la orden a EN_PROGRESO (en el primer intento también estadoCaso=3 y fecha_inicio)"""
         if intentos_realizados == 0:
             # Primer intento: actualizar fecha_inicio y estadoCaso
             fecha_inicio = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -149,7 +549,8 @@ class AutomationWorker(threading.Thread):
                 id_item, 
                 "EN_PROGRESO",
                 fecha_inicio=fecha_inicio,
-                usuario_ejecuto="worker_automatico"
+                usuario_ejecuto="worker_automatico",
+                worker_id=self.worker_id
             )
             self.api_service.actualizar_estado_caso(id_item, 3)  # 3 = En proceso
             
@@ -161,150 +562,207 @@ class AutomationWorker(threading.Thread):
             self.api_service.actualizar_estado_programacion(
                 id_item, 
                 "EN_PROGRESO",
-                usuario_ejecuto="worker_automatico"
+                usuario_ejecuto="worker_automatico",
+                worker_id=self.worker_id
             )
             # NO actualizar estadoCaso (ya está en 3 desde el primer intento)
             self.logger.info('Worker', f'🔄 Reintento {intentos_realizados + 1}/{intentos_maximos} - estadoCaso permanece en 3')
-        
-        try:
-            # Ejecutar automatización
-            self.logger.info('Worker', f'🤖 Automatizando: {nombre_paciente}')
-            
-            # Navegar al formulario solo la primera vez después de login
-            # Para casos subsecuentes, el método reinicio() del ejecutor 
-            # ya deja el formulario listo después de cada caso
-            if not self._formulario_navegado:
-                self.logger.debug('Worker', 'Primera navegación al formulario...')
-                if not self.navegar_a_formulario():
-                    raise Exception("No se pudo navegar al formulario")
-                self._formulario_navegado = True
-            else:
-                # Verificar que el formulario sigue accesible
-                self.logger.debug('Worker', f'Formulario ya navegado (intento {intentos_realizados + 1}/{intentos_maximos}). Verificando estado...')
-                try:
-                    url_actual = self.playwright_service.page.url
-                    self.logger.debug('Worker', f'URL actual: {url_actual}')
-                    if 'portalsalud.coosalud.com' not in url_actual:
-                        self.logger.warning('Worker', '⚠️ Página incorrecta, navegando de nuevo al formulario...')
-                        if not self.navegar_a_formulario():
-                            raise Exception("No se pudo navegar al formulario en reintento")
-                except Exception as page_error:
-                    self.logger.error('Worker', f'Error verificando página: {page_error}')
-                    # Si hay error verificando la página, mejor navegar de nuevo
-                    self.logger.info('Worker', 'Navegando de nuevo al formulario por seguridad...')
+    
+    def _asegurar_formulario(self, intentos_realizados: int, intentos_maximos: int):
+        """
+        Navega al formulario solo la primera vez después de login.
+        Para casos subsecuentes, el método reinicio() del ejecutor
+        ya deja el formulario listo después de cada caso.
+        """
+        if not self._formulario_navegado:
+            self.logger.debug('Worker', 'Primera navegación al formulario...')
+            if not self.navegar_a_formulario():
+                raise ConexionPortalError("No se pudo navegar al formulario")
+            self._formulario_navegado = True
+        else:
+            # Verificar que el formulario sigue accesible
+            self.logger.debug('Worker', f'Formulario ya navegado (intento {intentos_realizados + 1}/{intentos_maximos}). Verificando estado...')
+            try:
+                url_actual = self.playwright_service.page.url
+                self.logger.debug('Worker', f'URL actual: {url_actual}')
+                if 'portalsalud.coosalud.com' not in url_actual:
+                    self.logger.warning('Worker', '⚠️ Página incorrecta, navegando de nuevo al formulario...')
                     if not self.navegar_a_formulario():
-                        raise Exception("No se pudo navegar al formulario después de error")
-            # Para reintentos o siguientes órdenes, el formulario ya está listo
-            
-            # Ejecutar caso - usar inicio_casos como en Selenium
-            ejecutor = EjecutarCasosPlaywright(
-                self.playwright_service.page, 
+                        raise ConexionPortalError("No se pudo navegar al formulario en reintento")
+            except Exception as page_error:
+                self.logger.error('Worker', f'Error verificando página: {page_error}')
+                # Si hay error verificando la página, mejor navegar de nuevo
+                self.logger.info('Worker', 'Navegando de nuevo al formulario por seguridad...')
+                if not self.navegar_a_formulario():
+                    raise ConexionPortalError("No se pudo navegar al formulario después de error")
+        # Para reintentos o siguientes órdenes, el formulario ya está listo
+    
+    @staticmethod
+    def _construir_data(datos_paciente: dict, id_item: int):
+        """Convierte datos_paciente a objeto con atributos (como en Selenium)"""
+        class DataObject:
+            pass
+        data = DataObject()
+        for key, value in datos_paciente.items():
+            setattr(data, key, value)
+        # Mapear campos adicionales que usa inicio_casos
+        # La API devuelve Id_TipoIdentificacion (ej: "CC", "TI", "CE")
+        data.tipoIdentificacion = datos_paciente.get('Id_TipoIdentificacion', '') or datos_paciente.get('TipoIdentificacion', 'Cédula de Ciudadanía')
+        data.identificacion = datos_paciente.get('NoDocumento', '')
+        data.telefono = datos_paciente.get('telefono', '')
+        data.fechaFacturaEvento = datos_paciente.get('FechaOrden', '')
+        data.diagnostico = datos_paciente.get('DxIngreso', '')
+        data.idItemOrden = datos_paciente.get('idItemOrden', id_item)
+        data.idOrden = datos_paciente.get('idOrden', '')
+        data.urlOrdenMedica = datos_paciente.get('urlOrdenMedica', '')
+        # Nuevos campos agregados al JSON
+        data.idProcedimiento = datos_paciente.get('idProcedimiento', '')
+        data.idAtencion = datos_paciente.get('idAtencion', '')
+        data.cups = datos_paciente.get('cups', '')
+        return data
+    
+    def _manejar_fallo(self, id_item: int, error: ErrorCaso, intentos_realizados: int, intentos_maximos: int):
+        """
+        Decide, según el error tipado, si la orden queda en ERROR final o se reintenta.
+        
+        Args:
+            intentos_realizados: Intentos contando el que acaba de fallar
+        """
+        if isinstance(error, (TimeoutPortalError, ConexionPortalError)):
+            self.salud.registrar_fallo(error.etiqueta)
+        if not error.reintentable:
+            # Error PERMANENTE - No reintentar (rechazo del portal, documento, IPS, PDF, resultado incierto)
+            self.logger.warning('Worker', f'⚠️ Error permanente ({error.etiqueta}), marcando como ERROR final: {error}')
+            self.reintentos.olvidar(id_item)
+            self.marcar_error(id_item, f"Error permanente: {error}")
+        elif intentos_realizados >= intentos_maximos:
+            # Ya se agotaron los intentos - marcar como ERROR final
+            self.reintentos.olvidar(id_item)
+            self.marcar_error(id_item, str(error))
+        else:
+            # Error TEMPORAL - vale la pena reintentar (sesión, timeout, red, render lento)
+            self.logger.info('Worker', f'🔄 Error temporal ({error.etiqueta}), se reintentará: {error}')
+            espera = self.reintentos.programar(id_item, error, intentos_realizados)
+            self.marcar_para_reintento(id_item, str(error), espera)
+    
+    def _reconciliar_diario(self):
+        """
+        Cierra los casos que quedaron abiertos en el diario (app o navegador
+        caídos a mitad de un caso), según la última fase registrada:
+        
+        - RECLAMADA: no llegó al portal, vuelve a PENDIENTE
+        - ENVIADA: se hizo clic en Guardar sin leer respuesta; el portal pudo
+          radicar, así que queda en ERROR para verificar (no se reintenta)
+        - RESULTADO: se leyó la respuesta pero no se reportó; se reporta ahora
+        
+        Las llamadas van con el worker_id que tenía el lease. Si la API falla,
+        el caso sigue abierto y se intenta en el próximo arranque.
+        """
+        abiertos = self.diario.casos_abiertos()
+        if abiertos:
+            self.logger.warning('Worker', f'🩹 {len(abiertos)} caso(s) interrumpidos en el diario, reconciliando...')
+        
+        for caso in abiertos:
+            id_item, fase, detalle, worker_id = caso['id_item'], caso['fase'], caso['detalle'], caso['worker_id']
+            fecha_fin = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            try:
+                if fase == DiarioCasos.RECLAMADA:
+                    if self.api_service.liberar_orden(id_item, worker_id):
+                        self.diario.registrar(id_item, DiarioCasos.LIBERADA, recuperada=True)
+                        self.logger.info('Worker', f'🩹 Orden {id_item} no llegó al portal: devuelta a PENDIENTE')
+                    continue
+                
+                if fase == DiarioCasos.RESULTADO and detalle.get('exito'):
+                    reportada = self.api_service.actualizar_estado_programacion(
+                        id_item, "COMPLETADO", fecha_fin=fecha_fin,
+                        usuario_ejecuto="worker_automatico", resultado="OK", worker_id=worker_id
+                    ) and self.api_service.actualizar_estado_caso(id_item, 1, detalle.get('numero'))  # 1 = Completado
+                    if reportada:
+                        self._descontar_saldo()
+                        self.logger.info('Worker', f'🩹 Orden {id_item} ya radicada ({detalle.get("numero") or "sin número"}): COMPLETADA')
+                else:
+                    if fase == DiarioCasos.RESULTADO:
+                        mensaje = f"Error permanente: {detalle.get('mensaje', '')}"
+                        estado_caso = 4  # 4 = Error (rechazo del portal, como marcar_error)
+                    else:
+                        mensaje = "Caso interrumpido después de Guardar: verificar en el portal antes de reintentar"
+                        estado_caso = ResultadoIndeterminadoError.estado
+                    reportada = self.api_service.actualizar_estado_programacion(
+                        id_item, "ERROR", fecha_fin=fecha_fin, usuario_ejecuto="worker_automatico",
+                        resultado="ERROR", mensaje_error=mensaje, worker_id=worker_id
+                    ) and self.api_service.actualizar_estado_caso(id_item, estado_caso)
+                    if reportada:
+                        self.logger.warning('Worker', f'🩹 Orden {id_item} ({fase}): {mensaje}')
+                
+                if reportada:
+                    self.diario.registrar(id_item, DiarioCasos.REPORTADA, recuperada=True)
+                else:
+                    self.logger.error('Worker', f'🩹 No se pudo reconciliar la orden {id_item} ({fase}), se intentará al reiniciar')
+            except Exception as e:
+                self.logger.error('Worker', f'Error reconciliando orden {id_item}', e)
+        
+        self.diario.compactar()
+    
+    def _obtener_ejecutor(self) -> EjecutarCasosPlaywright:
+        """
+        Retorna el ejecutor ligado a la página actual.
+        Solo se crea de nuevo si el navegador se reinició (página distinta).
+        """
+        page = self.playwright_service.page
+        if self.ejecutor is None or self.ejecutor.page is not page:
+            self.logger.debug('Worker', 'Creando ejecutor de casos para la página actual')
+            self.ejecutor = EjecutarCasosPlaywright(
+                page,
                 self.logger,
                 pause_callback=lambda: self.paused  # Callback para verificar pausa
             )
-            
-            # Convertir datos_paciente a objeto con atributos (como en Selenium)
-            class DataObject:
-                pass
-            data = DataObject()
-            for key, value in datos_paciente.items():
-                setattr(data, key, value)
-            # Mapear campos adicionales que usa inicio_casos
-            # La API devuelve Id_TipoIdentificacion (ej: "CC", "TI", "CE")
-            data.tipoIdentificacion = datos_paciente.get('Id_TipoIdentificacion', '') or datos_paciente.get('TipoIdentificacion', 'Cédula de Ciudadanía')
-            data.identificacion = datos_paciente.get('NoDocumento', '')
-            data.telefono = datos_paciente.get('telefono', '')
-            data.fechaFacturaEvento = datos_paciente.get('FechaOrden', '')
-            data.diagnostico = datos_paciente.get('DxIngreso', '')
-            data.idItemOrden = datos_paciente.get('idItemOrden', id_item)
-            data.idOrden = datos_paciente.get('idOrden', '')
-            data.urlOrdenMedica = datos_paciente.get('urlOrdenMedica', '')
-            # Nuevos campos agregados al JSON
-            data.idProcedimiento = datos_paciente.get('idProcedimiento', '')
-            data.idAtencion = datos_paciente.get('idAtencion', '')
-            data.cups = datos_paciente.get('cups', '')
-            
-            if ejecutor.inicio_casos(data):
-                # ÉXITO
-                self.marcar_completado(id_item, nombre_paciente)
-            else:
-                # FALLO - Determinar si es error permanente o temporal
-                raise Exception("Error ejecutando caso")
-            
-        except Exception as e:
-            # Verificar si es una pausa (no es error)
-            from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import PausedException
-            if isinstance(e, PausedException):
-                self.logger.info('Worker', f'⏸️ Orden {id_item} pausada, se retomará después')
-                return  # No marcar como error, dejar pendiente
-            
-            # Error en automatización
-            error_msg = str(e).lower()
-            self.logger.error('Worker', f'Error procesando {nombre_paciente}', e)
-            
-            # Errores PERMANENTES que NO deben reintentarse:
-            # - Duplicados (servicio ya reportado anteriormente)
-            # - Tipo de documento incorrecto
-            # - Paciente no encontrado
-            # - IPS no encontrada
-            # - Archivo no existe
-            errores_permanentes = [
-                'duplicado', 'ya reportado', 'ya existe',
-                'servicio', 'número de radicado',  # Mensaje de duplicado del portal
-                'tipo documento', 'tipo de documento',
-                'paciente no encontrado',
-                'ips no encontrada',
-                'archivo no encontrado', 'pdf no encontrado'
-            ]
-            
-            # Errores TEMPORALES que SÍ deben reintentarse:
-            # - Timeouts de red/página
-            # - Sesión perdida (puede recuperarse con login)
-            # - Conexión de red
-            errores_temporales = [
-                'timeout', 'timed out', 
-                'session', 'sesión',
-                'network', 'connection',
-                'temporarily unavailable'
-            ]
-            
-            es_error_permanente = any(keyword in error_msg for keyword in errores_permanentes)
-            es_error_temporal = any(keyword in error_msg for keyword in errores_temporales)
-            
-            # Incrementar contador de intentos
-            intentos_realizados += 1
-            
-            if es_error_permanente:
-                # Error PERMANENTE - No reintentar (ej: duplicado, tipo documento incorrecto)
-                self.logger.warning('Worker', f'⚠️ Error permanente detectado, marcando como ERROR final: {e}')
-                self.marcar_error(id_item, f"Error permanente: {str(e)}")
-            elif intentos_realizados >= intentos_maximos:
-                # Ya se agotaron los intentos - marcar como ERROR final
-                self.marcar_error(id_item, str(e))
-            elif es_error_temporal:
-                # Error TEMPORAL - vale la pena reintentar
-                self.logger.info('Worker', f'🔄 Error temporal detectado, se reintentará: {e}')
-                self.marcar_para_reintento(id_item, str(e))
-            else:
-                # Error desconocido - no reintentar por seguridad
-                self.logger.warning('Worker', f'⚠️ Error desconocido, marcando como ERROR final: {e}')
-                self.marcar_error(id_item, f"Error no clasificado: {str(e)}")
+            self.ejecutor.diario = self.diario
+            self.ejecutor.salud = self.salud
+        return self.ejecutor
+    
+    def _obtener_ejecutor_lote(self) -> EjecutarCasosLote:
+        """Igual que _obtener_ejecutor, para el ejecutor de lotes"""
+        page = self.playwright_service.page
+        if self.ejecutor_lote is None or self.ejecutor_lote.page is not page:
+            self.logger.debug('Worker', 'Creando ejecutor de lotes para la página actual')
+            self.ejecutor_lote = EjecutarCasosLote(
+                page,
+                self.logger,
+                pause_callback=lambda: self.paused
+            )
+            self.ejecutor_lote.diario = self.diario
+            self.ejecutor_lote.salud = self.salud
+        return self.ejecutor_lote
     
     def marcar_completado(self, id_item: int, nombre_paciente: str):
         """Marca una orden como completada exitosamente"""
         fecha_fin = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
+        if self.leases.perdido(id_item):
+            self.logger.warning('Worker', f'⚠️ El lease de la orden {id_item} se perdió durante el caso; la API decide si acepta el resultado')
+        self.leases.soltar(id_item)
         self.api_service.actualizar_estado_programacion(
             id_item,
             "COMPLETADO",
             fecha_inicio=getattr(self, 'fecha_inicio_actual', None),
             fecha_fin=fecha_fin,
             usuario_ejecuto="worker_automatico",
-            resultado="OK"
+            resultado="OK",
+            worker_id=self.worker_id
         )
         self.api_service.actualizar_estado_caso(id_item, 1)  # 1 = Completado
+        self.diario.registrar(id_item, DiarioCasos.REPORTADA, resultado='COMPLETADO')
+        
+        self._descontar_saldo()
         
-        # Descontar saldo por caso exitoso
+        self.exitosos += 1
+        self.procesados += 1
+        self.actualizar_estadisticas()
+        
+        self.logger.success('Worker', f'✅ Orden {id_item} ({nombre_paciente}) COMPLETADA')
+    
+    def _descontar_saldo(self):
+        """Descuenta el saldo por caso exitoso y detiene el worker si se agota"""
         resultado_descuento = self.license_service.descontar_caso_exitoso()
         
         if resultado_descuento.get("success"):
@@ -319,17 +777,12 @@ class AutomationWorker(threading.Thread):
                 self.logger.error('Worker', '🛑 Worker detenido por saldo agotado')
         else:
             self.logger.error('Worker', f'Error descontando saldo: {resultado_descuento.get("message")}')
-        
-        self.exitosos += 1
-        self.procesados += 1
-        self.actualizar_estadisticas()
-        
-        self.logger.success('Worker', f'✅ Orden {id_item} ({nombre_paciente}) COMPLETADA')
     
     def marcar_error(self, id_item: int, error: str):
         """Marca una orden con error final"""
         fecha_fin = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
+        self.leases.soltar(id_item)
         self.api_service.actualizar_estado_programacion(
             id_item,
             "ERROR",
@@ -337,14 +790,17 @@ class AutomationWorker(threading.Thread):
             fecha_fin=fecha_fin,
             usuario_ejecuto="worker_automatico",
             resultado="ERROR",
-            mensaje_error=error
+            mensaje_error=error,
+            worker_id=self.worker_id
         )
         self.api_service.actualizar_estado_caso(id_item, 4)  # 4 = Error
+        self.diario.registrar(id_item, DiarioCasos.REPORTADA, resultado='ERROR')
         
-        # Screenshot de error
+        # Evidencia del error (se guarda en segundo plano)
         if self.playwright_service and self.playwright_service.page:
-            screenshot_path = self.playwright_service.take_screenshot(f"error_{id_item}")
-            self.logger.save_screenshot_info(screenshot_path, str(id_item), error)
+            screenshot_path = self.evidencias.capturar(self.playwright_service.page, id_item, error)
+            if screenshot_path:
+                self.logger.save_screenshot_info(screenshot_path, str(id_item), error)
         
         self.errores += 1
         self.procesados += 1
@@ -357,17 +813,29 @@ class AutomationWorker(threading.Thread):
             self.logger.critical('Worker', '🚨 ALERTA: 5 errores consecutivos detectados')
             self.reproducir_sonido_error()
     
-    def marcar_para_reintento(self, id_item: int, error: str):
-        """Marca una orden para reintentar después (incrementa intentos, no actualiza estadoCaso)"""
+    def marcar_para_reintento(self, id_item: int, error: str, espera: float = 0):
+        """
+        Marca una orden para reintentar después (incrementa intentos, no actualiza estadoCaso).
+        La espera ya quedó registrada en self.reintentos; aquí solo se informa.
+        """
+        self.leases.soltar(id_item)
         self.api_service.actualizar_estado_programacion(
             id_item,
-            "PENDIENTE",  # Volver a pendiente
+            "PENDIENTE",  # Volver a pendiente (libera el lease)
             mensaje_error=f"Intento fallido: {error}",
-            incrementar_intentos=True  # Incrementar contador de intentos
+            incrementar_intentos=True,  # Incrementar contador de intentos
+            worker_id=self.worker_id,
+            reintentar_despues=self.reintentos.not_before_api(id_item)  # Para otros workers y reinicios
         )
+        self.diario.registrar(id_item, DiarioCasos.REPORTADA, resultado='REINTENTO')
         # NO actualizar estadoCaso aquí, se mantiene en 3 (en proceso)
         
-        self.logger.warning('Worker', f'⚠️ Orden {id_item} reintentará después (intentos incrementados, estadoCaso permanece en 3)')
+        factor = self.reintentos.factor_degradacion()
+        self.logger.warning(
+            'Worker',
+            f'⚠️ Orden {id_item} reintentará en {espera:.0f}s (intentos incrementados, estadoCaso permanece en 3)'
+            + (f' | portal degradado x{factor}' if factor > 1 else '')
+        )
     
     def asegurar_navegador_activo(self) -> bool:
         """
@@ -380,7 +848,7 @@ class AutomationWorker(threading.Thread):
             # Si no hay servicio, crear
             if not self.playwright_service:
                 self.logger.info('Worker', 'Creando servicio Playwright...')
-                self.playwright_service = PlaywrightService(self.logger)
+                self.playwright_service = PlaywrightService(self.logger, vista_en_vivo=self.vista_en_vivo)
             
             # Si no está activo, iniciar
             if not self.playwright_service.esta_activo():
@@ -422,12 +890,15 @@ class AutomationWorker(threading.Thread):
     
     def navegar_a_formulario(self) -> bool:
         """Navega al formulario de reportar ambulatoria"""
+        inicio = time.time()
         try:
             home_service = HomePlaywright(self.playwright_service.page, self.logger)
-            return home_service.navegar_a_reportar_ambulatoria()
+            resultado = home_service.navegar_a_reportar_ambulatoria()
         except Exception as e:
             self.logger.error('Worker', 'Error navegando a formulario', e)
-            return False
+            resultado = False
+        self.salud.registrar('navegacion', time.time() - inicio, ok=bool(resultado))
+        return resultado
     
     def refrescar_solo_pagina(self) -> bool:
         """Solo refresca la página actual sin navegar de nuevo (para reintentos)"""
@@ -456,25 +927,144 @@ class AutomationWorker(threading.Thread):
             return False
     
     def verificar_inactividad(self):
-        """Verifica inactividad y cierra navegador si supera timeout"""
-        if not self.ultima_actividad:
+        """
+        Gestiona el navegador mientras no hay órdenes.
+        
+        - Modo 'cerrar': cierra el navegador si supera el timeout de inactividad.
+        - Modo 'caliente': lo mantiene abierto con sesión válida y formulario cargado.
+        - En ambos modos precalienta el navegador a las horas programadas.
+        """
+        if self.modo_espera == 'caliente':
+            self._mantener_en_caliente()
+        elif self.ultima_actividad:
+            tiempo_inactivo = time.time() - self.ultima_actividad
+            
+            if tiempo_inactivo > self.timeout_inactividad:
+                minutos = int(tiempo_inactivo / 60)
+                self.logger.info('Worker', f'💤 Sin actividad por {minutos} minutos. Cerrando navegador...')
+                self.cerrar_navegador()
+                self.ultima_actividad = None
+        
+        self._precalentar_si_toca()
+    
+    def _mantener_en_caliente(self):
+        """Verifica periódicamente el navegador en espera y lo recupera si hace falta"""
+        ahora = time.time()
+        if ahora - self._ultima_verificacion_espera < self.intervalo_verificacion_espera:
             return
+        self._ultima_verificacion_espera = ahora
         
-        tiempo_inactivo = time.time() - self.ultima_actividad
+        navegador_activo = self.playwright_service is not None and self.playwright_service.esta_activo()
+        if not navegador_activo:
+            self.precalentar_navegador('modo caliente')
+            return
+        
+        if self._reciclar_si_excede_memoria():
+            return
         
-        if tiempo_inactivo > self.timeout_inactividad:
-            minutos = int(tiempo_inactivo / 60)
-            self.logger.info('Worker', f'💤 Sin actividad por {minutos} minutos. Cerrando navegador...')
-            self.cerrar_navegador()
-            self.ultima_actividad = None
+        if not self.playwright_service.sesion_valida():
+            self.logger.info('Worker', '🔑 Sesión en espera expirada, renovando...')
+            self._formulario_navegado = False
+            self.precalentar_navegador('sesión expirada')
+    
+    def _precalentar_si_toca(self):
+        """Precalienta el navegador si estamos dentro de una hora programada"""
+        if not self.precalentar_horas:
+            return
+        
+        ahora = datetime.now()
+        for hora, minuto in self.precalentar_horas:
+            clave = (ahora.date(), hora, minuto)
+            programada = ahora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+            if clave in self._precalentados or not (programada <= ahora < programada + self.ventana_precalentado):
+                continue
+            
+            # Olvidar los precalentados de días anteriores
+            self._precalentados = {c for c in self._precalentados if c[0] == ahora.date()}
+            self._precalentados.add(clave)
+            if self.playwright_service is not None and self.playwright_service.esta_activo() and self._formulario_navegado:
+                self.logger.debug('Worker', f'Precalentado {hora:02d}:{minuto:02d}: navegador ya listo')
+                continue
+            self.precalentar_navegador(f'programado {hora:02d}:{minuto:02d}')
+    
+    def precalentar_navegador(self, motivo: str = '') -> bool:
+        """
+        Deja el navegador listo para la próxima orden: lanzado, con sesión
+        válida y el formulario cargado. Así la primera orden no paga el
+        arranque de Chromium, la carga de la página, el login ni el captcha.
+        
+        Args:
+            motivo: Texto para el log (modo caliente, hora programada, ...)
+        
+        Returns:
+            True si el navegador quedó listo
+        """
+        inicio = time.time()
+        self.logger.info('Worker', f'🔥 Precalentando navegador ({motivo})...')
+        
+        if not self.asegurar_navegador_activo():
+            self.logger.warning('Worker', '⚠️ No se pudo precalentar el navegador')
+            return False
+        
+        if not self._formulario_navegado:
+            if not self.navegar_a_formulario():
+                self.logger.warning('Worker', '⚠️ Navegador precalentado pero sin formulario cargado')
+                return False
+            self._formulario_navegado = True
+        
+        # Contar la espera desde aquí para el timeout de inactividad
+        self.ultima_actividad = time.time()
+        self.logger.success('Worker', f'🔥 Navegador listo en espera ({time.time() - inicio:.1f}s)')
+        return True
+    
+    def _reciclar_si_excede_memoria(self) -> bool:
+        """
+        Cierra el navegador si supera el límite de memoria configurado.
+        En modo caliente lo vuelve a precalentar enseguida.
+        
+        Returns:
+            True si el navegador se recicló
+        """
+        if not self.memoria_max_mb or not self.playwright_service:
+            return False
+        
+        memoria = self.playwright_service.memoria_navegador_mb()
+        if memoria is None or memoria <= self.memoria_max_mb:
+            return False
+        
+        self.logger.warning('Worker', f'🧠 Navegador usa {memoria:.0f} MB (límite {self.memoria_max_mb} MB), reciclando...')
+        self.cerrar_navegador()
+        if self.modo_espera == 'caliente':
+            self.precalentar_navegador('reciclado por memoria')
+        return True
+    
+    def _registrar_ahorro_recursos(self, id_item):
+        """Registra en el log lo que ahorró el filtro de recursos en el caso"""
+        if not self.playwright_service:
+            return
+        stats = self.playwright_service.tomar_estadisticas_recursos()
+        if stats and (stats['bloqueadas'] or stats['desde_cache']):
+            self.logger.debug('Worker', f'🚫 Recursos orden {id_item}: {BloqueadorRecursos.resumen(stats)}')
+    
+    def _sincronizar_vista_en_vivo(self):
+        """Inicia/detiene la transmisión de la vista en vivo según la UI (hilo del worker)"""
+        if self.playwright_service:
+            self.playwright_service.sincronizar_vista_en_vivo()
     
     def cerrar_navegador(self):
         """Cierra el navegador y limpia recursos"""
         if self.playwright_service:
             self.playwright_service.cerrar_navegador()
             self.playwright_service = None
+        self.ejecutor = None
+        self.ejecutor_lote = None
         self._formulario_navegado = False  # Resetear bandera
     
+    def _actualizar_metricas_cola(self, pendientes: list):
+        """Recalcula profundidad/antigüedad de la cola y notifica a la UI"""
+        self.metricas_cola = self.planificador.metricas(pendientes)
+        self.actualizar_estadisticas()
+    
     def actualizar_estadisticas(self):
         """Actualiza estadísticas y notifica a UI"""
         if self.on_stats_update:
@@ -482,7 +1072,9 @@ class AutomationWorker(threading.Thread):
                 self.on_stats_update({
                     'procesados': self.procesados,
                     'exitosos': self.exitosos,
-                    'errores': self.errores
+                    'errores': self.errores,
+                    'cola': self.metricas_cola,
+                    'portal': self.salud.metricas()
                 })
             except:
                 pass
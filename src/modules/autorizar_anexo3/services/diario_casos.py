@@ -0,0 +1,120 @@
+"""
+Diario local de los casos en curso del worker de Anexo 3.
+
+Registro de solo-agregar (SQLite en modo WAL, synchronous=FULL) de las fases
+de cada orden:
+
+    RECLAMADA -> ENVIADA (clic en Guardar) -> RESULTADO (modal leído) -> REPORTADA
+    RECLAMADA -> LIBERADA (pausa, detención, sin procesar)
+
+Si la app o el navegador mueren a mitad de un caso, la última fase dice qué
+hacer al arrancar: antes de ENVIADA se puede devolver a pendiente; después
+de ENVIADA el portal pudo haber radicado, así que no se reintenta. El worker
+reconcilia los casos abiertos antes de pedir trabajo nuevo.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.logger import AdvancedLogger
+from utils.paths import get_data_path
+
+
+class DiarioCasos:
+    """Fases de los casos en SQLite para recuperarse de una caída"""
+
+    RECLAMADA = 'RECLAMADA'
+    ENVIADA = 'ENVIADA'
+    RESULTADO = 'RESULTADO'
+    REPORTADA = 'REPORTADA'
+    LIBERADA = 'LIBERADA'
+    FASES_CIERRE = (REPORTADA, LIBERADA)
+
+    def __init__(self, worker_id: str, ruta: Optional[Path] = None, logger: Optional[AdvancedLogger] = None):
+        """
+        Args:
+            worker_id: Worker que escribe (dueño del lease al momento de la fase)
+            ruta: Archivo SQLite (por defecto session_data/diario_casos.db)
+            logger: Instancia del logger
+        """
+        self.worker_id = worker_id
+        self.ruta = Path(ruta) if ruta else get_data_path('session_data/diario_casos.db')
+        self.logger = logger or AdvancedLogger()
+        self._lock = threading.Lock()
+
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Se crea en el hilo de la UI y se usa en el del worker: una conexión con lock
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False, isolation_level=None)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute('PRAGMA synchronous=FULL')
+        self._conexion.execute(
+            'CREATE TABLE IF NOT EXISTS eventos ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' id_item TEXT NOT NULL,'
+            ' fase TEXT NOT NULL,'
+            ' detalle TEXT NOT NULL DEFAULT \'{}\','
+            ' worker_id TEXT NOT NULL,'
+            ' fecha REAL NOT NULL)'
+        )
+        self._conexion.execute('CREATE INDEX IF NOT EXISTS idx_eventos_item ON eventos (id_item, id)')
+
+    def registrar(self, id_item: Any, fase: str, **detalle):
+        """
+        Agrega una fase del caso. Un fallo del diario se registra en el log
+        pero nunca interrumpe el caso.
+
+        Args:
+            id_item: id_item_orden_proced
+            fase: Una de las fases de la clase
+            **detalle: Datos para reconciliar (número de radicado, mensaje, ...)
+        """
+        try:
+            with self._lock:
+                self._conexion.execute(
+                    'INSERT INTO eventos (id_item, fase, detalle, worker_id, fecha) VALUES (?, ?, ?, ?, ?)',
+                    (str(id_item), fase, json.dumps(detalle, ensure_ascii=False), self.worker_id, time.time())
+                )
+        except sqlite3.Error as e:
+            self.logger.warning('Diario', f'⚠️ No se pudo registrar {fase} de {id_item}: {e}')
+
+    def casos_abiertos(self) -> List[Dict[str, Any]]:
+        """
+        Casos cuya última fase no es de cierre.
+
+        Returns:
+            Lista de {'id_item', 'fase', 'detalle', 'worker_id', 'fecha'}
+        """
+        with self._lock:
+            filas = self._conexion.execute(
+                'SELECT e.id_item, e.fase, e.detalle, e.worker_id, e.fecha FROM eventos e'
+                ' JOIN (SELECT id_item, MAX(id) AS ultimo FROM eventos GROUP BY id_item) u ON e.id = u.ultimo'
+                ' ORDER BY e.id'
+            ).fetchall()
+        abiertos = []
+        for id_item, fase, detalle, worker_id, fecha in filas:
+            if fase in self.FASES_CIERRE:
+                continue
+            try:
+                detalle = json.loads(detalle)
+            except ValueError:
+                detalle = {}
+            abiertos.append({'id_item': id_item, 'fase': fase, 'detalle': detalle, 'worker_id': worker_id, 'fecha': fecha})
+        return abiertos
+
+    def compactar(self):
+        """Borra el historial de los casos ya cerrados (se llama al arrancar)"""
+        try:
+            with self._lock:
+                self._conexion.execute(
+                    'DELETE FROM eventos WHERE id_item IN ('
+                    ' SELECT e.id_item FROM eventos e'
+                    ' JOIN (SELECT id_item, MAX(id) AS ultimo FROM eventos GROUP BY id_item) u ON e.id = u.ultimo'
+                    ' WHERE e.fase IN (?, ?))',
+                    self.FASES_CIERRE
+                )
+                self._conexion.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error as e:
+            self.logger.warning('Diario', f'⚠️ No se pudo compactar el diario: {e}')
@@ -6,12 +6,23 @@ import os
 import requests
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable, Optional
 from utils.paths import get_data_path, get_resource_path
 
-try:
-    import fitz  # PyMuPDF
-except ImportError:
-    fitz = None
+# PyMuPDF se importa al crear el primer servicio, no al importar el módulo
+fitz = None
+
+
+def _importar_fitz():
+    """Importa PyMuPDF bajo demanda; retorna None si no está instalado"""
+    global fitz
+    if fitz is None:
+        try:
+            import fitz as _fitz  # PyMuPDF
+        except ImportError:
+            return None
+        fitz = _fitz
+    return fitz
 
 
 class PDFAnexo3Service:
@@ -40,7 +51,7 @@ class PDFAnexo3Service:
     FONT_BOLD = "Helvetica-Bold"
     
     def __init__(self, logger, config):
-        if fitz is None:
+        if _importar_fitz() is None:
             raise ImportError("PyMuPDF no está instalado. Ejecute: pip install PyMuPDF")
         
         self.logger = logger
@@ -114,8 +125,15 @@ class PDFAnexo3Service:
             self.logger.error('PDFAnexo3', f"Error generando Anexo 3", e)
             raise
 
-    def generar_anexo3_grupo(self, id_atencion: int, id_orden: int) -> str:
-        """Genera el PDF del Anexo 3 para grupo de procedimientos"""
+    def generar_anexo3_grupo(self, id_atencion: int, id_orden: int, cups: Optional[Iterable[str]] = None) -> str:
+        """
+        Genera el PDF del Anexo 3 para grupo de procedimientos.
+        
+        Args:
+            id_atencion: Id de la atención
+            id_orden: Id de la orden médica
+            cups: CUPS a incluir (los que se radican en la solicitud); None = todos los de la orden
+        """
         try:
             self.logger.info(
                 'PDFAnexo3',
@@ -138,6 +156,8 @@ class PDFAnexo3Service:
                 'PDFAnexo3',
                 f"✅ Datos obtenidos - Paciente: {datos.get('Nombre1')} {datos.get('Apellido1')}"
             )
+            if cups is not None:
+                datos = self._filtrar_procedimientos(datos, cups)
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             no_documento = datos.get('NoDocumento', 'SinDoc')
@@ -160,6 +180,24 @@ class PDFAnexo3Service:
             self.logger.error('PDFAnexo3', f"Error generando Anexo 3 (grupo)", e)
             raise
     
+    def _filtrar_procedimientos(self, datos: dict, cups: Iterable[str]) -> dict:
+        """Deja en los datos del grupo solo los procedimientos de los CUPS indicados"""
+        buscados = {str(c).strip() for c in cups}
+        procedimientos = datos.get('procedimientos')
+        if not isinstance(procedimientos, list):
+            # Respuesta de un solo procedimiento (sin tabla)
+            procedimientos = [datos]
+        incluidos = [p for p in procedimientos if str(p.get('Id_Procedimiento', '')).strip() in buscados]
+        faltantes = buscados - {str(p.get('Id_Procedimiento', '')).strip() for p in incluidos}
+        if faltantes:
+            raise Exception(f"La orden no trae los procedimientos {sorted(faltantes)}")
+        self.logger.info(
+            'PDFAnexo3', f"📋 Anexo 3 (grupo) con {len(incluidos)} de {len(procedimientos)} procedimientos de la orden"
+        )
+        if 'procedimientos' not in datos:
+            return datos
+        return {**datos, 'procedimientos': incluidos}
+    
     def _crear_pdf(self, filepath: str, datos: dict):
         """Crea el archivo PDF siguiendo el formato oficial"""
         doc = fitz.open()
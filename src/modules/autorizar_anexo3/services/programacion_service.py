@@ -10,6 +10,9 @@ from utils.logger import AdvancedLogger
 class ProgramacionService:
     """Servicio para interactuar con API de programacion_ordenes"""
     
+    # Respuestas de un backend que aún no expone los endpoints de lease
+    _HTTP_SIN_LEASES = (404, 405, 501)
+    
     def __init__(self, base_url: str = "http://localhost:5000", logger: Optional[AdvancedLogger] = None):
         """
         Args:
@@ -18,6 +21,7 @@ class ProgramacionService:
         """
         self.base_url = base_url.rstrip('/')
         self.logger = logger or AdvancedLogger()
+        self.leases_soportados = True  # Se apaga si el backend no tiene los endpoints de lease
     
     def programar_orden(self, id_item_orden_proced: int, id_orden: int, usuario: str = "sistema") -> bool:
         """
@@ -74,18 +78,22 @@ class ProgramacionService:
             self.logger.error('API', 'Error programando orden', e)
             return False
     
-    def obtener_pendientes(self, limite: int = 100) -> List[Dict]:
+    def obtener_pendientes(self, limite: int = 100, incluir_leases_vencidos: bool = False) -> List[Dict]:
         """
         Obtiene órdenes pendientes de programación.
         
         Args:
             limite: Número máximo de órdenes a obtener
+            incluir_leases_vencidos: Incluir las EN_PROGRESO cuyo lease venció
+                (worker caído) para que se puedan reclamar
         
         Returns:
             Lista de órdenes pendientes
         """
         try:
             url = f"{self.base_url}/programacion-ordenes?estado=PENDIENTE&per_page={limite}"
+            if incluir_leases_vencidos and self.leases_soportados:
+                url += "&incluir_leases_vencidos=true"
             response = requests.get(url, timeout=10)
             
             if response.status_code == 200:
@@ -112,7 +120,9 @@ class ProgramacionService:
         usuario_ejecuto: Optional[str] = None,
         resultado: Optional[str] = None,
         mensaje_error: Optional[str] = None,
-        incrementar_intentos: bool = False
+        incrementar_intentos: bool = False,
+        worker_id: Optional[str] = None,
+        reintentar_despues: Optional[str] = None
     ) -> bool:
         """
         Actualiza el estado de una orden en programación.
@@ -126,6 +136,8 @@ class ProgramacionService:
             resultado: Resultado de la ejecución
             mensaje_error: Mensaje de error si aplica
             incrementar_intentos: Si incrementar contador de intentos
+            worker_id: Dueño del lease; la API ignora la actualización si ya no lo es
+            reintentar_despues: Instante UTC (ISO 8601) antes del cual ningún worker debe reintentarla
         
         Returns:
             True si se actualizó exitosamente
@@ -147,6 +159,10 @@ class ProgramacionService:
                 payload["resultado_ejecucion"] = resultado
             if mensaje_error:
                 payload["mensaje_error"] = mensaje_error
+            if worker_id:
+                payload["worker_id"] = worker_id
+            if reintentar_despues:
+                payload["reintentar_despues"] = reintentar_despues
             
             self.logger.debug('API', f'Actualizando estado: PUT {url}')
             self.logger.debug('API', f'Payload: {payload}')
@@ -169,13 +185,100 @@ class ProgramacionService:
             self.logger.error('API', f'Error actualizando estado programación para {id_item_orden_proced}', e)
             return False
     
-    def actualizar_estado_caso(self, id_item_orden_proced: int, estado_caso: int) -> bool:
+    def reclamar_orden(self, id_item_orden_proced: int, worker_id: str, lease_seg: int) -> bool:
+        """
+        Reclama una orden de forma atómica: la API la pasa a EN_PROGRESO con
+        lease a nombre del worker solo si está PENDIENTE o si su lease venció.
+        
+        Args:
+            id_item_orden_proced: ID del item
+            worker_id: Identificador del worker que la reclama
+            lease_seg: Duración del lease en segundos
+        
+        Returns:
+            True si la orden quedó a nombre de este worker (o si el backend no
+            maneja leases); False si otro worker la tiene
+        """
+        return bool(self._llamar_lease(
+            'reclamar', id_item_orden_proced,
+            {"worker_id": worker_id, "lease_seg": lease_seg, "estado": "EN_PROGRESO"}
+        ))
+    
+    def renovar_lease(self, id_item_orden_proced: int, worker_id: str, lease_seg: int) -> bool:
+        """
+        Extiende el lease de una orden en curso (latido).
+        
+        Returns:
+            False solo si el lease ya no es de este worker (un fallo de red no
+            lo da por perdido: el lease aún tiene margen hasta el próximo latido)
+        """
+        return self._llamar_lease(
+            'renovar-lease', id_item_orden_proced,
+            {"worker_id": worker_id, "lease_seg": lease_seg}
+        ) is not False
+    
+    def liberar_orden(self, id_item_orden_proced: int, worker_id: str) -> bool:
+        """
+        Devuelve una orden reclamada a PENDIENTE sin contar intento (pausa,
+        detención o reclamada de más al armar un lote).
+        
+        Si el backend no tiene los endpoints de lease, el estado se devuelve
+        con la actualización normal de la programación.
+        
+        Returns:
+            True solo si la orden quedó PENDIENTE en el backend
+        """
+        if self.leases_soportados:
+            liberada = self._llamar_lease('liberar', id_item_orden_proced, {"worker_id": worker_id})
+            if self.leases_soportados:
+                return bool(liberada)
+        return self.actualizar_estado_programacion(id_item_orden_proced, "PENDIENTE", worker_id=worker_id)
+    
+    def _llamar_lease(self, accion: str, id_item_orden_proced: int, payload: Dict) -> Optional[bool]:
+        """
+        PUT condicional /programacion-ordenes/item/{id}/{accion}.
+        
+        Returns:
+            True si se aplicó (200), False si la orden es de otro worker (409),
+            None si la llamada falló por otro motivo
+        """
+        if not self.leases_soportados:
+            return True
+        try:
+            url = f"{self.base_url}/programacion-ordenes/item/{id_item_orden_proced}/{accion}"
+            self.logger.debug('API', f'Lease: PUT {url} {payload}')
+            response = requests.put(url, json=payload, timeout=10)
+            
+            if response.status_code == 200:
+                return True
+            if response.status_code == 409:
+                self.logger.info('API', f'🔒 Orden {id_item_orden_proced} tomada por otro worker ({accion})')
+                return False
+            if response.status_code in self._HTTP_SIN_LEASES:
+                # Backend sin leases: se sigue como antes (un solo worker por backend)
+                self.leases_soportados = False
+                self.logger.warning('API', f'⚠️ La API no soporta leases (HTTP {response.status_code}); usar un solo worker por backend')
+                return True
+            self.logger.error('API', f'❌ Error en lease ({accion}) de {id_item_orden_proced}: HTTP {response.status_code}')
+            return None
+            
+        except Exception as e:
+            self.logger.error('API', f'Error en lease ({accion}) de {id_item_orden_proced}', e)
+            return None
+    
+    def actualizar_estado_caso(
+        self,
+        id_item_orden_proced: int,
+        estado_caso: int,
+        numero_autorizacion: Optional[str] = None
+    ) -> bool:
         """
         Actualiza el estadoCaso en h-itemordenesproced.
         
         Args:
             id_item_orden_proced: ID del item
             estado_caso: Código de estado (2=programado, 3=en proceso, 1=completado, 4=error)
+            numero_autorizacion: Número de radicado a guardar (opcional)
         
         Returns:
             True si se actualizó exitosamente
@@ -183,6 +286,8 @@ class ProgramacionService:
         try:
             url = f"{self.base_url}/h-itemordenesproced/{id_item_orden_proced}/estadoCaso"
             payload = {"estadoCaso": estado_caso}
+            if numero_autorizacion:
+                payload["numeroAutorizacion"] = numero_autorizacion
             
             self.logger.debug('API', f'Actualizando estadoCaso: PUT {url}')
             self.logger.debug('API', f'Payload: {payload}')
@@ -0,0 +1,152 @@
+"""
+Programador de reintentos del worker de Anexo 3.
+
+Guarda para cada orden en reintento un `not_before` (momento a partir del
+cual puede volver a procesarse) calculado con backoff exponencial según la
+clase del error. Mientras tanto las órdenes nuevas pasan primero, y si el
+portal está degradado (muchos fallos temporales recientes) las esperas se
+alargan para no martillarlo con reintentos.
+
+El `not_before` también viaja a la API con la orden devuelta a PENDIENTE
+(campo reintentar_despues) y se respeta al leer las pendientes, así la
+espera sobrevive a un reinicio y la comparten los demás workers. Con un
+backend que no guarda el campo, la espera solo vale dentro de este proceso.
+"""
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.autorizar_anexo3.playwright.errores_caso import ErrorCaso
+
+
+class ProgramadorReintentos:
+    """not_before por orden con backoff exponencial por clase de error"""
+
+    VENTANA_DEGRADACION = 600  # Segundos de historial de fallos temporales
+    FALLOS_POR_NIVEL = 5       # Cada N fallos en la ventana duplica la espera
+    NIVEL_MAX_DEGRADACION = 2  # Hasta x4
+    JITTER = 0.2               # ±20% para repartir los reintentos
+    CAMPO_API = 'reintentar_despues'  # not_before de la orden en la API (UTC)
+
+    def __init__(self, espera_max_seg: int = 900):
+        """
+        Args:
+            espera_max_seg: Tope de la espera de un reintento
+        """
+        self.espera_max_seg = espera_max_seg
+        self._lock = threading.Lock()
+        # id_item -> (not_before, clase del error)
+        self._programados: Dict[int, Tuple[float, str]] = {}
+        self._fallos_recientes: deque = deque()
+
+    def programar(self, id_item: int, error: ErrorCaso, intento: int) -> float:
+        """
+        Registra un fallo temporal y calcula cuándo puede reintentarse la orden.
+
+        Args:
+            id_item: id_item_orden_proced
+            error: Error clasificado del intento
+            intento: Número de intentos ya realizados (1 = primer fallo)
+
+        Returns:
+            Segundos de espera asignados
+        """
+        ahora = time.time()
+        with self._lock:
+            self._fallos_recientes.append(ahora)
+            self._purgar_fallos(ahora)
+
+            espera = error.espera_reintento * (2 ** max(0, intento - 1)) * self.factor_degradacion()
+            espera = min(espera, self.espera_max_seg)
+            espera *= random.uniform(1 - self.JITTER, 1 + self.JITTER)
+
+            self._programados[id_item] = (ahora + espera, type(error).__name__)
+        return espera
+
+    def not_before_api(self, id_item: int) -> Optional[str]:
+        """not_before programado de la orden en el formato que guarda la API (ISO 8601 UTC)"""
+        with self._lock:
+            programado = self._programados.get(id_item)
+        if programado is None:
+            return None
+        return datetime.fromtimestamp(programado[0], timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def _instante(valor: Any) -> Optional[float]:
+        """reintentar_despues de la API como timestamp (sin zona se asume UTC)"""
+        texto = str(valor or '').strip()
+        if not texto:
+            return None
+        try:
+            fecha = parsedate_to_datetime(texto)  # "Mon, 02 Feb 2026 16:48:15 GMT"
+        except (TypeError, ValueError, IndexError):
+            try:
+                fecha = datetime.fromisoformat(texto.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        return fecha.timestamp()
+
+    def olvidar(self, id_item: int):
+        """Quita la orden del programador (completada o con error final)"""
+        with self._lock:
+            self._programados.pop(id_item, None)
+
+    def _purgar_fallos(self, ahora: float):
+        while self._fallos_recientes and ahora - self._fallos_recientes[0] > self.VENTANA_DEGRADACION:
+            self._fallos_recientes.popleft()
+
+    def factor_degradacion(self) -> int:
+        """Multiplicador de espera según los fallos temporales recientes (1, 2 o 4)"""
+        nivel = min(self.NIVEL_MAX_DEGRADACION, len(self._fallos_recientes) // self.FALLOS_POR_NIVEL)
+        return 2 ** nivel
+
+    def filtrar_listas(self, pendientes: List[dict]) -> Tuple[List[dict], int]:
+        """
+        Quita las órdenes cuyo reintento aún no vence, respetando el orden
+        recibido (el PlanificadorCola ya puso los primeros intentos adelante).
+        Cuenta tanto la espera programada aquí como la que trae la orden de
+        la API (otro worker o una ejecución anterior).
+
+        Args:
+            pendientes: Órdenes de obtener_pendientes(), ya planificadas
+
+        Returns:
+            (órdenes a procesar, cantidad de reintentos diferidos)
+        """
+        ahora = time.time()
+        listas, diferidas = [], 0
+        with self._lock:
+            self._purgar_fallos(ahora)
+            # Órdenes que ya no están pendientes (canceladas, anuladas): olvidarlas.
+            # Una lista vacía puede ser un fallo de la API, así que no se purga con ella
+            if pendientes:
+                ids = {orden.get('id_item_orden_proced') for orden in pendientes}
+                for id_item in [i for i in self._programados if i not in ids]:
+                    del self._programados[id_item]
+
+            for orden in pendientes:
+                id_item = orden.get('id_item_orden_proced')
+                remoto = self._instante(orden.get(self.CAMPO_API))
+                if remoto is not None and remoto > ahora and (
+                    id_item not in self._programados or self._programados[id_item][0] < remoto
+                ):
+                    self._programados[id_item] = (remoto, 'API')
+                programado = self._programados.get(id_item)
+                if programado is None or programado[0] <= ahora:
+                    listas.append(orden)
+                else:
+                    diferidas += 1
+        return listas, diferidas
+
+    def proximo_reintento(self) -> Optional[float]:
+        """Segundos hasta el próximo reintento programado (None si no hay)"""
+        with self._lock:
+            if not self._programados:
+                return None
+            return max(0.0, min(nb for nb, _ in self._programados.values()) - time.time())
@@ -0,0 +1,181 @@
+"""
+Salud de portalsalud.coosalud.com vista desde el worker de Anexo 3.
+
+Se miden las operaciones clave del portal (respuesta al Guardar, reinicio
+del formulario, navegación al formulario) y los fallos por timeout o
+conexión en una ventana móvil. Cada muestra se expresa como múltiplo del
+tiempo de referencia de su operación; el percentil 75 de la ventana da el
+nivel de lentitud:
+
+    NORMAL    -> timeouts normales
+    LENTO     -> timeouts escalados por el nivel (hasta factor_max)
+    DEGRADADO -> no se toman órdenes durante pausa_seg; al vencer la pausa
+                 se procesa una sola orden de sonda: si responde bien se
+                 vuelve a NORMAL, si no se pausa otra vez
+
+Así el worker deja de martillar al portal con casos que solo acumulan
+timeouts (estado 13) y reintentos, y se reanuda solo.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from utils.logger import AdvancedLogger
+
+
+class SaludPortal:
+    """Ventana móvil de tiempos de respuesta del portal y estado derivado"""
+
+    NORMAL = 'NORMAL'
+    LENTO = 'LENTO'
+    DEGRADADO = 'DEGRADADO'
+
+    # Segundos que tarda cada operación con el portal sano
+    REFERENCIA_SEG = {
+        'guardar': 15.0,     # Clic en Guardar -> modal Correcto/Error
+        'reinicio': 3.0,     # Reinicio suave del formulario
+        'navegacion': 10.0,  # Menú -> formulario de Ambulatoria
+    }
+    MIN_MUESTRAS = 4
+
+    def __init__(
+        self,
+        ventana: int = 20,
+        umbral_lento: float = 1.5,
+        umbral_degradado: float = 3.0,
+        factor_max: float = 3.0,
+        pausa_seg: int = 120,
+        logger: Optional[AdvancedLogger] = None
+    ):
+        """
+        Args:
+            ventana: Cantidad de muestras recientes que se consideran
+            umbral_lento: Nivel (múltiplo de la referencia) a partir del cual el portal está LENTO
+            umbral_degradado: Nivel a partir del cual está DEGRADADO
+            factor_max: Tope del multiplicador de timeouts
+            pausa_seg: Segundos sin tomar órdenes en modo DEGRADADO
+            logger: Instancia del logger
+        """
+        self.umbral_lento = umbral_lento
+        self.umbral_degradado = umbral_degradado
+        self.factor_max = factor_max
+        self.pausa_seg = pausa_seg
+        self.logger = logger or AdvancedLogger()
+
+        self._lock = threading.Lock()
+        self._muestras: deque = deque(maxlen=ventana)
+        self._estado = self.NORMAL
+        self._pausa_hasta = 0.0
+
+    # ==================== MUESTRAS ====================
+
+    def registrar(self, operacion: str, segundos: float, ok: bool = True):
+        """
+        Agrega una medición.
+
+        Args:
+            operacion: Clave de REFERENCIA_SEG ('guardar', 'reinicio', 'navegacion')
+            segundos: Duración medida
+            ok: False si la operación no terminó (timeout, sin respuesta)
+        """
+        nivel = segundos / self.REFERENCIA_SEG.get(operacion, 10.0)
+        if not ok:
+            nivel = max(nivel, self.umbral_degradado)
+        self._agregar(nivel, f'{operacion} {segundos:.1f}s' + ('' if ok else ' sin respuesta'))
+
+    def registrar_fallo(self, motivo: str):
+        """Un caso terminó por timeout o conexión con el portal"""
+        self._agregar(self.umbral_degradado, motivo)
+
+    def _agregar(self, nivel: float, descripcion: str):
+        with self._lock:
+            ahora = time.time()
+            if self._estado == self.DEGRADADO:
+                self._muestras.append(nivel)
+                if ahora < self._pausa_hasta:
+                    return  # Resto de un caso que ya estaba en curso al pausar
+                # Muestra de la orden de sonda
+                if nivel < self.umbral_lento:
+                    self._muestras.clear()
+                    self._muestras.append(nivel)
+                    self._cambiar(self.NORMAL, f'sonda correcta ({descripcion})')
+                else:
+                    self._pausa_hasta = ahora + self.pausa_seg
+                    self.logger.warning(
+                        'SaludPortal', f'🩺 Sonda fallida ({descripcion}): portal sigue degradado, pausa de {self.pausa_seg}s'
+                    )
+                return
+
+            self._muestras.append(nivel)
+            actual = self._nivel()
+            if actual >= self.umbral_degradado:
+                self._pausa_hasta = ahora + self.pausa_seg
+                self._cambiar(self.DEGRADADO, f'nivel x{actual:.1f} ({descripcion}), pausa de {self.pausa_seg}s')
+            elif actual >= self.umbral_lento:
+                self._cambiar(self.LENTO, f'nivel x{actual:.1f} ({descripcion})')
+            else:
+                self._cambiar(self.NORMAL, f'nivel x{actual:.1f}')
+
+    def _nivel(self) -> float:
+        """Percentil 75 de la ventana (1.0 mientras no haya muestras suficientes)"""
+        if len(self._muestras) < self.MIN_MUESTRAS:
+            return 1.0
+        ordenadas = sorted(self._muestras)
+        return ordenadas[int(0.75 * (len(ordenadas) - 1))]
+
+    def _cambiar(self, estado: str, motivo: str):
+        if estado == self._estado:
+            return
+        self._estado = estado
+        if estado == self.DEGRADADO:
+            self.logger.error('SaludPortal', f'🩺 Portal DEGRADADO: {motivo}')
+        elif estado == self.LENTO:
+            self.logger.warning('SaludPortal', f'🩺 Portal LENTO: {motivo}')
+        else:
+            self.logger.success('SaludPortal', f'🩺 Portal NORMAL: {motivo}')
+
+    # ==================== DECISIONES DEL WORKER ====================
+
+    @property
+    def estado(self) -> str:
+        return self._estado
+
+    def factor_timeout(self) -> float:
+        """Multiplicador de los timeouts del ejecutor (1.0 con el portal sano)"""
+        with self._lock:
+            return min(self.factor_max, max(1.0, self._nivel()))
+
+    def segundos_pausa(self) -> float:
+        """Segundos que faltan para volver a tomar órdenes (0 = se puede trabajar)"""
+        with self._lock:
+            if self._estado != self.DEGRADADO:
+                return 0.0
+            return max(0.0, self._pausa_hasta - time.time())
+
+    def limite_ordenes(self) -> Optional[int]:
+        """Órdenes a tomar en el ciclo: 1 (sonda) si está DEGRADADO, None = sin límite"""
+        return 1 if self._estado == self.DEGRADADO else None
+
+    def metricas(self) -> Dict[str, Any]:
+        """Estado para la UI: {'estado', 'factor', 'muestras', 'pausa_seg'}"""
+        with self._lock:
+            muestras = len(self._muestras)
+        return {
+            'estado': self._estado,
+            'factor': self.factor_timeout(),
+            'muestras': muestras,
+            'pausa_seg': self.segundos_pausa(),
+        }
+
+    @staticmethod
+    def resumen(metricas: Dict[str, Any]) -> str:
+        """Texto corto para el log y la UI"""
+        texto = {'NORMAL': '🟢 Normal', 'LENTO': '🟡 Lento', 'DEGRADADO': '🔴 Degradado'}.get(
+            metricas['estado'], metricas['estado']
+        )
+        if metricas.get('factor', 1.0) > 1.0:
+            texto += f" | timeouts x{metricas['factor']:.1f}"
+        if metricas.get('pausa_seg'):
+            texto += f" | reanuda en {metricas['pausa_seg']:.0f}s"
+        return texto
@@ -2,23 +2,30 @@
 Panel de control del Worker de Automatización
 Muestra estado, controles y tabla de órdenes programadas
 """
+import queue
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from datetime import datetime
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from config.config import Config
-from modules.autorizar_anexo3.services.automation_worker import AutomationWorker
 from modules.autorizar_anexo3.services.programacion_service import ProgramacionService
+from services.planificador_cola import PlanificadorCola
+from modules.autorizar_anexo3.services.salud_portal import SaludPortal
+
+if TYPE_CHECKING:
+    from modules.autorizar_anexo3.services.automation_worker import AutomationWorker
 
 
 class ProgramacionPanel(ttk.Frame):
     """Panel para controlar el Worker de automatización"""
     
+    INTERVALO_STATS_MS = 500  # Sondeo de las estadísticas que envía el worker
+    
     def __init__(self, parent, config):
         """
         Args:
@@ -28,11 +35,15 @@ class ProgramacionPanel(ttk.Frame):
         super().__init__(parent)
         self.config = config
         self.global_config = Config()  # Configuración global
-        self.worker: Optional[AutomationWorker] = None
+        self.worker: Optional['AutomationWorker'] = None
+        self.vista_window: Optional[tk.Toplevel] = None  # Ventana "Vista en vivo"
         base_url = self.global_config.api_url_programacion_base or "http://localhost:5000"
         self.api_service = ProgramacionService(base_url=base_url)
         self.refresh_id = None
         self.estado_filtro = tk.StringVar(value="PENDIENTE")  # Filtro por defecto
+        # El worker deja aquí sus estadísticas; solo el hilo de Tk toca los widgets
+        self._cola_stats: queue.Queue = queue.Queue()
+        self._stats_id = None
         
         self._create_widgets()
         self._start_auto_refresh()
@@ -75,6 +86,13 @@ class ProgramacionPanel(ttk.Frame):
         )
         self.btn_detener.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(
+            btn_frame,
+            text="👁️ Vista en vivo",
+            command=self._abrir_vista_en_vivo,
+            width=15
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Estado del worker
         status_frame = ttk.Frame(control_frame)
         status_frame.pack(side=tk.RIGHT)
@@ -116,7 +134,17 @@ class ProgramacionPanel(ttk.Frame):
         # Navegador
         ttk.Label(stats_row, text="🌐 Navegador:", font=('Arial', 9)).pack(side=tk.LEFT, padx=5)
         self.navegador_label = ttk.Label(stats_row, text="Sin sesión", font=('Arial', 9, 'italic'))
-        self.navegador_label.pack(side=tk.LEFT)
+        self.navegador_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Cola de pendientes (profundidad y antigüedad)
+        ttk.Label(stats_row, text="📥 Cola:", font=('Arial', 9)).pack(side=tk.LEFT, padx=5)
+        self.cola_label = ttk.Label(stats_row, text="-", font=('Arial', 9))
+        self.cola_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Salud del portal (tiempos de respuesta, timeouts escalados, pausa)
+        ttk.Label(stats_row, text="🩺 Portal:", font=('Arial', 9)).pack(side=tk.LEFT, padx=5)
+        self.portal_label = ttk.Label(stats_row, text="-", font=('Arial', 9))
+        self.portal_label.pack(side=tk.LEFT)
         
         # =========================
         # TABLA DE PROGRAMADOS
@@ -368,12 +396,17 @@ class ProgramacionPanel(ttk.Frame):
         try:
             self._agregar_log("🚀 Iniciando Worker de automatización...")
             
+            # Playwright se carga aquí, al iniciar el worker por primera vez
+            from modules.autorizar_anexo3.services.automation_worker import AutomationWorker
+            
             # Crear worker con callback para logs
             self.worker = AutomationWorker(ui_callback=self._agregar_log)
-            self.worker.on_stats_update = self._actualizar_estadisticas
+            self.worker.on_stats_update = self._recibir_estadisticas
             
             # Iniciar thread
             self.worker.start()
+            if self._stats_id is None:
+                self._stats_id = self.after(self.INTERVALO_STATS_MS, self._revisar_estadisticas)
             
             # Actualizar UI
             self.status_label.config(text="🟢 ACTIVO", foreground='green')
@@ -428,6 +461,8 @@ class ProgramacionPanel(ttk.Frame):
             
             # Limpiar referencia del worker
             self.worker = None
+            if self.vista_window is not None and self.vista_window.winfo_exists():
+                self.vista_window.destroy()
             
             # Actualizar UI
             self.status_label.config(text="⚪ INACTIVO", foreground='gray')
@@ -438,11 +473,53 @@ class ProgramacionPanel(ttk.Frame):
             
             self._agregar_log("✅ Worker detenido")
     
+    def _abrir_vista_en_vivo(self):
+        """Abre la ventana de vista en vivo del navegador del worker"""
+        if not self.worker or not self.worker.is_alive():
+            messagebox.showinfo("Vista en vivo", "Inicie el worker para ver su navegador")
+            return
+        
+        if self.vista_window is not None and self.vista_window.winfo_exists():
+            self.vista_window.lift()
+            return
+        
+        from ui.vista_en_vivo_window import VistaEnVivoWindow
+        self.vista_window = VistaEnVivoWindow(self, self.worker.vista_en_vivo, titulo="Worker Automatización")
+    
+    def _recibir_estadisticas(self, stats: dict):
+        """Callback del worker (su hilo): encola las estadísticas sin tocar widgets"""
+        self._cola_stats.put(dict(stats))
+    
+    def _revisar_estadisticas(self):
+        """Sondea (hilo de Tk) las estadísticas del worker y muestra la más reciente"""
+        # Se mira antes de vaciar la cola para no perder lo último que envió al terminar
+        vivo = self.worker is not None and self.worker.is_alive()
+        stats = None
+        while True:
+            try:
+                stats = self._cola_stats.get_nowait()
+            except queue.Empty:
+                break
+        if stats is not None:
+            self._actualizar_estadisticas(stats)
+        if vivo:
+            self._stats_id = self.after(self.INTERVALO_STATS_MS, self._revisar_estadisticas)
+        else:
+            self._stats_id = None
+    
     def _actualizar_estadisticas(self, stats: dict):
         """Actualiza las estadísticas en la UI"""
         self.procesados_label.config(text=str(stats.get('procesados', 0)))
         self.exitosos_label.config(text=str(stats.get('exitosos', 0)))
         self.errores_label.config(text=str(stats.get('errores', 0)))
+        if stats.get('cola') is not None:
+            self.cola_label.config(text=PlanificadorCola.resumen(stats['cola']))
+        if stats.get('portal') is not None:
+            colores = {SaludPortal.NORMAL: 'green', SaludPortal.LENTO: 'orange', SaludPortal.DEGRADADO: 'red'}
+            self.portal_label.config(
+                text=SaludPortal.resumen(stats['portal']),
+                foreground=colores.get(stats['portal']['estado'], 'gray')
+            )
     
     def _actualizar_estado_navegador(self):
         """Actualiza el indicador de estado del navegador"""
@@ -579,6 +656,8 @@ class ProgramacionPanel(ttk.Frame):
         """Limpia recursos al destruir"""
         if self.refresh_id:
             self.after_cancel(self.refresh_id)
+        if self._stats_id:
+            self.after_cancel(self._stats_id)
 
         if self.worker:
             # Evitar callbacks a UI destruida
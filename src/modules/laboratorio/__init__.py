@@ -1,8 +1,13 @@
 """
 Módulo de automatización de laboratorio
 """
-from modules.laboratorio.ui.laboratorio_panel import LaboratorioPanel
-from modules.laboratorio.ui.estadisticas_creados_panel import EstadisticasCreadosPanel
-from modules.laboratorio.ui.estadisticas_asistidos_panel import EstadisticasAsistidosPanel
+from utils.lazy import exportar_perezoso
 
 __all__ = ['LaboratorioPanel', 'EstadisticasCreadosPanel', 'EstadisticasAsistidosPanel']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'LaboratorioPanel': 'modules.laboratorio.ui.laboratorio_panel',
+    'EstadisticasCreadosPanel': 'modules.laboratorio.ui.estadisticas_creados_panel',
+    'EstadisticasAsistidosPanel': 'modules.laboratorio.ui.estadisticas_asistidos_panel'
+})
@@ -1,7 +1,11 @@
 """
 Automatización Playwright del módulo laboratorio
 """
-from modules.laboratorio.playwright.ejecutar_casos_laboratorio import EjecutarCasosLaboratorio
-from modules.laboratorio.playwright.ingreso_items_laboratorio import IngresoItemsLaboratorio
+from utils.lazy import exportar_perezoso
 
-__all__ = ['EjecutarCasosLaboratorio', 'IngresoItemsLaboratorio']
+__all__ = ['EjecutarCasosLaboratorio']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'EjecutarCasosLaboratorio': 'modules.laboratorio.playwright.ejecutar_casos_laboratorio'
+})
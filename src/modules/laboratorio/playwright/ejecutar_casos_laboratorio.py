@@ -11,7 +11,10 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import EjecutarCasosPlaywright
-from modules.laboratorio.playwright.ingreso_items_laboratorio import IngresoItemsLaboratorio
+from modules.autorizar_anexo3.playwright.errores_caso import PdfFaltanteError
+from services.ingreso_items_multiples import IngresoItemsMultiples
+from modules.laboratorio.services.laboratorio_service import LaboratorioService
+from services.registro_resultados import RegistroResultados
 from config.config import Config
 from utils.logger import Logger
 
@@ -25,17 +28,28 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
     - La búsqueda de PDF
     """
     
-    def __init__(self, page, logger: Optional[Logger] = None, pause_callback=None):
+    MODULO_RESULTADOS = 'laboratorio'
+    
+    def __init__(
+        self,
+        page,
+        logger: Optional[Logger] = None,
+        pause_callback=None,
+        laboratorio_service: Optional[LaboratorioService] = None
+    ):
         """
         Args:
             page: Página de Playwright
             logger: Logger para registrar eventos
             pause_callback: Función que retorna True si el worker está pausado
+            laboratorio_service: Servicio API compartido con el worker (opcional)
         """
         super().__init__(page, logger, pause_callback)
         self.config = Config()
-        self.ingreso_laboratorio = IngresoItemsLaboratorio(page, logger)
+        self.ingreso_laboratorio = IngresoItemsMultiples(page, logger)
+        self.laboratorio_service = laboratorio_service or LaboratorioService()
         self.cups_list = []  # Lista de CUPS para laboratorio
+        self.resultados_cups: List[Dict[str, Any]] = []  # Resultado por CUPS del último caso
     
     def _log(self, mensaje: str, level: str = "info"):
         """Registra un mensaje en el log"""
@@ -69,6 +83,7 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
         
         # Guardar cups_list para uso en _ingresar_servicios
         self.cups_list = paciente_data.get('cups_list', [])
+        self.resultados_cups = []
         self._log(f"📋 CUPS recibidos en ejecutor: {self.cups_list} (total: {len(self.cups_list)})")
         
         # Convertir diccionario a objeto con atributos (formato que espera inicio_casos)
@@ -155,9 +170,14 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
                 cups_list=cups_list,
                 page=self.page
             )
+            self.resultados_cups = list(self.ingreso_laboratorio.resultados_cups)
             
             if resultado:
-                self._log(f"✅ {len(cups_list)} CUPS ingresados correctamente")
+                fallidos = [r['cups'] for r in self.resultados_cups if not r['ok']]
+                if fallidos:
+                    self._log(f"⚠️ Ingreso parcial: {len(cups_list) - len(fallidos)}/{len(cups_list)} CUPS. No ingresados: {fallidos}", level="warning")
+                else:
+                    self._log(f"✅ {len(cups_list)} CUPS ingresados correctamente")
             else:
                 self._log("Error ingresando CUPS", level="error")
             
@@ -178,12 +198,12 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
             Ruta al archivo PDF si existe
             
         Raises:
-            Exception: Si no se encuentra el PDF (con mensaje para clasificación estado 5)
+            PdfFaltanteError: Si no se encuentra el PDF (estado 5)
         """
         ruta_base = getattr(self.config, 'laboratorio_pdf_path', None)
         
         if not ruta_base:
-            raise Exception("PDF no encontrado - LABORATORIO_PDF_PATH no configurado")
+            raise PdfFaltanteError("PDF no encontrado - LABORATORIO_PDF_PATH no configurado")
         
         # Obtener urlOrdenMedica
         if isinstance(paciente_data, dict):
@@ -192,13 +212,13 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
             url_orden_medica = getattr(paciente_data, 'urlOrdenMedica', '')
         
         if not url_orden_medica:
-            raise Exception("PDF no encontrado - urlOrdenMedica vacío")
+            raise PdfFaltanteError("PDF no encontrado - urlOrdenMedica vacío")
         
         # Formato: |1_4_HISTORIA CLINICA.pdf - quitar el | inicial
         nombre_archivo = url_orden_medica.lstrip('|').strip()
         
         if not nombre_archivo:
-            raise Exception("PDF no encontrado - nombre de archivo vacío")
+            raise PdfFaltanteError("PDF no encontrado - nombre de archivo vacío")
         
         ruta_completa = os.path.join(ruta_base, nombre_archivo)
         existe = os.path.exists(ruta_completa)
@@ -206,7 +226,7 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
         self._log(f"🔍 PDF: {ruta_completa} [{'✓ EXISTE' if existe else '✗ NO EXISTE'}]")
         
         if not existe:
-            raise Exception(f"PDF no encontrado - {ruta_completa}")
+            raise PdfFaltanteError(f"PDF no encontrado - {ruta_completa}")
         
         return ruta_completa
     
@@ -229,14 +249,13 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
         self._log(f"🔁 SOLICITUD ACTIVA DETECTADA - Marcando como ya radicada (estado 6)")
         self._log(f"📝 Mensaje completo: {error_text}")
         
-        # Registrar en archivo con mensaje completo
-        with open("archivo.txt", 'a', encoding='utf-8') as archivo:
-            archivo.write(f"caso,SOLICITUD ACTIVA (Lab) - {error_text},paciente,{data.identificacion},ordenCapita,{data.idItemOrden}\n")
+        # Registrar con mensaje completo
+        self._registrar_resultado(data, RegistroResultados.SOLICITUD_ACTIVA, error_text)
         
         # Cerrar modal y actualizar con estado 6 y mensaje completo
-        self._hacer_clic_ok()
-        self.actualizar_con_resultado_ejecucion(data, "6", error_text, error_text)
-        self.reinicio()
+        self._finalizar_radicado(
+            data, lambda: self.actualizar_con_resultado_ejecucion(data, "6", error_text, error_text), alerta=False
+        )
         return True  # True = no reintentar (ya está radicado)
     
     def actualizar_con_resultado_ejecucion(self, data, estado, numero_autorizacion="", resultado_ejecucion=""):
@@ -264,10 +283,7 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
         Returns:
             True si la actualización fue exitosa
         """
-        from modules.laboratorio.services.laboratorio_service import LaboratorioService
-        
         try:
-            service = LaboratorioService()
             # Soportar tanto dict como objeto DataObject - SIEMPRE usar idOrdenProcedimiento
             if isinstance(paciente_data, dict):
                 id_orden = paciente_data.get('idOrdenProcedimiento') or paciente_data.get('idOrden')
@@ -281,7 +297,7 @@ class EjecutarCasosLaboratorio(EjecutarCasosPlaywright):
             
             self._log(f"📡 Actualizando estado={estado_int} para idOrden={id_orden}, nAutorizacion={numero_autorizacion}")
             
-            return service.actualizar_item_orden_procedimiento(
+            return self.laboratorio_service.actualizar_item_orden_procedimiento(
                 id_orden_procedimiento=id_orden,
                 estado_dynamicos=estado_int,
                 n_autorizacion=numero_autorizacion if numero_autorizacion else None
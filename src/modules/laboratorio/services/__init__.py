@@ -1,7 +1,12 @@
 """
 Servicios del módulo laboratorio
 """
-from modules.laboratorio.services.laboratorio_service import LaboratorioService
-from modules.laboratorio.services.laboratorio_worker import LaboratorioWorker
+from utils.lazy import exportar_perezoso
 
 __all__ = ['LaboratorioService', 'LaboratorioWorker']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'LaboratorioService': 'modules.laboratorio.services.laboratorio_service',
+    'LaboratorioWorker': 'modules.laboratorio.services.laboratorio_worker'
+})
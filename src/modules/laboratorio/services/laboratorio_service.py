@@ -13,16 +13,28 @@ from config.config import Config
 class LaboratorioService:
     """Servicio para realizar llamadas a la API de Laboratorio"""
     
-    def __init__(self):
-        """Inicializa el servicio con la configuración"""
+    # Respuestas de un backend que aún no expone los endpoints de lease
+    _HTTP_SIN_LEASES = (404, 405, 501)
+    
+    def __init__(self, worker_id: Optional[str] = None):
+        """
+        Inicializa el servicio con la configuración
+        
+        Args:
+            worker_id: Worker dueño de los leases; se envía en cada actualización
+                para que la API ignore las de un worker que ya perdió la orden
+        """
         config = Config()
         self.base_url = config.api_url_programacion_base
+        self.worker_id = worker_id
+        self.leases_soportados = True  # Se apaga si el backend no tiene los endpoints de lease
         
     def obtener_pacientes(
         self, 
         estado: Optional[int] = None, 
         documento: Optional[str] = None, 
-        nombre: Optional[str] = None
+        nombre: Optional[str] = None,
+        incluir_leases_vencidos: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Obtiene la lista de pacientes de laboratorio
@@ -31,6 +43,8 @@ class LaboratorioService:
             estado: Estado del paciente (None=Todos, 0=Pendiente, 1=Exitoso, 2=En proceso, etc.)
             documento: Número de documento para filtrar
             nombre: Nombre del paciente para filtrar
+            incluir_leases_vencidos: Incluir las EN PROCESO cuyo lease venció
+                (worker caído) para que se puedan reclamar
             
         Returns:
             Lista de pacientes
@@ -47,6 +61,8 @@ class LaboratorioService:
             params['documento'] = documento
         if nombre:
             params['nombre'] = nombre
+        if incluir_leases_vencidos and self.leases_soportados:
+            params['incluirLeasesVencidos'] = 'true'
             
         url = f"{self.base_url}/list-pacientes-evento"
         
@@ -164,6 +180,8 @@ class LaboratorioService:
             data['errorMensaje'] = error_mensaje
         if n_autorizacion:
             data['nAutorizacion'] = n_autorizacion
+        if self.worker_id:
+            data['workerId'] = self.worker_id
             
         try:
             print(f"[LaboratorioService] PUT {url} - Data: {data}")
@@ -185,6 +203,81 @@ class LaboratorioService:
             print(f"[LaboratorioService] ✗ Error actualizando idOrdenProcedimiento {id_orden_procedimiento}: {e}")
             return False
     
+    def reclamar_orden_procedimiento(self, id_orden_procedimiento: int, lease_seg: int) -> bool:
+        """
+        Reclama la orden de forma atómica: la API la pasa a EN PROCESO (2) con
+        lease a nombre de este worker solo si está pendiente o su lease venció.
+        
+        Args:
+            id_orden_procedimiento: ID de idOrdenProcedimiento
+            lease_seg: Duración del lease en segundos
+            
+        Returns:
+            True si la orden quedó a nombre de este worker (o si el backend no
+            maneja leases); False si otro worker la tiene
+        """
+        return bool(self._llamar_lease('reclamar', id_orden_procedimiento, {'leaseSeg': lease_seg, 'estadoDynamicos': 2}))
+    
+    def renovar_lease_orden_procedimiento(self, id_orden_procedimiento: int, lease_seg: int) -> bool:
+        """
+        Extiende el lease de una orden en curso (latido).
+        
+        Returns:
+            False solo si el lease ya no es de este worker
+        """
+        return self._llamar_lease('renovar-lease', id_orden_procedimiento, {'leaseSeg': lease_seg}) is not False
+    
+    def liberar_orden_procedimiento(self, id_orden_procedimiento: int) -> bool:
+        """
+        Devuelve una orden reclamada a pendiente (0) sin registrar error.
+        Si el backend no tiene los endpoints de lease, se marca pendiente con
+        la actualización normal del estado.
+        
+        Returns:
+            True solo si la orden quedó pendiente en el backend
+        """
+        if self.leases_soportados:
+            liberada = self._llamar_lease('liberar', id_orden_procedimiento, {})
+            if self.leases_soportados:
+                return bool(liberada)
+        return self.marcar_como_pendiente(id_orden_procedimiento)
+    
+    def _llamar_lease(self, accion: str, id_orden_procedimiento: int, extra: Dict[str, Any]) -> Optional[bool]:
+        """
+        PUT condicional /{accion}-orden-procedimiento.
+        
+        Returns:
+            True si se aplicó (200), False si la orden es de otro worker (409),
+            None si la llamada falló por otro motivo
+        """
+        import requests
+        
+        if not self.leases_soportados:
+            return True
+        
+        url = f"{self.base_url}/{accion}-orden-procedimiento"
+        data = {'idOrden': id_orden_procedimiento, 'workerId': self.worker_id, **extra}
+        
+        try:
+            print(f"[LaboratorioService] PUT {url} - Data: {data}")
+            response = requests.put(url, json=data, timeout=30)
+            
+            if response.status_code == 200:
+                return True
+            if response.status_code == 409:
+                print(f"[LaboratorioService] 🔒 idOrdenProcedimiento {id_orden_procedimiento} tomada por otro worker ({accion})")
+                return False
+            if response.status_code in self._HTTP_SIN_LEASES:
+                # Backend sin leases: se sigue como antes (un solo worker por backend)
+                self.leases_soportados = False
+                print(f"[LaboratorioService] ⚠️ La API no soporta leases (HTTP {response.status_code}); usar un solo worker por backend")
+                return True
+            print(f"[LaboratorioService] ❌ Error en lease ({accion}) - Status: {response.status_code}")
+            return None
+        except requests.RequestException as e:
+            print(f"[LaboratorioService] ✗ Error en lease ({accion}) de idOrdenProcedimiento {id_orden_procedimiento}: {e}")
+            return None
+    
     def marcar_como_en_proceso(self, id_orden_procedimiento: int) -> bool:
         """
         Marca una orden como en proceso (estado = 2)
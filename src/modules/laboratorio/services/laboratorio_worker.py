@@ -4,7 +4,7 @@ Procesa pacientes de laboratorio de forma continua en segundo plano
 """
 import threading
 import time
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, List
 from pathlib import Path
 import sys
 
@@ -13,10 +13,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from config.config import Config
 from modules.laboratorio.services.laboratorio_service import LaboratorioService
 from modules.laboratorio.playwright.ejecutar_casos_laboratorio import EjecutarCasosLaboratorio
+from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import PausedException
+from modules.autorizar_anexo3.playwright.errores_caso import ConexionPortalError, SesionPerdidaError, clasificar_error
+from services.planificador_cola import PlanificadorCola
+from services.gestor_leases import GestorLeases
 from modules.autorizar_anexo3.playwright.playwright_service import PlaywrightService
+from modules.autorizar_anexo3.playwright.vista_en_vivo import VistaEnVivo
+from modules.autorizar_anexo3.playwright.bloqueo_recursos import BloqueadorRecursos
 from modules.autorizar_anexo3.playwright.login_playwright import LoginPlaywright
 from modules.autorizar_anexo3.playwright.home_playwright import HomePlaywright
 from services.license_service import LicenseService
+from services.registro_resultados import RegistroResultados, obtener_registro
 from utils.logger import Logger
 
 
@@ -49,10 +56,12 @@ class LaboratorioWorker(threading.Thread):
         self._pause_event.set()  # No pausado inicialmente
         
         # Servicios
-        self.api_service = LaboratorioService()
+        self.worker_id = self.config.worker_id
+        self.api_service = LaboratorioService(worker_id=self.worker_id)
         base_url = self.config.api_url_programacion_base or "http://localhost:5000"
         self.license_service = LicenseService(base_url=base_url)
         self.playwright_service: Optional[PlaywrightService] = None
+        self.vista_en_vivo = VistaEnVivo()  # Cuadros para la ventana "Vista en vivo" de la UI
         self.login_service: Optional[LoginPlaywright] = None
         self.home_service: Optional[HomePlaywright] = None
         self.ejecutar_service: Optional[EjecutarCasosLaboratorio] = None
@@ -65,39 +74,30 @@ class LaboratorioWorker(threading.Thread):
         }
         self.on_stats_update: Optional[Callable[[Dict[str, Any]], None]] = None
         
+        # Orden de la cola (ver Config: COLA_POLITICAS); se agrupa por documento del paciente
+        self.planificador = PlanificadorCola(
+            self.config.cola_politicas,
+            campo_fecha='fechaFacturaEvento',
+            campo_grupo='identificacion'
+        )
+        self._ultimo_paciente: Optional[str] = None  # Documento del último paciente procesado
+        
+        # Leases: cada orden se reclama en la API antes de procesarla para que
+        # varios workers compartan el backend (ver Config: WORKER_ID, WORKER_LEASE_SEG)
+        self.lease_seg = self.config.worker_lease_seg
+        self.leases = GestorLeases(
+            self.worker_id,
+            self.lease_seg,
+            renovar=lambda id_orden: self.api_service.renovar_lease_orden_procedimiento(id_orden, self.lease_seg),
+            logger=self.logger,
+            modulo='LaboratorioWorker'
+        )
+        
         # Control del formulario
         self._formulario_listo = False  # Indica si ya navegamos al formulario
         
         # Sin reintentos - una sola ejecución por paciente
-        # Si hay error, se actualiza estado y se continúa con el siguiente
-        
-        # Clasificación de errores - IGUAL QUE ANEXO 3
-        # Mapeo: error_keywords -> estado_codigo
-        self.errores_clasificados = {
-            # Estado 4 - Tipo documento incorrecto
-            4: ["tipo de documento", "documento incorrecto", "identificación inválida"],
-            # Estado 5 - PDF no encontrado
-            5: ["pdf no encontrado", "pdf no existe", "urlOrdenMedica vacío", 
-                "no se encontró pdf", "archivo pdf", "pdf faltante"],
-            # Estado 6 - Solicitud activa (ya radicada)
-            6: ["solicitud activa", "ya radicada"],
-            # Estado 11 - Paciente no encontrado (default para errores no clasificados)
-            11: ["paciente no encontrado", "no encontrado en base", "sin procedimientos"],
-            # Estado 12 - Sesión perdida
-            12: ["invalid session", "session not created", "no such session", "chrome not reachable", 
-                 "browser has been closed", "context has been closed", "disconnected"],
-            # Estado 13 - Timeout
-            13: ["timeout", "timed out", "exceeded"],
-            # Estado 14 - Elemento no encontrado
-            14: ["element not found", "no such element", "element not interactable", 
-                 "selector", "locator", "waiting for"],
-            # Estado 15 - Elemento obsoleto
-            15: ["stale element", "element is not attached", "detached"],
-            # Estado 16 - Conexión/network
-            16: ["network", "connection", "dns", "resolve", "unreachable"],
-            # Estado 18 - Permisos
-            18: ["permission", "access denied", "forbidden"]
-        }
+        # Si hay error, se actualiza estado (errores_caso.clasificar_error) y se continúa con el siguiente
     
     @property
     def paused(self) -> bool:
@@ -131,15 +131,16 @@ class LaboratorioWorker(threading.Thread):
     
     def run(self):
         """Método principal del worker"""
-        self._log("Worker iniciado")
+        self._log(f"Worker iniciado (id: {self.worker_id})")
         
         try:
             # Inicializar servicios de navegación
             self._inicializar_servicios()
             
             while not self._stop_event.is_set():
-                # Esperar si está pausado
-                self._pause_event.wait()
+                # Esperar si está pausado (la vista en vivo sigue respondiendo)
+                while not self._pause_event.wait(timeout=1):
+                    self._sincronizar_vista_en_vivo()
                 
                 if self._stop_event.is_set():
                     break
@@ -156,21 +157,35 @@ class LaboratorioWorker(threading.Thread):
                     except (TypeError, ValueError):
                         pass
                 
-                # Obtener siguiente paciente pendiente
-                pacientes = self.api_service.obtener_pacientes(estado=0)
+                # Obtener pendientes y elegir el siguiente según las políticas de la cola
+                pacientes = self.planificador.planificar(
+                    self.api_service.obtener_pacientes(estado=0, incluir_leases_vencidos=True),
+                    grupo_actual=self._ultimo_paciente
+                )
+                self._actualizar_metricas_cola(pacientes)
+                
+                # Reclamar el primero del plan que no tenga otro worker
+                paciente = next((p for p in pacientes if self._reclamar(p)), None)
                 
-                if not pacientes:
-                    self._log(f"Sin pacientes pendientes. Esperando {self.intervalo_espera}s...")
+                if paciente is None:
+                    if pacientes:
+                        self._log(f"Las {len(pacientes)} pendientes están tomadas por otros workers. Esperando {self.intervalo_espera}s...")
+                    else:
+                        self._log(f"Sin pacientes pendientes. Esperando {self.intervalo_espera}s...")
                     # Sleep interruptible - verificar stop cada segundo
                     for _ in range(self.intervalo_espera):
                         if self._stop_event.is_set():
                             break
+                        self._sincronizar_vista_en_vivo()
                         time.sleep(1)
                     continue
                 
-                # Procesar el primer paciente
-                paciente = pacientes[0]
+                # Procesar el paciente reclamado
+                self._log(f"📥 Cola: {PlanificadorCola.resumen(self.stats['cola'])}")
+                self._sincronizar_vista_en_vivo()
                 self._procesar_paciente(paciente)
+                self._ultimo_paciente = paciente.get('identificacion')
+                self._registrar_ahorro_recursos(paciente)
                 
                 # Pequeña pausa entre procesamiento (interruptible)
                 if not self._stop_event.is_set():
@@ -188,7 +203,7 @@ class LaboratorioWorker(threading.Thread):
         
         try:
             # Crear servicio playwright
-            self.playwright_service = PlaywrightService(self.logger)
+            self.playwright_service = PlaywrightService(self.logger, vista_en_vivo=self.vista_en_vivo)
             
             # Iniciar navegador
             if not self.playwright_service.iniciar_navegador(reutilizar_sesion=True):
@@ -201,7 +216,11 @@ class LaboratorioWorker(threading.Thread):
             # Inicializar servicios dependientes
             self.login_service = LoginPlaywright(page, self.logger)
             self.home_service = HomePlaywright(page, self.logger)
-            self.ejecutar_service = EjecutarCasosLaboratorio(page, self.logger)
+            self.ejecutar_service = EjecutarCasosLaboratorio(
+                page,
+                self.logger,
+                laboratorio_service=self.api_service
+            )
             
             # Verificar sesión o hacer login
             if not self.playwright_service.sesion_valida():
@@ -251,8 +270,10 @@ class LaboratorioWorker(threading.Thread):
         
         # Verificar si se solicitó detener
         if self._stop_event.is_set():
+            self._liberar_lease(id_orden_procedimiento)
             return
         
+        fallo = False
         try:
             # Marcar como en proceso (estado = 2)
             self._log(f"Actualizando idOrdenProcedimiento {id_orden_procedimiento} a estado EN PROCESO (2)...")
@@ -264,11 +285,13 @@ class LaboratorioWorker(threading.Thread):
             
             # Asegurar que el navegador esté activo
             self._asegurar_navegador_activo()
+            if self.playwright_service:
+                self.playwright_service.iniciar_traza_caso()
             
             # Navegar al formulario solo si es el primer paciente o si es necesario
             if not self._formulario_listo:
                 if not self._navegar_a_formulario():
-                    raise Exception("No se pudo navegar al formulario")
+                    raise ConexionPortalError("No se pudo navegar al formulario")
                 self._formulario_listo = True
             
             # Obtener los procedimientos (CUPS) de la orden usando idOrdenProcedimiento (NO facturaEvento)
@@ -290,6 +313,7 @@ class LaboratorioWorker(threading.Thread):
             # Verificar si se solicitó detener antes de ejecutar
             if self._stop_event.is_set():
                 self._log("⏹️ Detención solicitada, abortando procesamiento")
+                self._liberar_lease(id_orden_procedimiento)
                 return
             
             # Construir datos del paciente para el ejecutor
@@ -298,34 +322,42 @@ class LaboratorioWorker(threading.Thread):
             
             # Ejecutar automatizacion
             resultado = self.ejecutar_service.ejecutar(paciente_data)
+            cups_fallidos = [
+                r for r in getattr(self.ejecutar_service, 'resultados_cups', []) if not r.get('ok')
+            ]
             
             if resultado:
-                self._marcar_completado(id_orden_procedimiento, nombre)
+                self._marcar_completado(id_orden_procedimiento, nombre, cups_fallidos, identificacion)
             else:
                 # inicio_casos retornó False: la clase padre YA actualizó el estado en la API
                 # Solo logueamos, NO volvemos a actualizar estado para evitar doble update
                 self._log(f"⚠️ Automatización retornó False para {nombre} (estado ya actualizado por ejecutor)", level="warning")
                 self._actualizar_stats(error=True)
+                fallo = True
                 
+        except PausedException:
+            # Pausa del usuario: no es error, devolverla a pendiente
+            self._log(f"⏸️ Orden {id_orden_procedimiento} pausada, se retomará después")
+            self._liberar_lease(id_orden_procedimiento)
+        
         except Exception as e:
-            # Verificar si es una pausa (no es error)
-            from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import PausedException
-            if isinstance(e, PausedException):
-                self._log(f"⏸️ Orden {id_orden_procedimiento} pausada, se retomará después")
-                return  # No marcar como error, dejar pendiente
-            
-            error_message = str(e).lower()
+            fallo = True
             self._log(f"❌ Error procesando paciente {nombre}: {e}", level="error")
             
             # Clasificar error y actualizar estado
-            estado_error = self._clasificar_error(error_message)
-            self._actualizar_estado_error(id_orden_procedimiento, identificacion, estado_error, str(e))
+            error = clasificar_error(e)
+            self._actualizar_estado_error(id_orden_procedimiento, identificacion, error.estado, str(error))
             
             # Si fue error de sesión, marcar para reinicializar
-            if estado_error == 12:
+            if isinstance(error, SesionPerdidaError):
                 self._formulario_listo = False
         
         finally:
+            # Traza del caso: se guarda solo si falló o fue lento
+            if self.playwright_service:
+                self.playwright_service.finalizar_traza_caso(id_orden_procedimiento, fallo)
+            # La orden ya quedó en un estado final (o liberada): dejar de renovar su lease
+            self.leases.soltar(id_orden_procedimiento)
             # SIEMPRE reiniciar formulario para el siguiente paciente
             try:
                 self._reiniciar_formulario()
@@ -333,6 +365,20 @@ class LaboratorioWorker(threading.Thread):
                 self._log(f"⚠️ Error reiniciando formulario: {e}", level="warning")
                 self._formulario_listo = False
     
+    def _reclamar(self, paciente: Dict[str, Any]) -> bool:
+        """Reclama la orden en la API (lease a nombre de este worker)"""
+        id_orden_procedimiento = paciente.get('idOrdenProcedimiento')
+        if not self.api_service.reclamar_orden_procedimiento(id_orden_procedimiento, self.lease_seg):
+            return False
+        self.leases.tomar(id_orden_procedimiento)
+        return True
+    
+    def _liberar_lease(self, id_orden_procedimiento: int):
+        """Devuelve la orden a pendiente para que cualquier worker la tome"""
+        self.leases.soltar(id_orden_procedimiento)
+        if not self.api_service.liberar_orden_procedimiento(id_orden_procedimiento):
+            self._log(f"⚠️ No se pudo devolver la orden {id_orden_procedimiento} a pendiente", level="warning")
+    
     def _reiniciar_formulario(self):
         """
         Reinicia el formulario haciendo clic en Urgencias y luego Ambulatoria.
@@ -348,19 +394,6 @@ class LaboratorioWorker(threading.Thread):
             # Si falla el reinicio, navegar de nuevo al formulario
             self._formulario_listo = False
     
-    def _clasificar_error(self, error_message: str) -> int:
-        """
-        Clasifica el error y retorna el código de estado correspondiente.
-        Usa el mismo esquema de estados que Anexo 3.
-        
-        Returns:
-            Código de estado (4, 11-19)
-        """
-        for estado, keywords in self.errores_clasificados.items():
-            if any(keyword in error_message for keyword in keywords):
-                return estado
-        return 11  # Default: Error no clasificado
-    
     def _actualizar_estado_error(self, id_orden_procedimiento: int, identificacion: str, estado: int, error: str):
         """
         Actualiza el estado de la orden con un código de error específico.
@@ -393,10 +426,34 @@ class LaboratorioWorker(threading.Thread):
         
         self._actualizar_stats(error=True)
     
-    def _marcar_completado(self, id_orden_procedimiento: int, nombre: str):
-        """Marca una orden como completada exitosamente (estado = 1)"""
+    def _marcar_completado(
+        self,
+        id_orden_procedimiento: int,
+        nombre: str,
+        cups_fallidos: Optional[List[Dict[str, Any]]] = None,
+        identificacion: str = ''
+    ):
+        """
+        Marca una orden como completada exitosamente (estado = 1).
+        
+        Si algunos CUPS no se pudieron ingresar la solicitud ya se radicó con
+        los demás, así que la orden no se repite: queda con estado 14 (no se
+        vuelve a tomar y aparece como error para seguimiento) y cada CUPS
+        faltante se guarda en el registro de resultados como CUPS_NO_INGRESADO.
+        """
         self._log(f"✅ Paciente {nombre} procesado exitosamente")
-        self.api_service.marcar_como_exitoso(id_orden_procedimiento)
+        if cups_fallidos:
+            detalle = "; ".join(f"{r['cups']}: {r.get('detalle', '')[:80]}" for r in cups_fallidos)
+            self._log(f"⚠️ Radicado parcial - CUPS no ingresados (requieren gestión aparte): {detalle}", level="warning")
+            self.api_service.actualizar_item_orden_procedimiento(
+                id_orden_procedimiento=id_orden_procedimiento,
+                estado_dynamicos=14,
+                error_mensaje=f"Radicado parcial. CUPS no ingresados: {detalle}"[:500]
+            )
+            self._registrar_cups_no_ingresados(id_orden_procedimiento, identificacion, cups_fallidos)
+            self.stats['parciales'] = self.stats.get('parciales', 0) + 1
+        else:
+            self.api_service.marcar_como_exitoso(id_orden_procedimiento)
         
         # Descontar saldo por caso exitoso
         resultado_descuento = self.license_service.descontar_caso_exitoso()
@@ -415,7 +472,23 @@ class LaboratorioWorker(threading.Thread):
             self._log(f"⚠️ Error descontando saldo: {resultado_descuento.get('message')}")
         
         self._actualizar_stats(exitoso=True)
-        self._log(f"✓ idOrdenProcedimiento {id_orden_procedimiento} marcada como EXITOSO (estado=1)")
+        if cups_fallidos:
+            self._log(f"✓ idOrdenProcedimiento {id_orden_procedimiento} marcada como PARCIAL (estado=14)")
+        else:
+            self._log(f"✓ idOrdenProcedimiento {id_orden_procedimiento} marcada como EXITOSO (estado=1)")
+    
+    def _registrar_cups_no_ingresados(self, id_orden_procedimiento: int, identificacion: str, cups_fallidos: List[Dict[str, Any]]):
+        """Deja cada CUPS faltante en el registro de resultados (buscable desde la UI)"""
+        try:
+            registro = obtener_registro()
+            for r in cups_fallidos:
+                registro.registrar(
+                    RegistroResultados.CUPS_NO_INGRESADO, identificacion, id_orden_procedimiento,
+                    f"CUPS {r['cups']} no ingresado en la solicitud: {r.get('detalle', '')}",
+                    radicado='', modulo='laboratorio', cups=r['cups']
+                )
+        except Exception as e:
+            self._log(f"⚠️ No se pudieron registrar los CUPS no ingresados: {e}", level="warning")
     
     def _construir_datos_paciente(
         self, 
@@ -492,6 +565,12 @@ class LaboratorioWorker(threading.Thread):
         if self.on_stats_update:
             self.on_stats_update(self.stats)
     
+    def _actualizar_metricas_cola(self, pacientes: List[Dict[str, Any]]):
+        """Recalcula profundidad/antigüedad de la cola y notifica a la UI"""
+        self.stats['cola'] = self.planificador.metricas(pacientes)
+        if self.on_stats_update:
+            self.on_stats_update(self.stats)
+    
     def _log(self, mensaje: str, level: str = "info"):
         """Registra un mensaje en el log (el logger ya envía a UI via ui_callback)"""
         modulo = "LaboratorioWorker"
@@ -500,8 +579,24 @@ class LaboratorioWorker(threading.Thread):
         else:
             self.logger.info(modulo, mensaje)
     
+    def _registrar_ahorro_recursos(self, paciente: Dict[str, Any]):
+        """Registra en el log lo que ahorró el filtro de recursos en el caso"""
+        if not self.playwright_service:
+            return
+        stats = self.playwright_service.tomar_estadisticas_recursos()
+        if stats and (stats['bloqueadas'] or stats['desde_cache']):
+            self._log(f"🚫 Recursos {paciente.get('idOrdenProcedimiento')}: {BloqueadorRecursos.resumen(stats)}")
+    
+    def _sincronizar_vista_en_vivo(self):
+        """Inicia/detiene la transmisión de la vista en vivo según la UI (hilo del worker)"""
+        if self.playwright_service:
+            self.playwright_service.sincronizar_vista_en_vivo()
+    
     def _cleanup(self):
         """Limpieza al finalizar"""
+        for id_orden_procedimiento in self.leases.activos():
+            self._liberar_lease(id_orden_procedimiento)
+        self.leases.detener()
         if self.playwright_service:
             try:
                 self.playwright_service.cerrar_navegador()
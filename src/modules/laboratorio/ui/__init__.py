@@ -1,6 +1,11 @@
 """
 UI del módulo laboratorio
 """
-from modules.laboratorio.ui.laboratorio_panel import LaboratorioPanel
+from utils.lazy import exportar_perezoso
 
 __all__ = ['LaboratorioPanel']
+
+# Las clases se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'LaboratorioPanel': 'modules.laboratorio.ui.laboratorio_panel'
+})
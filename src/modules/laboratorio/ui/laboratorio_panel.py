@@ -2,10 +2,11 @@
 Panel de Worker Automatización Laboratorio
 Muestra tabla de pacientes de laboratorio con filtros de búsqueda y controles de worker
 """
+import queue
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from datetime import datetime
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import sys
 from pathlib import Path
 
@@ -13,12 +14,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from config.config import Config
 from modules.laboratorio.services.laboratorio_service import LaboratorioService
-from modules.laboratorio.services.laboratorio_worker import LaboratorioWorker
+from services.planificador_cola import PlanificadorCola
+
+if TYPE_CHECKING:
+    from modules.laboratorio.services.laboratorio_worker import LaboratorioWorker
 
 
 class LaboratorioPanel(ttk.Frame):
     """Panel para visualizar y trabajar con pacientes de laboratorio"""
     
+    INTERVALO_STATS_MS = 500  # Sondeo de las estadísticas que envía el worker
+    
     def __init__(self, parent, config):
         """
         Args:
@@ -35,7 +41,11 @@ class LaboratorioPanel(ttk.Frame):
         self.nombre_filtro = tk.StringVar(value="")
         
         # Worker de automatización
-        self.worker: Optional[LaboratorioWorker] = None
+        self.worker: Optional['LaboratorioWorker'] = None
+        self.vista_window: Optional[tk.Toplevel] = None  # Ventana "Vista en vivo"
+        # El worker deja aquí sus estadísticas; solo el hilo de Tk toca los widgets
+        self._cola_stats: queue.Queue = queue.Queue()
+        self._stats_id = None
         
         self._create_widgets()
         self._start_auto_refresh()
@@ -146,6 +156,13 @@ class LaboratorioPanel(ttk.Frame):
         )
         self.stop_btn.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(
+            worker_row,
+            text="👁️ Vista en vivo",
+            command=self._abrir_vista_en_vivo,
+            width=15
+        ).pack(side=tk.LEFT, padx=5)
+        
         ttk.Separator(worker_row, orient='vertical').pack(side=tk.LEFT, fill='y', padx=10, pady=2)
         
         self.reprogramar_btn = ttk.Button(
@@ -437,10 +454,15 @@ class LaboratorioPanel(ttk.Frame):
         
         self._agregar_log("🚀 Iniciando worker de automatización...", 'info')
         
+        # Playwright se carga aquí, al iniciar el worker por primera vez
+        from modules.laboratorio.services.laboratorio_worker import LaboratorioWorker
+        
         # Crear worker con callback de logs
         self.worker = LaboratorioWorker(ui_callback=self._ui_log_callback)
-        self.worker.on_stats_update = self._actualizar_stats
+        self.worker.on_stats_update = self._recibir_stats
         self.worker.start()
+        if self._stats_id is None:
+            self._stats_id = self.after(self.INTERVALO_STATS_MS, self._revisar_stats)
         
         # Actualizar UI
         self.start_btn.config(state='disabled')
@@ -481,9 +503,24 @@ class LaboratorioPanel(ttk.Frame):
         self.stop_btn.config(state='disabled')
         self.worker_status_label.config(text="Estado: Detenido", foreground='gray')
         self.worker = None
+        if self.vista_window is not None and self.vista_window.winfo_exists():
+            self.vista_window.destroy()
         
         self._agregar_log("⏹️ Worker detenido", 'info')
     
+    def _abrir_vista_en_vivo(self):
+        """Abre la ventana de vista en vivo del navegador del worker"""
+        if not self.worker or not self.worker.is_alive():
+            messagebox.showinfo("Vista en vivo", "Inicie el worker para ver su navegador")
+            return
+        
+        if self.vista_window is not None and self.vista_window.winfo_exists():
+            self.vista_window.lift()
+            return
+        
+        from ui.vista_en_vivo_window import VistaEnVivoWindow
+        self.vista_window = VistaEnVivoWindow(self, self.worker.vista_en_vivo, titulo="Worker Laboratorio")
+    
     def _reprogramar_seleccionados(self):
         """Reprograma (resetea a pendiente) los pacientes seleccionados"""
         seleccionados = self.tree.selection()
@@ -520,20 +557,43 @@ class LaboratorioPanel(ttk.Frame):
         self.log_text.insert(tk.END, f"{mensaje}\n")
         self.log_text.see(tk.END)
     
+    def _recibir_stats(self, stats: dict):
+        """Callback del worker (su hilo): encola una copia de las estadísticas sin tocar widgets"""
+        self._cola_stats.put(dict(stats))
+    
+    def _revisar_stats(self):
+        """Sondea (hilo de Tk) las estadísticas del worker y muestra la más reciente"""
+        # Se mira antes de vaciar la cola para no perder lo último que envió al terminar
+        vivo = self.worker is not None and self.worker.is_alive()
+        stats = None
+        while True:
+            try:
+                stats = self._cola_stats.get_nowait()
+            except queue.Empty:
+                break
+        if stats is not None:
+            self._actualizar_stats(stats)
+        if vivo:
+            self._stats_id = self.after(self.INTERVALO_STATS_MS, self._revisar_stats)
+        else:
+            self._stats_id = None
+    
     def _actualizar_stats(self, stats: dict):
         """Actualiza las estadísticas en la UI"""
-        def update():
-            procesados = stats.get('procesados', 0)
-            exitosos = stats.get('exitosos', 0)
-            errores = stats.get('errores', 0)
-            self.stats_label.config(
-                text=f"📊 Procesados: {procesados} | ✅ Exitosos: {exitosos} | ❌ Errores: {errores}"
-            )
-        self.after(0, update)
+        procesados = stats.get('procesados', 0)
+        exitosos = stats.get('exitosos', 0)
+        errores = stats.get('errores', 0)
+        texto = f"📊 Procesados: {procesados} | ✅ Exitosos: {exitosos} | ❌ Errores: {errores}"
+        if stats.get('cola') is not None:
+            texto += f" | 📥 {PlanificadorCola.resumen(stats['cola'])}"
+        self.stats_label.config(text=texto)
     
     def destroy(self):
         """Limpieza al destruir el panel"""
         self._stop_auto_refresh()
+        if self._stats_id:
+            self.after_cancel(self._stats_id)
+            self._stats_id = None
         
         # Detener worker si está activo
         if self.worker and self.worker.is_alive():
@@ -0,0 +1,105 @@
+"""
+Leases de las órdenes tomadas por un worker (Anexo 3 y Laboratorio).
+
+Para que varios workers (en uno o varios equipos) compartan el mismo backend,
+cada orden se reclama con una actualización condicional antes de consultar
+sus datos: la API solo la entrega si está PENDIENTE o si el lease de otro
+worker ya venció. El lease dura `lease_seg` y un hilo de latido lo renueva
+mientras el caso está en curso; si la API rechaza la renovación, otro worker
+la reclamó y la orden se marca como perdida.
+
+El servicio de API pone las llamadas (reclamar/renovar/liberar); aquí solo
+se lleva el registro de lo que tiene este worker y el latido.
+"""
+import threading
+from typing import Any, Callable, List, Optional, Set
+
+from utils.logger import AdvancedLogger
+
+
+class GestorLeases:
+    """Órdenes con lease de este worker y su renovación periódica"""
+
+    def __init__(
+        self,
+        worker_id: str,
+        lease_seg: int,
+        renovar: Callable[[Any], bool],
+        logger: Optional[AdvancedLogger] = None,
+        modulo: str = 'Leases'
+    ):
+        """
+        Args:
+            worker_id: Identificador de este worker (dueño de los leases)
+            lease_seg: Duración del lease en la API
+            renovar: Función que renueva el lease de una orden (False = lo perdió)
+            logger: Instancia del logger
+            modulo: Módulo con el que se registran los mensajes
+        """
+        self.worker_id = worker_id
+        self.lease_seg = lease_seg
+        self._renovar = renovar
+        self.logger = logger or AdvancedLogger()
+        self.modulo = modulo
+
+        self._lock = threading.Lock()
+        self._activos: Set[Any] = set()
+        self._perdidos: Set[Any] = set()
+        self._stop_event = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def intervalo_latido(self) -> float:
+        """Se renueva a un tercio del lease: dos latidos pueden fallar sin perderlo"""
+        return max(5.0, self.lease_seg / 3)
+
+    def tomar(self, id_orden: Any):
+        """Registra una orden reclamada y arranca el latido si no está corriendo"""
+        with self._lock:
+            self._activos.add(id_orden)
+            self._perdidos.discard(id_orden)
+        self._iniciar_latido()
+
+    def soltar(self, id_orden: Any):
+        """La orden quedó en un estado final (o se liberó): deja de renovarse"""
+        with self._lock:
+            self._activos.discard(id_orden)
+            self._perdidos.discard(id_orden)
+
+    def activos(self) -> List[Any]:
+        """Órdenes con lease vigente de este worker"""
+        with self._lock:
+            return list(self._activos)
+
+    def perdido(self, id_orden: Any) -> bool:
+        """True si otro worker reclamó la orden mientras este la procesaba"""
+        with self._lock:
+            return id_orden in self._perdidos
+
+    def _iniciar_latido(self):
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._stop_event.clear()
+        self._hilo = threading.Thread(target=self._latir, name='latido-leases', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Detiene el latido (los leases que queden vencerán solos en la API)"""
+        self._stop_event.set()
+
+    def _latir(self):
+        """Hilo de latido: solo hace llamadas HTTP, nunca toca Playwright"""
+        while not self._stop_event.wait(self.intervalo_latido):
+            for id_orden in self.activos():
+                try:
+                    vigente = self._renovar(id_orden)
+                except Exception as e:
+                    # Error de red: se reintenta en el siguiente latido, el lease aún tiene margen
+                    self.logger.warning(self.modulo, f'💓 No se pudo renovar el lease de {id_orden}: {e}')
+                    continue
+                if not vigente:
+                    with self._lock:
+                        if id_orden in self._activos:
+                            self._activos.discard(id_orden)
+                            self._perdidos.add(id_orden)
+                    self.logger.error(self.modulo, f'💔 Lease de {id_orden} perdido: otro worker reclamó la orden')
@@ -0,0 +1,164 @@
+"""
+Ingreso de varios items/procedimientos (CUPS) en el modal de servicios del portal.
+Reutiliza la lógica de IngresoItemsPlaywright pero permite múltiples CUPS;
+lo usan Laboratorio y los lotes de Anexo 3.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from playwright.sync_api import Page
+
+from utils.logger import Logger
+from modules.autorizar_anexo3.playwright.helpers_playwright import PlaywrightHelper
+
+
+class IngresoItemsMultiples:
+    """
+    Maneja el ingreso de múltiples procedimientos (CUPS) en una misma solicitud.
+    Usa los mismos XPaths que IngresoItemsPlaywright pero permite iterar múltiples CUPS.
+    """
+    
+    # XPaths EXACTOS del sistema (mismo que IngresoItemsPlaywright)
+    XPATH_INPUT_CUPS = "//h5/following-sibling::div/div/div/div/span/input"
+    XPATH_OPCION_CUPS = "//div[@class='ant-select-item-option-content'][contains(.,'{}')]"
+    XPATH_ACEPTAR = "//span[contains(.,'Aceptar')]"
+    XPATH_AGREGAR_ITEM = "//button[contains(.,'Agregar') or contains(.,'agregar')]"
+    
+    # Espera máxima de la opción de cada CUPS en el dropdown (ms)
+    TIMEOUT_OPCION_CUPS = 8000
+    
+    def __init__(self, page, logger: Optional[Logger] = None):
+        """
+        Args:
+            page: Página de Playwright
+            logger: Logger para registrar eventos
+        """
+        self.page = page
+        self.logger = logger or Logger()
+        self.helper = PlaywrightHelper(page) if page else None
+        # Resultado por CUPS de la última llamada: [{'cups', 'ok', 'detalle', 'opcion_ausente'}]
+        self.resultados_cups: List[Dict[str, Any]] = []
+    
+    def _log(self, mensaje: str, level: str = "info"):
+        """Registra un mensaje en el log"""
+        modulo = "IngresoItemsMultiples"
+        if level == "error":
+            self.logger.error(modulo, mensaje)
+        else:
+            self.logger.info(modulo, mensaje)
+    
+    def ingresar_procedimientos(self, cups_list: List[str], page: Page) -> bool:
+        """
+        Ingresa múltiples procedimientos (CUPS) en el formulario.
+        Mantiene abierto el modal de servicios y reutiliza el mismo input para
+        todos los códigos, esperando solo la opción filtrada de cada uno.
+        Al final hace clic en Aceptar.
+        
+        El detalle por CUPS queda en self.resultados_cups.
+        
+        Args:
+            cups_list: Lista de códigos CUPS a ingresar
+            page: Página de Playwright donde realizar la operación
+            
+        Returns:
+            True si al menos un CUPS fue ingresado correctamente
+        """
+        if page is not self.page or self.helper is None:
+            self.page = page
+            self.helper = PlaywrightHelper(page)
+        
+        self.resultados_cups = []
+        
+        if not cups_list:
+            self._log("Lista de CUPS vacía", level="error")
+            return False
+        
+        self._log(f"Ingresando {len(cups_list)} procedimiento(s)...")
+        
+        try:
+            # El input se localiza una sola vez para toda la lista
+            self._log("Buscando campo de entrada CUPS...")
+            input_cups = self.page.wait_for_selector(self.XPATH_INPUT_CUPS, timeout=20000)
+            
+            for idx, codigo_cups in enumerate(cups_list, start=1):
+                self._log(f"=== PROCESANDO CUPS {idx}/{len(cups_list)}: {codigo_cups} ===")
+                
+                input_cups = self._input_vigente(input_cups)
+                ok, detalle, opcion_ausente = self._ingresar_un_cups(codigo_cups, idx, input_cups)
+                self.resultados_cups.append({
+                    'cups': str(codigo_cups), 'ok': ok, 'detalle': detalle, 'opcion_ausente': opcion_ausente
+                })
+                
+                if not ok:
+                    self._log(f"⚠️ Error ingresando CUPS {codigo_cups}, continuando con el siguiente...", level="warning")
+            
+            cups_ingresados = sum(1 for r in self.resultados_cups if r['ok'])
+            
+            # Al final, hacer clic en Aceptar
+            self._log("=== FINALIZANDO - Haciendo clic en Aceptar ===")
+            clic_aceptar = self.page.wait_for_selector(self.XPATH_ACEPTAR, timeout=15000)
+            clic_aceptar.click()
+            self._log("✓ Clicked Aceptar - Proceso finalizado")
+            
+            self._log(f"✅ {cups_ingresados}/{len(cups_list)} CUPS ingresados correctamente")
+            return cups_ingresados > 0
+            
+        except Exception as e:
+            self._log(f"Error ingresando procedimientos: {e}", level="error")
+            # Los CUPS que no alcanzaron a procesarse quedan como fallidos
+            procesados = {r['cups'] for r in self.resultados_cups}
+            for codigo_cups in cups_list:
+                if str(codigo_cups) not in procesados:
+                    self.resultados_cups.append({
+                        'cups': str(codigo_cups), 'ok': False, 'detalle': str(e), 'opcion_ausente': False
+                    })
+            return False
+    
+    def _input_vigente(self, input_cups):
+        """Reutiliza el handle del input mientras siga en el DOM; si no, lo vuelve a buscar"""
+        try:
+            if input_cups and input_cups.evaluate("el => el.isConnected"):
+                return input_cups
+        except Exception:
+            pass
+        self._log("Input CUPS re-renderizado, buscándolo de nuevo...")
+        return self.page.wait_for_selector(self.XPATH_INPUT_CUPS, timeout=20000)
+    
+    def _ingresar_un_cups(self, codigo_cups: str, numero: int, input_cups=None) -> Tuple[bool, str, bool]:
+        """
+        Ingresa un código CUPS individual en el formulario.
+        
+        Args:
+            codigo_cups: Código CUPS a ingresar
+            numero: Número de orden del CUPS (para logs)
+            input_cups: Handle del input ya localizado (opcional)
+            
+        Returns:
+            (True si el CUPS fue ingresado, detalle del resultado,
+             True si el portal no ofrece el CUPS en la lista)
+        """
+        try:
+            if input_cups is None:
+                self._log(f"[CUPS {numero}] Buscando campo de entrada...")
+                input_cups = self.page.wait_for_selector(self.XPATH_INPUT_CUPS, timeout=20000)
+            
+            # Clic e ingreso del código en el mismo input
+            input_cups.click()
+            self.helper.ingresar_texto(input_cups, str(codigo_cups))
+            self._log(f"[CUPS {numero}] ✓ Código ingresado: {codigo_cups}")
+            
+            # Buscar opción exacta en dropdown (^CUPS-[^0-9])
+            clic_opcion, candidatas, estado = self.helper.buscar_opcion_cups(codigo_cups, timeout=self.TIMEOUT_OPCION_CUPS)
+            if not clic_opcion:
+                detalle = f"Opción no encontrada ({estado}). Opciones disponibles: {candidatas[:10]}"
+                self._log(f"[CUPS {numero}] ❌ {detalle}", level="error")
+                return False, detalle, estado != 'timeout'
+            
+            texto_opcion = (clic_opcion.text_content() or "").strip()
+            clic_opcion.click()
+            self._log(f"[CUPS {numero}] ✓ CUPS {codigo_cups} seleccionado correctamente")
+            
+            return True, texto_opcion, False
+            
+        except Exception as e:
+            self._log(f"[CUPS {numero}] ❌ Error: {e}", level="error")
+            return False, str(e), False
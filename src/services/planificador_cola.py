@@ -0,0 +1,159 @@
+"""
+Planificador de la cola de trabajo de los workers (Anexo 3 y Laboratorio).
+
+El backend devuelve las pendientes en su propio orden. Aquí se reordenan en
+el cliente según políticas configurables (COLA_POLITICAS):
+
+- primeros_intentos: las que nunca se han intentado van antes que los reintentos
+- antiguedad: la más antigua primero
+- agrupar_paciente: las del mismo paciente/orden quedan seguidas, en la
+  posición de la mejor de ellas, para aprovechar la búsqueda del documento
+
+También calcula métricas de la cola (profundidad y antigüedad).
+"""
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class PlanificadorCola:
+    """Ordena las pendientes según políticas y mide la cola"""
+
+    POLITICAS = ('primeros_intentos', 'antiguedad', 'agrupar_paciente')
+    _FORMATOS_FECHA = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y')
+
+    def __init__(
+        self,
+        politicas: Iterable[str],
+        campo_fecha: str,
+        campo_grupo: str,
+        campo_intentos: Optional[str] = None
+    ):
+        """
+        Args:
+            politicas: Políticas a aplicar, en orden de prioridad
+            campo_fecha: Campo con la fecha de la pendiente (para antigüedad)
+            campo_grupo: Campo que identifica al paciente (o la orden del paciente)
+            campo_intentos: Campo con los intentos realizados (None si no hay reintentos)
+        """
+        self.politicas = [p for p in politicas if p in self.POLITICAS]
+        self.campo_fecha = campo_fecha
+        self.campo_grupo = campo_grupo
+        self.campo_intentos = campo_intentos
+
+    def _timestamp(self, item: Dict[str, Any]) -> Optional[float]:
+        """Fecha del item como timestamp (None si no viene o no se entiende)"""
+        valor = item.get(self.campo_fecha)
+        if not valor:
+            return None
+        texto = str(valor).strip()
+        try:
+            return parsedate_to_datetime(texto).timestamp()  # "Mon, 02 Feb 2026 16:48:15 GMT"
+        except (TypeError, ValueError, IndexError):
+            pass
+        try:
+            return datetime.fromisoformat(texto.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+        for formato in self._FORMATOS_FECHA:
+            try:
+                return datetime.strptime(texto, formato).timestamp()
+            except ValueError:
+                continue
+        return None
+
+    def _es_reintento(self, item: Dict[str, Any]) -> bool:
+        if not self.campo_intentos:
+            return False
+        try:
+            return int(item.get(self.campo_intentos) or 0) > 0
+        except (TypeError, ValueError):
+            return False
+
+    def _clave(self, item: Dict[str, Any]) -> tuple:
+        clave = []
+        for politica in self.politicas:
+            if politica == 'primeros_intentos':
+                clave.append(self._es_reintento(item))
+            elif politica == 'antiguedad':
+                ts = self._timestamp(item)
+                clave.append(ts if ts is not None else float('inf'))
+        return tuple(clave)
+
+    def planificar(self, items: List[Dict[str, Any]], grupo_actual: Any = None) -> List[Dict[str, Any]]:
+        """
+        Retorna las pendientes en el orden en que conviene procesarlas.
+
+        Args:
+            items: Pendientes tal como las devuelve la API
+            grupo_actual: Paciente que se acaba de procesar; con agrupar_paciente
+                sus pendientes restantes pasan al frente
+
+        Returns:
+            Nueva lista ordenada (sort estable: a igualdad se respeta el orden del backend)
+        """
+        ordenados = sorted(items, key=self._clave)
+        if 'agrupar_paciente' not in self.politicas:
+            return ordenados
+
+        grupos: Dict[Any, List[Dict[str, Any]]] = {}
+        orden_grupos = []
+        for item in ordenados:
+            grupo = item.get(self.campo_grupo)
+            if grupo in (None, ''):
+                grupo = id(item)  # Sin dato de paciente: no se agrupa
+            if grupo not in grupos:
+                grupos[grupo] = []
+                orden_grupos.append(grupo)
+            grupos[grupo].append(item)
+
+        if grupo_actual not in (None, '') and grupo_actual in grupos:
+            orden_grupos.remove(grupo_actual)
+            orden_grupos.insert(0, grupo_actual)
+
+        return [item for grupo in orden_grupos for item in grupos[grupo]]
+
+    def metricas(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Profundidad y antigüedad de la cola.
+
+        Returns:
+            Dict con profundidad, primeros_intentos, reintentos, pacientes,
+            edad_max_seg y edad_prom_seg (None si no hay fechas)
+        """
+        ahora = time.time()
+        edades = [ahora - ts for ts in (self._timestamp(i) for i in items) if ts is not None]
+        reintentos = sum(1 for i in items if self._es_reintento(i))
+        return {
+            'profundidad': len(items),
+            'primeros_intentos': len(items) - reintentos,
+            'reintentos': reintentos,
+            'pacientes': len({i.get(self.campo_grupo) for i in items if i.get(self.campo_grupo) not in (None, '')}),
+            'edad_max_seg': max(edades) if edades else None,
+            'edad_prom_seg': sum(edades) / len(edades) if edades else None,
+        }
+
+    @staticmethod
+    def formatear_edad(segundos: Optional[float]) -> str:
+        """Edad legible: 45s, 12m, 3.5h, 2.0d"""
+        if segundos is None:
+            return '-'
+        segundos = max(0.0, segundos)
+        if segundos < 60:
+            return f"{segundos:.0f}s"
+        if segundos < 3600:
+            return f"{segundos / 60:.0f}m"
+        if segundos < 86400:
+            return f"{segundos / 3600:.1f}h"
+        return f"{segundos / 86400:.1f}d"
+
+    @classmethod
+    def resumen(cls, metricas: Dict[str, Any]) -> str:
+        """Texto corto para el log y la UI"""
+        texto = f"{metricas['profundidad']} en cola"
+        if metricas.get('reintentos'):
+            texto += f" ({metricas['reintentos']} reintentos)"
+        if metricas.get('edad_max_seg') is not None:
+            texto += f" | más antigua: {cls.formatear_edad(metricas['edad_max_seg'])}"
+        return texto
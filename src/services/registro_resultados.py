@@ -0,0 +1,353 @@
+"""
+Registro local de resultados de los casos (Anexo 3 y Laboratorio).
+
+Reemplaza archivo.txt y los errores_archivos_*.txt: cada resultado del portal
+(radicado, rechazo, solicitud activa, IPS no encontrada, error de archivo)
+queda en SQLite con índices por documento, idItemOrden, radicado y fecha,
+para consultarlo desde la UI sin recorrer un archivo de texto que solo crece.
+
+También sirve de índice (documento, CUPS, fecha de la orden) -> radicado para
+no volver a radicar en el portal un servicio que ya tiene número.
+
+El archivo.txt heredado se importa una sola vez al abrir el registro.
+"""
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.paths import get_data_path, get_runtime_path
+
+
+class RegistroResultados:
+    """Resultados de casos en SQLite con consulta por documento/orden/radicado"""
+
+    EXITO = 'EXITO'
+    RECHAZO = 'RECHAZO'
+    SOLICITUD_ACTIVA = 'SOLICITUD_ACTIVA'
+    IPS_NO_ENCONTRADA = 'IPS_NO_ENCONTRADA'
+    ERROR_ARCHIVO = 'ERROR_ARCHIVO'
+    CUPS_NO_INGRESADO = 'CUPS_NO_INGRESADO'  # Radicado parcial: CUPS pendiente de gestionar aparte
+
+    # caso,{texto},paciente,{documento},ordenCapita,{idItemOrden}  (el texto puede traer comas)
+    _LINEA_CASO = re.compile(r'^caso,(.*),paciente,([^,]*),ordenCapita,([^,]*)$')
+    # combo ips atiende  ,no se encontro,{documento},ordenCapita,{idItemOrden}
+    _LINEA_IPS = re.compile(r'^combo ips atiende\s*,(.*),([^,]*),ordenCapita,([^,]*)$')
+    _FORMATOS_FECHA = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y')
+    # Columnas agregadas después de la primera versión de la tabla
+    _COLUMNAS_NUEVAS = {'cups': "TEXT NOT NULL DEFAULT ''", 'fecha_orden': "TEXT NOT NULL DEFAULT ''"}
+
+    def __init__(self, ruta: Optional[Path] = None):
+        """
+        Args:
+            ruta: Archivo SQLite (por defecto session_data/resultados.db)
+        """
+        self.ruta = Path(ruta) if ruta else get_data_path('session_data/resultados.db')
+        self._lock = threading.Lock()
+
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Escriben los hilos de los workers y consulta el de la UI: una conexión con lock
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False, isolation_level=None)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resultados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha TEXT NOT NULL,
+                modulo TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                documento TEXT NOT NULL DEFAULT '',
+                id_item_orden TEXT NOT NULL DEFAULT '',
+                radicado TEXT NOT NULL DEFAULT '',
+                detalle TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_resultados_documento ON resultados (documento);
+            CREATE INDEX IF NOT EXISTS idx_resultados_orden ON resultados (id_item_orden);
+            CREATE INDEX IF NOT EXISTS idx_resultados_radicado ON resultados (radicado);
+            CREATE INDEX IF NOT EXISTS idx_resultados_fecha ON resultados (fecha);
+            CREATE TABLE IF NOT EXISTS migraciones (clave TEXT PRIMARY KEY, fecha TEXT NOT NULL);
+            """
+        )
+        existentes = {fila[1] for fila in self._conexion.execute('PRAGMA table_info(resultados)')}
+        for columna, definicion in self._COLUMNAS_NUEVAS.items():
+            if columna not in existentes:
+                self._conexion.execute(f'ALTER TABLE resultados ADD COLUMN {columna} {definicion}')
+        self._conexion.execute(
+            'CREATE INDEX IF NOT EXISTS idx_resultados_servicio ON resultados (documento, cups, fecha_orden)'
+        )
+        self._importar_archivos_heredados()
+
+    @staticmethod
+    def extraer_radicado(texto: str) -> str:
+        """Número de radicado de un mensaje del portal ('... radicado #123', 'Correcto Caso # 123')"""
+        if not texto:
+            return ''
+        m = re.search(r'#\s*(\d+)', texto)
+        if m:
+            return m.group(1)
+        return ''.join(re.findall(r'\d+', texto)) if texto.lower().startswith('correcto') else ''
+
+    @staticmethod
+    def extraer_cups(texto: str) -> str:
+        """CUPS de un mensaje del portal ('... para el servicio 895101 con el número de radicado ...')"""
+        m = re.search(r'servicio\s*(\d+)', texto or '', re.IGNORECASE)
+        return m.group(1) if m else ''
+
+    @classmethod
+    def normalizar_fecha(cls, valor: Any) -> str:
+        """Fecha de la orden como 'YYYY-MM-DD' ('' si no viene o no se entiende)"""
+        texto = str(valor or '').strip()
+        if not texto:
+            return ''
+        try:
+            return parsedate_to_datetime(texto).strftime('%Y-%m-%d')  # "Mon, 02 Feb 2026 16:48:15 GMT"
+        except (TypeError, ValueError, IndexError):
+            pass
+        try:
+            return datetime.fromisoformat(texto.replace('Z', '+00:00')).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+        for formato in cls._FORMATOS_FECHA:
+            try:
+                return datetime.strptime(texto, formato).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return ''
+
+    def registrar(
+        self,
+        tipo: str,
+        documento: Any,
+        id_item_orden: Any,
+        detalle: str = '',
+        radicado: Optional[str] = None,
+        modulo: str = 'anexo3',
+        fecha: Optional[str] = None,
+        cups: Optional[str] = None,
+        fecha_orden: Any = ''
+    ):
+        """
+        Guarda un resultado.
+
+        Args:
+            tipo: EXITO, RECHAZO, SOLICITUD_ACTIVA, IPS_NO_ENCONTRADA o ERROR_ARCHIVO
+            documento: Número de documento del paciente
+            id_item_orden: idItemOrden (Anexo 3) o idOrdenProcedimiento (Laboratorio)
+            detalle: Mensaje del portal o descripción del error
+            radicado: Número de radicado (si no se pasa se extrae del detalle)
+            modulo: 'anexo3' o 'laboratorio'
+            fecha: 'YYYY-MM-DD HH:MM:SS' (por defecto ahora)
+            cups: CUPS del servicio (si no se pasa se extrae del detalle)
+            fecha_orden: Fecha de la orden médica (cualquier formato de la API)
+        """
+        if radicado is None:
+            radicado = self.extraer_radicado(detalle)
+        if not cups:
+            cups = self.extraer_cups(detalle)
+        with self._lock:
+            self._conexion.execute(
+                'INSERT INTO resultados (fecha, modulo, tipo, documento, id_item_orden, radicado, detalle, cups, fecha_orden)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    fecha or datetime.now().strftime('%Y-%m-%d %H:%M:%S'), modulo, tipo,
+                    str(documento or '').strip(), str(id_item_orden or '').strip(),
+                    str(radicado or '').strip(), detalle or '',
+                    str(cups or '').strip(), self.normalizar_fecha(fecha_orden)
+                )
+            )
+
+    def buscar(
+        self,
+        texto: str = '',
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None,
+        tipo: Optional[str] = None,
+        limite: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta resultados, los más recientes primero.
+
+        Args:
+            texto: Documento, idItemOrden o radicado exacto (vacío = todos)
+            desde: Fecha mínima 'YYYY-MM-DD'
+            hasta: Fecha máxima 'YYYY-MM-DD' (incluida)
+            tipo: Filtrar por tipo
+            limite: Máximo de filas
+
+        Returns:
+            Lista de dicts con las columnas de la tabla
+        """
+        condiciones, parametros = [], []
+        texto = (texto or '').strip().lstrip('#')
+        if texto:
+            condiciones.append('(documento = ? OR id_item_orden = ? OR radicado = ?)')
+            parametros += [texto, texto, texto]
+        if desde:
+            condiciones.append('fecha >= ?')
+            parametros.append(desde)
+        if hasta:
+            condiciones.append('fecha <= ?')
+            parametros.append(f'{hasta} 23:59:59')  # Incluye todo el día
+        if tipo:
+            condiciones.append('tipo = ?')
+            parametros.append(tipo)
+
+        sql = 'SELECT id, fecha, modulo, tipo, documento, id_item_orden, radicado, detalle FROM resultados'
+        if condiciones:
+            sql += ' WHERE ' + ' AND '.join(condiciones)
+        sql += ' ORDER BY fecha DESC, id DESC LIMIT ?'
+        parametros.append(limite)
+
+        with self._lock:
+            cursor = self._conexion.execute(sql, parametros)
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def radicado_previo(
+        self, documento: Any, cups: Any, fecha_orden: Any, id_item_orden: Any = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resultado más reciente con radicado para el mismo servicio del paciente
+        en la misma fecha de orden (índice documento, CUPS, fecha).
+
+        Args:
+            documento: Número de documento del paciente
+            cups: CUPS del servicio
+            fecha_orden: Fecha de la orden médica (cualquier formato de la API)
+            id_item_orden: idItemOrden consultado; si se pasa, antes se completan
+                CUPS y fecha de sus filas importadas de archivo.txt
+
+        Returns:
+            Dict con las columnas de la tabla, o None si no hay radicado conocido
+            (o si falta alguno de los tres datos)
+        """
+        documento = str(documento or '').strip()
+        cups = str(cups or '').strip()
+        fecha_orden = self.normalizar_fecha(fecha_orden)
+        if not (documento and cups and fecha_orden):
+            return None
+        if id_item_orden:
+            self.completar_heredados(documento, id_item_orden, cups, fecha_orden)
+        with self._lock:
+            cursor = self._conexion.execute(
+                'SELECT id, fecha, modulo, tipo, documento, id_item_orden, radicado, detalle, cups, fecha_orden'
+                " FROM resultados WHERE documento = ? AND cups = ? AND fecha_orden = ? AND radicado != ''"
+                ' ORDER BY id DESC LIMIT 1',
+                (documento, cups, fecha_orden)
+            )
+            fila = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], fila)) if fila else None
+
+    # ==================== MIGRACIÓN DE archivo.txt ====================
+
+    def completar_heredados(self, documento: Any, id_item_orden: Any, cups: Any, fecha_orden: Any) -> int:
+        """
+        archivo.txt no guardaba CUPS ni fecha de la orden: cuando la API entrega
+        los datos de una orden, se copian a sus filas sin ellos (mismo documento
+        e idItemOrden) para que entren al índice de radicado_previo.
+
+        Returns:
+            Cantidad de filas completadas
+        """
+        documento = str(documento or '').strip()
+        id_item_orden = str(id_item_orden or '').strip()
+        cups = str(cups or '').strip()
+        fecha_orden = self.normalizar_fecha(fecha_orden)
+        if not (documento and id_item_orden and cups and fecha_orden):
+            return 0
+        with self._lock:
+            cursor = self._conexion.execute(
+                "UPDATE resultados SET cups = CASE WHEN cups = '' THEN ? ELSE cups END,"
+                " fecha_orden = CASE WHEN fecha_orden = '' THEN ? ELSE fecha_orden END"
+                " WHERE documento = ? AND id_item_orden = ? AND (cups = '' OR fecha_orden = '')",
+                (cups, fecha_orden, documento, id_item_orden)
+            )
+            return cursor.rowcount
+
+    def _importar_archivos_heredados(self):
+        """Importa archivo.txt (directorio actual y de la app) si no se importó antes"""
+        candidatos = {Path('archivo.txt').resolve(), (get_runtime_path() / 'archivo.txt').resolve()}
+        for ruta in candidatos:
+            if ruta.is_file():
+                try:
+                    self.importar_archivo_txt(ruta)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"[RegistroResultados] ⚠️ No se pudo importar {ruta}: {e}")
+
+    @classmethod
+    def _clasificar_linea(cls, linea: str) -> Optional[tuple]:
+        """(tipo, documento, id_item_orden, detalle) de una línea de archivo.txt"""
+        m = cls._LINEA_CASO.match(linea)
+        if m:
+            detalle, documento, id_item = m.groups()
+            texto = detalle.lower()
+            if texto.startswith('solicitud activa'):
+                tipo = cls.SOLICITUD_ACTIVA
+            elif texto.startswith('correcto'):
+                tipo = cls.EXITO
+            else:
+                tipo = cls.RECHAZO
+            return tipo, documento, id_item, detalle
+        m = cls._LINEA_IPS.match(linea)
+        if m:
+            detalle, documento, id_item = m.groups()
+            return cls.IPS_NO_ENCONTRADA, documento, id_item, f"IPS de atención {detalle.strip()}"
+        return None
+
+    def importar_archivo_txt(self, ruta: Path) -> int:
+        """
+        Importa las líneas de un archivo.txt heredado (una sola vez por ruta).
+        archivo.txt no guardaba fecha: se usa la de modificación del archivo.
+
+        Returns:
+            Cantidad de resultados importados (0 si ya se había importado)
+        """
+        clave = f'archivo_txt:{Path(ruta).resolve()}'
+        with self._lock:
+            if self._conexion.execute('SELECT 1 FROM migraciones WHERE clave = ?', (clave,)).fetchone():
+                return 0
+
+        fecha = datetime.fromtimestamp(Path(ruta).stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        filas = []
+        with open(ruta, 'r', encoding='utf-8', errors='replace') as archivo:
+            for linea in archivo:
+                clasificada = self._clasificar_linea(linea.rstrip('\r\n'))
+                if clasificada:
+                    tipo, documento, id_item, detalle = clasificada
+                    filas.append((fecha, 'anexo3', tipo, documento.strip(), id_item.strip(),
+                                  self.extraer_radicado(detalle), detalle, self.extraer_cups(detalle)))
+
+        with self._lock:
+            self._conexion.execute('BEGIN')
+            try:
+                self._conexion.executemany(
+                    'INSERT INTO resultados (fecha, modulo, tipo, documento, id_item_orden, radicado, detalle, cups)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    filas
+                )
+                self._conexion.execute(
+                    'INSERT INTO migraciones (clave, fecha) VALUES (?, ?)',
+                    (clave, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                self._conexion.execute('COMMIT')
+            except sqlite3.Error:
+                self._conexion.execute('ROLLBACK')
+                raise
+        print(f"[RegistroResultados] 📥 {len(filas)} resultados importados de {ruta}")
+        return len(filas)
+
+
+_registro: Optional[RegistroResultados] = None
+_registro_lock = threading.Lock()
+
+
+def obtener_registro() -> RegistroResultados:
+    """Instancia compartida del registro (se crea e importa archivo.txt al primer uso)"""
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroResultados()
+        return _registro
@@ -1,8 +1,14 @@
 """
 Módulo de interfaz de usuario.
 """
+from utils.lazy import exportar_perezoso
 from .main_window import MainWindow
-from .empresas_panel import EmpresasCasosBootPanel
-from .procedimientos_panel import ProcedimientosBootPanel
 
-__all__ = ['MainWindow', 'EmpresasCasosBootPanel', 'ProcedimientosBootPanel']
+__all__ = ['MainWindow', 'EmpresasCasosBootPanel', 'ProcedimientosBootPanel', 'VistaEnVivoWindow']
+
+# Los paneles se importan al primer acceso (ver utils/lazy.py)
+__getattr__, __dir__ = exportar_perezoso(__name__, {
+    'EmpresasCasosBootPanel': 'ui.empresas_panel',
+    'ProcedimientosBootPanel': 'ui.procedimientos_panel',
+    'VistaEnVivoWindow': 'ui.vista_en_vivo_window'
+})
@@ -1,9 +1,13 @@
 """
 Ventana principal de la aplicación con menú para navegar entre paneles.
 """
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Optional, Dict, Type
+from typing import Optional, Dict, Type, Union, TYPE_CHECKING
 import sys
 from pathlib import Path
 
@@ -11,10 +15,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config import Config
-from services.license_service import LicenseService
-from ui.saldo_panel import RecargaSaldoPanel
-from ui.empresas_panel import EmpresasCasosBootPanel
-from ui.procedimientos_panel import ProcedimientosBootPanel
+from utils.lazy import importar_ruta
+
+if TYPE_CHECKING:
+    from services.license_service import LicenseService
 
 
 class MainWindow:
@@ -22,6 +26,26 @@ class MainWindow:
     Ventana principal de la aplicación con sistema de navegación por menú.
     """
     
+    # Paneles registrados por ruta de import ('modulo:Clase').
+    # Se importan al abrirlos por primera vez, así Playwright, PyMuPDF o
+    # tkcalendar no se cargan al arrancar. Mantener en sincronía con
+    # BootOroBuilder.hidden_imports (PyInstaller no ve imports por texto).
+    PANELES = {
+        'autorizar_anexo3': 'modules.autorizar_anexo3.ui.panel:AutorizarAnexo3Panel',
+        'worker_automatizacion': 'modules.autorizar_anexo3.ui.programacion_panel:ProgramacionPanel',
+        'worker_laboratorio': 'modules.laboratorio.ui.laboratorio_panel:LaboratorioPanel',
+        'casos_creados_laboratorio': 'modules.laboratorio.ui.estadisticas_creados_panel:EstadisticasCreadosPanel',
+        'casos_asistidos_laboratorio': 'modules.laboratorio.ui.estadisticas_asistidos_panel:EstadisticasAsistidosPanel',
+        'recarga_saldo': 'ui.saldo_panel:RecargaSaldoPanel',
+        'empresas_casos_boot': 'ui.empresas_panel:EmpresasCasosBootPanel',
+        'procedimientos_boot': 'ui.procedimientos_panel:ProcedimientosBootPanel',
+        'resultados_casos': 'ui.resultados_panel:ResultadosPanel',
+    }
+    
+    # Validación de licencia en segundo plano: sondeo del resultado y espera máxima
+    INTERVALO_LICENCIA_MS = 100
+    TIMEOUT_LICENCIA_SEG = 60
+    
     def __init__(self):
         """Inicializa la ventana principal"""
         self.root = tk.Tk()
@@ -30,15 +54,22 @@ class MainWindow:
         self.saldo_robot = None
         self.saldo_agotado = False
         self.nombre_licencia = ""
-        self.license_service: Optional[LicenseService] = None
+        self.license_service: Optional['LicenseService'] = None
+        # True mientras la licencia se valida en segundo plano
+        self.licencia_verificando = False
+        # El hilo de la licencia deja aquí su resultado; el hilo de Tk lo sondea con after()
+        self._cola_licencia: queue.Queue = queue.Queue()
+        self._limite_licencia = 0.0
         self.current_panel: Optional[tk.Frame] = None
-        self.panels_registry: Dict[str, Type] = {}
+        # Nombre -> ruta de import (str) hasta el primer uso, luego la clase
+        self.panels_registry: Dict[str, Union[str, Type]] = {}
         
         self._setup_window()
         self._create_menu()
-        self._verificar_licencia()
         self._create_main_container()
         self._register_panels()
+        # La ventana se dibuja sin esperar al backend de licencias
+        self._iniciar_verificacion_licencia()
     
     def _setup_window(self):
         """Configura las propiedades de la ventana principal"""
@@ -105,6 +136,11 @@ class MainWindow:
             label="Casos asistidos Laboratorio",
             command=lambda: self._open_panel('casos_asistidos_laboratorio')
         )
+        estadisticas_menu.add_separator()
+        estadisticas_menu.add_command(
+            label="Buscar resultados / radicados",
+            command=lambda: self._open_panel('resultados_casos')
+        )
         
         # Menú Ayuda
         ayuda_menu = tk.Menu(self.menubar, tearoff=0)
@@ -139,20 +175,28 @@ class MainWindow:
         self._show_welcome_panel()
     
     def _register_panels(self):
-        """Registra todos los paneles disponibles"""
-        try:
-            from modules.autorizar_anexo3 import AutorizarAnexo3Panel, ProgramacionPanel
-            from modules.laboratorio import LaboratorioPanel, EstadisticasCreadosPanel, EstadisticasAsistidosPanel
-            self.panels_registry['autorizar_anexo3'] = AutorizarAnexo3Panel
-            self.panels_registry['worker_automatizacion'] = ProgramacionPanel
-            self.panels_registry['worker_laboratorio'] = LaboratorioPanel
-            self.panels_registry['casos_creados_laboratorio'] = EstadisticasCreadosPanel
-            self.panels_registry['casos_asistidos_laboratorio'] = EstadisticasAsistidosPanel
-            self.panels_registry['recarga_saldo'] = RecargaSaldoPanel
-            self.panels_registry['empresas_casos_boot'] = EmpresasCasosBootPanel
-            self.panels_registry['procedimientos_boot'] = ProcedimientosBootPanel
-        except ImportError as e:
-            print(f"Advertencia: No se pudo cargar el panel AutorizarAnexo3: {e}")
+        """Registra todos los paneles disponibles (sin importarlos todavía)"""
+        self.panels_registry.update(self.PANELES)
+    
+    def _resolver_panel(self, panel_name: str) -> Optional[Type]:
+        """
+        Retorna la clase del panel, importándola la primera vez que se abre.
+        
+        Args:
+            panel_name: Nombre del panel registrado
+        
+        Returns:
+            Clase del panel o None si no se pudo importar
+        """
+        panel = self.panels_registry[panel_name]
+        if isinstance(panel, str):
+            try:
+                panel = importar_ruta(panel)
+            except ImportError as e:
+                print(f"Advertencia: No se pudo cargar el panel {panel_name}: {e}")
+                return None
+            self.panels_registry[panel_name] = panel
+        return panel
     
     def _show_welcome_panel(self):
         """Muestra el panel de bienvenida"""
@@ -207,6 +251,13 @@ class MainWindow:
         Args:
             panel_name: Nombre del panel a abrir
         """
+        if self.licencia_verificando and panel_name != 'recarga_saldo':
+            messagebox.showinfo(
+                "Licencia",
+                "Verificando licencia y saldo. Intente de nuevo en unos segundos."
+            )
+            return
+
         if self.saldo_agotado and panel_name != 'recarga_saldo':
             messagebox.showwarning(
                 "Saldo agotado",
@@ -221,10 +272,17 @@ class MainWindow:
             )
             return
         
+        panel_class = self._resolver_panel(panel_name)
+        if panel_class is None:
+            messagebox.showerror(
+                "Error",
+                f"El panel '{panel_name}' no se pudo cargar."
+            )
+            return
+        
         self._clear_current_panel()
         
         # Crear instancia del panel
-        panel_class = self.panels_registry[panel_name]
         self.current_panel = panel_class(self.main_frame, self.config)
         self.current_panel.pack(fill=tk.BOTH, expand=True)
         
@@ -267,23 +325,52 @@ class MainWindow:
             self.procesos_menu.entryconfig(0, state=tk.DISABLED)
             self.procesos_menu.entryconfig(2, state=tk.DISABLED)
 
-    def _verificar_licencia(self):
+    def _iniciar_verificacion_licencia(self):
+        """
+        Lanza la validación de licencia y saldo en un hilo.
+        
+        Mientras responde el backend (timeout HTTP de 10s + descifrado PBKDF2)
+        los menús de procesos quedan bloqueados y la barra de estado muestra
+        "Verificando licencia...". El hilo deja el resultado en una cola que
+        el hilo de Tk sondea con after() (Tk no admite llamadas desde otros
+        hilos); si no llega en TIMEOUT_LICENCIA_SEG se da por no validada.
+        """
         from utils.logger import AdvancedLogger
         self._startup_logger = AdvancedLogger()
 
+        self.licencia_verificando = True
+        self._bloquear_menus()
+        self.status_bar.config(
+            text=f"Verificando licencia... - {self.config.sede_ips_nombre} | Saldo: {self._formatear_saldo()}"
+        )
+
+        hilo = threading.Thread(target=self._consultar_licencia, daemon=True)
+        hilo.start()
+        self._limite_licencia = time.monotonic() + self.TIMEOUT_LICENCIA_SEG
+        self.root.after(self.INTERVALO_LICENCIA_MS, self._revisar_licencia)
+
+    def _consultar_licencia(self):
+        """Consulta licencia y saldo (hilo en segundo plano, sin tocar widgets)"""
+        resultado = {'info': None, 'es_autorizado': False, 'error_import': None}
         try:
+            from services.license_service import LicenseService
             base_url = self.config.api_url_programacion_base or 'http://localhost:5000'
             self.license_service = LicenseService(base_url=base_url)
             self._startup_logger.info('Licencia', f'LicenseService inicializado - base_url: {base_url}')
         except ImportError as exc:
             self._startup_logger.error('Licencia', f'Error importando cryptography: {exc}', exc)
-            messagebox.showerror("Licencia", str(exc))
-            raise SystemExit(1)
+            resultado['error_import'] = str(exc)
+            self._cola_licencia.put(resultado)
+            return
 
         saldo_url = f"{self.license_service.base_url}/ips-saldos"
         self._startup_logger.info('Licencia', f'Consultando saldo en: {saldo_url}')
 
-        info = self.license_service.obtener_saldo()
+        try:
+            info = self.license_service.obtener_saldo()
+        except Exception as exc:
+            self._startup_logger.error('Licencia', f'Error consultando saldo: {exc}', exc)
+            info = {"success": False, "message": str(exc), "error": str(exc)}
 
         self._startup_logger.info('Licencia', f'Respuesta saldo - success: {info.get("success")}')
         self._startup_logger.info('Licencia', f'Respuesta saldo - message: {info.get("message")}')
@@ -295,40 +382,84 @@ class MainWindow:
         if info.get("error"):
             self._startup_logger.error('Licencia', f'Error en consulta: {info.get("error")}')
 
+        resultado['info'] = info
+        if info.get("success"):
+            permitidos = self.config.ips_nombres_permitidos
+            nombre = info.get("nombre_desencriptado") or ""
+            resultado['es_autorizado'] = self.license_service.nombre_autorizado(nombre, permitidos)
+            self._startup_logger.info('Licencia', f'Nombre desencriptado: "{nombre}"')
+            self._startup_logger.info('Licencia', f'IPS permitidas: {permitidos}')
+            self._startup_logger.info('Licencia', f'Autorizado: {resultado["es_autorizado"]}')
+
+        self._cola_licencia.put(resultado)
+
+    def _revisar_licencia(self):
+        """Sondea (hilo de Tk) el resultado de la validación de licencia"""
+        try:
+            resultado = self._cola_licencia.get_nowait()
+        except queue.Empty:
+            if time.monotonic() < self._limite_licencia:
+                self.root.after(self.INTERVALO_LICENCIA_MS, self._revisar_licencia)
+                return
+            self._startup_logger.error('Licencia', f'Sin respuesta de la validación en {self.TIMEOUT_LICENCIA_SEG}s')
+            resultado = {
+                'info': {"success": False, "message": "El servidor de licencias no respondió a tiempo."},
+                'es_autorizado': False,
+                'error_import': None
+            }
+        self._aplicar_licencia(resultado)
+
+    def _aplicar_licencia(self, resultado: dict):
+        """
+        Aplica el resultado de la validación de licencia (hilo de Tk).
+        
+        Args:
+            resultado: Dict con info (respuesta de obtener_saldo), es_autorizado
+                       y error_import
+        """
+        self.licencia_verificando = False
+
+        if resultado.get('error_import'):
+            messagebox.showerror("Licencia", resultado['error_import'])
+            self.root.destroy()
+            return
+
+        info = resultado['info']
         if not info.get("success"):
             self._startup_logger.warning('Licencia', f'Validación fallida: {info.get("message", "")}')
+            self.saldo_agotado = True
+            self._bloquear_menus()
+            self.status_bar.config(
+                text=f"Licencia no validada - {self.config.sede_ips_nombre} | Saldo: {self._formatear_saldo()}"
+            )
             messagebox.showerror(
                 "Licencia",
                 f"No se pudo validar licencia. {info.get('message', '')}"
             )
-            self.saldo_agotado = True
-            self._bloquear_menus()
             return
 
-        self.saldo_robot = info.get("saldo_robot")
         self.nombre_licencia = info.get("nombre_desencriptado") or ""
 
-        permitidos = self.config.ips_nombres_permitidos
-        es_autorizado = self.license_service.nombre_autorizado(
-            self.nombre_licencia,
-            permitidos
-        )
-        self._startup_logger.info('Licencia', f'Nombre desencriptado: "{self.nombre_licencia}"')
-        self._startup_logger.info('Licencia', f'IPS permitidas: {permitidos}')
-        self._startup_logger.info('Licencia', f'Autorizado: {es_autorizado}')
-
-        if not es_autorizado:
+        if not resultado.get('es_autorizado'):
             self._startup_logger.error('Licencia', 'IPS NO autorizada - cerrando app')
             messagebox.showerror(
                 "Licencia",
                 "IPS no autorizada para usar esta aplicacion."
             )
             self.root.destroy()
-            raise SystemExit(1)
+            return
 
-        self._startup_logger.info('Licencia', f'Saldo robot: {self.saldo_robot}')
+        saldo = info.get("saldo_robot")
+        self._startup_logger.info('Licencia', f'Saldo robot: {saldo}')
+        # Actualiza barra de estado y reactiva los menús si hay saldo
+        self.actualizar_saldo_ui(saldo)
+
+        try:
+            sin_saldo = saldo is None or float(saldo) <= 0
+        except (TypeError, ValueError):
+            sin_saldo = True
 
-        if self.saldo_robot is None or float(self.saldo_robot) <= 0:
+        if sin_saldo:
             self.saldo_agotado = True
             self._bloquear_menus()
             self._startup_logger.warning('Licencia', 'Saldo agotado - menús bloqueados')
@@ -337,7 +468,7 @@ class MainWindow:
                 "El saldo del robot se agotó."
             )
         else:
-            self._startup_logger.success('Licencia', f'Licencia OK - Saldo: {self.saldo_robot}')
+            self._startup_logger.success('Licencia', f'Licencia OK - Saldo: {saldo}')
     
     def _show_config(self):
         """Muestra la configuración de la aplicación"""
@@ -392,4 +523,7 @@ Para modificar estos valores, edite el archivo endpoint.env
     def run(self):
         """Inicia el loop principal de la aplicación"""
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
+        # Benchmark de arranque (benchmark_arranque.py): cerrar apenas se dibuja la ventana
+        if os.environ.get('BOOTORO_BENCHMARK_ARRANQUE'):
+            self.root.after_idle(self.root.destroy)
         self.root.mainloop()
@@ -0,0 +1,150 @@
+"""
+Panel de búsqueda de resultados de casos (radicados, rechazos, errores).
+Consulta el registro local (services/registro_resultados.py).
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
+
+from services.registro_resultados import RegistroResultados, obtener_registro
+
+
+class ResultadosPanel(ttk.Frame):
+    """Busca resultados por documento, idItemOrden o radicado"""
+
+    TIPOS = [
+        "TODOS",
+        RegistroResultados.EXITO,
+        RegistroResultados.SOLICITUD_ACTIVA,
+        RegistroResultados.RECHAZO,
+        RegistroResultados.IPS_NO_ENCONTRADA,
+        RegistroResultados.ERROR_ARCHIVO,
+        RegistroResultados.CUPS_NO_INGRESADO,
+    ]
+    LIMITE = 500
+
+    def __init__(self, parent, config):
+        super().__init__(parent)
+        self.config = config
+
+        self.texto_busqueda = tk.StringVar()
+        self.tipo_filtro = tk.StringVar(value="TODOS")
+        self.fecha_desde = tk.StringVar(value=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
+        self.fecha_hasta = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
+
+        self._create_widgets()
+        self._buscar()
+
+    def _create_widgets(self):
+        """Crea los widgets del panel"""
+        ttk.Label(self, text="🔎 Resultados de casos", font=('Arial', 16, 'bold')).pack(pady=(10, 5))
+
+        filtros = ttk.LabelFrame(self, text="Buscar", padding=10)
+        filtros.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Label(filtros, text="Documento / ID Item / Radicado:").pack(side=tk.LEFT, padx=5)
+        entrada = ttk.Entry(filtros, textvariable=self.texto_busqueda, width=22)
+        entrada.pack(side=tk.LEFT, padx=5)
+        entrada.bind('<Return>', lambda e: self._buscar())
+        entrada.focus_set()
+
+        ttk.Label(filtros, text="Desde:").pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Entry(filtros, textvariable=self.fecha_desde, width=11).pack(side=tk.LEFT)
+        ttk.Label(filtros, text="Hasta:").pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Entry(filtros, textvariable=self.fecha_hasta, width=11).pack(side=tk.LEFT)
+
+        ttk.Label(filtros, text="Tipo:").pack(side=tk.LEFT, padx=(15, 5))
+        combo_tipo = ttk.Combobox(filtros, textvariable=self.tipo_filtro, values=self.TIPOS, state='readonly', width=18)
+        combo_tipo.pack(side=tk.LEFT, padx=5)
+        combo_tipo.bind('<<ComboboxSelected>>', lambda e: self._buscar())
+
+        ttk.Button(filtros, text="🔎 Buscar", command=self._buscar, width=12).pack(side=tk.LEFT, padx=10)
+
+        self.count_label = ttk.Label(filtros, text="", font=('Arial', 9, 'bold'))
+        self.count_label.pack(side=tk.RIGHT, padx=10)
+
+        # Tabla
+        table_container = ttk.Frame(self)
+        table_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 5))
+
+        vsb = ttk.Scrollbar(table_container, orient="vertical")
+        hsb = ttk.Scrollbar(table_container, orient="horizontal")
+
+        columns = ("fecha", "modulo", "tipo", "documento", "id_item", "radicado", "detalle")
+        self.tree = ttk.Treeview(
+            table_container,
+            columns=columns,
+            show='headings',
+            yscrollcommand=vsb.set,
+            xscrollcommand=hsb.set,
+            height=18
+        )
+        vsb.config(command=self.tree.yview)
+        hsb.config(command=self.tree.xview)
+
+        self.tree.heading("fecha", text="Fecha")
+        self.tree.heading("modulo", text="Módulo")
+        self.tree.heading("tipo", text="Tipo")
+        self.tree.heading("documento", text="Documento")
+        self.tree.heading("id_item", text="ID Item")
+        self.tree.heading("radicado", text="Radicado")
+        self.tree.heading("detalle", text="Detalle")
+
+        self.tree.column("fecha", width=140, anchor=tk.CENTER)
+        self.tree.column("modulo", width=90, anchor=tk.CENTER)
+        self.tree.column("tipo", width=130, anchor=tk.CENTER)
+        self.tree.column("documento", width=110, anchor=tk.CENTER)
+        self.tree.column("id_item", width=80, anchor=tk.CENTER)
+        self.tree.column("radicado", width=100, anchor=tk.CENTER)
+        self.tree.column("detalle", width=450)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        hsb.grid(row=1, column=0, sticky='ew')
+        table_container.grid_rowconfigure(0, weight=1)
+        table_container.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind('<Double-1>', self._mostrar_detalle)
+
+        ttk.Label(
+            self,
+            text="Doble clic en una fila para ver el detalle completo. La búsqueda por texto es exacta.",
+            font=('Arial', 8),
+            foreground='gray'
+        ).pack(pady=(0, 10))
+
+    def _buscar(self):
+        """Consulta el registro con los filtros actuales"""
+        tipo = self.tipo_filtro.get()
+        try:
+            filas = obtener_registro().buscar(
+                texto=self.texto_busqueda.get(),
+                desde=self.fecha_desde.get().strip() or None,
+                hasta=self.fecha_hasta.get().strip() or None,
+                tipo=None if tipo == "TODOS" else tipo,
+                limite=self.LIMITE
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo consultar el registro de resultados:\n{e}")
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        self._detalles = {}
+        for fila in filas:
+            detalle = fila['detalle'].replace('\n', ' | ')
+            iid = self.tree.insert('', tk.END, values=(
+                fila['fecha'], fila['modulo'], fila['tipo'], fila['documento'],
+                fila['id_item_orden'], fila['radicado'], detalle[:200]
+            ))
+            self._detalles[iid] = fila['detalle']
+
+        texto = f"Resultados: {len(filas)}"
+        if len(filas) >= self.LIMITE:
+            texto += f" (máx. {self.LIMITE}, afine la búsqueda)"
+        self.count_label.config(text=texto)
+
+    def _mostrar_detalle(self, event=None):
+        """Muestra el detalle completo de la fila seleccionada"""
+        seleccion = self.tree.selection()
+        if seleccion:
+            messagebox.showinfo("Detalle del resultado", self._detalles.get(seleccion[0], ''))
@@ -0,0 +1,71 @@
+"""
+Ventana de supervisión "Vista en vivo" del navegador de un worker.
+Útil sobre todo en modo headless (NAVEGADOR_HEADLESS=true), donde no hay
+ventana de Chromium visible.
+"""
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from modules.autorizar_anexo3.playwright.vista_en_vivo import VistaEnVivo
+
+
+class VistaEnVivoWindow(tk.Toplevel):
+    """Muestra los cuadros que publica el worker en su VistaEnVivo"""
+
+    INTERVALO_MS = 500  # Frecuencia de refresco de la imagen
+
+    def __init__(self, parent, vista: 'VistaEnVivo', titulo: str = "Worker"):
+        """
+        Args:
+            parent: Widget padre
+            vista: Buzón de cuadros del worker
+            titulo: Nombre del worker para el título de la ventana
+        """
+        super().__init__(parent)
+        self.vista = vista
+        self._timestamp_mostrado = 0.0
+        self._imagen: Optional[tk.PhotoImage] = None  # Mantener referencia (Tk la libera si no)
+        self._refresh_id = None
+
+        self.title(f"Vista en vivo - {titulo}")
+        self.geometry("1000x680")
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+        self.imagen_label = ttk.Label(self, anchor=tk.CENTER, text="⏳ Esperando cuadro del navegador...")
+        self.imagen_label.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.estado_label = ttk.Label(self, text="", font=('Arial', 9), foreground='gray')
+        self.estado_label.pack(fill=tk.X, padx=5, pady=(0, 5))
+
+        self.vista.activar()
+        self._refrescar()
+
+    def _refrescar(self):
+        """Muestra el último cuadro si cambió (loop con after)"""
+        cuadro, timestamp = self.vista.ultimo_cuadro()
+        if cuadro and timestamp != self._timestamp_mostrado:
+            try:
+                self._imagen = tk.PhotoImage(data=cuadro)
+                self.imagen_label.config(image=self._imagen, text="")
+                self._timestamp_mostrado = timestamp
+            except tk.TclError as e:
+                self.estado_label.config(text=f"⚠️ Cuadro no válido: {e}")
+
+        if self._timestamp_mostrado:
+            hora = datetime.fromtimestamp(self._timestamp_mostrado).strftime('%H:%M:%S')
+            self.estado_label.config(text=f"🔴 En vivo | Último cuadro: {hora} (se actualiza cuando la página cambia)")
+        else:
+            self.estado_label.config(text="El worker empezará a transmitir en su próximo ciclo")
+
+        self._refresh_id = self.after(self.INTERVALO_MS, self._refrescar)
+
+    def destroy(self):
+        """Detiene la transmisión al cerrar"""
+        if self._refresh_id:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        self.vista.desactivar()
+        super().destroy()
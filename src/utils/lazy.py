@@ -0,0 +1,59 @@
+"""
+Carga perezosa de módulos y clases.
+Permite que los paquetes re-exporten sus clases sin importarlas al arrancar:
+Playwright, PyMuPDF, tkcalendar, etc. solo se cargan cuando se usan.
+
+Uso en un __init__.py:
+
+    from utils.lazy import exportar_perezoso
+
+    __all__ = ['MiPanel']
+    __getattr__, __dir__ = exportar_perezoso(__name__, {
+        'MiPanel': 'modulo.ui.mi_panel',
+    })
+"""
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def importar_ruta(ruta: str) -> Any:
+    """
+    Importa un objeto a partir de una ruta 'paquete.modulo:Nombre'.
+
+    Args:
+        ruta: Ruta de import con el nombre del objeto separado por ':'
+
+    Returns:
+        El objeto importado (clase, función, ...)
+    """
+    modulo, _, nombre = ruta.partition(':')
+    objeto = importlib.import_module(modulo)
+    return getattr(objeto, nombre) if nombre else objeto
+
+
+def exportar_perezoso(
+    paquete: str,
+    exportaciones: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Construye __getattr__ y __dir__ (PEP 562) para un paquete.
+
+    Args:
+        paquete: __name__ del paquete
+        exportaciones: Nombre exportado -> módulo absoluto que lo define
+
+    Returns:
+        (__getattr__, __dir__) para asignar en el paquete
+    """
+    def __getattr__(nombre: str) -> Any:
+        if nombre not in exportaciones:
+            raise AttributeError(f"module {paquete!r} has no attribute {nombre!r}")
+        valor = getattr(importlib.import_module(exportaciones[nombre]), nombre)
+        # Cachear en el paquete para no volver a pasar por aquí
+        setattr(importlib.import_module(paquete), nombre, valor)
+        return valor
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(paquete))) | set(exportaciones))
+
+    return __getattr__, __dir__
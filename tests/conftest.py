@@ -0,0 +1,47 @@
+"""
+Configuración común de las pruebas unitarias.
+
+Los módulos de la app se importan como en main.py (src/ en sys.path).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+class LoggerMemoria:
+    """Logger con la interfaz de AdvancedLogger que guarda los mensajes en memoria (no escribe en logs/)"""
+
+    def __init__(self):
+        self.mensajes = []
+
+    def _registrar(self, nivel, modulo, mensaje, *args, **kwargs):
+        self.mensajes.append((nivel, modulo, mensaje))
+
+    def debug(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('DEBUG', modulo, mensaje)
+
+    def info(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('INFO', modulo, mensaje)
+
+    def success(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('SUCCESS', modulo, mensaje)
+
+    def warning(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('WARNING', modulo, mensaje)
+
+    def error(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('ERROR', modulo, mensaje)
+
+    def critical(self, modulo, mensaje, *args, **kwargs):
+        self._registrar('CRITICAL', modulo, mensaje)
+
+    def niveles(self, nivel):
+        return [mensaje for n, _, mensaje in self.mensajes if n == nivel]
+
+
+@pytest.fixture
+def logger():
+    return LoggerMemoria()
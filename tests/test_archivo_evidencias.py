@@ -0,0 +1,109 @@
+"""Retención de evidencias de error por cantidad, tamaño total y antigüedad"""
+import gzip
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.autorizar_anexo3.playwright.archivo_evidencias import ArchivoEvidencias
+
+
+class PaginaFalsa:
+    def screenshot(self, **opciones):
+        self.opciones = opciones
+        return b'\xff\xd8jpeg'
+
+    def content(self):
+        return '<html>formulario</html>'
+
+
+@pytest.fixture
+def crear(tmp_path, logger):
+    creados = []
+
+    def crear(**limites):
+        evidencias = ArchivoEvidencias(tmp_path, logger=logger, **limites)
+        evidencias.detener()  # Las pruebas guardan y aplican la retención en este hilo
+        creados.append(evidencias)
+        return evidencias
+
+    yield crear
+    for evidencias in creados:
+        evidencias._conexion.close()
+
+
+def _guardar(evidencias, id_item, imagen=b'x' * 10, dias=0, dom=''):
+    fecha = datetime.now() - timedelta(days=dias)
+    evidencias._guardar({
+        'fecha': fecha.strftime('%Y-%m-%d %H:%M:%S'), 'id_item': str(id_item), 'motivo': 'timeout',
+        'nombre': f'error_{id_item}', 'imagen': imagen, 'dom': dom
+    })
+
+
+def _guardadas(evidencias):
+    return [fila[0] for fila in evidencias._conexion.execute('SELECT id_item FROM capturas ORDER BY id')]
+
+
+def test_capturar_guarda_jpeg_dom_e_indice(tmp_path, logger):
+    evidencias = ArchivoEvidencias(tmp_path, calidad_jpeg=40, logger=logger)
+    pagina = PaginaFalsa()
+
+    ruta = evidencias.capturar(pagina, 409921, 'Timeout Guardar')
+    evidencias.detener()
+
+    assert pagina.opciones == {'type': 'jpeg', 'quality': 40, 'full_page': False}
+    assert open(ruta, 'rb').read() == b'\xff\xd8jpeg'
+    captura, = evidencias.capturas(409921)
+    assert captura['motivo'] == 'Timeout Guardar'
+    with gzip.open(tmp_path / captura['dom'], 'rt', encoding='utf-8') as f:
+        assert f.read() == '<html>formulario</html>'
+
+
+def test_retencion_por_cantidad(tmp_path, crear):
+    evidencias = crear(max_capturas=2, max_mb=0, max_dias=0)
+    for id_item in (1, 2, 3):
+        _guardar(evidencias, id_item)
+
+    evidencias.aplicar_retencion()
+
+    assert _guardadas(evidencias) == ['2', '3']
+    assert not (tmp_path / 'error_1.jpg').exists()
+    assert (tmp_path / 'error_3.jpg').exists()
+
+
+def test_retencion_por_tamano(tmp_path, crear):
+    evidencias = crear(max_capturas=0, max_mb=1, max_dias=0)
+    for id_item in (1, 2, 3):
+        _guardar(evidencias, id_item, imagen=b'x' * 400 * 1024, dom='<html>' * 10)
+
+    evidencias.aplicar_retencion()
+
+    assert _guardadas(evidencias) == ['2', '3']
+    assert not (tmp_path / 'error_1.html.gz').exists()
+
+
+def test_retencion_por_antiguedad(tmp_path, crear):
+    evidencias = crear(max_capturas=0, max_mb=0, max_dias=30)
+    _guardar(evidencias, 1, dias=40)
+    _guardar(evidencias, 2, dias=1)
+    png_viejo, png_nuevo = tmp_path / 'viejo.png', tmp_path / 'nuevo.png'
+    for png in (png_viejo, png_nuevo):
+        png.write_bytes(b'png')
+    hace_40_dias = time.time() - 40 * 86400
+    os.utime(png_viejo, (hace_40_dias, hace_40_dias))
+
+    evidencias.aplicar_retencion()
+
+    assert _guardadas(evidencias) == ['2']
+    assert not png_viejo.exists()
+    assert png_nuevo.exists()
+
+
+def test_sin_limites_no_borra(crear):
+    evidencias = crear(max_capturas=0, max_mb=0, max_dias=0)
+    _guardar(evidencias, 1, dias=400)
+
+    evidencias.aplicar_retencion()
+
+    assert _guardadas(evidencias) == ['1']
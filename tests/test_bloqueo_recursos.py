@@ -0,0 +1,49 @@
+"""Filtro de recursos: una descarga fallida para la caché no deja la petición colgada"""
+import types
+
+from modules.autorizar_anexo3.playwright.bloqueo_recursos import BloqueadorRecursos
+
+
+class RutaFalsa:
+    def __init__(self, url, tipo='script', error=None):
+        self.request = types.SimpleNamespace(url=url, resource_type=tipo, method='GET', headers={})
+        self.error = error
+        self.acciones = []
+
+    def fetch(self, **opciones):
+        self.acciones.append('fetch')
+        raise self.error
+
+    def continue_(self):
+        if self.acciones[-1:] == ['continue']:
+            raise RuntimeError('Route is already handled!')
+        self.acciones.append('continue')
+
+    def fulfill(self, **respuesta):
+        self.acciones.append('fulfill')
+
+    def abort(self, motivo=''):
+        self.acciones.append('abort')
+
+
+def test_fetch_fallido_continua_la_peticion(logger):
+    bloqueador = BloqueadorRecursos(logger=logger)
+    ruta = RutaFalsa(
+        'https://portalsalud.coosalud.com/static/js/main.3f2a9c1b.js',
+        error=RuntimeError('net::ERR_CONNECTION_RESET')
+    )
+
+    bloqueador._manejar(ruta)
+
+    assert ruta.acciones == ['fetch', 'continue']
+    assert any('ERR_CONNECTION_RESET' in mensaje for mensaje in logger.niveles('DEBUG'))
+
+
+def test_bloqueo_por_tipo_sin_descargar(logger):
+    bloqueador = BloqueadorRecursos(logger=logger, tipos_bloqueados=['image'])
+    ruta = RutaFalsa('https://portalsalud.coosalud.com/logo.png', tipo='image')
+
+    bloqueador._manejar(ruta)
+
+    assert ruta.acciones == ['abort']
+    assert bloqueador.tomar_estadisticas()['bloqueadas_por_tipo'] == {'image': 1}
@@ -0,0 +1,51 @@
+"""Diario de casos: casos abiertos tras una caída y compactación de los cerrados"""
+import pytest
+
+from modules.autorizar_anexo3.services.diario_casos import DiarioCasos
+
+
+@pytest.fixture
+def diario(tmp_path, logger):
+    return DiarioCasos('w1', tmp_path / 'diario_casos.db', logger=logger)
+
+
+def test_casos_abiertos_segun_la_ultima_fase(diario):
+    diario.registrar(1, DiarioCasos.RECLAMADA)
+    diario.registrar(2, DiarioCasos.RECLAMADA)
+    diario.registrar(2, DiarioCasos.ENVIADA)
+    diario.registrar(3, DiarioCasos.RECLAMADA)
+    diario.registrar(3, DiarioCasos.LIBERADA)
+    diario.registrar(4, DiarioCasos.RECLAMADA)
+    diario.registrar(4, DiarioCasos.RESULTADO, resultado='COMPLETADO', numero='17501845')
+    diario.registrar(4, DiarioCasos.REPORTADA)
+    diario.registrar(5, DiarioCasos.RESULTADO, resultado='COMPLETADO', numero='17501846')
+
+    abiertos = diario.casos_abiertos()
+
+    assert [(c['id_item'], c['fase']) for c in abiertos] == [('1', 'RECLAMADA'), ('2', 'ENVIADA'), ('5', 'RESULTADO')]
+    assert abiertos[2]['detalle'] == {'resultado': 'COMPLETADO', 'numero': '17501846'}
+    assert abiertos[0]['worker_id'] == 'w1'
+
+
+def test_los_casos_abiertos_sobreviven_al_reabrir(tmp_path, logger):
+    DiarioCasos('w1', tmp_path / 'diario_casos.db', logger=logger).registrar(7, DiarioCasos.ENVIADA)
+
+    abiertos = DiarioCasos('w2', tmp_path / 'diario_casos.db', logger=logger).casos_abiertos()
+
+    assert [(c['id_item'], c['worker_id']) for c in abiertos] == [('7', 'w1')]
+
+
+def test_compactar_borra_solo_los_cerrados(diario):
+    diario.registrar(1, DiarioCasos.RECLAMADA)
+    diario.registrar(1, DiarioCasos.REPORTADA)
+    diario.registrar(2, DiarioCasos.RECLAMADA)
+    diario.registrar(2, DiarioCasos.ENVIADA)
+    diario.registrar(3, DiarioCasos.LIBERADA)
+    # Reclamada de nuevo después de liberada: vuelve a estar abierta
+    diario.registrar(3, DiarioCasos.RECLAMADA)
+
+    diario.compactar()
+
+    filas = diario._conexion.execute('SELECT id_item, fase FROM eventos ORDER BY id').fetchall()
+    assert filas == [('2', 'RECLAMADA'), ('2', 'ENVIADA'), ('3', 'LIBERADA'), ('3', 'RECLAMADA')]
+    assert [c['id_item'] for c in diario.casos_abiertos()] == ['2', '3']
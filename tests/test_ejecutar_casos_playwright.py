@@ -0,0 +1,165 @@
+"""
+Cierre de un caso ya radicado: ningún fallo posterior al modal Correcto
+puede devolverlo a error (el worker lo reintentaría y radicaría dos veces).
+Opciones de los dropdowns: un valor ausente no se reintenta, tampoco dentro de un lote.
+"""
+import types
+
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTimeout
+
+from modules.autorizar_anexo3.playwright import ejecutar_casos_playwright as modulo
+from modules.autorizar_anexo3.playwright.ejecutar_casos_lote import EjecutarCasosLote
+from modules.autorizar_anexo3.playwright.ejecutar_casos_playwright import (
+    EjecutarCasosPlaywright, SessionLostException
+)
+from modules.autorizar_anexo3.playwright.errores_caso import (
+    ElementoNoEncontradoError, OpcionNoEncontradaError, clasificar_error
+)
+
+
+class ElementoFalso:
+    def __init__(self, texto=''):
+        self.texto = texto
+        self.clics = 0
+
+    def is_visible(self):
+        return True
+
+    def text_content(self):
+        return self.texto
+
+    def click(self, **kwargs):
+        self.clics += 1
+
+
+class PaginaCorrecto:
+    """Página que muestra el modal 'Correcto' del portal tras el Guardar"""
+
+    url = 'https://portalsalud.coosalud.com/ambulatoria'
+
+    def __init__(self, texto='Correcto Caso # 17501845'):
+        self.titulo = ElementoFalso(texto)
+        self.boton_ok = ElementoFalso()
+
+    def on(self, evento, callback):
+        pass
+
+    def query_selector(self, selector):
+        return self.titulo if 'Correcto' in selector else None
+
+    def wait_for_selector(self, selector, timeout=None):
+        return self.boton_ok
+
+    def evaluate(self, script, *args):
+        return 'none'
+
+
+@pytest.fixture(autouse=True)
+def sin_esperas(monkeypatch):
+    monkeypatch.setattr(modulo.time, 'sleep', lambda segundos: None)
+
+
+def _preparar(ejecutor, estados):
+    ejecutor._registrar_resultado = lambda *args, **kwargs: None
+    ejecutor.actualizar = lambda data, estado, numero='': estados.append((estado, numero))
+
+    def reinicio_fallido():
+        raise SessionLostException('Sesión perdida durante reinicio')
+
+    ejecutor.reinicio = reinicio_fallido
+
+
+def _data():
+    return types.SimpleNamespace(idItemOrden=409921, identificacion='39273830', cups='890201')
+
+
+def test_reinicio_fallido_tras_correcto_mantiene_el_exito(logger):
+    ejecutor = EjecutarCasosPlaywright(PaginaCorrecto(), logger)
+    estados = []
+    _preparar(ejecutor, estados)
+
+    assert ejecutor._procesar_respuesta_guardar(_data(), modulo.time.time()) is True
+    assert estados == [('3', '17501845')]
+    assert any('ya radicado' in mensaje for mensaje in logger.niveles('WARNING'))
+
+
+def test_reinicio_fallido_tras_correcto_en_lote(logger, monkeypatch):
+    ejecutor = EjecutarCasosLote(PaginaCorrecto(), logger)
+    ejecutor.preparar_lote([{'idItemOrden': 1, 'cups': '890201'}, {'idItemOrden': 2, 'cups': '890301'}])
+    reportados = []
+    monkeypatch.setattr(
+        EjecutarCasosPlaywright, 'actualizar',
+        lambda self, data, estado, numero='': reportados.append((data.idItemOrden, estado, numero))
+    )
+    ejecutor._registrar_resultado = lambda *args, **kwargs: None
+
+    def reinicio_fallido():
+        raise SessionLostException('Sesión perdida durante reinicio')
+
+    ejecutor.reinicio = reinicio_fallido
+
+    assert ejecutor._procesar_respuesta_guardar(_data(), modulo.time.time()) is True
+    assert reportados == [(1, '3', '17501845'), (2, '3', '17501845')]
+
+
+def test_fallo_reportando_no_impide_reiniciar(logger):
+    ejecutor = EjecutarCasosPlaywright(PaginaCorrecto(), logger)
+    pasos = []
+
+    def reportar():
+        raise ConnectionError('API caída')
+
+    ejecutor.reinicio = lambda: pasos.append('reinicio')
+    ejecutor.alerta = lambda: pasos.append('alerta')
+
+    ejecutor._finalizar_radicado(_data(), reportar)
+
+    assert pasos == ['reinicio', 'alerta']
+    assert ejecutor.page.boton_ok.clics == 1
+
+
+class PaginaSinOpcion(PaginaCorrecto):
+    """La opción buscada nunca aparece en el dropdown"""
+
+    def wait_for_selector(self, selector, timeout=None):
+        raise PlaywrightTimeout(f'Timeout {timeout}ms exceeded')
+
+
+def test_opcion_ausente_no_es_reintentable(logger):
+    ejecutor = EjecutarCasosPlaywright(PaginaSinOpcion(), logger)
+    ejecutor.helper.esperar_filtro_dropdown = lambda texto, timeout=3000: 'vacio'
+
+    with pytest.raises(OpcionNoEncontradaError) as error:
+        ejecutor._esperar_opcion('Diagnóstico', 'Z000', "//div[contains(.,'Z000')]")
+    assert error.value.estado == 14
+    assert not error.value.reintentable
+
+
+def test_opcion_sin_render_sigue_siendo_timeout(logger):
+    ejecutor = EjecutarCasosPlaywright(PaginaSinOpcion(), logger)
+    ejecutor.helper.esperar_filtro_dropdown = lambda texto, timeout=3000: None
+
+    with pytest.raises(PlaywrightTimeout) as error:
+        ejecutor._esperar_opcion('Diagnóstico', 'Z000', "//div[contains(.,'Z000')]")
+    assert clasificar_error(error.value).reintentable
+
+
+def test_cups_no_enviado_en_lote_conserva_su_error(logger):
+    ejecutor = EjecutarCasosLote(PaginaCorrecto(), logger)
+    ejecutor.preparar_lote([
+        {'idItemOrden': 1, 'cups': '890201'}, {'idItemOrden': 2, 'cups': '890301'}, {'idItemOrden': 3, 'cups': '890401'}
+    ])
+    ejecutor.resultados_cups = [
+        {'cups': '890201', 'ok': True, 'detalle': '', 'opcion_ausente': False},
+        {'cups': '890301', 'ok': False, 'detalle': 'sin coincidencia en la lista', 'opcion_ausente': True},
+        {'cups': '890401', 'ok': False, 'detalle': 'timeout del dropdown', 'opcion_ausente': False},
+    ]
+
+    ausente, no_ingresado = ejecutor.error_no_enviado(2), ejecutor.error_no_enviado(3)
+
+    assert ejecutor.error_no_enviado(1) is None
+    assert isinstance(ausente, OpcionNoEncontradaError) and not ausente.reintentable
+    assert 'sin coincidencia en la lista' in ausente.mensaje
+    assert type(no_ingresado) is ElementoNoEncontradoError and no_ingresado.reintentable
+    assert 'timeout del dropdown' in no_ingresado.mensaje
@@ -0,0 +1,51 @@
+"""Clasificación de excepciones en ErrorCaso (estadoCaso y política de reintento)"""
+import pytest
+import requests
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+
+from modules.autorizar_anexo3.playwright.errores_caso import (
+    ConexionPortalError, ElementoNoEncontradoError, ElementoObsoletoError, ErrorCaso, OpcionNoEncontradaError,
+    PdfFaltanteError, PermisosError, SesionPerdidaError, TimeoutPortalError, clasificar_error
+)
+
+
+@pytest.mark.parametrize('excepcion, tipo', [
+    (PlaywrightTimeout('Timeout 30000ms exceeded.'), TimeoutPortalError),
+    (PlaywrightError('Target page, context or browser has been closed'), SesionPerdidaError),
+    (PlaywrightError('Element is not attached to the DOM'), ElementoObsoletoError),
+    (PlaywrightError('net::ERR_CONNECTION_RESET at https://portalsalud.coosalud.com'), ConexionPortalError),
+    (PlaywrightError('Unexpected token'), ErrorCaso),
+    (requests.Timeout('read timeout'), TimeoutPortalError),
+    (requests.ConnectionError('refused'), ConexionPortalError),
+    (ConnectionResetError('reset'), ConexionPortalError),
+    (PermissionError('denegado'), PermisosError),
+    (FileNotFoundError('orden.pdf'), PdfFaltanteError),
+    (ValueError('otro'), ErrorCaso),
+])
+def test_clasificar_excepciones(excepcion, tipo):
+    error = clasificar_error(excepcion)
+
+    assert type(error) is tipo
+    assert error.causa is excepcion
+    assert error.mensaje == str(excepcion)
+
+
+def test_un_error_de_caso_se_conserva():
+    error = OpcionNoEncontradaError('Diagnóstico Z000 no está en la lista')
+
+    assert clasificar_error(error) is error
+
+
+def test_opcion_no_encontrada_no_se_reintenta():
+    error = OpcionNoEncontradaError()
+
+    assert error.estado == ElementoNoEncontradoError.estado == 14
+    assert ElementoNoEncontradoError.reintentable
+    assert not error.reintentable
+    assert error.mensaje == OpcionNoEncontradaError.etiqueta
+
+
+def test_politica_de_reintento_por_tipo():
+    assert ErrorCaso.estado == 11 and not ErrorCaso.reintentable
+    assert SesionPerdidaError.reintentable and TimeoutPortalError.reintentable and ConexionPortalError.reintentable
+    assert not PermisosError.reintentable and not PdfFaltanteError.reintentable
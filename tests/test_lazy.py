@@ -0,0 +1,50 @@
+"""Exportaciones perezosas de paquetes (PEP 562)"""
+import json
+import sys
+
+import pytest
+
+from utils.lazy import importar_ruta
+
+
+@pytest.fixture
+def paquete(tmp_path, monkeypatch):
+    raiz = tmp_path / 'paquete_perezoso'
+    raiz.mkdir()
+    (raiz / '__init__.py').write_text(
+        'from utils.lazy import exportar_perezoso\n'
+        "__all__ = ['Pesado']\n"
+        "__getattr__, __dir__ = exportar_perezoso(__name__, {'Pesado': 'paquete_perezoso.pesado'})\n",
+        encoding='utf-8'
+    )
+    (raiz / 'pesado.py').write_text('class Pesado:\n    pass\n', encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for nombre in ('paquete_perezoso', 'paquete_perezoso.pesado'):
+        sys.modules.pop(nombre, None)
+
+
+def test_el_modulo_se_importa_al_primer_uso(paquete):
+    import paquete_perezoso
+
+    assert 'paquete_perezoso.pesado' not in sys.modules
+    assert 'Pesado' in dir(paquete_perezoso)
+
+    pesado = paquete_perezoso.Pesado
+
+    assert pesado is sys.modules['paquete_perezoso.pesado'].Pesado
+    assert vars(paquete_perezoso)['Pesado'] is pesado  # Cacheado en el paquete
+
+
+def test_from_import_y_nombre_desconocido(paquete):
+    from paquete_perezoso import Pesado
+    import paquete_perezoso
+
+    assert Pesado.__name__ == 'Pesado'
+    with pytest.raises(AttributeError, match='Inexistente'):
+        paquete_perezoso.Inexistente
+
+
+def test_importar_ruta():
+    assert importar_ruta('json:dumps') is json.dumps
+    assert importar_ruta('json') is json
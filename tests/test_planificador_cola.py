@@ -0,0 +1,83 @@
+"""Orden de la cola: primeros intentos, antigüedad y agrupación por paciente"""
+from services.planificador_cola import PlanificadorCola
+
+
+def _planificador(*politicas):
+    return PlanificadorCola(politicas, campo_fecha='fecha', campo_grupo='doc', campo_intentos='intentos')
+
+
+def _ids(items):
+    return [item['id'] for item in items]
+
+
+def test_primeros_intentos_antes_que_reintentos():
+    items = [
+        {'id': 1, 'intentos': 1},
+        {'id': 2, 'intentos': 0},
+        {'id': 3},
+        {'id': 4, 'intentos': 2},
+    ]
+
+    assert _ids(_planificador('primeros_intentos').planificar(items)) == [2, 3, 1, 4]
+
+
+def test_antiguedad_con_formatos_de_la_api_y_sin_fecha_al_final():
+    items = [
+        {'id': 1, 'fecha': '2026-02-03 08:00:00'},
+        {'id': 2},
+        {'id': 3, 'fecha': 'Mon, 02 Feb 2026 16:48:15 GMT'},
+        {'id': 4, 'fecha': '01/02/2026'},
+    ]
+
+    assert _ids(_planificador('antiguedad').planificar(items)) == [4, 3, 1, 2]
+
+
+def test_prioridad_segun_el_orden_de_las_politicas():
+    items = [
+        {'id': 1, 'fecha': '2026-01-01', 'intentos': 1},
+        {'id': 2, 'fecha': '2026-02-01', 'intentos': 0},
+    ]
+
+    assert _ids(_planificador('primeros_intentos', 'antiguedad').planificar(items)) == [2, 1]
+    assert _ids(_planificador('antiguedad', 'primeros_intentos').planificar(items)) == [1, 2]
+
+
+def test_agrupar_paciente_en_la_posicion_de_su_mejor_orden():
+    items = [
+        {'id': 1, 'doc': 'A', 'fecha': '2026-01-01'},
+        {'id': 2, 'doc': 'B', 'fecha': '2026-01-02'},
+        {'id': 3, 'doc': 'A', 'fecha': '2026-01-05'},
+        {'id': 4, 'doc': '', 'fecha': '2026-01-03'},
+        {'id': 5, 'fecha': '2026-01-04'},
+    ]
+
+    ordenados = _planificador('antiguedad', 'agrupar_paciente').planificar(items)
+
+    assert _ids(ordenados) == [1, 3, 2, 4, 5]
+
+
+def test_grupo_actual_pasa_al_frente():
+    items = [{'id': 1, 'doc': 'A'}, {'id': 2, 'doc': 'B'}, {'id': 3, 'doc': 'B'}]
+
+    assert _ids(_planificador('agrupar_paciente').planificar(items, grupo_actual='B')) == [2, 3, 1]
+
+
+def test_sin_politicas_respeta_el_orden_del_backend():
+    items = [{'id': 3, 'intentos': 1}, {'id': 1}, {'id': 2}]
+
+    assert _ids(_planificador('desconocida').planificar(items)) == [3, 1, 2]
+
+
+def test_metricas_de_la_cola():
+    items = [
+        {'id': 1, 'doc': 'A', 'intentos': 1, 'fecha': '2020-01-01'},
+        {'id': 2, 'doc': 'A'},
+        {'id': 3, 'doc': 'B'},
+    ]
+
+    metricas = _planificador('antiguedad').metricas(items)
+
+    assert (metricas['profundidad'], metricas['primeros_intentos'], metricas['reintentos']) == (3, 2, 1)
+    assert metricas['pacientes'] == 2
+    assert metricas['edad_max_seg'] == metricas['edad_prom_seg'] > 0
+    assert PlanificadorCola.resumen(metricas).startswith('3 en cola (1 reintentos) | más antigua: ')
@@ -0,0 +1,55 @@
+"""
+Liberación de órdenes: sin endpoints de lease la orden se devuelve a
+PENDIENTE con la actualización normal (no basta con el no-op del lease).
+Reintentos: la espera (reintentar_despues) viaja con la orden a la API.
+"""
+import types
+
+from modules.autorizar_anexo3.services import programacion_service as modulo
+from modules.autorizar_anexo3.services.programacion_service import ProgramacionService
+
+
+def _api(monkeypatch, logger, respuestas):
+    llamadas = []
+
+    def put(url, json=None, timeout=None):
+        llamadas.append((url, json))
+        return types.SimpleNamespace(status_code=respuestas.pop(0), json=lambda: {}, text='')
+
+    monkeypatch.setattr(modulo.requests, 'put', put)
+    return ProgramacionService('http://api', logger=logger), llamadas
+
+
+def test_liberar_con_leases_usa_el_endpoint(monkeypatch, logger):
+    api, llamadas = _api(monkeypatch, logger, [200])
+
+    assert api.liberar_orden(7, 'w1') is True
+    assert llamadas == [('http://api/programacion-ordenes/item/7/liberar', {'worker_id': 'w1'})]
+
+
+def test_liberar_sin_leases_vuelve_a_pendiente(monkeypatch, logger):
+    api, llamadas = _api(monkeypatch, logger, [404, 200])
+
+    assert api.liberar_orden(7, 'w1') is True
+    assert not api.leases_soportados
+    assert llamadas[1] == ('http://api/programacion-ordenes/item/7', {'estado': 'PENDIENTE', 'worker_id': 'w1'})
+
+
+def test_liberar_sin_leases_reporta_fallo_de_la_api(monkeypatch, logger):
+    api, llamadas = _api(monkeypatch, logger, [500])
+    api.leases_soportados = False
+
+    assert api.liberar_orden(7, 'w1') is False
+    assert [url for url, _ in llamadas] == ['http://api/programacion-ordenes/item/7']
+
+
+def test_reintento_envia_not_before(monkeypatch, logger):
+    api, llamadas = _api(monkeypatch, logger, [200])
+
+    assert api.actualizar_estado_programacion(
+        7, 'PENDIENTE', incrementar_intentos=True, worker_id='w1', reintentar_despues='2026-02-02T02:41:00Z'
+    )
+    assert llamadas[0][1] == {
+        'estado': 'PENDIENTE', 'incrementar_intentos': True, 'worker_id': 'w1',
+        'reintentar_despues': '2026-02-02T02:41:00Z'
+    }
@@ -0,0 +1,116 @@
+"""Backoff de reintentos: exponencial por intento, jitter acotado y factor por degradación"""
+import pytest
+
+from modules.autorizar_anexo3.playwright.errores_caso import ConexionPortalError, TimeoutPortalError
+from modules.autorizar_anexo3.services import programador_reintentos as modulo
+from modules.autorizar_anexo3.services.programador_reintentos import ProgramadorReintentos
+
+
+@pytest.fixture
+def sin_jitter(monkeypatch):
+    monkeypatch.setattr(modulo.random, 'uniform', lambda a, b: 1.0)
+
+
+def test_backoff_exponencial_por_intento(sin_jitter):
+    programador = ProgramadorReintentos(espera_max_seg=10000)
+    base = TimeoutPortalError.espera_reintento
+
+    assert programador.programar(1, TimeoutPortalError(), 1) == base
+    assert programador.programar(2, TimeoutPortalError(), 2) == base * 2
+    assert programador.programar(3, TimeoutPortalError(), 3) == base * 4
+
+
+def test_espera_con_tope(sin_jitter):
+    programador = ProgramadorReintentos(espera_max_seg=100)
+
+    assert programador.programar(1, ConexionPortalError(), 5) == 100
+
+
+def test_jitter_dentro_de_los_limites():
+    programador = ProgramadorReintentos(espera_max_seg=10000)
+    base = TimeoutPortalError.espera_reintento
+    j = ProgramadorReintentos.JITTER
+
+    for id_item in range(ProgramadorReintentos.FALLOS_POR_NIVEL - 1):
+        espera = programador.programar(id_item, TimeoutPortalError(), 1)
+        assert base * (1 - j) <= espera <= base * (1 + j)
+
+
+def test_factor_de_degradacion_por_fallos_recientes(sin_jitter):
+    programador = ProgramadorReintentos(espera_max_seg=10000)
+    por_nivel = ProgramadorReintentos.FALLOS_POR_NIVEL
+
+    assert programador.factor_degradacion() == 1
+    for id_item in range(por_nivel - 1):
+        programador.programar(id_item, TimeoutPortalError(), 1)
+    # El fallo que completa el nivel ya espera el doble
+    assert programador.programar(99, TimeoutPortalError(), 1) == TimeoutPortalError.espera_reintento * 2
+    for id_item in range(100, 100 + por_nivel * 3):
+        programador.programar(id_item, TimeoutPortalError(), 1)
+    assert programador.factor_degradacion() == 2 ** ProgramadorReintentos.NIVEL_MAX_DEGRADACION
+
+
+def test_fallos_fuera_de_la_ventana_no_degradan(monkeypatch, sin_jitter):
+    reloj = [1000.0]
+    monkeypatch.setattr(modulo.time, 'time', lambda: reloj[0])
+    programador = ProgramadorReintentos()
+    for id_item in range(ProgramadorReintentos.FALLOS_POR_NIVEL):
+        programador.programar(id_item, TimeoutPortalError(), 1)
+    assert programador.factor_degradacion() == 2
+
+    reloj[0] += ProgramadorReintentos.VENTANA_DEGRADACION + 1
+    programador.filtrar_listas([])
+    assert programador.factor_degradacion() == 1
+
+
+def test_filtrar_listas_difiere_hasta_vencer(monkeypatch, sin_jitter):
+    reloj = [1000.0]
+    monkeypatch.setattr(modulo.time, 'time', lambda: reloj[0])
+    programador = ProgramadorReintentos()
+    pendientes = [{'id_item_orden_proced': 1}, {'id_item_orden_proced': 2}]
+    programador.programar(1, TimeoutPortalError(), 1)
+
+    assert programador.filtrar_listas(pendientes) == ([pendientes[1]], 1)
+    assert programador.proximo_reintento() == TimeoutPortalError.espera_reintento
+
+    reloj[0] += TimeoutPortalError.espera_reintento
+    assert programador.filtrar_listas(pendientes) == (pendientes, 0)
+
+
+def test_filtrar_listas_olvida_las_que_ya_no_estan_pendientes(sin_jitter):
+    programador = ProgramadorReintentos()
+    programador.programar(1, TimeoutPortalError(), 1)
+
+    programador.filtrar_listas([])  # Lista vacía: posible fallo de la API, no se purga
+    assert programador.proximo_reintento() is not None
+    programador.filtrar_listas([{'id_item_orden_proced': 2}])
+    assert programador.proximo_reintento() is None
+
+
+def test_not_before_de_la_api_difiere_la_orden(monkeypatch):
+    reloj = [1_770_000_000.0]  # 2026-02-02 02:40:00 UTC
+    monkeypatch.setattr(modulo.time, 'time', lambda: reloj[0])
+    programador = ProgramadorReintentos()
+    pendientes = [
+        {'id_item_orden_proced': 1, 'reintentar_despues': 'Mon, 02 Feb 2026 02:45:00 GMT'},
+        {'id_item_orden_proced': 2, 'reintentar_despues': '2026-02-02T02:30:00Z'},  # Ya venció
+        {'id_item_orden_proced': 3, 'reintentar_despues': '2026-02-02 02:42:00'},  # Sin zona: UTC
+    ]
+
+    assert programador.filtrar_listas(pendientes) == ([pendientes[1]], 2)
+    assert programador.proximo_reintento() == 120
+
+    reloj[0] += 300
+    assert programador.filtrar_listas(pendientes) == (pendientes, 0)
+
+
+def test_not_before_para_la_api_en_utc(monkeypatch, sin_jitter):
+    monkeypatch.setattr(modulo.time, 'time', lambda: 1_770_000_000.0)
+    programador = ProgramadorReintentos()
+    programador.programar(1, TimeoutPortalError(), 1)
+
+    assert programador.not_before_api(1) == '2026-02-02T02:41:00Z'
+    assert programador.not_before_api(2) is None
+    # Otro worker que lee la orden con ese campo espera lo mismo
+    otro = ProgramadorReintentos()
+    assert otro.filtrar_listas([{'id_item_orden_proced': 1, 'reintentar_despues': '2026-02-02T02:41:00Z'}])[1] == 1
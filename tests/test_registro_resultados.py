@@ -0,0 +1,77 @@
+"""Pruebas del registro local de resultados (índice de radicados y archivo.txt heredado)"""
+import pytest
+
+from services.registro_resultados import RegistroResultados
+
+
+@pytest.fixture
+def registro(tmp_path, monkeypatch):
+    # Sin importar el archivo.txt real del proyecto al abrir el registro
+    monkeypatch.setattr(RegistroResultados, '_importar_archivos_heredados', lambda self: None)
+    return RegistroResultados(tmp_path / 'resultados.db')
+
+
+@pytest.fixture
+def archivo_txt(tmp_path):
+    ruta = tmp_path / 'archivo.txt'
+    ruta.write_text(
+        'caso,Correcto Caso # 17501845,paciente,39273830,ordenCapita,409921\n'
+        'caso,servicio 881301 con el número de radicado #16892639,paciente,1143135147,ordenCapita,399795\n'
+        'combo ips atiende  ,no se encontro,52000111,ordenCapita,400001\n',
+        encoding='utf-8'
+    )
+    return ruta
+
+
+def test_heredado_sin_cups_se_completa_al_consultar_la_orden(registro, archivo_txt):
+    registro.importar_archivo_txt(archivo_txt)
+
+    previo = registro.radicado_previo('39273830', '890201', 'Mon, 02 Feb 2026 16:48:15 GMT', id_item_orden=409921)
+
+    assert previo['radicado'] == '17501845'
+    assert (previo['cups'], previo['fecha_orden']) == ('890201', '2026-02-02')
+
+
+def test_heredado_de_otra_orden_no_se_completa(registro, archivo_txt):
+    registro.importar_archivo_txt(archivo_txt)
+
+    assert registro.radicado_previo('39273830', '890201', '2026-02-02', id_item_orden=409999) is None
+    assert registro.radicado_previo('39273830', '890201', '2026-02-02') is None
+
+
+def test_completar_heredados_respeta_el_cups_del_detalle(registro, archivo_txt):
+    registro.importar_archivo_txt(archivo_txt)
+
+    assert registro.completar_heredados('1143135147', '399795', '890201', '2026-02-02') == 1
+    assert registro.radicado_previo('1143135147', '890201', '2026-02-02') is None
+    assert registro.radicado_previo('1143135147', '881301', '2026-02-02')['radicado'] == '16892639'
+
+
+def test_radicado_previo_por_documento_cups_y_fecha(registro):
+    registro.registrar(
+        RegistroResultados.EXITO, '39273830', 409921, 'Correcto Caso # 17501845',
+        cups='890201', fecha_orden='2026-02-02T16:48:15Z', fecha='2026-02-02 17:00:00'
+    )
+    registro.registrar(
+        RegistroResultados.EXITO, '39273830', 409921, 'Correcto Caso # 17501900',
+        cups='890201', fecha_orden='02/02/2026', fecha='2026-02-03 09:00:00'
+    )
+    registro.registrar(RegistroResultados.RECHAZO, '39273830', 409922, 'Error: ya existe', cups='890202', fecha_orden='2026-02-02')
+
+    previo = registro.radicado_previo(' 39273830 ', '890201', 'Mon, 02 Feb 2026 16:48:15 GMT')
+
+    assert (previo['radicado'], previo['id_item_orden']) == ('17501900', '409921')
+    assert registro.radicado_previo('39273830', '890201', '2026-02-03') is None
+    assert registro.radicado_previo('39273830', '890202', '2026-02-02') is None  # Rechazo: sin radicado
+    assert registro.radicado_previo('39273830', '', '2026-02-02') is None
+
+
+def test_importar_archivo_txt_una_sola_vez(registro, archivo_txt):
+    assert registro.importar_archivo_txt(archivo_txt) == 3
+    assert registro.importar_archivo_txt(archivo_txt) == 0
+
+    filas = {fila['id_item_orden']: fila for fila in registro.buscar()}
+    assert (filas['409921']['tipo'], filas['409921']['radicado']) == (RegistroResultados.EXITO, '17501845')
+    assert (filas['399795']['tipo'], filas['399795']['radicado']) == (RegistroResultados.RECHAZO, '16892639')
+    assert (filas['400001']['tipo'], filas['400001']['documento']) == (RegistroResultados.IPS_NO_ENCONTRADA, '52000111')
+    assert registro.buscar('16892639')[0]['documento'] == '1143135147'
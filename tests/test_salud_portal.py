@@ -0,0 +1,78 @@
+"""Salud del portal: NORMAL -> DEGRADADO -> sonda -> NORMAL"""
+import pytest
+
+from modules.autorizar_anexo3.services import salud_portal as modulo
+from modules.autorizar_anexo3.services.salud_portal import SaludPortal
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = [1000.0]
+    monkeypatch.setattr(modulo.time, 'time', lambda: reloj[0])
+    return reloj
+
+
+@pytest.fixture
+def salud(logger, reloj):
+    return SaludPortal(ventana=10, pausa_seg=120, logger=logger)
+
+
+def _degradar(salud):
+    for _ in range(SaludPortal.MIN_MUESTRAS):
+        salud.registrar_fallo('timeout')
+
+
+def test_sin_muestras_suficientes_sigue_normal(salud):
+    for _ in range(SaludPortal.MIN_MUESTRAS - 1):
+        salud.registrar_fallo('timeout')
+
+    assert salud.estado == SaludPortal.NORMAL
+    assert salud.factor_timeout() == 1.0
+    assert salud.limite_ordenes() is None
+
+
+def test_lento_escala_los_timeouts(salud):
+    for _ in range(SaludPortal.MIN_MUESTRAS):
+        salud.registrar('guardar', 30.0)  # x2 de la referencia
+
+    assert salud.estado == SaludPortal.LENTO
+    assert salud.factor_timeout() == 2.0
+    assert salud.segundos_pausa() == 0.0
+
+
+def test_degradado_pausa_y_sonda_correcta_vuelve_a_normal(salud, reloj, logger):
+    _degradar(salud)
+
+    assert salud.estado == SaludPortal.DEGRADADO
+    assert salud.segundos_pausa() == 120
+    assert salud.limite_ordenes() == 1
+
+    # Lo que termina durante la pausa no cuenta como sonda
+    salud.registrar('guardar', 5.0)
+    assert salud.estado == SaludPortal.DEGRADADO
+
+    reloj[0] += 121
+    assert salud.segundos_pausa() == 0.0
+    salud.registrar('guardar', 5.0)
+
+    assert salud.estado == SaludPortal.NORMAL
+    assert salud.factor_timeout() == 1.0
+    assert salud.limite_ordenes() is None
+    assert any('sonda correcta' in mensaje for mensaje in logger.niveles('SUCCESS'))
+
+
+def test_sonda_fallida_renueva_la_pausa(salud, reloj, logger):
+    _degradar(salud)
+    reloj[0] += 121
+
+    salud.registrar('guardar', 60.0, ok=False)
+
+    assert salud.estado == SaludPortal.DEGRADADO
+    assert salud.segundos_pausa() == 120
+    assert any('Sonda fallida' in mensaje for mensaje in logger.niveles('WARNING'))
+
+
+def test_resumen_para_la_ui(salud):
+    _degradar(salud)
+
+    assert SaludPortal.resumen(salud.metricas()) == '🔴 Degradado | timeouts x3.0 | reanuda en 120s'